@@ -0,0 +1,102 @@
+"""MarkdownParser のスケーリングベンチマーク
+
+見出し数を倍々に増やした生成ドキュメントをパースし、見出しあたりの処理時間を比較する。
+見出しあたりの時間がほぼ一定であれば、セクション構築・再分割が見出し数に対して線形であることを示す。
+
+使い方:
+    uv run python benchmarks/bench_parser.py
+    uv run python benchmarks/bench_parser.py --sizes 12500 25000 50000 100000 --check
+
+再分割（_refine_sections）の走査そのものを測るため、nlp モードでは閾値を大きくして
+形態素解析を伴うサブスプリットを発生させない。
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+from md2map.parsers.markdown_parser import MarkdownParser
+
+DEFAULT_SIZES = [12500, 25000, 50000, 100000]
+
+# 見出しレベルの繰り返しパターン（レベル飛ばしの警告を出さない並び）
+LEVEL_PATTERN = [1, 2, 3, 3, 2, 3, 4, 5, 4, 2]
+
+# 許容する見出しあたり時間の増加率（最小サイズ比）
+MAX_SCALING_RATIO = 2.0
+
+
+def generate_document(num_headings: int) -> str:
+    """指定した見出し数のマークダウンを生成する"""
+    parts: List[str] = []
+    for i in range(num_headings):
+        level = LEVEL_PATTERN[i % len(LEVEL_PATTERN)]
+        parts.append(f"{'#' * level} 見出し {i}\n\n")
+        parts.append(f"セクション {i} の本文です。**キーワード{i % 97}** を含みます。\n")
+        parts.append("This paragraph has some English words as well.\n\n")
+    return "".join(parts)
+
+
+def run_once(path: str, split_mode: str) -> Tuple[float, int]:
+    """1回パースして (経過秒数, セクション数) を返す"""
+    parser = MarkdownParser(split_mode=split_mode, split_threshold=10**9)
+    started = time.perf_counter()
+    sections, _ = parser.parse(path, max_depth=6)
+    return time.perf_counter() - started, len(sections)
+
+
+def main(argv: List[str] = None) -> int:
+    arg_parser = argparse.ArgumentParser(description="MarkdownParser scaling benchmark")
+    arg_parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    arg_parser.add_argument("--modes", nargs="+", default=["heading", "nlp", "tiling"])
+    arg_parser.add_argument(
+        "--repeat", type=int, default=3, help="各計測の繰り返し回数（最良値を採用）"
+    )
+    arg_parser.add_argument(
+        "--check", action="store_true",
+        help=f"見出しあたり時間が最小サイズの {MAX_SCALING_RATIO} 倍を超えたら失敗する",
+    )
+    args = arg_parser.parse_args(argv)
+
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = {}
+        for size in args.sizes:
+            path = Path(tmp_dir) / f"bench_{size}.md"
+            path.write_text(generate_document(size), encoding="utf-8")
+            paths[size] = str(path)
+
+        for mode in args.modes:
+            print(f"[{mode}]")
+            print(
+                f"{'headings':>10} {'sections':>10} {'seconds':>10} "
+                f"{'us/heading':>12} {'ratio':>7}"
+            )
+            base_per_heading = None
+            for size in args.sizes:
+                results = [run_once(paths[size], mode) for _ in range(args.repeat)]
+                seconds = min(r[0] for r in results)
+                num_sections = results[0][1]
+                per_heading = seconds / size
+                if base_per_heading is None:
+                    base_per_heading = per_heading
+                ratio = per_heading / base_per_heading
+                print(
+                    f"{size:>10} {num_sections:>10} {seconds:>10.3f} "
+                    f"{per_heading * 1e6:>12.2f} {ratio:>7.2f}"
+                )
+                if args.check and ratio > MAX_SCALING_RATIO:
+                    failed = True
+            print()
+
+    if failed:
+        print(f"NG: per-heading time grew more than {MAX_SCALING_RATIO}x", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+"""複数文書のビルド（build-dir）
+
+ディレクトリ内のマークダウンファイルのパースをワーカープロセスに分散する。
+パーサーはワーカーごとに一度だけ生成し（NLP の辞書や LLM クライアントを使い回す）、
+セクションIDはすべての文書のパースが終わってから、文書のパス順に通し番号で割り当てる。
+そのため ID は完了順やワーカー数によらず、文書をまたいで一意になる。
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from md2map.llm.split_cache import AISplitCache
+from md2map.models.section import Section
+from md2map.parsers.markdown_parser import MarkdownParser
+from md2map.utils.logger import setup_logger
+
+# 文書ごとの出力（INDEX.md / MAP.json / parts/）を置くディレクトリ名から除く拡張子
+_DOCUMENT_SUFFIX = ".md"
+
+_worker_parser: Optional[MarkdownParser] = None
+
+
+class DocumentResult(NamedTuple):
+    """1文書のパース結果
+
+    Attributes:
+        path: 入力ファイルのパス
+        rel_path: 入力ディレクトリからの相対パス（/ 区切り）
+        out_subdir: 出力ディレクトリからの文書ごとの出力先（/ 区切り）
+        sections: セクションのリスト
+        warnings: 警告メッセージのリスト
+        error: パースに失敗した場合のエラーメッセージ
+    """
+
+    path: Path
+    rel_path: str
+    out_subdir: str
+    sections: List[Section]
+    warnings: List[str]
+    error: Optional[str] = None
+
+
+def find_documents(
+    input_dir: Path, pattern: str = "**/*.md", exclude_dir: Optional[Path] = None
+) -> List[Path]:
+    """入力ディレクトリから pattern に一致するファイルをパス順に返す
+
+    exclude_dir（出力ディレクトリ）の中のファイルは除く（入力ディレクトリの中に出力する場合に、
+    前回生成したパートを入力として拾わないようにする）。
+    """
+    excluded = exclude_dir.resolve() if exclude_dir is not None else None
+    documents = []
+    for path in input_dir.glob(pattern):
+        if not path.is_file():
+            continue
+        if excluded is not None and excluded in path.resolve().parents:
+            continue
+        documents.append(path)
+    return sorted(documents, key=lambda path: path.relative_to(input_dir).as_posix())
+
+
+def document_out_subdir(rel_path: str) -> str:
+    """文書ごとの出力先（相対パスから .md を除いたもの）を返す"""
+    if rel_path.lower().endswith(_DOCUMENT_SUFFIX):
+        return rel_path[: -len(_DOCUMENT_SUFFIX)]
+    return rel_path
+
+
+def _create_parser(
+    parser_options: Dict[str, Any],
+    ai_cache_dir: Optional[str],
+    ai_cache_max_bytes: int,
+) -> MarkdownParser:
+    ai_cache = None
+    if ai_cache_dir:
+        ai_cache = AISplitCache(ai_cache_dir, max_bytes=ai_cache_max_bytes)
+    return MarkdownParser(ai_cache=ai_cache, **parser_options)
+
+
+def _init_worker(
+    parser_options: Dict[str, Any],
+    ai_cache_dir: Optional[str],
+    ai_cache_max_bytes: int,
+    verbose: bool,
+) -> None:
+    """ワーカープロセスの初期化（ロガーとパーサーを用意する）"""
+    global _worker_parser
+    setup_logger(verbose)
+    _worker_parser = _create_parser(parser_options, ai_cache_dir, ai_cache_max_bytes)
+
+
+def _parse_in_worker(file_path: str, max_depth: int) -> Tuple[List[Section], List[str]]:
+    return _worker_parser.parse(file_path, max_depth)
+
+
+def parse_documents(
+    input_dir: Path,
+    paths: List[Path],
+    parser_options: Dict[str, Any],
+    max_depth: int = 3,
+    jobs: int = 1,
+    ai_cache_dir: Optional[str] = None,
+    ai_cache_max_bytes: int = 0,
+    verbose: bool = False,
+) -> List[DocumentResult]:
+    """文書をパースし、paths の順に結果を返す
+
+    Args:
+        input_dir: 入力ディレクトリ（相対パスの基準）
+        paths: 入力ファイルのパス
+        parser_options: MarkdownParser の引数（ai_cache を除く。pickle できる値のみ）
+        max_depth: 分割対象の最大見出し深さ（1-6）
+        jobs: ワーカープロセス数（1 の場合はこのプロセスでパースする）
+        ai_cache_dir: AI サブスプリット結果のキャッシュディレクトリ（プロセス間で共有する）
+        ai_cache_max_bytes: キャッシュディレクトリの上限バイト数
+        verbose: ワーカーのログを詳細にするかどうか
+
+    Raises:
+        ValueError, RuntimeError: パーサーを生成できない場合（ワーカーの起動前に検証する）
+    """
+    jobs = max(1, min(jobs, len(paths)))
+    outcomes: List[Tuple[Optional[Tuple[List[Section], List[str]]], Optional[str]]] = []
+    if jobs == 1:
+        parser = _create_parser(parser_options, ai_cache_dir, ai_cache_max_bytes)
+        for path in paths:
+            try:
+                outcomes.append((parser.parse(str(path), max_depth), None))
+            except Exception as exc:  # 1文書の失敗で他の文書を止めない
+                outcomes.append((None, str(exc)))
+    else:
+        # 設定の誤りや任意依存の不足は、ワーカーを起動する前にこのプロセスで検出する
+        # （このプロセスではパースしないため、辞書の読み込みなど重い初期化はしない）
+        MarkdownParser.validate_options(**parser_options)
+        with ProcessPoolExecutor(
+            max_workers=jobs,
+            initializer=_init_worker,
+            initargs=(parser_options, ai_cache_dir, ai_cache_max_bytes, verbose),
+        ) as pool:
+            futures = [pool.submit(_parse_in_worker, str(path), max_depth) for path in paths]
+            for future in futures:
+                try:
+                    outcomes.append((future.result(), None))
+                except Exception as exc:  # 1文書の失敗で他の文書を止めない
+                    outcomes.append((None, str(exc)))
+
+    results: List[DocumentResult] = []
+    for path, (parsed, error) in zip(paths, outcomes):
+        rel_path = path.relative_to(input_dir).as_posix()
+        sections, warnings = parsed if parsed is not None else ([], [])
+        results.append(
+            DocumentResult(
+                path=path,
+                rel_path=rel_path,
+                out_subdir=document_out_subdir(rel_path),
+                sections=sections,
+                warnings=warnings,
+                error=error,
+            )
+        )
+    return results
+
+
+def assign_section_ids(documents: List[DocumentResult], id_prefix: str = "MD") -> None:
+    """文書の順にセクションIDを通し番号で割り当てる（文書をまたいで一意）"""
+    number = 0
+    for document in documents:
+        for section in document.sections:
+            number += 1
+            section.id = f"{id_prefix}{number}"
+
+
+def default_jobs() -> int:
+    """ワーカープロセス数の既定値（CPU 数）"""
+    return os.cpu_count() or 1
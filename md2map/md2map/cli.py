@@ -1,42 +1,51 @@
 """CLI エントリポイント"""
 
 import argparse
+import contextlib
 import json
 import sys
 from pathlib import Path
-
-from md2map.generators.index_generator import generate_index
-from md2map.generators.map_generator import generate_map
-from md2map.generators.parts_generator import generate_parts
-from md2map.parsers.markdown_parser import MarkdownParser
-from md2map.utils.file_utils import ensure_dir, read_file
-from md2map.utils.logger import setup_logger
-
-
-def build_arg_parser() -> argparse.ArgumentParser:
-    """コマンドライン引数パーサーを構築する
-
-    Returns:
-        ArgumentParser インスタンス
-    """
-    parser = argparse.ArgumentParser(
-        prog="md2map",
-        description="マークダウンファイルを意味的単位に分割し、AI解析用の索引を生成する",
-    )
-
-    subparsers = parser.add_subparsers(dest="command", required=True)
-
-    # build サブコマンド
-    build_parser = subparsers.add_parser(
-        "build", help="マークダウンファイルを解析して出力を生成"
-    )
-    build_parser.add_argument("input_file", help="解析対象のマークダウンファイル")
-    build_parser.add_argument(
+from typing import TYPE_CHECKING, Any, Dict, List, Set, Tuple
+
+from md2map.batch import (
+    assign_section_ids,
+    default_jobs,
+    document_out_subdir,
+    find_documents,
+    parse_documents,
+)
+from md2map.generators.index_generator import generate_combined_index, generate_index
+from md2map.generators.map_generator import (
+    build_map_entries,
+    load_map,
+    part_checksums,
+    prefix_map_entries,
+    write_map,
+)
+from md2map.generators.parts_generator import generate_parts, remove_orphaned_parts
+from md2map.llm.split_cache import DEFAULT_AI_CACHE_MAX_BYTES, AISplitCache
+from md2map.models.section import Section
+from md2map.parsers.heading_scanner import MarkdownSource
+from md2map.parsers.markdown_parser import (
+    DEFAULT_AI_CONCURRENCY,
+    DEFAULT_AI_PROMPT_TOKEN_BUDGET,
+    MarkdownParser,
+)
+from md2map.utils.file_utils import ensure_dir
+from md2map.utils.logger import get_logger, setup_logger
+
+if TYPE_CHECKING:
+    from md2map.llm.config import LLMConfig
+
+
+def _add_build_options(parser: argparse.ArgumentParser) -> None:
+    """build / build-dir に共通のオプションを追加する"""
+    parser.add_argument(
         "--out",
         default="./md2map-out",
         help="出力ディレクトリ（デフォルト: ./md2map-out）",
     )
-    build_parser.add_argument(
+    parser.add_argument(
         "--max-depth",
         type=int,
         default=3,
@@ -44,63 +53,149 @@ def build_arg_parser() -> argparse.ArgumentParser:
         metavar="N",
         help="分割対象の最大見出し深さ 1-6（デフォルト: 3）",
     )
-    build_parser.add_argument(
+    parser.add_argument(
         "--id-prefix",
         default="MD",
         help="セクションIDのプレフィックス（デフォルト: MD → MD1, MD2, ...）",
     )
-    build_parser.add_argument(
+    parser.add_argument(
         "--verbose", action="store_true", help="詳細ログを出力"
     )
-    build_parser.add_argument(
+    parser.add_argument(
         "--dry-run", action="store_true", help="ファイル生成せずプレビューのみ"
     )
-    build_parser.add_argument(
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="前回の MAP.json と比べて変更・追加されたパートのみ書き込み、不要になったパートを削除",
+    )
+    parser.add_argument(
         "--split-mode",
         "-m",
         default="heading",
-        choices=["heading", "nlp", "ai"],
-        help="セクション分割モード（heading/nlp/ai）",
+        choices=["heading", "nlp", "ai", "tiling"],
+        help="セクション分割モード（heading/nlp/ai/tiling）",
     )
-    build_parser.add_argument(
+    parser.add_argument(
         "--split-threshold",
         type=int,
         default=500,
         help="再分割対象の最小文字数（日本語）/単語数（英語）",
     )
-    build_parser.add_argument(
+    parser.add_argument(
         "--max-subsections",
         type=int,
         default=5,
         help="1セクションから生成する仮想見出しの最大数",
     )
-    build_parser.add_argument(
+    parser.add_argument(
         "--ai-provider",
         default="bedrock",
         choices=["openai", "anthropic", "bedrock"],
         help="AIプロバイダー（デフォルト: bedrock）",
     )
-    build_parser.add_argument(
+    parser.add_argument(
         "--ai-model",
         default=None,
         help="AIモデルID（未指定時はプロバイダーのデフォルト）",
     )
-    build_parser.add_argument(
+    parser.add_argument(
         "--ai-region",
         default=None,
         help="Bedrock用リージョン（未指定時は環境変数またはap-northeast-1）",
     )
-    build_parser.add_argument(
+    parser.add_argument(
         "--ai-prompt-extra-notes",
         default=None,
         help="AI サブスプリットの注意事項に追記するテキスト",
     )
+    parser.add_argument(
+        "--ai-concurrency",
+        type=int,
+        default=DEFAULT_AI_CONCURRENCY,
+        help=(
+            "AI サブスプリットの LLM 呼び出しの同時実行数"
+            f"（デフォルト: {DEFAULT_AI_CONCURRENCY}）"
+        ),
+    )
+    parser.add_argument(
+        "--ai-prompt-mode",
+        default="full",
+        choices=["full", "skeleton"],
+        help="AI に送る本文（full: 全文 / skeleton: 長いセクションは行頭と構造記法のみ）",
+    )
+    parser.add_argument(
+        "--ai-prompt-token-budget",
+        type=int,
+        default=DEFAULT_AI_PROMPT_TOKEN_BUDGET,
+        help=(
+            "skeleton モードで骨格に切り替える本文のトークン数（骨格もこの予算に収める）"
+            f"（デフォルト: {DEFAULT_AI_PROMPT_TOKEN_BUDGET}）"
+        ),
+    )
+    parser.add_argument(
+        "--ai-cache-dir",
+        default=None,
+        help="AI サブスプリット結果のキャッシュディレクトリ（未指定時はキャッシュしない）",
+    )
+    parser.add_argument(
+        "--ai-cache-max-mb",
+        type=int,
+        default=DEFAULT_AI_CACHE_MAX_BYTES // (1024 * 1024),
+        help="AI サブスプリット結果のキャッシュの上限サイズ（MB）",
+    )
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    """コマンドライン引数パーサーを構築する
+
+    Returns:
+        ArgumentParser インスタンス
+    """
+    parser = argparse.ArgumentParser(
+        prog="md2map",
+        description="マークダウンファイルを意味的単位に分割し、AI解析用の索引を生成する",
+    )
+
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    # build サブコマンド
+    build_parser = subparsers.add_parser(
+        "build", help="マークダウンファイルを解析して出力を生成"
+    )
+    build_parser.add_argument("input_file", help="解析対象のマークダウンファイル")
+    _add_build_options(build_parser)
+    build_parser.add_argument(
+        "--nlp-workers",
+        type=int,
+        default=1,
+        help="NLP モードで段落が多い場合に名詞抽出を分散するワーカープロセス数（デフォルト: 1）",
+    )
     build_parser.add_argument(
         "--section-overrides",
         default=None,
         help="セクション単位の分割設定オーバーライド（JSON ファイルパスまたは JSON 文字列）",
     )
 
+    # build-dir サブコマンド
+    build_dir_parser = subparsers.add_parser(
+        "build-dir", help="ディレクトリ内のマークダウンファイルをまとめて解析して出力を生成"
+    )
+    build_dir_parser.add_argument("input_dir", help="解析対象のディレクトリ")
+    _add_build_options(build_dir_parser)
+    build_dir_parser.add_argument(
+        "--pattern",
+        default="**/*.md",
+        help="入力ディレクトリから対象ファイルを選ぶ glob パターン（デフォルト: **/*.md）",
+    )
+    build_dir_parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=None,
+        help="文書のパースを分散するワーカープロセス数（デフォルト: CPU 数）",
+    )
+
     # headings サブコマンド
     headings_parser = subparsers.add_parser(
         "headings", help="見出し一覧を取得（JSON 出力）"
@@ -118,6 +213,21 @@ def build_arg_parser() -> argparse.ArgumentParser:
     return parser
 
 
+def _llm_config_from_args(args: argparse.Namespace) -> "LLMConfig":
+    """AI オプションと環境変数から LLM 設定を構築する
+
+    Raises:
+        ValueError, RuntimeError: 設定が不足している場合
+    """
+    from md2map.llm.factory import build_llm_config_from_env
+
+    return build_llm_config_from_env(
+        provider=args.ai_provider,
+        model=args.ai_model,
+        region=args.ai_region,
+    )
+
+
 def cmd_build(args: argparse.Namespace) -> int:
     """build コマンドの実行
 
@@ -138,10 +248,25 @@ def cmd_build(args: argparse.Namespace) -> int:
     if not input_path.suffix.lower() == ".md":
         logger.warning(f"File extension is not .md: {args.input_file}")
 
-    # ファイル読み込み
-    lines, read_warnings = read_file(str(input_path))
-    if lines is None:
+    # ファイルを開く（パートの本文は行リストを持たずに書き出し時にオフセットから切り出す）
+    try:
+        source = MarkdownSource(input_path)
+    except OSError as exc:
+        logger.error(f"Failed to read file: {input_path} ({exc})")
         return 1
+    with source:
+        return _build_from_source(args, input_path, source)
+
+
+def _build_from_source(
+    args: argparse.Namespace, input_path: Path, source: MarkdownSource
+) -> int:
+    """build コマンドの本体（source は呼び出し元で閉じる）
+
+    Returns:
+        終了コード (0: 成功, 1: エラー, 2: 警告あり)
+    """
+    logger = get_logger()
 
     # section_overrides の解析
     section_overrides = None
@@ -179,16 +304,18 @@ def cmd_build(args: argparse.Namespace) -> int:
 
     llm_config = None
     if needs_ai:
-        from md2map.llm.factory import build_llm_config_from_env
         try:
-            llm_config = build_llm_config_from_env(
-                provider=args.ai_provider,
-                model=args.ai_model,
-                region=args.ai_region,
-            )
+            llm_config = _llm_config_from_args(args)
         except (ValueError, RuntimeError) as exc:
             logger.error(str(exc))
             return 1
+
+    ai_cache = None
+    if needs_ai and args.ai_cache_dir:
+        ai_cache = AISplitCache(
+            args.ai_cache_dir, max_bytes=args.ai_cache_max_mb * 1024 * 1024
+        )
+
     try:
         parser = MarkdownParser(
             split_mode=args.split_mode,
@@ -197,12 +324,16 @@ def cmd_build(args: argparse.Namespace) -> int:
             llm_config=llm_config,
             ai_prompt_extra_notes=args.ai_prompt_extra_notes,
             section_overrides=section_overrides,
+            nlp_workers=args.nlp_workers,
+            ai_concurrency=args.ai_concurrency,
+            ai_cache=ai_cache,
+            ai_prompt_mode=args.ai_prompt_mode,
+            ai_prompt_token_budget=args.ai_prompt_token_budget,
         )
     except (ValueError, RuntimeError) as exc:
         logger.error(str(exc))
         return 1
     sections, warnings = parser.parse(str(input_path), args.max_depth)
-    warnings.extend(read_warnings)
 
     # セクションIDの割り当て
     id_prefix = args.id_prefix
@@ -241,21 +372,246 @@ def cmd_build(args: argparse.Namespace) -> int:
         logger.error(f"Failed to create output directory: {out_dir}")
         return 1
 
-    # parts/ 生成
+    _generate_outputs(sections, warnings, source, out_dir, input_path.name, args.incremental)
+
+    logger.info(f"Output generated in: {out_dir}")
+
+    return 2 if warnings else 0
+
+
+def _generate_outputs(
+    sections: List[Section],
+    warnings: List[str],
+    source: MarkdownSource,
+    out_dir: Path,
+    input_name: str,
+    incremental: bool,
+) -> List[Dict[str, Any]]:
+    """parts/・INDEX.md・MAP.json を生成し、MAP.json のエントリを返す
+
+    incremental の場合は前回の MAP.json のチェックサムと比べ、変更・追加されたパートのみ書き込み、
+    前回の MAP.json にあって今回生成しないパートを削除する。
+    """
+    logger = get_logger()
+
+    previous_checksums = None
+    if incremental:
+        previous_entries = load_map(str(out_dir / "MAP.json"))
+        if previous_entries is None:
+            logger.info(f"No previous MAP.json in {out_dir}; writing all parts")
+        else:
+            previous_checksums = part_checksums(previous_entries)
+
+    # parts/ 生成（チェックサムはメモリ上で算出する）
     logger.info("Generating parts...")
-    generate_parts(sections, lines, str(out_dir))
+    generate_parts(sections, source, str(out_dir), previous_checksums=previous_checksums)
+    if previous_checksums is not None:
+        removed = remove_orphaned_parts(str(out_dir), previous_checksums, sections)
+        if removed:
+            logger.info(f"Removed {len(removed)} orphaned parts")
 
     # INDEX.md 生成
     logger.info("Generating INDEX.md...")
-    generate_index(sections, warnings, str(out_dir / "INDEX.md"), input_path.name)
+    generate_index(sections, warnings, str(out_dir / "INDEX.md"), input_name)
 
     # MAP.json 生成
     logger.info("Generating MAP.json...")
-    generate_map(sections, str(out_dir), str(out_dir / "MAP.json"))
+    entries = build_map_entries(sections, str(out_dir))
+    write_map(entries, str(out_dir / "MAP.json"))
+    return entries
+
+
+def _remove_vanished_documents(
+    out_dir: Path, previous_entries: List[Dict[str, Any]], documents: Set[str]
+) -> None:
+    """前回の統合 MAP.json にあり、入力ディレクトリからなくなった文書の出力を削除する
+
+    削除するのは前回の MAP.json にあるパートと、文書ごとの INDEX.md / MAP.json のみ。
+    出力先が出力ディレクトリの配下にならない文書（MAP.json の document が ../ を含む
+    場合など）は削除しない。
+    """
+    logger = get_logger()
+    out_root = out_dir.resolve()
+    vanished: Dict[str, List[str]] = {}
+    for entry in previous_entries:
+        document = entry.get("document")
+        part_file = entry.get("part_file")
+        if isinstance(document, str) and isinstance(part_file, str) and document not in documents:
+            vanished.setdefault(document, []).append(part_file)
+
+    for document, part_files in vanished.items():
+        out_subdir = document_out_subdir(document)
+        doc_out_dir = (out_dir / out_subdir).resolve()
+        if out_root not in doc_out_dir.parents:
+            logger.warning(f"Skipped removing outputs outside the output directory: {document}")
+            continue
+        prefix = f"{out_subdir}/"
+        remove_orphaned_parts(
+            str(doc_out_dir),
+            [part_file[len(prefix):] for part_file in part_files if part_file.startswith(prefix)],
+            [],
+        )
+        for path in (doc_out_dir / "INDEX.md", doc_out_dir / "MAP.json"):
+            with contextlib.suppress(OSError):
+                path.unlink()
+        # 空になったディレクトリのみ削除する
+        for directory in (doc_out_dir / "parts", doc_out_dir):
+            with contextlib.suppress(OSError):
+                directory.rmdir()
+        logger.info(f"Removed outputs of deleted document: {document}")
+
+
+def cmd_build_dir(args: argparse.Namespace) -> int:
+    """build-dir コマンドの実行
+
+    文書ごとの出力を <out>/<相対パスから .md を除いたもの>/ に、全文書をまとめた
+    INDEX.md / MAP.json を <out>/ に生成する。セクションIDは文書をまたいで一意になる。
+
+    Args:
+        args: パース済みの引数
+
+    Returns:
+        終了コード (0: 成功, 1: エラー, 2: 警告あり)
+    """
+    logger = setup_logger(args.verbose)
+
+    # 入力ディレクトリ検証
+    input_dir = Path(args.input_dir)
+    if not input_dir.is_dir():
+        logger.error(f"Directory not found: {args.input_dir}")
+        return 1
+
+    out_dir = Path(args.out)
+    paths = find_documents(input_dir, args.pattern, exclude_dir=out_dir)
+    if not paths:
+        logger.error(f"No files matching {args.pattern} in: {args.input_dir}")
+        return 1
+
+    llm_config = None
+    if args.split_mode == "ai":
+        try:
+            llm_config = _llm_config_from_args(args)
+        except (ValueError, RuntimeError) as exc:
+            logger.error(str(exc))
+            return 1
+
+    # パース（ワーカープロセスの中で NLP の名詞抽出をさらに分散しない）
+    jobs = args.jobs if args.jobs is not None else default_jobs()
+    logger.info(f"Parsing {len(paths)} files in: {input_dir} (jobs: {max(1, jobs)})")
+    try:
+        documents = parse_documents(
+            input_dir,
+            paths,
+            parser_options={
+                "split_mode": args.split_mode,
+                "split_threshold": args.split_threshold,
+                "max_subsections": args.max_subsections,
+                "llm_config": llm_config,
+                "ai_prompt_extra_notes": args.ai_prompt_extra_notes,
+                "ai_concurrency": args.ai_concurrency,
+                "ai_prompt_mode": args.ai_prompt_mode,
+                "ai_prompt_token_budget": args.ai_prompt_token_budget,
+            },
+            max_depth=args.max_depth,
+            jobs=jobs,
+            ai_cache_dir=args.ai_cache_dir if args.split_mode == "ai" else None,
+            ai_cache_max_bytes=args.ai_cache_max_mb * 1024 * 1024,
+            verbose=args.verbose,
+        )
+    except (ValueError, RuntimeError) as exc:
+        logger.error(str(exc))
+        return 1
+
+    # セクションIDの割り当て（文書のパス順の通し番号）
+    assign_section_ids(documents, args.id_prefix)
+
+    # 警告・エラー出力（統合 INDEX.md の警告には文書の相対パスを付ける）
+    failed = False
+    warnings: List[str] = []
+    for document in documents:
+        if document.error is not None:
+            logger.error(f"Failed to parse: {document.rel_path} ({document.error})")
+            failed = True
+        for warning in document.warnings:
+            logger.warning(f"{document.rel_path}: {warning}")
+            warnings.append(f"{document.rel_path}: {warning}")
+    documents = [document for document in documents if document.error is None]
+
+    # dry-run モード
+    if args.dry_run:
+        from md2map.generators.parts_generator import build_filename
+
+        for document in documents:
+            print(f"\n=== {document.rel_path}: Detected Sections ({len(document.sections)}) ===\n")
+            for section in document.sections:
+                indent = "  " * (section.level - 1)
+                print(
+                    f"{indent}[{section.id}] [H{section.level}] "
+                    f"{section.display_name()} ({section.line_range()})"
+                )
+
+        print("\n=== Files to be generated ===\n")
+        print(f"  {args.out}/INDEX.md")
+        print(f"  {args.out}/MAP.json")
+        for document in documents:
+            existing_files: set[str] = set()
+            print(f"  {args.out}/{document.out_subdir}/INDEX.md")
+            print(f"  {args.out}/{document.out_subdir}/MAP.json")
+            for section in document.sections:
+                filename = build_filename(section, existing_files)
+                existing_files.add(filename)
+                print(f"  {args.out}/{document.out_subdir}/parts/{filename}")
+
+        return 1 if failed else 2 if warnings else 0
+
+    # 差分ビルドでは、入力ディレクトリからなくなった文書の出力を削除する
+    if args.incremental:
+        previous_entries = load_map(str(out_dir / "MAP.json"))
+        if previous_entries is not None:
+            _remove_vanished_documents(
+                out_dir,
+                previous_entries,
+                {path.relative_to(input_dir).as_posix() for path in paths},
+            )
+
+    # 文書ごとの出力
+    combined_entries: List[Dict[str, Any]] = []
+    written: List[Tuple[str, str, List[Section]]] = []
+    for document in documents:
+        doc_out_dir = out_dir / document.out_subdir
+        if not ensure_dir(str(doc_out_dir)):
+            logger.error(f"Failed to create output directory: {doc_out_dir}")
+            return 1
+        try:
+            source = MarkdownSource(document.path)
+        except OSError as exc:
+            logger.error(f"Failed to read file: {document.path} ({exc})")
+            failed = True
+            continue
+
+        logger.info(f"Generating: {doc_out_dir}")
+        with source:
+            entries = _generate_outputs(
+                document.sections,
+                document.warnings,
+                source,
+                doc_out_dir,
+                document.rel_path,
+                args.incremental,
+            )
+        combined_entries.extend(
+            prefix_map_entries(entries, document.rel_path, document.out_subdir)
+        )
+        written.append((document.rel_path, document.out_subdir, document.sections))
+
+    # 統合 INDEX.md / MAP.json
+    logger.info("Generating combined INDEX.md and MAP.json...")
+    generate_combined_index(written, warnings, str(out_dir / "INDEX.md"), input_dir.name)
+    write_map(combined_entries, str(out_dir / "MAP.json"))
 
     logger.info(f"Output generated in: {out_dir}")
 
-    return 2 if warnings else 0
+    return 1 if failed else 2 if warnings else 0
 
 
 def cmd_headings(args: argparse.Namespace) -> int:
@@ -272,9 +628,12 @@ def cmd_headings(args: argparse.Namespace) -> int:
         print(f"Error: File not found: {args.input_file}", file=sys.stderr)
         return 1
 
-    content = input_path.read_text(encoding="utf-8")
     parser = MarkdownParser()
-    headings = parser.extract_headings(content, max_depth=args.max_depth)
+    try:
+        headings = parser.extract_headings_from_file(str(input_path), max_depth=args.max_depth)
+    except OSError as exc:
+        print(f"Error: Failed to read file: {args.input_file} ({exc})", file=sys.stderr)
+        return 1
     print(json.dumps(headings, ensure_ascii=False, indent=2))
     return 0
 
@@ -290,6 +649,8 @@ def main() -> int:
 
     if args.command == "build":
         return cmd_build(args)
+    elif args.command == "build-dir":
+        return cmd_build_dir(args)
     elif args.command == "headings":
         return cmd_headings(args)
 
@@ -1,6 +1,6 @@
 """INDEX.md 生成モジュール"""
 
-from typing import List
+from typing import List, Tuple
 
 from md2map.models.section import Section
 from md2map.utils.file_utils import write_file
@@ -83,3 +83,74 @@ def generate_index(
     else:
         logger.error(f"Failed to write: {output_path}")
         return False
+
+
+def generate_combined_index(
+    documents: List[Tuple[str, str, List[Section]]],
+    warnings: List[str],
+    output_path: str,
+    input_dir: str,
+) -> bool:
+    """複数文書をまとめた INDEX.md を生成する
+
+    文書の一覧と文書ごとの構造ツリーを出力する（セクション詳細は文書ごとの INDEX.md に出力する）。
+
+    Args:
+        documents: (入力ディレクトリからの文書の相対パス, 文書ごとの出力先, セクションのリスト)
+        warnings: 警告メッセージのリスト
+        output_path: 出力ファイルパス
+        input_dir: 入力ディレクトリ名
+
+    Returns:
+        成功時True、失敗時False
+    """
+    logger = get_logger()
+    lines: List[str] = []
+
+    # ヘッダ
+    lines.append(f"# Index: {input_dir}\n\n")
+
+    # 警告セクション
+    if warnings:
+        lines.append("## Warnings\n\n")
+        for warning in warnings:
+            lines.append(f"- [WARNING] {warning}\n")
+        lines.append("\n")
+
+    # 文書一覧
+    lines.append("## 文書一覧\n\n")
+    for document, out_subdir, sections in documents:
+        ids = [section.id for section in sections if section.id]
+        id_range = f", {ids[0]}–{ids[-1]}" if ids else ""
+        lines.append(
+            f"- [{document}]({out_subdir}/INDEX.md) ({len(sections)} sections{id_range})\n"
+        )
+    lines.append("\n")
+
+    # 文書ごとの構造ツリー
+    lines.append("## 構造ツリー\n\n")
+    for document, out_subdir, sections in documents:
+        lines.append(f"### {document}\n\n")
+        for section in sections:
+            indent = "  " * (section.level - 1)
+            id_label = f"[{section.id}] " if section.id else ""
+            subsplit_label = "[SubSplit] " if section.is_subsplit else ""
+            if section.part_file:
+                part_path = f"{out_subdir}/{section.part_file}"
+                link = f"[{part_path}]({part_path})"
+            else:
+                link = ""
+            lines.append(
+                f"{indent}- {id_label}{subsplit_label}"
+                f"{section.display_name()} ({section.line_range()}) → {link}\n"
+            )
+        lines.append("\n")
+
+    # ファイル書き込み
+    content = "".join(lines)
+    if write_file(output_path, content):
+        logger.debug(f"Generated: {output_path}")
+        return True
+    else:
+        logger.error(f"Failed to write: {output_path}")
+        return False
@@ -3,7 +3,7 @@
 import hashlib
 import json
 import os
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 from md2map.models.section import Section
 from md2map.utils.file_utils import write_file
@@ -26,31 +26,26 @@ def calculate_checksum(file_path: str) -> str:
         return ""
 
 
-def generate_map(
-    sections: List[Section],
-    out_dir: str,
-    output_path: str,
-) -> bool:
-    """MAP.json を生成する
+def build_map_entries(sections: List[Section], out_dir: str) -> List[Dict[str, Any]]:
+    """MAP.json のエントリを組み立てる
 
     Args:
         sections: セクションのリスト
         out_dir: 出力ディレクトリ（parts/ファイルの基準パス）
-        output_path: 出力ファイルパス
 
     Returns:
-        成功時True、失敗時False
+        パートファイルのあるセクションごとのエントリ
     """
-    logger = get_logger()
     entries: List[Dict[str, Any]] = []
 
     for section in sections:
         if not section.part_file:
             continue
 
-        # パートファイルのパス
-        part_path = os.path.join(out_dir, section.part_file)
-        checksum = calculate_checksum(part_path)
+        # パートの書き出し時に算出済みでなければファイルから算出する
+        checksum = section.checksum
+        if not checksum:
+            checksum = calculate_checksum(os.path.join(out_dir, section.part_file))
 
         entry: Dict[str, Any] = {}
         if section.id:
@@ -75,7 +70,75 @@ def generate_map(
                 entry["subsplit_title"] = section.subsplit_title
         entries.append(entry)
 
-    # JSON書き込み
+    return entries
+
+
+def load_map(map_path: str) -> Optional[List[Dict[str, Any]]]:
+    """既存の MAP.json を読み込む
+
+    Args:
+        map_path: MAP.json のパス
+
+    Returns:
+        エントリのリスト（存在しない・形式が不正な場合は None）
+    """
+    try:
+        with open(map_path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(entries, list):
+        return None
+    return [entry for entry in entries if isinstance(entry, dict)]
+
+
+def part_checksums(entries: List[Dict[str, Any]]) -> Dict[str, str]:
+    """MAP.json のエントリから part_file → checksum の辞書を作る"""
+    checksums: Dict[str, str] = {}
+    for entry in entries:
+        part_file = entry.get("part_file")
+        checksum = entry.get("checksum")
+        if isinstance(part_file, str) and isinstance(checksum, str) and checksum:
+            checksums[part_file] = checksum
+    return checksums
+
+
+def prefix_map_entries(
+    entries: List[Dict[str, Any]], document: str, out_subdir: str
+) -> List[Dict[str, Any]]:
+    """文書ごとの MAP.json のエントリを、統合 MAP.json 用に変換する
+
+    part_file を統合出力ディレクトリからの相対パスにし、入力ディレクトリからの
+    文書の相対パスを document に追加する。
+
+    Args:
+        entries: 文書ごとのエントリ
+        document: 入力ディレクトリからの文書の相対パス
+        out_subdir: 統合出力ディレクトリからの文書ごとの出力先
+
+    Returns:
+        変換したエントリ（元のエントリは変更しない）
+    """
+    combined: List[Dict[str, Any]] = []
+    for entry in entries:
+        entry = dict(entry)
+        entry["part_file"] = f"{out_subdir}/{entry['part_file']}"
+        entry["document"] = document
+        combined.append(entry)
+    return combined
+
+
+def write_map(entries: List[Dict[str, Any]], output_path: str) -> bool:
+    """MAP.json を書き込む
+
+    Args:
+        entries: エントリのリスト
+        output_path: 出力ファイルパス
+
+    Returns:
+        成功時True、失敗時False
+    """
+    logger = get_logger()
     content = json.dumps(entries, ensure_ascii=False, indent=2)
     if write_file(output_path, content + "\n"):
         logger.debug(f"Generated: {output_path}")
@@ -83,3 +146,21 @@ def generate_map(
     else:
         logger.error(f"Failed to write: {output_path}")
         return False
+
+
+def generate_map(
+    sections: List[Section],
+    out_dir: str,
+    output_path: str,
+) -> bool:
+    """MAP.json を生成する
+
+    Args:
+        sections: セクションのリスト
+        out_dir: 出力ディレクトリ（parts/ファイルの基準パス）
+        output_path: 出力ファイルパス
+
+    Returns:
+        成功時True、失敗時False
+    """
+    return write_map(build_map_entries(sections, out_dir), output_path)
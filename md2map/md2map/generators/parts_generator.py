@@ -1,11 +1,13 @@
 """parts/ ディレクトリ生成モジュール"""
 
+import hashlib
 import os
 import re
-from typing import List, Set, Tuple
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
 
 from md2map.models.section import Section
-from md2map.utils.file_utils import ensure_dir, write_file
+from md2map.parsers.heading_scanner import MarkdownSource
+from md2map.utils.file_utils import ensure_dir, write_bytes
 from md2map.utils.logger import get_logger
 
 
@@ -62,13 +64,15 @@ def build_filename(section: Section, existing: Set[str]) -> str:
 def generate_header(section: Section) -> str:
     """パートファイルのヘッダを生成する
 
+    ID と行範囲は前後のセクションの増減で変わるため、ヘッダには含めず MAP.json / INDEX.md
+    にのみ出力する（差分ビルドで、変更していないパートの内容が変わらないようにする）。
+
     Args:
         section: セクション
 
     Returns:
         HTMLコメント形式のヘッダ
     """
-    id_line = f"id: {section.id}\n" if section.id else ""
     # サブスプリットの場合のみ追加フィールドを出力（heading モードの後方互換性を維持）
     subsplit_lines = ""
     if section.is_subsplit:
@@ -79,8 +83,7 @@ def generate_header(section: Section) -> str:
             subsplit_lines += f"subsplit_title: {section.subsplit_title}\n"
     return f"""<!--
 md2map fragment
-{id_line}original: {section.original_file}
-lines: {section.start_line}-{section.end_line}
+original: {section.original_file}
 section: {section.title}
 level: {section.level}
 {subsplit_lines}-->
@@ -90,17 +93,24 @@ level: {section.level}
 
 def generate_parts(
     sections: List[Section],
-    lines: List[str],
+    lines: Union[List[str], MarkdownSource],
     out_dir: str,
     dry_run: bool = False,
+    previous_checksums: Optional[Dict[str, str]] = None,
 ) -> List[Tuple[Section, str]]:
     """parts/ ディレクトリにセクションファイルを生成する
 
+    パートの内容はメモリ上で組み立て、SHA-256 チェックサムを section.checksum に設定する
+    （MAP.json の生成時にファイルを読み直さない）。
+
     Args:
         sections: セクションのリスト
-        lines: 元ファイルの行リスト
+        lines: 元ファイルの行リスト、または元ファイルの MarkdownSource
+            （本文は書き出すセクションごとにオフセットから切り出す）
         out_dir: 出力ディレクトリ
         dry_run: Trueの場合、ファイルを生成せずプレビューのみ
+        previous_checksums: 前回の MAP.json の part_file → checksum。指定した場合、
+            チェックサムが一致し、同じサイズのファイルが既にあるパートは書き直さない
 
     Returns:
         (セクション, 生成ファイルパス) のリスト
@@ -115,6 +125,7 @@ def generate_parts(
 
     results: List[Tuple[Section, str]] = []
     existing_files: Set[str] = set()
+    unchanged = 0
 
     for section in sections:
         # ファイル名決定
@@ -132,13 +143,89 @@ def generate_parts(
         header = generate_header(section)
 
         # コンテンツ抽出
-        content = "".join(lines[section.start_line - 1 : section.end_line])
+        if isinstance(lines, MarkdownSource):
+            content = lines.text(section.start_line, section.end_line)
+        else:
+            content = "".join(lines[section.start_line - 1 : section.end_line])
+
+        data = (header + content).encode("utf-8")
+        checksum = hashlib.sha256(data).hexdigest()
+
+        # 前回と同じ内容のパートは書き直さない
+        if (
+            previous_checksums is not None
+            and previous_checksums.get(section.part_file) == checksum
+            and _file_size(file_path) == len(data)
+        ):
+            section.checksum = checksum
+            unchanged += 1
+            results.append((section, file_path))
+            continue
 
-        # ファイル書き込み
-        if write_file(file_path, header + content):
+        # ファイル書き込み（チェックサムと一致するよう改行を変換せずに書き込む）
+        if write_bytes(file_path, data):
+            section.checksum = checksum
             logger.debug(f"Generated: {file_path}")
             results.append((section, file_path))
         else:
             logger.error(f"Failed to write: {file_path}")
 
+    if previous_checksums is not None:
+        logger.info(f"Parts: {len(results) - unchanged} written, {unchanged} unchanged")
+
     return results
+
+
+def remove_orphaned_parts(
+    out_dir: str, previous_part_files: Iterable[str], sections: List[Section]
+) -> List[str]:
+    """前回の MAP.json にあり、今回生成していないパートファイルを削除する
+
+    削除するのは parts/ 直下のファイルのみ（md2map が生成していないファイルや、
+    想定外のパスの part_file は削除しない）。
+
+    Args:
+        out_dir: 出力ディレクトリ
+        previous_part_files: 前回の MAP.json の part_file
+        sections: 今回のセクションのリスト
+
+    Returns:
+        削除したファイルのパス
+    """
+    logger = get_logger()
+    current = {section.part_file for section in sections if section.part_file}
+    removed: List[str] = []
+
+    for part_file in previous_part_files:
+        if part_file in current or not _is_part_file(part_file):
+            continue
+        file_path = os.path.join(out_dir, part_file)
+        try:
+            os.remove(file_path)
+        except FileNotFoundError:
+            continue
+        except OSError as e:
+            logger.warning(f"Failed to remove orphaned part: {file_path} ({e})")
+            continue
+        logger.debug(f"Removed: {file_path}")
+        removed.append(file_path)
+
+    return removed
+
+
+def _is_part_file(part_file: str) -> bool:
+    """parts/ 直下のファイルを指す part_file かどうか"""
+    directory, _, name = part_file.partition("/")
+    return (
+        directory == "parts"
+        and name not in ("", ".", "..")
+        and "/" not in name
+        and "\\" not in name
+    )
+
+
+def _file_size(file_path: str) -> int:
+    try:
+        return os.path.getsize(file_path)
+    except OSError:
+        return -1
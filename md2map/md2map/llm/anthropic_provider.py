@@ -7,6 +7,8 @@ from md2map.llm.config import LLMConfig
 class AnthropicProvider(BaseLLMProvider):
     """Anthropic API を使用する LLM プロバイダー"""
 
+    provider_name = "anthropic"
+
     def __init__(self, config: LLMConfig) -> None:
         try:
             import anthropic  # noqa: F401
@@ -18,7 +20,10 @@ class AnthropicProvider(BaseLLMProvider):
 
         self._model = config.model
         self._max_tokens = config.max_tokens
-        self._client = anthropic.Anthropic(api_key=config.api_key)
+        client_kwargs = {"api_key": config.api_key}
+        if config.timeout is not None:
+            client_kwargs["timeout"] = config.timeout
+        self._client = anthropic.Anthropic(**client_kwargs)
 
     def send_message(self, system_prompt: str, user_message: str) -> str:
         response = self._client.messages.create(
@@ -8,8 +8,18 @@ class BaseLLMProvider(ABC):
 
     各プロバイダー（OpenAI, Anthropic, Bedrock）はこのクラスを継承し、
     send_message を実装する。
+
+    Attributes:
+        provider_name: プロバイダー名（AI サブスプリットのキャッシュキーに使用）
     """
 
+    provider_name: str = ""
+
+    @property
+    def model_id(self) -> str:
+        """使用するモデルID（AI サブスプリットのキャッシュキーに使用）"""
+        return getattr(self, "_model", "") or ""
+
     @abstractmethod
     def send_message(self, system_prompt: str, user_message: str) -> str:
         """メッセージを送信してレスポンステキストを返す
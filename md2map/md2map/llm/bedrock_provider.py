@@ -9,6 +9,8 @@ from md2map.llm.config import LLMConfig
 class BedrockProvider(BaseLLMProvider):
     """Amazon Bedrock (Claude) を使用する LLM プロバイダー"""
 
+    provider_name = "bedrock"
+
     def __init__(self, config: LLMConfig) -> None:
         try:
             import boto3
@@ -29,6 +31,13 @@ class BedrockProvider(BaseLLMProvider):
         if config.access_key_id and config.secret_access_key:
             client_kwargs["aws_access_key_id"] = config.access_key_id
             client_kwargs["aws_secret_access_key"] = config.secret_access_key
+        if config.timeout is not None:
+            from botocore.config import Config
+
+            client_kwargs["config"] = Config(
+                connect_timeout=min(config.timeout, 10),
+                read_timeout=config.timeout,
+            )
 
         self._client = boto3.client(**client_kwargs)
 
@@ -16,6 +16,7 @@ class LLMConfig:
         secret_access_key: シークレットアクセスキー（Bedrock 用）
         region: リージョン（Bedrock 用）
         max_tokens: 最大出力トークン数
+        timeout: 1回の呼び出しのタイムアウト秒数（None の場合は SDK の既定値）
     """
 
     provider: str
@@ -25,3 +26,4 @@ class LLMConfig:
     secret_access_key: Optional[str] = None
     region: Optional[str] = None
     max_tokens: int = 800
+    timeout: Optional[float] = None
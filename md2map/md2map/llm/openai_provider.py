@@ -7,6 +7,8 @@ from md2map.llm.config import LLMConfig
 class OpenAIProvider(BaseLLMProvider):
     """OpenAI API を使用する LLM プロバイダー"""
 
+    provider_name = "openai"
+
     def __init__(self, config: LLMConfig) -> None:
         try:
             from openai import OpenAI
@@ -18,7 +20,10 @@ class OpenAIProvider(BaseLLMProvider):
 
         self._model = config.model
         self._max_tokens = config.max_tokens
-        self._client = OpenAI(api_key=config.api_key)
+        client_kwargs = {"api_key": config.api_key}
+        if config.timeout is not None:
+            client_kwargs["timeout"] = config.timeout
+        self._client = OpenAI(**client_kwargs)
 
     def send_message(self, system_prompt: str, user_message: str) -> str:
         response = self._client.chat.completions.create(
@@ -0,0 +1,146 @@
+"""AI サブスプリット結果のディスクキャッシュ
+
+同じセクションを同じ条件で再分割する場合に LLM を呼び出さずに済むよう、
+AI が返した区切り（正規化した JSON）を sha256 キーのファイルとして保存する。
+
+- キーは「セクション本文・分割数・システムプロンプト・プロバイダー・モデル」のハッシュ
+- 書き込みは一時ファイル経由でアトミックに行うため、複数プロセスで同じディレクトリを共有できる
+- 合計サイズが上限を超えたら最終アクセス時刻（mtime）の古い順に削除する
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+# キャッシュディレクトリの既定の上限バイト数
+DEFAULT_AI_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+_KEY_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+def ai_split_cache_key(
+    content: str,
+    target_parts: int,
+    system_prompt: str,
+    provider: str,
+    model: str,
+    prompt_mode: str = "full",
+) -> str:
+    """AI サブスプリットのキャッシュキー（sha256 の16進数64文字）を返す
+
+    prompt_mode には本文の送り方（全文 / 骨格と行頭の文字数）を指定する。
+    """
+    material = json.dumps(
+        [content, target_parts, system_prompt, provider, model, prompt_mode],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class AISplitCache:
+    """サイズ上限付きの AI サブスプリット結果キャッシュ
+
+    スレッドセーフ。ファイルの有無はディスクを直接参照するため、
+    他のプロセスが書き込んだ結果もそのまま利用できる。
+    """
+
+    def __init__(
+        self,
+        cache_dir: Union[str, Path],
+        max_bytes: int = DEFAULT_AI_CACHE_MAX_BYTES,
+    ) -> None:
+        """AISplitCache を初期化する
+
+        Args:
+            cache_dir: キャッシュディレクトリ（存在しなければ作成する）
+            max_bytes: キャッシュディレクトリの上限バイト数
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max(0, max_bytes)
+        self._lock = threading.Lock()
+        self._sizes: Dict[str, int] = {}
+        self._total_bytes = 0
+        self._evict(self._scan())
+
+    def get(self, key: str) -> Optional[str]:
+        """キーに対応する値を返す（存在しなければ None）"""
+        if not _KEY_PATTERN.match(key):
+            return None
+        path = self._path_for(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)  # LRU用に最終アクセス時刻を更新
+        except OSError:
+            return None
+        try:
+            return data.decode("utf-8")
+        except UnicodeDecodeError:
+            with self._lock:
+                self._forget(key, unlink=True)
+            return None
+
+    def put(self, key: str, value: str) -> None:
+        """値を保存する（書き込めない場合は何もしない）"""
+        if not _KEY_PATTERN.match(key):
+            return
+        data = value.encode("utf-8")
+        if len(data) > self.max_bytes:
+            return
+        path = self._path_for(key)
+        with self._lock:
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except OSError:
+                return
+            self._total_bytes += len(data) - self._sizes.get(key, 0)
+            self._sizes[key] = len(data)
+            if self._total_bytes > self.max_bytes:
+                # 他のプロセスの書き込み分も含めて数え直してから削除する
+                self._evict(self._scan())
+
+    def _path_for(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / key
+
+    def _scan(self) -> List[str]:
+        """ディレクトリを走査してサイズを数え直し、キーを最終アクセスの古い順に返す"""
+        found: List[Tuple[float, str, int]] = []
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            for path in self.cache_dir.glob("??/*"):
+                if not _KEY_PATTERN.match(path.name):
+                    continue
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                found.append((stat.st_mtime, path.name, stat.st_size))
+        except OSError:
+            return []
+        found.sort()
+        self._sizes = {key: size for _, key, size in found}
+        self._total_bytes = sum(self._sizes.values())
+        return [key for _, key, _ in found]
+
+    def _evict(self, oldest_first: List[str]) -> None:
+        """上限を超えていれば古い順に削除する"""
+        for key in oldest_first:
+            if self._total_bytes <= self.max_bytes:
+                break
+            self._forget(key, unlink=True)
+
+    def _forget(self, key: str, unlink: bool = False) -> None:
+        self._total_bytes -= self._sizes.pop(key, 0)
+        if unlink:
+            with contextlib.suppress(OSError):
+                self._path_for(key).unlink()
@@ -16,6 +16,7 @@ class Section:
         original_file: 元ファイル名
         parent: 親セクション
         path: 階層パス（"親 > 子" 形式）
+        children: 子セクション（出現順）
         summary: 要約（最初の段落、100文字まで）
         keywords: キーワードリスト
         links: リンク一覧 [(text, url), ...]
@@ -25,6 +26,7 @@ class Section:
         is_subsplit: サブスプリット（再分割）由来かどうか
         note: 備考（分割の由来等）
         subsplit_title: サブスプリットタイトル（表示名として使用）
+        checksum: パートファイルの SHA-256 チェックサム（書き出し時にメモリ上で算出）
     """
 
     # 基本情報
@@ -37,6 +39,7 @@ class Section:
     # 階層情報
     parent: Optional["Section"] = None
     path: str = ""
+    children: List["Section"] = field(default_factory=list, repr=False, compare=False)
 
     # 抽出情報
     summary: Optional[str] = None
@@ -50,6 +53,7 @@ class Section:
     is_subsplit: bool = False
     note: str = ""
     subsplit_title: str = ""
+    checksum: str = ""
 
     def display_name(self) -> str:
         """表示用名前を返す
@@ -0,0 +1,285 @@
+"""mmap ベースの見出しスキャナー
+
+巨大な文書でも行ごとの文字列を作らずに見出しを抽出する。ファイルを mmap し、
+見出し・コードブロック・フロントマターの判定に関わる行（行頭が # ` ~ -）だけを
+正規表現で探してデコードする。見出しは行頭のバイトオフセット付きで返し、
+パートの本文はオフセットから書き出すときに切り出す。
+
+str.splitlines() は \\n 以外（単独の \\r、\\v、\\f、\\x1c〜\\x1e、\\x85、\\u2028、\\u2029）でも
+行を分けるため、これらを含むファイルは全体をデコードして行に分け、同じ判定を行う。
+
+本文は read_file()（テキストモードの読み込み）と同じく、\\r\\n と単独の \\r を \\n に変換して返す。
+"""
+
+import mmap
+import os
+import re
+from bisect import bisect_right, insort
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+# 見出しパターン（ATX形式）
+HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.+)$")
+
+# コードブロック開始/終了パターン
+CODE_BLOCK_PATTERN = re.compile(r"^(`{3,}|~{3,})")
+
+# フロントマターパターン
+FRONTMATTER_PATTERN = re.compile(r"^---\s*$")
+
+# 見出し・コードブロックの判定に関わる行（行頭が # ` ~）と、フロントマターの終了候補の行
+# （^ と MULTILINE より、直前の改行から探す方が速い。2行目以降が対象）
+_CANDIDATE_LINE = re.compile(rb"\n([#`~][^\n]*)")
+_FRONTMATTER_LINE = re.compile(rb"\n(-[^\n]*)")
+
+# 行頭のオフセットを前方に探す際に、まとめて読み飛ばす行数とそのパターン（多い順）
+_LINE_SKIPS = tuple(
+    (count, re.compile(rb"(?:[^\n]*\n){%d}" % count)) for count in (4096, 64, 1)
+)
+
+# \n（と \r\n）以外の改行文字
+_OTHER_LINE_BREAKS = (
+    b"\x0b", b"\x0c", b"\x1c", b"\x1d", b"\x1e", b"\xc2\x85", b"\xe2\x80\xa8", b"\xe2\x80\xa9",
+)
+
+# mmap には count() がないため、一度に切り出して数える上限
+_COUNT_CHUNK = 1 << 20
+
+
+class ScannedHeading(NamedTuple):
+    """見出し（line は 1-based、offset は行頭のバイトオフセット）"""
+
+    level: int
+    title: str
+    line: int
+    offset: int
+
+
+class HeadingTracker:
+    """行を順に受け取り、フロントマターとコードブロックを除いて見出しを判定する
+
+    判定に関わらない行（行頭が # ` ~ でなく、フロントマター内では - でもない行）は
+    渡さなくても結果は変わらない。
+    """
+
+    def __init__(self, max_depth: int) -> None:
+        self.max_depth = max_depth
+        self.in_frontmatter = False
+        self._frontmatter_started = False
+        self._in_code_block = False
+        self._code_block_marker: Optional[str] = None
+
+    def feed(self, line_no: int, line: str) -> Optional[Tuple[int, str]]:
+        """見出しであれば (レベル, タイトル) を返す"""
+        stripped = line.rstrip()
+
+        # フロントマターの処理（ファイル先頭の --- で囲まれた部分）
+        if line_no == 1 and FRONTMATTER_PATTERN.match(stripped):
+            self.in_frontmatter = True
+            self._frontmatter_started = True
+            return None
+
+        if self._frontmatter_started and self.in_frontmatter:
+            if FRONTMATTER_PATTERN.match(stripped):
+                self.in_frontmatter = False
+            return None
+
+        # コードブロックの追跡
+        code_match = CODE_BLOCK_PATTERN.match(stripped)
+        if code_match:
+            marker = code_match.group(1)[0]  # ` または ~
+            if not self._in_code_block:
+                self._in_code_block = True
+                self._code_block_marker = marker
+            elif marker == self._code_block_marker:
+                self._in_code_block = False
+                self._code_block_marker = None
+            return None
+
+        if self._in_code_block:
+            return None
+
+        # 見出しマッチ
+        match = HEADING_PATTERN.match(stripped)
+        if match:
+            level = len(match.group(1))
+            if level <= self.max_depth:
+                return level, match.group(2).strip()
+        return None
+
+
+def headings_in_lines(lines: Iterable[str], max_depth: int) -> Iterator[Tuple[int, int, str]]:
+    """行リストから (行番号, レベル, タイトル) を返す"""
+    tracker = HeadingTracker(max_depth)
+    for i, line in enumerate(lines, start=1):
+        heading = tracker.feed(i, line)
+        if heading is not None:
+            yield i, heading[0], heading[1]
+
+
+def _decode(data: bytes) -> str:
+    return data.decode("utf-8", errors="replace")
+
+
+def _normalize_newlines(text: str) -> str:
+    """\\r\\n と単独の \\r を \\n に変換する（テキストモードの読み込みと同じ改行にする）"""
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+def _count(buffer: Union[mmap.mmap, bytes], sub: bytes, start: int = 0, end: int = -1) -> int:
+    """buffer[start:end] に含まれる sub の数を返す（end が負の場合は末尾まで）"""
+    if end < 0:
+        end = len(buffer)
+    if end - start <= _COUNT_CHUNK:
+        return buffer[start:end].count(sub)
+    total = 0
+    for chunk_start in range(start, end, _COUNT_CHUNK):
+        chunk_end = min(end, chunk_start + _COUNT_CHUNK)
+        # チャンクの境界をまたぐ出現も、開始位置のチャンクで数える
+        total += buffer[chunk_start : min(end, chunk_end + len(sub) - 1)].count(sub)
+    return total
+
+
+class MarkdownSource:
+    """mmap したマークダウンファイル
+
+    行番号は 1-based、終了行は inclusive で指定する。行頭のバイトオフセットは
+    見出しの走査で判明したものを起点に、必要になった行だけ前方に探して求める。
+    """
+
+    def __init__(self, file_path: Union[str, os.PathLike]) -> None:
+        """ファイルを開く
+
+        Raises:
+            OSError: ファイルを開けない場合
+        """
+        # mmap の間は開いたままにし、close() で閉じる
+        self._file = open(file_path, "rb")  # noqa: SIM115
+        self._buffer: Union[mmap.mmap, bytes] = b""
+        try:
+            if os.fstat(self._file.fileno()).st_size > 0:
+                self._buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            self._buffer = self._file.read()
+        self.size = len(self._buffer)
+
+        # \n（と \r\n）以外の改行を含む場合のみ、行リストで扱う
+        lone_cr = self._buffer.find(b"\r") != -1 and (
+            _count(self._buffer, b"\r") != _count(self._buffer, b"\r\n")
+        )
+        self._lines: Optional[List[str]] = None
+        if lone_cr or any(self._buffer.find(sep) != -1 for sep in _OTHER_LINE_BREAKS):
+            self._lines = _normalize_newlines(_decode(self._buffer[:])).splitlines(keepends=True)
+
+        if self._lines is not None:
+            self.line_count = len(self._lines)
+        else:
+            self.line_count = _count(self._buffer, b"\n")
+            if self.size and self._buffer[-1:] != b"\n":
+                self.line_count += 1
+
+        # 判明している行頭のバイトオフセット（行番号 → オフセットと、行番号の昇順のリスト）
+        self._known: Dict[int, int] = {1: 0}
+        self._known_lines: List[int] = [1]
+
+    def close(self) -> None:
+        """mmap とファイルを閉じる"""
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+        self._buffer = b""
+        self._file.close()
+
+    def __enter__(self) -> "MarkdownSource":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def headings(self, max_depth: int) -> Iterator[ScannedHeading]:
+        """見出しを文書順に返す（コードブロック・フロントマター内は除外）"""
+        if self._lines is not None:
+            # 行リストで扱う場合のオフセットはデコード後の本文を UTF-8 にした長さ
+            offset = 0
+            tracker = HeadingTracker(max_depth)
+            for i, line in enumerate(self._lines, start=1):
+                heading = tracker.feed(i, line)
+                if heading is not None:
+                    yield ScannedHeading(heading[0], heading[1], i, offset)
+                offset += len(line.encode("utf-8"))
+            return
+
+        buffer = self._buffer
+        tracker = HeadingTracker(max_depth)
+        line_no = 1
+        position = 0
+
+        def line_at(offset: int) -> int:
+            nonlocal line_no, position
+            line_no += _count(buffer, b"\n", position, offset)
+            position = offset
+            return line_no
+
+        # 1行目はフロントマターの開始の判定があるため先に渡す
+        first_end = buffer.find(b"\n")
+        if first_end == -1:
+            first_end = self.size
+        heading = tracker.feed(1, _decode(buffer[:first_end]))
+        if heading is not None:
+            yield ScannedHeading(heading[0], heading[1], 1, 0)
+
+        # フロントマター内は終了行の候補（行頭が -）だけを渡す
+        start = first_end
+        if tracker.in_frontmatter:
+            for match in _FRONTMATTER_LINE.finditer(buffer, start):
+                tracker.feed(line_at(match.start(1)), _decode(match.group(1)))
+                if not tracker.in_frontmatter:
+                    start = match.end()
+                    break
+            else:
+                return
+
+        for match in _CANDIDATE_LINE.finditer(buffer, start):
+            offset = match.start(1)
+            line = line_at(offset)
+            heading = tracker.feed(line, _decode(match.group(1)))
+            if heading is not None:
+                self._remember(line, offset)
+                yield ScannedHeading(heading[0], heading[1], line, offset)
+
+    def offset_of(self, line: int) -> int:
+        """行頭のバイトオフセットを返す（line_count + 1 はファイル末尾）"""
+        line = max(1, min(line, self.line_count + 1))
+        if line > self.line_count:
+            return self.size
+        if self._lines is not None:
+            return len("".join(self._lines[: line - 1]).encode("utf-8"))
+
+        offset = self._known.get(line)
+        if offset is not None:
+            return offset
+        known_line = self._known_lines[bisect_right(self._known_lines, line) - 1]
+        offset = self._known[known_line]
+        remaining = line - known_line
+        for count, pattern in _LINE_SKIPS:
+            while remaining >= count:
+                offset = pattern.match(self._buffer, offset).end()
+                remaining -= count
+        self._remember(line, offset)
+        return offset
+
+    def text(self, start_line: int, end_line: int) -> str:
+        """行範囲の本文を返す（改行を含む。\\r\\n は \\n に変換する）"""
+        if start_line > end_line:
+            return ""
+        if self._lines is not None:
+            return "".join(self._lines[start_line - 1 : end_line])
+        text = _decode(self._buffer[self.offset_of(start_line) : self.offset_of(end_line + 1)])
+        return text.replace("\r\n", "\n")
+
+    def _remember(self, line: int, offset: int) -> None:
+        if line in self._known:
+            return
+        self._known[line] = offset
+        if line > self._known_lines[-1]:
+            self._known_lines.append(line)
+        else:
+            insort(self._known_lines, line)
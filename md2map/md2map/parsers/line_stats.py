@@ -0,0 +1,118 @@
+"""行単位の統計索引
+
+文書の各行について文字数・単語数・日本語の有無を一度だけ求めて累積和で保持し、
+任意の行範囲の単語数/文字数を O(1) で返す。
+"""
+
+import re
+from itertools import accumulate, compress
+from operator import methodcaller
+from typing import Dict, List, Optional, Tuple
+
+# 単語数カウント時に除去する見出し記法・コードブロック記法
+_HEADING_MARK_PATTERN = re.compile(r"^#{1,6}\s+")
+_CODE_FENCE_PATTERN = re.compile(r"^(`{3,}|~{3,}).*$", re.MULTILINE)
+_CODE_FENCES = ("```", "~~~")
+
+# "#" と空白のみの行（見出し記法の除去が次の行の行頭の空白まで続く）
+_BARE_HEADING_MARK_PATTERN = re.compile(r"#{1,6}\s+")
+
+# 日本語文字（ひらがな、カタカナ、漢字）
+_JAPANESE_PATTERN = re.compile(r"[\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FFF]")
+
+
+def _line_counts(text: str) -> Tuple[int, int, int]:
+    """見出し記法を除いた行の (文字数, 単語数, 日本語を含むか) を返す"""
+    if text.startswith(_CODE_FENCES):
+        text = _CODE_FENCE_PATTERN.sub("", text)
+    words = text.split()
+    japanese = _JAPANESE_PATTERN.search(text) is not None
+    return len("".join(words)), len(words), int(japanese)
+
+
+class LineStats:
+    """文書の行ごとの統計
+
+    行番号はすべて 1-based、終了行は inclusive で指定する。
+
+    Attributes:
+        lines: 文書の行リスト
+        summary_cache: 要約の抽出結果（走査の開始行 → (要約, 走査を停止した位置)）
+    """
+
+    def __init__(self, lines: List[str]) -> None:
+        self.lines = lines
+        self.summary_cache: Dict[int, Tuple[Optional[str], int]] = {}
+
+        # 見出し記法・コードブロック記法を除いた各行（行ごとの処理は map で C 実装に任せる）
+        clean = list(lines)
+        heading_rows = list(
+            compress(range(len(lines)), map(methodcaller("startswith", "#"), lines))
+        )
+        for i in heading_rows:
+            clean[i] = _HEADING_MARK_PATTERN.sub("", clean[i])
+        fence_rows = compress(
+            range(len(clean)), map(methodcaller("startswith", _CODE_FENCES), clean)
+        )
+        for i in fence_rows:
+            clean[i] = _CODE_FENCE_PATTERN.sub("", clean[i])
+
+        # str.split() の区切りは正規表現の \s と同じ空白文字
+        words = list(map(str.split, clean))
+        chars = list(map(len, map("".join, words)))
+        word_counts = list(map(len, words))
+        japanese = list(map(bool, map(_JAPANESE_PATTERN.search, clean)))
+
+        # "#" だけの行に続く行は、行頭の空白ごと見出し記法として除去されるため
+        # 空白の後ろが行頭として扱われる。範囲の先頭から数える場合に戻せるよう差分を持つ
+        self._carry_in = bytearray(len(lines) + 1)
+        self._carry_deltas: Dict[int, Tuple[int, int, int]] = {}
+        for i in heading_rows:
+            if not _BARE_HEADING_MARK_PATTERN.fullmatch(lines[i]):
+                continue
+            for j in range(i + 1, len(lines)):
+                self._carry_in[j] = 1
+                if lines[j][:1].isspace():
+                    carried = _line_counts(lines[j].lstrip())
+                    self._carry_deltas[j] = (
+                        carried[0] - chars[j],
+                        carried[1] - word_counts[j],
+                        carried[2] - japanese[j],
+                    )
+                    chars[j], word_counts[j], japanese[j] = carried
+                if lines[j].strip():
+                    break
+
+        # 累積和（先頭は 0）
+        self._char_sums = list(accumulate(chars, initial=0))
+        self._word_sums = list(accumulate(word_counts, initial=0))
+        self._japanese_sums = list(accumulate(japanese, initial=0))
+
+    def count_words(self, start_line: int, end_line: int) -> int:
+        """行範囲の単語数/文字数を返す
+
+        日本語を含む場合は空白と改行を除いた文字数、それ以外は単語数を返す。
+        見出し記法やコードブロック記法は除いて数える。
+        """
+        start = max(start_line, 1) - 1
+        end = min(end_line, len(self.lines))
+        if start >= end:
+            return 0
+
+        chars = self._char_sums[end] - self._char_sums[start]
+        words = self._word_sums[end] - self._word_sums[start]
+        japanese = self._japanese_sums[end] - self._japanese_sums[start]
+
+        # 範囲の直前の行から続く見出し記法の除去は、範囲のテキストだけを数える場合には起きない
+        i = start
+        while i < end and self._carry_in[i]:
+            delta = self._carry_deltas.get(i)
+            if delta is not None:
+                chars -= delta[0]
+                words -= delta[1]
+                japanese -= delta[2]
+            if self.lines[i].strip():
+                break
+            i += 1
+
+        return chars if japanese > 0 else words
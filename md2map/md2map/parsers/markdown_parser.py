@@ -1,19 +1,37 @@
 """マークダウンパーサー"""
 
+import contextvars
 import json
 import math
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Dict, FrozenSet, List, Optional, Tuple
 
+from md2map.llm.split_cache import ai_split_cache_key
 from md2map.models.section import Section
+from md2map.parsers import heading_scanner
 from md2map.parsers.base_parser import BaseParser
+from md2map.parsers.heading_scanner import MarkdownSource, headings_in_lines
+from md2map.parsers.line_stats import LineStats
+from md2map.parsers.noun_extractor import extract_nouns, get_tokenizer, require_sudachi
+from md2map.parsers.prompt_skeleton import build_skeleton, estimate_tokens
+from md2map.parsers.text_tiling import (
+    depth_scores,
+    gap_similarities,
+    paragraph_vectors,
+    require_numpy,
+    select_boundaries,
+)
 from md2map.utils.file_utils import read_file
 from md2map.utils.logger import get_logger
 
 if TYPE_CHECKING:
     from md2map.llm.base_provider import BaseLLMProvider
     from md2map.llm.config import LLMConfig
+    from md2map.llm.split_cache import AISplitCache
 
 DEFAULT_AI_PROMPT_PARTS: Dict[str, str] = {
     "role": (
@@ -43,6 +61,42 @@ DEFAULT_AI_PROMPT_PARTS: Dict[str, str] = {
     ),
 }
 
+# AI モードの LLM 呼び出しの既定の同時実行数
+DEFAULT_AI_CONCURRENCY = 4
+
+# skeleton プロンプトで骨格テキストに切り替えるセクション本文の既定のトークン予算
+DEFAULT_AI_PROMPT_TOKEN_BUDGET = 2000
+
+
+@dataclass
+class _SplitTarget:
+    """再分割の対象セクションと分割条件"""
+
+    section: Section
+    split_mode: str
+    own_start: int
+    own_end: int
+    total_count: int
+    target_parts: int
+    extra_notes: str
+
+
+def _check_modes(split_mode: str, ai_prompt_mode: str) -> None:
+    if split_mode not in {"heading", "nlp", "ai", "tiling"}:
+        raise ValueError(f"Invalid split_mode: {split_mode}")
+    if ai_prompt_mode not in {"full", "skeleton"}:
+        raise ValueError(f"Invalid ai_prompt_mode: {ai_prompt_mode}")
+
+
+def _create_llm_provider(llm_config: Optional["LLMConfig"]) -> "BaseLLMProvider":
+    if llm_config is not None:
+        from md2map.llm.factory import get_llm_provider
+        return get_llm_provider(llm_config)
+    # 後方互換: 環境変数からフォールバック
+    from md2map.llm.factory import build_llm_config_from_env, get_llm_provider
+    fallback_config = build_llm_config_from_env(provider="bedrock")
+    return get_llm_provider(fallback_config)
+
 
 class MarkdownParser(BaseParser):
     """マークダウンファイルパーサー
@@ -51,10 +105,10 @@ class MarkdownParser(BaseParser):
     """
 
     # 見出しパターン（ATX形式）
-    HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.+)$")
+    HEADING_PATTERN = heading_scanner.HEADING_PATTERN
 
     # コードブロック開始/終了パターン
-    CODE_BLOCK_PATTERN = re.compile(r"^(`{3,}|~{3,})")
+    CODE_BLOCK_PATTERN = heading_scanner.CODE_BLOCK_PATTERN
 
     # リンクパターン
     LINK_PATTERN = re.compile(r"\[([^\]]+)\]\(([^)]+)\)")
@@ -63,7 +117,7 @@ class MarkdownParser(BaseParser):
     BOLD_PATTERN = re.compile(r"\*\*([^*]+)\*\*")
 
     # フロントマターパターン
-    FRONTMATTER_PATTERN = re.compile(r"^---\s*$")
+    FRONTMATTER_PATTERN = heading_scanner.FRONTMATTER_PATTERN
 
     def __init__(
         self,
@@ -74,14 +128,21 @@ class MarkdownParser(BaseParser):
         llm_provider: Optional["BaseLLMProvider"] = None,
         ai_prompt_extra_notes: Optional[str] = None,
         section_overrides: Optional[List[Dict[str, any]]] = None,
+        nlp_workers: int = 1,
+        ai_concurrency: int = DEFAULT_AI_CONCURRENCY,
+        ai_cache: Optional["AISplitCache"] = None,
+        ai_prompt_mode: str = "full",
+        ai_prompt_token_budget: int = DEFAULT_AI_PROMPT_TOKEN_BUDGET,
     ) -> None:
-        if split_mode not in {"heading", "nlp", "ai"}:
-            raise ValueError(f"Invalid split_mode: {split_mode}")
+        _check_modes(split_mode, ai_prompt_mode)
         self._nlp_tokenizer = None
+        self.nlp_workers = max(1, nlp_workers)
         self._llm_provider: Optional["BaseLLMProvider"] = None
         self._llm_config = llm_config
         if split_mode == "nlp":
             self._ensure_nlp_tokenizer()
+        if split_mode == "tiling":
+            require_numpy()
         if split_mode == "ai":
             if llm_provider is not None:
                 self._llm_provider = llm_provider
@@ -91,37 +152,57 @@ class MarkdownParser(BaseParser):
         self.split_threshold = max(1, split_threshold)
         self.max_subsections = max(1, max_subsections)
         self._ai_prompt_extra_notes = ai_prompt_extra_notes
+        self.ai_concurrency = max(1, ai_concurrency)
+        self._ai_cache = ai_cache
+        self.ai_prompt_mode = ai_prompt_mode
+        self.ai_prompt_token_budget = max(1, ai_prompt_token_budget)
+        self._prompt_tokens_lock = threading.Lock()
+        self._prompt_tokens_full = 0
+        self._prompt_tokens_sent = 0
         # セクション単位のオーバーライドマップ（start_line → 設定 dict）
         self._override_map: Dict[int, Dict[str, any]] = {}
         if section_overrides:
             for o in section_overrides:
                 self._override_map[o["start_line"]] = o
 
+    @staticmethod
+    def validate_options(
+        split_mode: str = "heading",
+        ai_prompt_mode: str = "full",
+        llm_config: Optional["LLMConfig"] = None,
+        llm_provider: Optional["BaseLLMProvider"] = None,
+        **_options: any,
+    ) -> None:
+        """パーサーを生成せずに、コンストラクタ引数と任意依存を検証する
+
+        NLP モードの辞書の読み込みなど重い初期化は行わない。
+        AI モードは LLM プロバイダーを生成して設定を確認する（通信はしない）。
+
+        Raises:
+            ValueError, RuntimeError: コンストラクタと同じ条件で失敗する場合
+        """
+        _check_modes(split_mode, ai_prompt_mode)
+        if split_mode == "nlp":
+            require_sudachi()
+        if split_mode == "tiling":
+            require_numpy()
+        if split_mode == "ai" and llm_provider is None:
+            _create_llm_provider(llm_config)
+
     def _ensure_llm_provider(self) -> None:
         """LLM provider が未初期化なら初期化する（遅延初期化）"""
         if self._llm_provider is not None:
             return
-        if self._llm_config is not None:
-            from md2map.llm.factory import get_llm_provider
-            self._llm_provider = get_llm_provider(self._llm_config)
-        else:
-            # 後方互換: 環境変数からフォールバック
-            from md2map.llm.factory import build_llm_config_from_env, get_llm_provider
-            fallback_config = build_llm_config_from_env(provider="bedrock")
-            self._llm_provider = get_llm_provider(fallback_config)
+        self._llm_provider = _create_llm_provider(self._llm_config)
 
     def _ensure_nlp_tokenizer(self) -> None:
-        """NLP tokenizer が未初期化なら初期化する（遅延初期化）"""
+        """NLP tokenizer が未初期化なら初期化する（遅延初期化）
+
+        辞書はプロセス共通のものを使うため、パーサーごとに読み込み直さない。
+        """
         if self._nlp_tokenizer is not None:
             return
-        try:
-            from sudachipy import dictionary
-        except ImportError as exc:
-            raise RuntimeError(
-                "NLP mode requires optional dependencies (sudachipy, sudachidict-core). "
-                "Install with: pip install md2map[nlp]"
-            ) from exc
-        self._nlp_tokenizer = dictionary.Dictionary().create()
+        self._nlp_tokenizer = get_tokenizer()
 
     def _resolve_settings(self, section: Section) -> Dict[str, any]:
         """セクションに適用する設定を解決する
@@ -171,6 +252,38 @@ class MarkdownParser(BaseParser):
             for s in sections
         ]
 
+    def extract_headings_from_file(
+        self, file_path: str, max_depth: int = 6
+    ) -> List[Dict[str, any]]:
+        """ファイルから見出し一覧を取得する（extract_headings() と同じ結果）
+
+        ファイル全体を行に分けず、mmap したファイルから見出しの行だけを探す。
+        estimated_chars はセクションごとに本文を切り出して数える。
+
+        Args:
+            file_path: 入力ファイルパス
+            max_depth: 最大見出し深さ（1-6、デフォルト: 6）
+
+        Returns:
+            見出し情報のリスト [{"title", "level", "start_line", "end_line", "estimated_chars"}]
+
+        Raises:
+            OSError: ファイルを読み込めない場合
+        """
+        with MarkdownSource(file_path) as source:
+            headings = list(source.headings(max_depth))
+            result: List[Dict[str, any]] = []
+            for i, heading in enumerate(headings):
+                end_line = headings[i + 1].line - 1 if i + 1 < len(headings) else source.line_count
+                result.append({
+                    "title": heading.title,
+                    "level": heading.level,
+                    "start_line": heading.line,
+                    "end_line": end_line,
+                    "estimated_chars": len(source.text(heading.line, end_line)),
+                })
+            return result
+
     def parse(
         self, file_path: str, max_depth: int = 3
     ) -> Tuple[List[Section], List[str]]:
@@ -194,6 +307,7 @@ class MarkdownParser(BaseParser):
             return [], warnings
 
         file_name = Path(file_path).name
+        stats = LineStats(lines)
 
         # 見出し抽出
         headings = self._extract_headings(lines, max_depth)
@@ -213,7 +327,7 @@ class MarkdownParser(BaseParser):
                 original_file=file_name,
                 path=Path(file_path).stem,
             )
-            self._extract_section_info(section, lines)
+            self._extract_section_info(section, stats)
             return [section], warnings
 
         # 見出しレベルのスキップをチェック
@@ -229,11 +343,11 @@ class MarkdownParser(BaseParser):
             for o in self._override_map.values()
         )
         if self.split_mode != "heading" or has_non_heading_override:
-            sections = self._refine_sections(sections, lines)
+            sections = self._refine_sections(sections, stats)
 
         # 各セクションの追加情報を抽出
         for section in sections:
-            self._extract_section_info(section, lines)
+            self._extract_section_info(section, stats)
 
         return sections, warnings
 
@@ -249,53 +363,10 @@ class MarkdownParser(BaseParser):
         Returns:
             見出し情報のリスト [{"level": int, "title": str, "line": int}, ...]
         """
-        headings: List[Dict[str, any]] = []
-        in_code_block = False
-        code_block_marker: Optional[str] = None
-        in_frontmatter = False
-        frontmatter_started = False
-
-        for i, line in enumerate(lines, start=1):
-            stripped = line.rstrip()
-
-            # フロントマターの処理（ファイル先頭の --- で囲まれた部分）
-            if i == 1 and self.FRONTMATTER_PATTERN.match(stripped):
-                in_frontmatter = True
-                frontmatter_started = True
-                continue
-
-            if frontmatter_started and in_frontmatter:
-                if self.FRONTMATTER_PATTERN.match(stripped):
-                    in_frontmatter = False
-                continue
-
-            # コードブロックの追跡
-            code_match = self.CODE_BLOCK_PATTERN.match(stripped)
-            if code_match:
-                marker = code_match.group(1)[0]  # ` または ~
-                if not in_code_block:
-                    in_code_block = True
-                    code_block_marker = marker
-                elif marker == code_block_marker:
-                    in_code_block = False
-                    code_block_marker = None
-                continue
-
-            if in_code_block:
-                continue
-
-            # 見出しマッチ
-            match = self.HEADING_PATTERN.match(stripped)
-            if match:
-                level = len(match.group(1))
-                if level <= max_depth:
-                    headings.append({
-                        "level": level,
-                        "title": match.group(2).strip(),
-                        "line": i,
-                    })
-
-        return headings
+        return [
+            {"level": level, "title": title, "line": line}
+            for line, level, title in headings_in_lines(lines, max_depth)
+        ]
 
     def _check_level_skip(self, headings: List[Dict[str, any]]) -> List[str]:
         """見出しレベルのスキップをチェックする
@@ -360,7 +431,7 @@ class MarkdownParser(BaseParser):
         return sections
 
     def _build_hierarchy(self, sections: List[Section]) -> None:
-        """セクションの階層関係を構築する
+        """セクションの階層関係（親・子・階層パス）を構築する
 
         Args:
             sections: セクションのリスト（変更される）
@@ -368,33 +439,47 @@ class MarkdownParser(BaseParser):
         stack: List[Section] = []
 
         for section in sections:
-            # スタックから現在のレベル以上のものを削除
-            while stack and stack[-1].level >= section.level:
-                stack.pop()
-
-            # 親の設定
-            if stack:
-                section.parent = stack[-1]
-                section.path = f"{stack[-1].path} > {section.display_name()}"
-            else:
-                section.path = section.display_name()
+            self._attach_to_hierarchy(section, stack)
 
-            stack.append(section)
+    def _attach_to_hierarchy(self, section: Section, stack: List[Section]) -> None:
+        """スタック上の直近の祖先にセクションを子として追加する
 
-    def _extract_section_info(self, section: Section, lines: List[str]) -> None:
+        Args:
+            section: 追加するセクション（変更される）
+            stack: 祖先セクションのスタック（変更される）
+        """
+        # スタックから現在のレベル以上のものを削除
+        while stack and stack[-1].level >= section.level:
+            stack.pop()
+
+        # 親の設定
+        if stack:
+            section.parent = stack[-1]
+            section.path = f"{stack[-1].path} > {section.display_name()}"
+            stack[-1].children.append(section)
+        else:
+            section.parent = None
+            section.path = section.display_name()
+
+        stack.append(section)
+
+    def _extract_section_info(self, section: Section, stats: LineStats) -> None:
         """セクションの追加情報（要約、キーワード、リンク）を抽出する
 
         Args:
             section: セクション（変更される）
-            lines: ファイルの行リスト
+            stats: 文書の行統計
         """
-        # セクションの行を取得
-        section_lines = lines[section.start_line - 1 : section.end_line]
-        section_text = "".join(section_lines)
+        start, end = section.start_line, section.end_line
 
         # 要約抽出（見出し直後の段落）
-        skip_first = self.HEADING_PATTERN.match(section_lines[0].rstrip()) is not None
-        section.summary = self._extract_summary(section_lines, skip_first_line=skip_first)
+        skip_first = (
+            start <= len(stats.lines)
+            and self.HEADING_PATTERN.match(stats.lines[start - 1].rstrip()) is not None
+        )
+        section.summary = self._section_summary(section, stats, skip_first_line=skip_first)
+
+        section_text = "".join(stats.lines[start - 1 : end])
 
         # リンク抽出
         section.links = self.LINK_PATTERN.findall(section_text)
@@ -403,41 +488,69 @@ class MarkdownParser(BaseParser):
         section.keywords = list(set(self.BOLD_PATTERN.findall(section_text)))
 
         # 単語数カウント
-        section.word_count = self._count_words(section_text)
+        section.word_count = stats.count_words(start, end)
+
+    def _section_summary(
+        self, section: Section, stats: LineStats, skip_first_line: bool = True
+    ) -> Optional[str]:
+        """セクションの要約を返す
+
+        要約は走査の開始行で決まるため、開始行ごとに文書末尾まで（段落の終わりで停止）
+        走査した結果を再利用する。走査がセクションの終了行より後で停止した場合のみ
+        セクションの範囲で改めて走査する。
+        """
+        first = section.start_line + 1 if skip_first_line else section.start_line
+
+        cached = stats.summary_cache.get(first)
+        if cached is None:
+            cached = self._extract_summary(stats.lines, first - 1, len(stats.lines))
+            stats.summary_cache[first] = cached
+
+        summary, stop = cached
+        if section.end_line >= stop:
+            return summary
+        return self._extract_summary(stats.lines, first - 1, section.end_line)[0]
 
-    def _extract_summary(self, lines: List[str], skip_first_line: bool = True) -> Optional[str]:
+    def _extract_summary(
+        self, lines: List[str], start: int, end: int
+    ) -> Tuple[Optional[str], int]:
         """最初の段落を要約として抽出する（100文字まで）
 
         Args:
-            lines: セクションの行リスト
+            lines: ファイルの行リスト
+            start: 走査の開始位置（0-based）
+            end: 走査の終了位置（0-based, exclusive）
 
         Returns:
-            要約文字列（100文字以内）、なければNone
+            (要約文字列（100文字以内、なければNone）, 走査を停止した位置（0-based）)
         """
         content_started = False
         summary_lines: List[str] = []
 
-        source_lines = lines[1:] if skip_first_line else lines
-        for line in source_lines:
-            stripped = line.strip()
+        stop = end
+        for index in range(start, end):
+            stripped = lines[index].strip()
 
             if not stripped:
                 if content_started:
+                    stop = index
                     break  # 空行で段落終了
                 continue
 
             if stripped.startswith("#"):
+                stop = index
                 break  # 次の見出しで終了
 
             # コードブロックの開始は無視
             if self.CODE_BLOCK_PATTERN.match(stripped):
+                stop = index
                 break
 
             content_started = True
             summary_lines.append(stripped)
 
         if not summary_lines:
-            return None
+            return None, stop
 
         summary = " ".join(summary_lines)
 
@@ -447,37 +560,9 @@ class MarkdownParser(BaseParser):
         if len(summary) > 100:
             summary = summary[:97] + "..."
 
-        return summary
-
-    def _count_words(self, text: str) -> int:
-        """単語数/文字数をカウントする
-
-        日本語を含む場合は文字数、それ以外は単語数をカウントする。
-
-        Args:
-            text: カウント対象のテキスト
-
-        Returns:
-            単語数または文字数
-        """
-        # 見出し記法やコードブロック記法を除去
-        clean_text = re.sub(r"^#{1,6}\s+", "", text, flags=re.MULTILINE)
-        clean_text = re.sub(r"^(`{3,}|~{3,}).*$", "", clean_text, flags=re.MULTILINE)
-
-        # 日本語文字（ひらがな、カタカナ、漢字）が含まれるかチェック
-        has_japanese = bool(re.search(r"[\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FFF]", clean_text))
-
-        if has_japanese:
-            # 日本語: 空白と改行を除いた文字数
-            return len(re.sub(r"\s", "", clean_text))
-        else:
-            # 英語: 単語数
-            words = clean_text.split()
-            return len(words)
+        return summary, stop
 
-    def _get_own_content_range(
-        self, section: Section, sections: List[Section]
-    ) -> Tuple[int, int]:
+    def _get_own_content_range(self, section: Section) -> Tuple[int, int]:
         """セクションの自身コンテンツ範囲を返す
 
         子セクションを持つ場合は、見出し行の次〜最初の子セクションの開始行の前行まで。
@@ -489,120 +574,277 @@ class MarkdownParser(BaseParser):
         own_start = section.start_line + 1
         own_end = section.end_line
 
-        for s in sections:
-            if s.parent is section:
-                own_end = s.start_line - 1
-                break
+        if section.children:
+            own_end = section.children[0].start_line - 1
 
         return own_start, own_end
 
-    def _refine_sections(self, sections: List[Section], lines: List[str]) -> List[Section]:
-        """セクションを再分割してサブスプリットを挿入する"""
-        refined: List[Section] = []
-
-        for section in sections:
-            # セクションごとに設定を解決
-            settings = self._resolve_settings(section)
-            split_mode = settings["split_mode"]
-            threshold = max(1, settings["split_threshold"])
-            max_subs = max(1, settings["max_subsections"])
-            extra_notes = settings.get("ai_prompt_extra_notes", "")
-
-            if max_subs <= 1 or split_mode == "heading":
-                refined.append(section)
-                continue
+    def _refine_sections(self, sections: List[Section], stats: LineStats) -> List[Section]:
+        """セクションを再分割してサブスプリットを挿入する
 
-            # 自身のコンテンツ範囲を算出
-            own_start, own_end = self._get_own_content_range(section, sections)
+        AI モードの LLM 呼び出しは対象セクションをすべて集めてから並行に実行し、
+        NLP モードの名詞抽出と tiling モードの境界の計算は対象セクションの段落を
+        まとめて行ったうえで、結果を文書順に組み立てる。各セクションの自身コンテンツ範囲は
+        _build_sections で構築した子セクションから求めるため、子の付け替えより前にすべて算出する。
+        """
+        targets = [self._split_target(section, stats) for section in sections]
 
-            if own_start > own_end:
-                refined.append(section)
-                continue
+        ai_targets = {
+            i: target for i, target in enumerate(targets)
+            if target is not None and target.split_mode == "ai"
+        }
+        if ai_targets:
+            self._ensure_llm_provider()
+        self._prompt_tokens_full = self._prompt_tokens_sent = 0
+        ai_ranges = dict(zip(
+            ai_targets, self._select_chunks_ai_concurrently(list(ai_targets.values()), stats)
+        ))
+        if self._prompt_tokens_full:
+            saved = self._prompt_tokens_full - self._prompt_tokens_sent
+            get_logger().info(
+                f"AI skeleton prompts: ~{self._prompt_tokens_full} -> "
+                f"~{self._prompt_tokens_sent} input tokens (~{saved} saved)"
+            )
 
-            own_text = "".join(lines[own_start - 1 : own_end])
-            total_count = self._count_words(own_text)
+        nlp_targets = {
+            i: target for i, target in enumerate(targets)
+            if target is not None and target.split_mode == "nlp"
+        }
+        if nlp_targets:
+            self._ensure_nlp_tokenizer()
+        nlp_paragraphs = {
+            i: self._split_paragraphs(stats.lines, target.own_start, target.own_end)
+            for i, target in nlp_targets.items()
+        }
+        nlp_terms = self._extract_paragraph_terms(nlp_paragraphs, stats)
 
-            if total_count < threshold:
-                refined.append(section)
-                continue
+        tiling_paragraphs = {
+            i: self._split_paragraphs(stats.lines, target.own_start, target.own_end)
+            for i, target in enumerate(targets)
+            if target is not None and target.split_mode == "tiling"
+        }
+        tiling_boundaries = self._select_boundaries_tiling(tiling_paragraphs, targets, stats)
 
-            if split_mode == "ai":
-                self._ensure_llm_provider()
-                # AI モード: 行番号ベース
-                content_lines_count = own_end - own_start + 1
-                if content_lines_count < 2:
-                    refined.append(section)
-                    continue
-
-                target_parts = min(
-                    max_subs,
-                    max(2, math.ceil(total_count / threshold)),
-                )
+        refined: List[Section] = []
+        stack: List[Section] = []
 
-                line_ranges, _ = self._select_chunks_ai(
-                    section, lines, own_start, own_end, target_parts,
-                    extra_notes=extra_notes,
-                )
-                if not line_ranges:
-                    line_ranges = self._chunk_lines_by_threshold(
-                        lines, own_start, own_end, total_count, target_parts
-                    )
-
-                if len(line_ranges) < 2:
-                    refined.append(section)
-                    continue
-
-                refined.append(section)
-                # 最初のサブスプリットに見出し行を含める
-                line_ranges[0] = (section.start_line, line_ranges[0][1])
-                virtual_sections = self._build_virtual_sections(
-                    section, line_ranges, split_mode=split_mode,
+        for i, (section, target) in enumerate(zip(sections, targets)):
+            if target is None:
+                virtual_sections: List[Section] = []
+            elif target.split_mode == "ai":
+                virtual_sections = self._split_section_ai(target, stats, ai_ranges[i])
+            elif target.split_mode == "tiling":
+                virtual_sections = self._split_section_paragraphs(
+                    target, stats, tiling_paragraphs[i], tiling_boundaries.get(i, [])
                 )
-                refined.extend(virtual_sections)
-
-            elif split_mode == "nlp":
-                self._ensure_nlp_tokenizer()
-                # NLP モード: 段落ベース
-                paragraphs = self._split_paragraphs(lines, own_start, own_end)
-                if len(paragraphs) < 2:
-                    refined.append(section)
-                    continue
-
-                target_parts = min(
-                    max_subs,
-                    max(2, math.ceil(total_count / threshold)),
+            else:
+                virtual_sections = self._split_section_nlp(
+                    target, stats, nlp_paragraphs[i], nlp_terms.get(i)
                 )
-                target_parts = min(target_parts, len(paragraphs))
 
-                boundaries = self._select_boundaries_nlp(
-                    section, lines, paragraphs, target_parts
-                )
-                if boundaries:
-                    chunks = self._chunks_from_boundaries(paragraphs, boundaries)
-                else:
-                    chunks = self._chunk_paragraphs_by_threshold(
-                        paragraphs, lines, total_count, target_parts
-                    )
-
-                if len(chunks) < 2:
-                    refined.append(section)
-                    continue
-
-                refined.append(section)
-                # 段落チャンクを行範囲タプルに変換
-                line_ranges = [
-                    (chunk[0][0], chunk[-1][1]) for chunk in chunks
-                ]
-                # 最初のサブスプリットに見出し行を含める
-                line_ranges[0] = (section.start_line, line_ranges[0][1])
-                virtual_sections = self._build_virtual_sections(
-                    section, line_ranges, split_mode=split_mode,
-                )
-                refined.extend(virtual_sections)
+            section.children = []
+            self._attach_to_hierarchy(section, stack)
+            refined.append(section)
+            for virtual in virtual_sections:
+                self._attach_to_hierarchy(virtual, stack)
+                refined.append(virtual)
 
-        self._build_hierarchy(refined)
         return refined
 
+    def _split_target(self, section: Section, stats: LineStats) -> Optional[_SplitTarget]:
+        """再分割の対象なら自身コンテンツの範囲と分割数を返す（対象外は None）"""
+        # セクションごとに設定を解決
+        settings = self._resolve_settings(section)
+        split_mode = settings["split_mode"]
+        threshold = max(1, settings["split_threshold"])
+        max_subs = max(1, settings["max_subsections"])
+
+        if max_subs <= 1 or split_mode not in ("ai", "nlp", "tiling"):
+            return None
+
+        # 自身のコンテンツ範囲を算出
+        own_start, own_end = self._get_own_content_range(section)
+
+        if own_start > own_end:
+            return None
+
+        total_count = stats.count_words(own_start, own_end)
+
+        if total_count < threshold:
+            return None
+
+        # AI モード: 行番号ベースのため 2 行以上必要
+        if split_mode == "ai" and own_end - own_start + 1 < 2:
+            return None
+
+        return _SplitTarget(
+            section=section,
+            split_mode=split_mode,
+            own_start=own_start,
+            own_end=own_end,
+            total_count=total_count,
+            target_parts=min(max_subs, max(2, math.ceil(total_count / threshold))),
+            extra_notes=settings.get("ai_prompt_extra_notes", ""),
+        )
+
+    def _select_chunks_ai_concurrently(
+        self, targets: List[_SplitTarget], stats: LineStats
+    ) -> List[List[Tuple[int, int]]]:
+        """AI モードの対象セクションの LLM 呼び出しを並行に実行する
+
+        同時実行数は ai_concurrency まで。結果は targets と同じ順序で返す。
+        """
+        def select(target: _SplitTarget) -> List[Tuple[int, int]]:
+            line_ranges, _ = self._select_chunks_ai(
+                target.section, stats.lines, target.own_start, target.own_end,
+                target.target_parts, extra_notes=target.extra_notes,
+            )
+            return line_ranges
+
+        if self.ai_concurrency <= 1 or len(targets) <= 1:
+            return [select(target) for target in targets]
+
+        workers = min(self.ai_concurrency, len(targets))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="md2map-ai") as executor:
+            # 呼び出し元のコンテキスト変数（タイムアウト等）を各スレッドに引き継ぐ
+            futures = [
+                executor.submit(contextvars.copy_context().run, select, target)
+                for target in targets
+            ]
+            return [future.result() for future in futures]
+
+    def _split_section_ai(
+        self,
+        target: _SplitTarget,
+        stats: LineStats,
+        line_ranges: List[Tuple[int, int]],
+    ) -> List[Section]:
+        """AI の区切り（失敗時は行数ベースの分割）からサブスプリットを生成する"""
+        if not line_ranges:
+            line_ranges = self._chunk_lines_by_threshold(
+                stats.lines, target.own_start, target.own_end,
+                target.total_count, target.target_parts,
+            )
+
+        if len(line_ranges) < 2:
+            return []
+
+        section = target.section
+        # 最初のサブスプリットに見出し行を含める
+        line_ranges = list(line_ranges)
+        line_ranges[0] = (section.start_line, line_ranges[0][1])
+        return self._build_virtual_sections(section, line_ranges, split_mode="ai")
+
+    def _extract_paragraph_terms(
+        self, paragraphs: Dict[int, List[Tuple[int, int]]], stats: LineStats
+    ) -> Dict[int, List[FrozenSet[str]]]:
+        """NLP モードの対象セクションの段落ごとの名詞集合を求める
+
+        全セクションの段落を1回の抽出にまとめる（キャッシュ済みの段落はトークナイズしない）。
+        トークナイザーがない場合は空の dict を返す（閾値ベースの分割になる）。
+        """
+        if self._nlp_tokenizer is None:
+            return {}
+        targets = {i: paras for i, paras in paragraphs.items() if len(paras) >= 2}
+        texts = [
+            "".join(stats.lines[start - 1 : end])
+            for paras in targets.values()
+            for start, end in paras
+        ]
+        if not texts:
+            return {}
+
+        nouns = extract_nouns(texts, workers=self.nlp_workers)
+        terms: Dict[int, List[FrozenSet[str]]] = {}
+        offset = 0
+        for i, paras in targets.items():
+            terms[i] = nouns[offset : offset + len(paras)]
+            offset += len(paras)
+        return terms
+
+    def _split_section_nlp(
+        self,
+        target: _SplitTarget,
+        stats: LineStats,
+        paragraphs: List[Tuple[int, int]],
+        para_terms: Optional[List[FrozenSet[str]]],
+    ) -> List[Section]:
+        """NLP（段落ベース）でサブスプリットを生成する"""
+        if len(paragraphs) < 2:
+            return []
+
+        target_parts = min(target.target_parts, len(paragraphs))
+
+        boundaries = (
+            self._select_boundaries_nlp(para_terms, target_parts) if para_terms else []
+        )
+        return self._split_section_paragraphs(target, stats, paragraphs, boundaries)
+
+    def _split_section_paragraphs(
+        self,
+        target: _SplitTarget,
+        stats: LineStats,
+        paragraphs: List[Tuple[int, int]],
+        boundaries: List[int],
+    ) -> List[Section]:
+        """段落の境界（なければ閾値ベースの分割）からサブスプリットを生成する"""
+        section = target.section
+        if len(paragraphs) < 2:
+            return []
+
+        target_parts = min(target.target_parts, len(paragraphs))
+
+        if boundaries:
+            chunks = self._chunks_from_boundaries(paragraphs, boundaries)
+        else:
+            chunks = self._chunk_paragraphs_by_threshold(
+                paragraphs, stats, target.total_count, target_parts
+            )
+
+        if len(chunks) < 2:
+            return []
+
+        # 段落チャンクを行範囲タプルに変換
+        line_ranges = [
+            (chunk[0][0], chunk[-1][1]) for chunk in chunks
+        ]
+        # 最初のサブスプリットに見出し行を含める
+        line_ranges[0] = (section.start_line, line_ranges[0][1])
+        return self._build_virtual_sections(section, line_ranges, split_mode=target.split_mode)
+
+    def _select_boundaries_tiling(
+        self,
+        paragraphs: Dict[int, List[Tuple[int, int]]],
+        targets: List[Optional[_SplitTarget]],
+        stats: LineStats,
+    ) -> Dict[int, List[int]]:
+        """tiling モードの対象セクションの段落の境界を TextTiling で選ぶ
+
+        全セクションの段落の TF-IDF ベクトル（IDF は文書内の対象段落全体で求める）と
+        ブロック類似度を1回で計算し、セクションごとに深さスコアの大きい位置を選ぶ。
+        """
+        if not paragraphs:
+            return {}
+        require_numpy()
+
+        texts = [
+            "".join(stats.lines[start - 1 : end])
+            for paras in paragraphs.values()
+            for start, end in paras
+        ]
+        ranges: List[Tuple[int, int]] = []
+        offset = 0
+        for paras in paragraphs.values():
+            ranges.append((offset, offset + len(paras)))
+            offset += len(paras)
+
+        similarities = gap_similarities(paragraph_vectors(texts), ranges)
+        boundaries: Dict[int, List[int]] = {}
+        for (i, paras), sims in zip(paragraphs.items(), similarities):
+            target_parts = min(targets[i].target_parts, len(paras))
+            boundaries[i] = select_boundaries(depth_scores(sims), target_parts)
+        return boundaries
+
     def _split_paragraphs(
         self, lines: List[str], start_line: int, end_line: int
     ) -> List[Tuple[int, int]]:
@@ -640,15 +882,12 @@ class MarkdownParser(BaseParser):
     def _chunk_paragraphs_by_threshold(
         self,
         paragraphs: List[Tuple[int, int]],
-        lines: List[str],
+        stats: LineStats,
         total_count: int,
         target_parts: int,
     ) -> List[List[Tuple[int, int]]]:
         """閾値ベースで段落を均等に分割する"""
-        para_counts = [
-            self._count_words("".join(lines[s - 1 : e]))
-            for s, e in paragraphs
-        ]
+        para_counts = [stats.count_words(s, e) for s, e in paragraphs]
         target_per_part = max(1, math.ceil(total_count / target_parts))
 
         chunks: List[List[Tuple[int, int]]] = []
@@ -673,26 +912,9 @@ class MarkdownParser(BaseParser):
         return chunks
 
     def _select_boundaries_nlp(
-        self,
-        section: Section,
-        lines: List[str],
-        paragraphs: List[Tuple[int, int]],
-        target_parts: int,
+        self, para_terms: List[FrozenSet[str]], target_parts: int
     ) -> List[int]:
-        """NLP（Sudachi）で境界候補を選ぶ"""
-        if self._nlp_tokenizer is None:
-            return []
-
-        para_terms: List[set[str]] = []
-        for start, end in paragraphs:
-            text = "".join(lines[start - 1 : end])
-            nouns = {
-                m.surface()
-                for m in self._nlp_tokenizer.tokenize(text)
-                if m.part_of_speech()[0] == "名詞"
-            }
-            para_terms.append(nouns)
-
+        """隣接する段落の名詞集合の類似度が低い位置を境界候補に選ぶ"""
         scores: List[Tuple[int, float]] = []
         for i in range(len(para_terms) - 1):
             a = para_terms[i]
@@ -761,32 +983,97 @@ class MarkdownParser(BaseParser):
 
         AI には 1〜N の相対行番号付きテキストを送信し、
         レスポンスの相対行番号を元ファイルの行番号に変換して返す。
+        ai_prompt_mode が "skeleton" の場合、本文がトークン予算を超えるセクションには
+        行頭と構造記法だけの骨格テキストを送る（行番号は本文と同じ）。
+        ai_cache が指定されていれば、妥当な結果のみ保存して次回以降の呼び出しを省く。
         """
         if self._llm_provider is None:
             return [], None
 
-        content = "".join(lines[own_start - 1 : own_end])
-        numbered_text = self._add_line_numbers(content)
+        section_lines = lines[own_start - 1 : own_end]
+        content = "".join(section_lines)
         total_lines = own_end - own_start + 1
-
         system_text = self._build_ai_system_prompt(extra_notes=extra_notes)
+        logger = get_logger()
+
+        # skeleton モードでは、本文がトークン予算を超える場合のみ骨格テキストを送る
+        skeleton = None
+        prompt_mode = "full"
+        if self.ai_prompt_mode == "skeleton":
+            full_tokens = estimate_tokens(content)
+            if full_tokens > self.ai_prompt_token_budget:
+                skeleton, head_chars, skeleton_tokens = build_skeleton(
+                    section_lines, self.ai_prompt_token_budget
+                )
+                prompt_mode = f"skeleton:{head_chars}"
+
+        # 同じ本文・条件での分割結果がキャッシュにあれば LLM を呼び出さない
+        cache_key = None
+        if self._ai_cache is not None:
+            cache_key = ai_split_cache_key(
+                content, target_parts, system_text,
+                getattr(self._llm_provider, "provider_name", "") or "",
+                getattr(self._llm_provider, "model_id", "") or "",
+                prompt_mode=prompt_mode,
+            )
+            cached = self._ai_cache.get(cache_key)
+            if cached is not None:
+                items = self._parse_ai_ranges(cached, total_lines)
+                if items:
+                    logger.debug(f"AI subsplit cache hit: {section.display_name()}")
+                    return self._to_file_ranges(items, own_start), None
+
+        if skeleton is None:
+            numbered_text = self._add_line_numbers(content)
+            skeleton_note = ""
+        else:
+            numbered_text = skeleton
+            skeleton_note = (
+                f"各行は先頭 {head_chars} 文字までの骨格です"
+                f"（見出し・リスト・引用・表・コードブロックの記法は残し、"
+                f"以降は「…」で省略。空行は段落の区切り）。\n"
+            )
+            self._record_prompt_tokens(full_tokens, skeleton_tokens)
+            logger.debug(
+                f"AI skeleton prompt: {section.display_name()} "
+                f"~{full_tokens} -> ~{skeleton_tokens} tokens"
+            )
         user_text = (
             f"以下のテキストを、意味的なまとまりを保ちつつ"
             f"最大 {target_parts} つに区切ってください。\n"
             f"テキストは全 {total_lines} 行です。"
             f"最後の区間は行 {total_lines} で終了してください"
             f"（すべての行を漏れなくカバー）。\n"
+            f"{skeleton_note}"
             f"\n"
             f"{numbered_text}"
         )
 
-        logger = get_logger()
         try:
             response_text = self._llm_provider.send_message(system_text, user_text)
         except Exception as exc:
             logger.warning(f"AI API call failed: {exc}")
             return [], None
 
+        items = self._parse_ai_ranges(response_text, total_lines)
+        if not items:
+            return [], None
+
+        if cache_key is not None:
+            self._ai_cache.put(cache_key, json.dumps(
+                [{"start_line": sl, "end_line": el} for sl, el in items]
+            ))
+
+        return self._to_file_ranges(items, own_start), None
+
+    def _record_prompt_tokens(self, full_tokens: int, sent_tokens: int) -> None:
+        """骨格テキストで削減した入力トークン数（推定）を集計する"""
+        with self._prompt_tokens_lock:
+            self._prompt_tokens_full += full_tokens
+            self._prompt_tokens_sent += sent_tokens
+
+    def _parse_ai_ranges(self, response_text: str, total_lines: int) -> List[Tuple[int, int]]:
+        """AI のレスポンスから 1-based 相対行番号の区間を取り出す（不正な場合は空リスト）"""
         # LLM が ```json ... ``` で囲んで返す場合に対応
         stripped = response_text.strip()
         if stripped.startswith("```"):
@@ -799,7 +1086,7 @@ class MarkdownParser(BaseParser):
         try:
             data = json.loads(response_text)
         except json.JSONDecodeError:
-            return [], None
+            return []
 
         # LLM のレスポンスは 1-based 相対行番号
         items: List[Tuple[int, int]] = []
@@ -814,24 +1101,23 @@ class MarkdownParser(BaseParser):
             items.append((sl, el))
 
         if not items:
-            return [], None
+            return []
 
         items.sort(key=lambda x: x[0])
         # Validate coverage and non-overlap (1-based relative)
         if items[0][0] != 1 or items[-1][1] != total_lines:
-            return [], None
+            return []
         for i in range(len(items) - 1):
             if items[i][1] + 1 != items[i + 1][0]:
-                return [], None
+                return []
 
-        # 相対行番号を元ファイルの行番号に変換
-        line_ranges: List[Tuple[int, int]] = []
-        for sl, el in items:
-            actual_start = own_start + sl - 1
-            actual_end = own_start + el - 1
-            line_ranges.append((actual_start, actual_end))
+        return items
 
-        return line_ranges, None
+    def _to_file_ranges(
+        self, items: List[Tuple[int, int]], own_start: int
+    ) -> List[Tuple[int, int]]:
+        """相対行番号の区間を元ファイルの行番号に変換する"""
+        return [(own_start + sl - 1, own_start + el - 1) for sl, el in items]
 
     def _chunk_lines_by_threshold(
         self,
@@ -882,7 +1168,10 @@ class MarkdownParser(BaseParser):
                 end_line=end_line,
                 original_file=section.original_file,
                 is_subsplit=True,
-                note=f"Subsplit of {section.id or section.title} (L{start_line}\u2013L{end_line}, {effective_mode} threshold split)",
+                note=(
+                    f"Subsplit of {section.id or section.title} "
+                    f"(L{start_line}\u2013L{end_line}, {effective_mode} threshold split)"
+                ),
                 subsplit_title=subsplit_title,
             )
             virtual_sections.append(virtual)
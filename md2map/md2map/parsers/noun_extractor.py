@@ -0,0 +1,202 @@
+"""NLP モード用の名詞抽出
+
+Sudachi の辞書はプロセスで一度だけ読み込み、トークナイザーはスレッドごとに辞書から生成する
+（トークナイザーはスレッドセーフではないため）。段落ごとの名詞集合は本文のハッシュをキーに
+キャッシュし、未抽出の段落はまとめて（入力長の上限内で連結して）トークナイズする。
+段落数が多い場合はワーカープロセスに分散できる。
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+# Sudachi の入力長の上限（49149 バイト）に余裕を持たせた1回のトークナイズの上限
+_BATCH_MAX_BYTES = 40000
+
+# 名詞集合のキャッシュの上限件数（段落単位）
+_NOUN_CACHE_MAX_ENTRIES = 100000
+
+# ワーカープロセスに分散する未抽出段落数の下限（これ未満は起動・転送のコストが上回る）
+PARALLEL_MIN_PARAGRAPHS = 2000
+
+_dictionary = None
+_dictionary_lock = threading.Lock()
+_local = threading.local()
+
+_noun_cache: "OrderedDict[bytes, FrozenSet[str]]" = OrderedDict()
+_noun_cache_lock = threading.Lock()
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_workers = 0
+_process_pool_lock = threading.Lock()
+
+
+def require_sudachi() -> None:
+    """sudachipy がインストールされていることを確認する（辞書は読み込まない）
+
+    Raises:
+        RuntimeError: sudachipy がインストールされていない場合
+    """
+    try:
+        import sudachipy  # noqa: F401
+    except ImportError as exc:
+        raise RuntimeError(
+            "NLP mode requires optional dependencies (sudachipy, sudachidict-core). "
+            "Install with: pip install md2map[nlp]"
+        ) from exc
+
+
+def _load_dictionary():
+    """Sudachi の辞書を読み込む（プロセスで一度だけ）"""
+    global _dictionary
+    with _dictionary_lock:
+        if _dictionary is None:
+            require_sudachi()
+            from sudachipy import dictionary
+
+            _dictionary = dictionary.Dictionary()
+        return _dictionary
+
+
+def get_tokenizer():
+    """現在のスレッドのトークナイザーを返す（共有の辞書から生成する）
+
+    Raises:
+        RuntimeError: sudachipy / sudachidict-core がインストールされていない場合
+    """
+    tokenizer = getattr(_local, "tokenizer", None)
+    if tokenizer is None:
+        tokenizer = _load_dictionary().tokenizer()
+        _local.tokenizer = tokenizer
+    return tokenizer
+
+
+def warm_up() -> None:
+    """辞書を読み込み、初回のトークナイズを済ませておく（起動時に呼ぶ）"""
+    get_tokenizer().tokenize("準備")
+
+
+def _text_key(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+def _pieces(text: str) -> List[str]:
+    """入力長の上限を超える段落を行単位（長すぎる行は文字単位）に分ける"""
+    if len(text.encode("utf-8")) <= _BATCH_MAX_BYTES:
+        return [text]
+    max_chars = _BATCH_MAX_BYTES // 4
+    pieces: List[str] = []
+    current = ""
+    for line in text.splitlines(keepends=True):
+        for i in range(0, len(line), max_chars):
+            part = line[i : i + max_chars]
+            if current and len((current + part).encode("utf-8")) > _BATCH_MAX_BYTES:
+                pieces.append(current)
+                current = ""
+            current += part
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def nouns_for_texts(texts: List[str]) -> List[List[str]]:
+    """テキストごとの名詞の表層形を返す（キャッシュを使わない）
+
+    上限内でテキストを改行で連結してトークナイズし、形態素の開始位置でテキストに振り分ける。
+    ワーカープロセスからも呼び出す。
+    """
+    tokenizer = get_tokenizer()
+    nouns: List[List[str]] = [[] for _ in texts]
+
+    # (連結したテキスト, [(開始位置, テキストの番号), ...]) の単位でトークナイズする
+    batch: List[str] = []
+    owners: List[Tuple[int, int]] = []
+    size = 0
+    offset = 0
+
+    def flush() -> None:
+        nonlocal batch, owners, size, offset
+        if not batch:
+            return
+        starts = [start for start, _ in owners]
+        owner_index = 0
+        for m in tokenizer.tokenize("".join(batch)):
+            begin = m.begin()
+            while owner_index + 1 < len(starts) and starts[owner_index + 1] <= begin:
+                owner_index += 1
+            if m.part_of_speech()[0] == "名詞":
+                nouns[owners[owner_index][1]].append(m.surface())
+        batch, owners, size, offset = [], [], 0, 0
+
+    for index, text in enumerate(texts):
+        for piece in _pieces(text):
+            piece += "\n"
+            piece_size = len(piece.encode("utf-8"))
+            if size + piece_size > _BATCH_MAX_BYTES:
+                flush()
+            batch.append(piece)
+            owners.append((offset, index))
+            size += piece_size
+            offset += len(piece)
+    flush()
+    return nouns
+
+
+def _get_process_pool(workers: int) -> ProcessPoolExecutor:
+    """辞書を読み込み済みのワーカープロセスのプールを返す（同じワーカー数なら再利用する）"""
+    global _process_pool, _process_pool_workers
+    with _process_pool_lock:
+        if _process_pool is None or _process_pool_workers != workers:
+            if _process_pool is not None:
+                _process_pool.shutdown(wait=False)
+            _process_pool = ProcessPoolExecutor(max_workers=workers, initializer=warm_up)
+            _process_pool_workers = workers
+        return _process_pool
+
+
+def _extract_uncached(texts: List[str], workers: int) -> List[List[str]]:
+    if workers <= 1 or len(texts) < PARALLEL_MIN_PARAGRAPHS:
+        return nouns_for_texts(texts)
+    chunk_size = -(-len(texts) // workers)
+    chunks = [texts[i : i + chunk_size] for i in range(0, len(texts), chunk_size)]
+    results: List[List[str]] = []
+    for chunk_nouns in _get_process_pool(workers).map(nouns_for_texts, chunks):
+        results.extend(chunk_nouns)
+    return results
+
+
+def extract_nouns(texts: List[str], workers: int = 1) -> List[FrozenSet[str]]:
+    """テキスト（段落）ごとの名詞集合を返す
+
+    Args:
+        texts: 段落のテキスト
+        workers: 未抽出の段落が多い場合に使うワーカープロセス数（1 の場合は分散しない）
+
+    Raises:
+        RuntimeError: sudachipy / sudachidict-core がインストールされていない場合
+    """
+    keys = [_text_key(text) for text in texts]
+    found: Dict[bytes, FrozenSet[str]] = {}
+    with _noun_cache_lock:
+        for key in keys:
+            nouns = _noun_cache.get(key)
+            if nouns is not None:
+                _noun_cache.move_to_end(key)
+                found[key] = nouns
+
+    missing: Dict[bytes, str] = {}
+    for key, text in zip(keys, texts):
+        if key not in found and key not in missing:
+            missing[key] = text
+
+    if missing:
+        extracted = _extract_uncached(list(missing.values()), workers)
+        with _noun_cache_lock:
+            for key, nouns in zip(missing, extracted):
+                found[key] = _noun_cache[key] = frozenset(nouns)
+            while len(_noun_cache) > _NOUN_CACHE_MAX_ENTRIES:
+                _noun_cache.popitem(last=False)
+
+    return [found[key] for key in keys]
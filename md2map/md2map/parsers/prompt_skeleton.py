@@ -0,0 +1,72 @@
+"""AI サブスプリット用の骨格テキスト
+
+AI は区切りの行番号だけを返せばよいため、長いセクションでは本文全体の代わりに
+各行の構造記法（見出し・リスト・引用・表・コードブロック）と行頭の数文字だけを送る。
+空行は空のまま残し、段落の切れ目がわかるようにする。
+"""
+
+import re
+from typing import List, Tuple
+
+# 行頭の構造記法（インデント, 記法, 本文）
+_STRUCTURE_PATTERN = re.compile(
+    r"^([ \t]*)(#{1,6}\s+|[-*+]\s+(?:\[[ xX]\]\s+)?|\d+[.)]\s+|>\s?|\||`{3,}|~{3,})?(.*)$"
+)
+
+# インデントは深さがわかれば十分なため上限を設ける
+_MAX_INDENT = 8
+
+# 行頭を残す文字数の候補（トークン予算に収まる最長のものを使う）
+SKELETON_HEAD_CHARS: Tuple[int, ...] = (80, 40, 20, 10, 0)
+
+_ELLIPSIS = "…"
+
+
+def estimate_tokens(text: str) -> int:
+    """簡易トークン数推定（日本語は1文字あたり約1.5、それ以外は約0.25トークン）"""
+    japanese_chars = sum(1 for c in text if ord(c) > 0x3000)
+    return int(japanese_chars * 1.5 + (len(text) - japanese_chars) * 0.25)
+
+
+def skeleton_line(line: str, head_chars: int) -> str:
+    """1行を構造記法と行頭 head_chars 文字に縮める"""
+    line = line.rstrip("\r\n")
+    if not line.strip():
+        return ""
+    indent, marker, text = _STRUCTURE_PATTERN.match(line).groups()
+    indent = indent.expandtabs(4)[:_MAX_INDENT]
+    marker = re.sub(r"\s+$", " ", marker or "")
+    text = text.strip()
+    if len(text) > head_chars:
+        text = text[:head_chars].rstrip() + _ELLIPSIS
+    return f"{indent}{marker}{text}".rstrip()
+
+
+def number_lines(lines: List[str]) -> str:
+    """1 始まりの行番号を付与する（add-line-numbers と同じ書式）"""
+    width = max(4, len(str(len(lines))))
+    return "\n".join(f"{i:>{width}}: {line}" for i, line in enumerate(lines, start=1))
+
+
+def build_skeleton(lines: List[str], token_budget: int) -> Tuple[str, int, int]:
+    """トークン予算に収まる骨格テキストを組み立てる
+
+    行頭の文字数を SKELETON_HEAD_CHARS の順に減らし、予算に収まった時点のものを返す。
+    行番号は省略できないため、最短でも予算を超える場合は記法のみの骨格を返す。
+
+    Args:
+        lines: セクション本文の行リスト
+        token_budget: 骨格テキストのトークン予算
+
+    Returns:
+        (行番号付きの骨格テキスト, 行頭の文字数, 推定トークン数)
+    """
+    skeleton = ""
+    tokens = 0
+    head_chars = 0
+    for head_chars in SKELETON_HEAD_CHARS:
+        skeleton = number_lines([skeleton_line(line, head_chars) for line in lines])
+        tokens = estimate_tokens(skeleton)
+        if tokens <= token_budget:
+            break
+    return skeleton, head_chars, tokens
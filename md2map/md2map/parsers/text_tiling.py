@@ -0,0 +1,234 @@
+"""tiling モード用の TextTiling
+
+段落ごとに TF-IDF ベクトルを作り、隣接するブロック（前後 BLOCK_SIZE 段落の和）の
+コサイン類似度が周囲より深く落ち込む位置（深さスコアの大きい位置）を境界に選ぶ。
+
+- 日本語（漢字・カタカナ・ひらがな）は文字 bigram、英数字は単語内の文字 trigram を特徴量とする
+  （ひらがなのみの bigram は助詞・助動詞が大半のため除く）
+- 特徴量は 2^FEATURE_BITS 次元にハッシュし、文字単位の処理はすべて NumPy で行う
+- ブロックの内積は「段落 a と a + d の内積」（d < 2 * BLOCK_SIZE）の和で求めるため、
+  密行列を作らずに文書全体の境界を一度に計算できる
+- 外部サービスや辞書は使わない
+"""
+
+from typing import TYPE_CHECKING, Dict, List, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy は任意の依存
+    np = None
+
+if TYPE_CHECKING:
+    import numpy
+
+# 特徴量のハッシュのビット数
+FEATURE_BITS = 20
+_FEATURE_DIM = 1 << FEATURE_BITS
+
+# 類似度を比べるブロックの段落数（境界の前後それぞれ）
+BLOCK_SIZE = 3
+
+# ハッシュの乗数（64bit の奇数）と trigram を bigram と区別するための値
+_HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+_TRIGRAM_SALT = 0x632BE59BD9B4E019
+
+
+def require_numpy() -> None:
+    """NumPy がインストールされていることを確認する
+
+    Raises:
+        RuntimeError: numpy がインストールされていない場合
+    """
+    if np is None:
+        raise RuntimeError(
+            "Tiling mode requires optional dependency numpy. "
+            "Install with: pip install md2map[tiling]"
+        )
+
+
+class ParagraphVectors:
+    """段落ごとの L2 正規化した TF-IDF ベクトル（疎表現）
+
+    Attributes:
+        keys: 段落番号 * 2^FEATURE_BITS + 特徴量（昇順）
+        weights: keys に対応する重み
+        norms_sq: 段落ごとのノルムの2乗（特徴量があれば 1、なければ 0）
+    """
+
+    def __init__(
+        self, keys: "numpy.ndarray", weights: "numpy.ndarray", norms_sq: "numpy.ndarray"
+    ) -> None:
+        self.keys = keys
+        self.weights = weights
+        self.norms_sq = norms_sq
+
+    def __len__(self) -> int:
+        return len(self.norms_sq)
+
+    def pair_dots(self, offset: int) -> "numpy.ndarray":
+        """段落 a と a + offset の内積を a ごとに返す（a + offset が範囲外なら 0）"""
+        shifted = self.keys + (offset << FEATURE_BITS)
+        pos = np.searchsorted(self.keys, shifted)
+        pos[pos == len(self.keys)] = 0
+        match = self.keys[pos] == shifted
+        return np.bincount(
+            self.keys[match] >> FEATURE_BITS,
+            weights=self.weights[match] * self.weights[pos[match]],
+            minlength=len(self),
+        )
+
+
+def _features(texts: List[str]) -> Tuple["numpy.ndarray", "numpy.ndarray"]:
+    """各特徴量の出現の (段落番号, ハッシュ値) を返す"""
+    # 改行で連結したコードポイント列と、各文字の段落番号
+    joined = "\n".join(texts)
+    codes = np.frombuffer(joined.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    lengths = np.fromiter((len(text) + 1 for text in texts), dtype=np.int64, count=len(texts))
+    owners = np.repeat(np.arange(len(texts), dtype=np.int64), lengths)[: len(codes)]
+
+    # 英大文字は小文字にそろえる
+    upper = (codes >= 0x41) & (codes <= 0x5A)
+    codes = np.where(upper, codes + 0x20, codes)
+
+    hiragana = (codes >= 0x3040) & (codes <= 0x309F)
+    japanese = (
+        hiragana
+        | ((codes >= 0x30A0) & (codes <= 0x30FF))
+        | ((codes >= 0x3400) & (codes <= 0x9FFF))
+    )
+    alnum = ((codes >= 0x30) & (codes <= 0x39)) | ((codes >= 0x61) & (codes <= 0x7A))
+
+    # 段落の区切りの改行はどちらにも該当しないため、特徴量は段落をまたがない
+    bigram_at = np.flatnonzero(japanese[:-1] & japanese[1:] & ~(hiragana[:-1] & hiragana[1:]))
+    trigram_at = np.flatnonzero(alnum[:-2] & alnum[1:-1] & alnum[2:])
+
+    mult = np.uint64(_HASH_MULTIPLIER)
+    bigram_hash = codes[bigram_at] * mult + codes[bigram_at + 1]
+    trigram_hash = (
+        (codes[trigram_at] * mult + codes[trigram_at + 1]) * mult + codes[trigram_at + 2]
+    ) ^ np.uint64(_TRIGRAM_SALT)
+
+    # 上位ビットの方がよく混ざるため上位 FEATURE_BITS ビットを使う
+    hashes = np.concatenate([bigram_hash, trigram_hash]) * mult
+    hashes = (hashes >> np.uint64(64 - FEATURE_BITS)).astype(np.int64)
+    paragraphs = np.concatenate([owners[bigram_at], owners[trigram_at]])
+    return paragraphs, hashes
+
+
+def paragraph_vectors(texts: List[str]) -> ParagraphVectors:
+    """段落ごとの TF-IDF ベクトルを求める
+
+    TF は 1 + log(出現数)、IDF は与えた段落全体での平滑化 IDF とし、段落ごとに L2 正規化する。
+
+    Raises:
+        RuntimeError: numpy がインストールされていない場合
+    """
+    require_numpy()
+    count = len(texts)
+    if count == 0:
+        return ParagraphVectors(np.zeros(0, np.int64), np.zeros(0), np.zeros(0))
+
+    paragraphs, hashes = _features(texts)
+    keys, tf = np.unique((paragraphs << FEATURE_BITS) | hashes, return_counts=True)
+    rows = keys >> FEATURE_BITS
+    features = keys & (_FEATURE_DIM - 1)
+
+    df = np.bincount(features, minlength=_FEATURE_DIM)
+    idf = np.log((1.0 + count) / (1.0 + df)) + 1.0
+    weights = (1.0 + np.log(tf)) * idf[features]
+
+    norms = np.sqrt(np.bincount(rows, weights=weights * weights, minlength=count))
+    weights = weights / norms[rows]
+    return ParagraphVectors(keys, weights, (norms > 0).astype(np.float64))
+
+
+def gap_similarities(
+    vectors: ParagraphVectors,
+    ranges: List[Tuple[int, int]],
+    block_size: int = BLOCK_SIZE,
+) -> List["numpy.ndarray"]:
+    """段落の範囲 [start, end) ごとに、段落間（end - start - 1 箇所）のブロック類似度を返す
+
+    段落 g と g + 1 の間の類似度は、g 以前 block_size 段落と g + 1 以降 block_size 段落
+    （範囲の外は含めない）のベクトルの和のコサイン類似度。
+    両方とも特徴量がなければ 1.0、片方だけなら 0.0 とする。
+    """
+    gap_counts = [max(0, end - start - 1) for start, end in ranges]
+    if not sum(gap_counts):
+        return [np.zeros(0) for _ in ranges]
+
+    gap = np.concatenate([np.arange(start, end - 1) for start, end in ranges if end - start > 1])
+    lo = np.repeat([start for start, _ in ranges], gap_counts)
+    hi = np.repeat([end for _, end in ranges], gap_counts)
+    last = len(vectors) - 1
+
+    pair_dots: Dict[int, "numpy.ndarray"] = {
+        d: vectors.pair_dots(d) for d in range(1, 2 * block_size)
+    }
+
+    def rows(offsets: range, left: bool) -> List[Tuple["numpy.ndarray", "numpy.ndarray"]]:
+        """ブロックの各段落の (段落番号, 範囲内か) を返す"""
+        result = []
+        for k in offsets:
+            row = gap - k if left else gap + 1 + k
+            valid = row >= lo if left else row < hi
+            result.append((np.clip(row, 0, last), valid))
+        return result
+
+    def block_norm_sq(block: List[Tuple["numpy.ndarray", "numpy.ndarray"]]) -> "numpy.ndarray":
+        total = np.zeros(len(gap))
+        for i, (row_i, valid_i) in enumerate(block):
+            total += np.where(valid_i, vectors.norms_sq[row_i], 0.0)
+            for j in range(i + 1, len(block)):
+                row_j, valid_j = block[j]
+                first = np.minimum(row_i, row_j)
+                total += np.where(valid_i & valid_j, 2.0 * pair_dots[j - i][first], 0.0)
+        return total
+
+    left = rows(range(block_size), left=True)
+    right = rows(range(block_size), left=False)
+
+    dot = np.zeros(len(gap))
+    for i, (row_a, valid_a) in enumerate(left):
+        for j, (_, valid_b) in enumerate(right):
+            dot += np.where(valid_a & valid_b, pair_dots[1 + i + j][row_a], 0.0)
+
+    left_sq = block_norm_sq(left)
+    right_sq = block_norm_sq(right)
+    denom = np.sqrt(left_sq * right_sq)
+    similarities = np.divide(dot, denom, out=np.zeros_like(dot), where=denom > 0)
+    similarities[(left_sq == 0) & (right_sq == 0)] = 1.0
+
+    return np.split(similarities, np.cumsum(gap_counts)[:-1])
+
+
+def depth_scores(similarities: "numpy.ndarray") -> "numpy.ndarray":
+    """類似度の各位置の深さスコアを返す
+
+    左右それぞれ類似度が上がり続ける限りたどった山の高さと、その位置の類似度との差の和。
+    """
+    values = similarities.tolist()
+    left_peak = list(values)
+    right_peak = list(values)
+    for i in range(1, len(values)):
+        if values[i - 1] >= values[i]:
+            left_peak[i] = left_peak[i - 1]
+    for i in range(len(values) - 2, -1, -1):
+        if values[i + 1] >= values[i]:
+            right_peak[i] = right_peak[i + 1]
+    return (np.array(left_peak) - similarities) + (np.array(right_peak) - similarities)
+
+
+def select_boundaries(depths: "numpy.ndarray", target_parts: int) -> List[int]:
+    """深さスコアの大きい順に target_parts - 1 箇所までの境界を選ぶ
+
+    谷のない位置（深さ 0）は選ばない。同じ深さなら前の位置を優先する。
+
+    Returns:
+        境界（区間の最後の段落の相対インデックス）の昇順のリスト
+    """
+    num_splits = max(0, min(target_parts - 1, len(depths)))
+    if num_splits == 0:
+        return []
+    order = np.lexsort((np.arange(len(depths)), -depths))
+    return sorted(int(i) for i in order[:num_splits] if depths[i] > 1e-9)
@@ -67,6 +67,28 @@ def write_file(file_path: str, content: str) -> bool:
         return False
 
 
+def write_bytes(file_path: str, data: bytes) -> bool:
+    """バイト列をそのまま書き込む（改行を変換しない）
+
+    Args:
+        file_path: 書き込むファイルのパス
+        data: 書き込む内容
+
+    Returns:
+        成功時True、失敗時False
+    """
+    logger = get_logger()
+
+    try:
+        with open(file_path, "wb") as f:
+            f.write(data)
+        return True
+
+    except IOError as e:
+        logger.error(f"Failed to write file: {file_path} ({e})")
+        return False
+
+
 def ensure_dir(dir_path: str) -> bool:
     """ディレクトリが存在することを保証する
 
@@ -5,9 +5,12 @@ import os
 import subprocess
 import tempfile
 from pathlib import Path
+from unittest.mock import patch
 
 import pytest
 
+from md2map.cli import build_arg_parser, cmd_build, cmd_build_dir
+
 
 FIXTURES_DIR = Path(__file__).parent / "fixtures"
 
@@ -269,3 +272,225 @@ class TestCLIJapanese:
             parts_dir = Path(tmpdir) / "parts"
             part_names = [p.name for p in parts_dir.glob("*.md")]
             assert any("日本語" in name for name in part_names)
+
+
+class TestCLIIncremental:
+    """build --incremental のテスト（プロセス内で実行）"""
+
+    @staticmethod
+    def _document(first_body: str) -> str:
+        chapters = [f"# 第{i}章\n\n本文{i}。\n" for i in range(2, 21)]
+        return f"# 第1章\n\n{first_body}\n" + "".join(chapters)
+
+    @staticmethod
+    def _touch_parts(out_dir: Path) -> None:
+        for path in (out_dir / "parts").glob("*.md"):
+            os.utime(path, (0, 0))
+
+    def test_edit_early_section_keeps_later_parts(self, tmp_path):
+        """前方のセクションに行を追加しても、後続のパートは書き直さない"""
+        doc = tmp_path / "doc.md"
+        out_dir = tmp_path / "out"
+        doc.write_text(self._document("本文1。"), encoding="utf-8")
+        args = ["build", str(doc), "--out", str(out_dir), "--incremental"]
+        assert cmd_build(build_arg_parser().parse_args(args)) == 0
+        self._touch_parts(out_dir)
+
+        # 行の追加で後続のセクションの行番号がずれる
+        doc.write_text(self._document("本文1。\n\n追加した行。"), encoding="utf-8")
+        assert cmd_build(build_arg_parser().parse_args(args)) == 0
+
+        rewritten = sorted(
+            p.name for p in (out_dir / "parts").glob("*.md") if p.stat().st_mtime != 0
+        )
+        assert rewritten == ["第1章.md"]
+        entries = json.loads((out_dir / "MAP.json").read_text(encoding="utf-8"))
+        assert entries[1]["original_start_line"] == 6
+
+
+class TestCLIBuildDir:
+    """build-dir コマンドのテスト（プロセス内で実行）"""
+
+    @staticmethod
+    def _make_input(root: Path) -> Path:
+        input_dir = root / "docs"
+        (input_dir / "sub").mkdir(parents=True)
+        (input_dir / "a.md").write_text(
+            (FIXTURES_DIR / "simple.md").read_text(encoding="utf-8"), encoding="utf-8"
+        )
+        (input_dir / "sub" / "b.md").write_text(
+            (FIXTURES_DIR / "japanese.md").read_text(encoding="utf-8"), encoding="utf-8"
+        )
+        return input_dir
+
+    @staticmethod
+    def _run(*argv: str) -> int:
+        return cmd_build_dir(build_arg_parser().parse_args(["build-dir", *argv]))
+
+    def test_build_dir_outputs(self, tmp_path):
+        """文書ごとの出力と統合 INDEX.md / MAP.json"""
+        input_dir = self._make_input(tmp_path)
+        out_dir = tmp_path / "out"
+
+        assert self._run(str(input_dir), "--out", str(out_dir), "--jobs", "2") == 0
+
+        for subdir in ("a", "sub/b"):
+            assert (out_dir / subdir / "INDEX.md").exists()
+            assert (out_dir / subdir / "MAP.json").exists()
+            assert list((out_dir / subdir / "parts").glob("*.md"))
+
+        combined = json.loads((out_dir / "MAP.json").read_text(encoding="utf-8"))
+        ids = [entry["id"] for entry in combined]
+        # 文書のパス順に通し番号で、文書をまたいで一意
+        assert ids == [f"MD{i}" for i in range(1, len(ids) + 1)]
+        assert {entry["document"] for entry in combined} == {"a.md", "sub/b.md"}
+        for entry in combined:
+            assert (out_dir / entry["part_file"]).exists()
+
+        # 文書ごとの MAP.json は文書の出力先からの相対パスで、ID は統合 MAP.json と同じ
+        doc_map = json.loads((out_dir / "sub/b" / "MAP.json").read_text(encoding="utf-8"))
+        assert doc_map[0]["part_file"].startswith("parts/")
+        assert doc_map[0]["id"] == next(e["id"] for e in combined if e["document"] == "sub/b.md")
+
+        index = (out_dir / "INDEX.md").read_text(encoding="utf-8")
+        assert "[sub/b.md](sub/b/INDEX.md)" in index
+        assert "日本語ドキュメント" in index
+
+    def test_build_dir_newlines_do_not_change_parts(self, tmp_path):
+        """CRLF・CR の文書も LF の文書と同じパート本文になる"""
+        content = (FIXTURES_DIR / "japanese.md").read_text(encoding="utf-8")
+        input_dir = tmp_path / "docs"
+        input_dir.mkdir()
+        for name, newline in (("lf", "\n"), ("crlf", "\r\n"), ("cr", "\r")):
+            (input_dir / f"{name}.md").write_bytes(content.replace("\n", newline).encode("utf-8"))
+        out_dir = tmp_path / "out"
+
+        assert self._run(str(input_dir), "--out", str(out_dir), "--jobs", "1") == 0
+
+        def parts(name):
+            doc_map = json.loads((out_dir / name / "MAP.json").read_text(encoding="utf-8"))
+            return [
+                (entry["original_start_line"], entry["original_end_line"], entry["word_count"],
+                 # ヘッダ（ID・元ファイル名）を除いた本文
+                 (out_dir / name / entry["part_file"]).read_bytes().split(b"-->\n", 1)[1])
+                for entry in doc_map
+            ]
+
+        assert parts("crlf") == parts("lf")
+        assert parts("cr") == parts("lf")
+
+    def test_build_dir_jobs_do_not_change_output(self, tmp_path):
+        """ワーカー数によらず同じ出力になる"""
+        input_dir = self._make_input(tmp_path)
+        self._run(str(input_dir), "--out", str(tmp_path / "out1"), "--jobs", "1")
+        self._run(str(input_dir), "--out", str(tmp_path / "out2"), "--jobs", "2")
+
+        for path in (tmp_path / "out1").rglob("*"):
+            if path.is_file():
+                other = tmp_path / "out2" / path.relative_to(tmp_path / "out1")
+                assert other.read_bytes() == path.read_bytes()
+
+    def test_build_dir_skips_output_inside_input(self, tmp_path):
+        """入力ディレクトリ内の出力先は入力にしない"""
+        input_dir = self._make_input(tmp_path)
+        out_dir = input_dir / "out"
+
+        self._run(str(input_dir), "--out", str(out_dir), "--jobs", "1")
+        first = (out_dir / "MAP.json").read_bytes()
+        self._run(str(input_dir), "--out", str(out_dir), "--jobs", "1")
+
+        assert (out_dir / "MAP.json").read_bytes() == first
+
+    def test_build_dir_incremental_removes_deleted_document(self, tmp_path):
+        """差分ビルドでは、なくなった文書の出力を削除し、フルビルドと同じ出力になる"""
+        input_dir = self._make_input(tmp_path)
+        out_dir = tmp_path / "out"
+        self._run(str(input_dir), "--out", str(out_dir), "--jobs", "1", "--incremental")
+
+        (input_dir / "sub" / "b.md").unlink()
+        self._run(str(input_dir), "--out", str(out_dir), "--jobs", "1", "--incremental")
+        self._run(str(input_dir), "--out", str(tmp_path / "full"), "--jobs", "1")
+
+        assert not (out_dir / "sub" / "b").exists()
+        produced = sorted(p.relative_to(out_dir) for p in out_dir.rglob("*") if p.is_file())
+        expected = sorted(
+            p.relative_to(tmp_path / "full") for p in (tmp_path / "full").rglob("*") if p.is_file()
+        )
+        assert produced == expected
+        for path in produced:
+            assert (out_dir / path).read_bytes() == (tmp_path / "full" / path).read_bytes()
+
+    def test_build_dir_incremental_keeps_later_documents(self, tmp_path):
+        """前方の文書にセクションを追加しても（ID がずれても）後続の文書のパートは書き直さない"""
+        input_dir = self._make_input(tmp_path)
+        out_dir = tmp_path / "out"
+        self._run(str(input_dir), "--out", str(out_dir), "--jobs", "1", "--incremental")
+        for path in out_dir.rglob("parts/*.md"):
+            os.utime(path, (0, 0))
+
+        a_md = input_dir / "a.md"
+        a_md.write_text(
+            a_md.read_text(encoding="utf-8") + "\n# 追加の章\n\n本文。\n", encoding="utf-8"
+        )
+        self._run(str(input_dir), "--out", str(out_dir), "--jobs", "1", "--incremental")
+
+        b_parts = list((out_dir / "sub" / "b" / "parts").glob("*.md"))
+        assert b_parts and all(p.stat().st_mtime == 0 for p in b_parts)
+        combined = json.loads((out_dir / "MAP.json").read_text(encoding="utf-8"))
+        b_ids = [e["id"] for e in combined if e["document"] == "sub/b.md"]
+        assert b_ids[0] == f"MD{len(combined) - len(b_ids) + 1}"
+
+    def test_build_dir_incremental_keeps_outputs_outside_out_dir(self, tmp_path):
+        """MAP.json の document が出力ディレクトリの外を指していても削除しない"""
+        input_dir = self._make_input(tmp_path)
+        out_dir = tmp_path / "build" / "out"
+        self._run(str(input_dir), "--out", str(out_dir), "--jobs", "1", "--incremental")
+
+        victim = tmp_path / "victim"
+        (victim / "parts").mkdir(parents=True)
+        for name in ("INDEX.md", "MAP.json", "parts/x.md"):
+            (victim / name).write_text("keep", encoding="utf-8")
+        map_path = out_dir / "MAP.json"
+        entries = json.loads(map_path.read_text(encoding="utf-8"))
+        entries.append({"document": "../../victim.md", "part_file": "../../victim/parts/x.md"})
+        map_path.write_text(json.dumps(entries), encoding="utf-8")
+
+        assert self._run(str(input_dir), "--out", str(out_dir), "--jobs", "1", "--incremental") == 0
+
+        for name in ("INDEX.md", "MAP.json", "parts/x.md"):
+            assert (victim / name).read_text(encoding="utf-8") == "keep"
+
+    def test_build_dir_jobs_parse_only_in_workers(self, tmp_path):
+        """--jobs 2 以上ではこのプロセスでパーサーを生成せず、設定の誤りは起動前に検出する"""
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+
+        import md2map.batch as batch
+        from md2map.parsers import text_tiling
+
+        input_dir = self._make_input(tmp_path)
+        created_in = []
+        create_parser = batch._create_parser
+
+        def recording_create_parser(*args):
+            created_in.append(threading.current_thread())
+            return create_parser(*args)
+
+        # ワーカーをスレッドで代用して、パーサーを生成したスレッドを記録する
+        with patch.object(batch, "ProcessPoolExecutor", ThreadPoolExecutor), patch.object(
+            batch, "_create_parser", recording_create_parser
+        ):
+            assert self._run(str(input_dir), "--out", str(tmp_path / "out"), "--jobs", "2") == 0
+            with patch.object(text_tiling, "np", None):
+                assert self._run(
+                    str(input_dir), "--out", str(tmp_path / "out2"),
+                    "--jobs", "2", "--split-mode", "tiling",
+                ) == 1
+
+        assert created_in
+        assert threading.main_thread() not in created_in
+        assert not (tmp_path / "out2").exists()
+
+    def test_build_dir_no_files(self, tmp_path):
+        """対象ファイルがない場合はエラー"""
+        assert self._run(str(tmp_path), "--out", str(tmp_path / "out")) == 1
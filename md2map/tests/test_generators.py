@@ -10,12 +10,21 @@ import pytest
 from md2map.models.section import Section
 from md2map.generators.parts_generator import (
     generate_parts,
+    remove_orphaned_parts,
     sanitize_filename,
     build_filename,
     generate_header,
 )
-from md2map.generators.index_generator import generate_index
-from md2map.generators.map_generator import generate_map, calculate_checksum
+from md2map.generators.index_generator import generate_combined_index, generate_index
+from md2map.generators.map_generator import (
+    calculate_checksum,
+    generate_map,
+    load_map,
+    part_checksums,
+    prefix_map_entries,
+)
+from md2map.parsers.heading_scanner import MarkdownSource
+from md2map.utils.file_utils import read_file
 
 
 class TestSanitizeFilename:
@@ -122,36 +131,22 @@ class TestGenerateHeader:
 
         assert "md2map fragment" in header
         assert "original: test.md" in header
-        assert "lines: 10-20" in header
+        # 行範囲は前後の編集で変わるため出力しない
+        assert "lines:" not in header
         assert "section: Test Section" in header
         assert "level: 2" in header
         assert header.startswith("<!--")
         assert "-->" in header
 
-    def test_header_with_id(self):
-        """ID付きヘッダのフォーマット"""
-        section = Section(
-            title="Test Section",
-            level=2,
-            start_line=10,
-            end_line=20,
-            original_file="test.md",
-            id="MD1",
-        )
-
-        header = generate_header(section)
-
-        assert "id: MD1" in header
-        assert "md2map fragment" in header
-
     def test_header_without_id(self):
-        """IDなしの場合はid行を出力しない"""
+        """IDは前後のセクションの増減で変わるため出力しない"""
         section = Section(
             title="Test Section",
             level=2,
             start_line=10,
             end_line=20,
             original_file="test.md",
+            id="MD1",
         )
 
         header = generate_header(section)
@@ -206,6 +201,90 @@ class TestGenerateParts:
             assert sections[0].part_file == "parts/Section_One.md"
             assert sections[1].part_file == "parts/Section_Two.md"
 
+    @pytest.mark.parametrize("newline", ["\n", "\r\n", "\r"])
+    def test_generate_parts_from_source(self, tmp_path, newline):
+        """MarkdownSource から切り出した本文が read_file() の行リストと同じになる"""
+        content = "# One\n本文一。\n\n# Two\n本文二。".replace("\n", newline)
+        src_path = tmp_path / "doc.md"
+        src_path.write_bytes(content.encode("utf-8"))
+        lines, _ = read_file(str(src_path))
+
+        def make_sections():
+            return [
+                Section(title="One", level=1, start_line=1, end_line=3,
+                        original_file="doc.md", path="One"),
+                Section(title="Two", level=1, start_line=4, end_line=5,
+                        original_file="doc.md", path="Two"),
+            ]
+
+        expected_sections = make_sections()
+        generate_parts(expected_sections, lines, str(tmp_path / "a"))
+        sections = make_sections()
+        with MarkdownSource(src_path) as source:
+            generate_parts(sections, source, str(tmp_path / "b"))
+
+        for name in ("One.md", "Two.md"):
+            expected = (tmp_path / "a" / "parts" / name).read_bytes()
+            assert (tmp_path / "b" / "parts" / name).read_bytes() == expected
+            assert b"\r" not in expected
+        assert [s.checksum for s in sections] == [s.checksum for s in expected_sections]
+
+    def test_checksum_computed_in_memory(self, tmp_path):
+        """書き出した内容のチェックサムを section.checksum に設定する"""
+        content = "# One\r\n本文一。\r\n# Two\n本文二。\n"
+        sections = [
+            Section(title="One", level=1, start_line=1, end_line=2,
+                    original_file="doc.md", path="One"),
+            Section(title="Two", level=1, start_line=3, end_line=4,
+                    original_file="doc.md", path="Two"),
+        ]
+        generate_parts(sections, content.splitlines(keepends=True), str(tmp_path))
+
+        for section in sections:
+            assert section.checksum == calculate_checksum(str(tmp_path / section.part_file))
+
+    def test_incremental_skips_unchanged_parts(self, tmp_path):
+        """前回とチェックサムが同じパートは書き直さない"""
+        lines = ["# One\n", "本文一。\n", "# Two\n", "本文二。\n"]
+
+        def make_sections():
+            return [
+                Section(title="One", level=1, start_line=1, end_line=2,
+                        original_file="doc.md", path="One"),
+                Section(title="Two", level=1, start_line=3, end_line=4,
+                        original_file="doc.md", path="Two"),
+            ]
+
+        first = make_sections()
+        generate_parts(first, lines, str(tmp_path))
+        previous = {section.part_file: section.checksum for section in first}
+        for section in first:
+            os.utime(tmp_path / section.part_file, (0, 0))
+
+        lines[3] = "本文二を変更。\n"
+        second = make_sections()
+        results = generate_parts(second, lines, str(tmp_path), previous_checksums=previous)
+
+        assert len(results) == 2
+        assert (tmp_path / "parts" / "One.md").stat().st_mtime == 0
+        assert (tmp_path / "parts" / "Two.md").stat().st_mtime != 0
+        assert "本文二を変更。" in (tmp_path / "parts" / "Two.md").read_text(encoding="utf-8")
+        assert second[0].checksum == first[0].checksum
+        assert second[1].checksum != first[1].checksum
+
+    def test_incremental_rewrites_missing_part(self, tmp_path):
+        """チェックサムが同じでもファイルがなければ書き込む"""
+        lines = ["# One\n", "本文一。\n"]
+        section = Section(title="One", level=1, start_line=1, end_line=2,
+                          original_file="doc.md", path="One")
+        generate_parts([section], lines, str(tmp_path))
+        previous = {section.part_file: section.checksum}
+        (tmp_path / "parts" / "One.md").unlink()
+
+        generate_parts([section], lines, str(tmp_path), previous_checksums=previous)
+
+        assert (tmp_path / "parts" / "One.md").exists()
+
     def test_dry_run_no_files(self):
         """dry_run モードではファイルを作成しない"""
         sections = [
@@ -228,6 +307,30 @@ class TestGenerateParts:
             assert not parts_dir.exists()
 
 
+class TestRemoveOrphanedParts:
+    """remove_orphaned_parts のテスト"""
+
+    def test_removes_only_orphaned_parts(self, tmp_path):
+        """前回の MAP.json にあり今回生成していないパートのみ削除する"""
+        parts_dir = tmp_path / "parts"
+        parts_dir.mkdir()
+        for name in ("keep.md", "old.md", "user.md"):
+            (parts_dir / name).write_text("x", encoding="utf-8")
+        (tmp_path / "INDEX.md").write_text("x", encoding="utf-8")
+        section = Section(title="Keep", level=1, start_line=1, end_line=1,
+                          original_file="doc.md", part_file="parts/keep.md")
+
+        removed = remove_orphaned_parts(
+            str(tmp_path), ["parts/keep.md", "parts/old.md", "INDEX.md", "parts/../INDEX.md"],
+            [section],
+        )
+
+        assert removed == [str(tmp_path / "parts" / "old.md")]
+        assert (parts_dir / "keep.md").exists()
+        assert (parts_dir / "user.md").exists()
+        assert (tmp_path / "INDEX.md").exists()
+
+
 class TestGenerateIndex:
     """generate_index のテスト"""
 
@@ -333,6 +436,33 @@ class TestGenerateIndex:
             assert "### [MD2] Sub (H2)" in content
 
 
+class TestGenerateCombinedIndex:
+    """generate_combined_index のテスト"""
+
+    def test_combined_index_links(self, tmp_path):
+        """文書一覧と、統合出力ディレクトリからのパートへのリンク"""
+        section = Section(
+            title="概要",
+            level=1,
+            start_line=1,
+            end_line=5,
+            original_file="b.md",
+            part_file="parts/概要.md",
+            id="MD3",
+        )
+        output_path = tmp_path / "INDEX.md"
+        generate_combined_index(
+            [("sub/b.md", "sub/b", [section])], ["sub/b.md: warn"], str(output_path), "docs"
+        )
+
+        content = output_path.read_text(encoding="utf-8")
+        assert content.startswith("# Index: docs\n")
+        assert "- [WARNING] sub/b.md: warn" in content
+        assert "- [sub/b.md](sub/b/INDEX.md) (1 sections, MD3–MD3)" in content
+        assert "### sub/b.md" in content
+        assert "[sub/b/parts/概要.md](sub/b/parts/概要.md)" in content
+
+
 class TestGenerateMap:
     """generate_map のテスト"""
 
@@ -450,6 +580,44 @@ class TestGenerateMap:
             assert "id" not in entry
 
 
+class TestPrefixMapEntries:
+    """prefix_map_entries のテスト"""
+
+    def test_prefix_map_entries(self):
+        """part_file に文書の出力先を付け、document を追加する"""
+        entries = [{"id": "MD1", "part_file": "parts/a.md", "checksum": "x"}]
+        combined = prefix_map_entries(entries, "sub/b.md", "sub/b")
+
+        assert combined == [
+            {"id": "MD1", "part_file": "sub/b/parts/a.md", "checksum": "x", "document": "sub/b.md"}
+        ]
+        # 元のエントリは変更しない
+        assert entries[0]["part_file"] == "parts/a.md"
+
+
+class TestLoadMap:
+    """load_map / part_checksums のテスト"""
+
+    def test_load_map_round_trip(self, tmp_path):
+        """生成した MAP.json から part_file → checksum を得る"""
+        section = Section(title="One", level=1, start_line=1, end_line=1,
+                          original_file="doc.md", path="One")
+        generate_parts([section], ["# One\n"], str(tmp_path))
+        generate_map([section], str(tmp_path), str(tmp_path / "MAP.json"))
+
+        entries = load_map(str(tmp_path / "MAP.json"))
+
+        assert part_checksums(entries) == {"parts/One.md": section.checksum}
+
+    def test_load_map_missing_or_invalid(self, tmp_path):
+        """存在しない・形式が不正な MAP.json は None"""
+        assert load_map(str(tmp_path / "MAP.json")) is None
+        (tmp_path / "MAP.json").write_text("{not json", encoding="utf-8")
+        assert load_map(str(tmp_path / "MAP.json")) is None
+        (tmp_path / "MAP.json").write_text("{}", encoding="utf-8")
+        assert load_map(str(tmp_path / "MAP.json")) is None
+
+
 class TestCalculateChecksum:
     """calculate_checksum のテスト"""
 
@@ -2,7 +2,10 @@
 
 import json
 import os
+import re
 import tempfile
+import threading
+import time
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
@@ -11,7 +14,14 @@ import pytest
 from md2map.llm.base_provider import BaseLLMProvider
 from md2map.llm.config import LLMConfig
 from md2map.llm.factory import build_llm_config_from_env, get_llm_provider
+from md2map.llm.split_cache import AISplitCache, ai_split_cache_key
 from md2map.parsers.markdown_parser import DEFAULT_AI_PROMPT_PARTS, MarkdownParser
+from md2map.parsers.prompt_skeleton import (
+    SKELETON_HEAD_CHARS,
+    build_skeleton,
+    estimate_tokens,
+    skeleton_line,
+)
 
 
 FIXTURES_DIR = Path(__file__).parent / "fixtures"
@@ -59,6 +69,7 @@ class TestLLMConfig:
         assert config.access_key_id is None
         assert config.secret_access_key is None
         assert config.region is None
+        assert config.timeout is None
 
 
 # ---------------------------------------------------------------------------
@@ -90,6 +101,16 @@ class TestGetLLMProvider:
             with pytest.raises(RuntimeError, match="anthropic"):
                 get_llm_provider(config)
 
+    def test_timeout_passed_to_client(self):
+        """timeout 指定時は SDK クライアントに渡す"""
+        anthropic_module = MagicMock()
+        config = LLMConfig(
+            provider="anthropic", model="claude-haiku-4-5-20251001", api_key="sk-test", timeout=12.5
+        )
+        with patch.dict("sys.modules", {"anthropic": anthropic_module}):
+            get_llm_provider(config)
+        anthropic_module.Anthropic.assert_called_once_with(api_key="sk-test", timeout=12.5)
+
     def test_bedrock_provider_without_package(self):
         """boto3 パッケージがインポートできない場合"""
         config = LLMConfig(
@@ -508,3 +529,279 @@ class TestAIPromptCustomization:
         prompt = parser._build_ai_system_prompt()
         assert "title" not in prompt
         assert "タイトル" not in prompt
+
+
+# ---------------------------------------------------------------------------
+# AI サブスプリットの並行実行テスト
+# ---------------------------------------------------------------------------
+
+
+class ConcurrentMockLLMProvider(BaseLLMProvider):
+    """同時実行数を記録するテスト用の LLM プロバイダー
+
+    先に呼ばれたものほど応答を遅らせ、完了順が文書順と逆になるようにする。
+    fail_marker を含むセクションには不正な応答を返す。
+    """
+
+    def __init__(self, fail_marker: str = ""):
+        self.fail_marker = fail_marker
+        self.active = 0
+        self.max_active = 0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def send_message(self, system_prompt: str, user_message: str) -> str:
+        with self._lock:
+            self.calls += 1
+            delay = max(0.0, 0.1 - 0.02 * self.calls)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(delay)
+        finally:
+            with self._lock:
+                self.active -= 1
+        if self.fail_marker and self.fail_marker in user_message:
+            return "invalid"
+        total = int(re.search(r"全 (\d+) 行", user_message).group(1))
+        half = total // 2
+        return json.dumps([
+            {"start_line": 1, "end_line": half},
+            {"start_line": half + 1, "end_line": total},
+        ])
+
+
+def _write_large_sections(tmp_path, count: int) -> str:
+    content = ""
+    for i in range(count):
+        content += f"## Section {i}\n\n"
+        for j in range(4):
+            content += f"Section {i} paragraph {j}. " + "word " * 30 + "\n\n"
+    path = tmp_path / "doc.md"
+    path.write_text(content, encoding="utf-8")
+    return str(path)
+
+
+def _outline(sections):
+    return [(s.display_name(), s.start_line, s.end_line) for s in sections]
+
+
+class TestAIConcurrency:
+    """AI サブスプリットの LLM 呼び出しの並行実行テスト"""
+
+    def test_concurrency_limit(self, tmp_path):
+        """同時実行数が ai_concurrency を超えない"""
+        path = _write_large_sections(tmp_path, 6)
+        provider = ConcurrentMockLLMProvider()
+        parser = MarkdownParser(
+            split_mode="ai", split_threshold=50, llm_provider=provider, ai_concurrency=3
+        )
+        parser.parse(path)
+
+        assert provider.calls == 6
+        assert 1 < provider.max_active <= 3
+
+    def test_sequential_when_concurrency_is_one(self, tmp_path):
+        """ai_concurrency=1 では逐次に呼び出す"""
+        path = _write_large_sections(tmp_path, 3)
+        provider = ConcurrentMockLLMProvider()
+        parser = MarkdownParser(
+            split_mode="ai", split_threshold=50, llm_provider=provider, ai_concurrency=1
+        )
+        parser.parse(path)
+
+        assert provider.max_active == 1
+
+    def test_document_order(self, tmp_path):
+        """完了順にかかわらず文書順に組み立てられる"""
+        path = _write_large_sections(tmp_path, 5)
+        concurrent, _ = MarkdownParser(
+            split_mode="ai", split_threshold=50,
+            llm_provider=ConcurrentMockLLMProvider(), ai_concurrency=5,
+        ).parse(path)
+        sequential, _ = MarkdownParser(
+            split_mode="ai", split_threshold=50,
+            llm_provider=ConcurrentMockLLMProvider(), ai_concurrency=1,
+        ).parse(path)
+
+        assert _outline(concurrent) == _outline(sequential)
+        starts = [s.start_line for s in concurrent]
+        assert starts == sorted(starts)
+        part = next(s for s in concurrent if s.subsplit_title == "Section 0: part-2")
+        assert part.parent.title == "Section 0"
+
+    def test_fallback_is_deterministic(self, tmp_path):
+        """不正な応答のセクションは行数ベースの分割に決定的にフォールバックする"""
+        path = _write_large_sections(tmp_path, 4)
+        results = []
+        for concurrency in (1, 4, 4):
+            sections, _ = MarkdownParser(
+                split_mode="ai", split_threshold=50,
+                llm_provider=ConcurrentMockLLMProvider(fail_marker="Section 2 paragraph"),
+                ai_concurrency=concurrency,
+            ).parse(path)
+            results.append(_outline(sections))
+
+        assert results[0] == results[1] == results[2]
+        parts = [name for name, _, _ in results[0] if name.startswith("Section 2: part-")]
+        assert len(parts) >= 2
+
+
+# ---------------------------------------------------------------------------
+# AI サブスプリット結果のキャッシュテスト
+# ---------------------------------------------------------------------------
+
+
+class TestAISplitCache:
+    """AI サブスプリット結果のディスクキャッシュのテスト"""
+
+    def _parse(self, path, cache, provider, **kwargs):
+        parser = MarkdownParser(
+            split_mode="ai", split_threshold=50, llm_provider=provider,
+            ai_cache=cache, **kwargs,
+        )
+        sections, _ = parser.parse(path)
+        return _outline(sections)
+
+    def test_cache_hit_skips_llm(self, tmp_path):
+        """同じ文書の再分割では LLM を呼び出さず同じ結果になる"""
+        path = _write_large_sections(tmp_path, 3)
+        cache_dir = tmp_path / "cache"
+        first = ConcurrentMockLLMProvider()
+        second = ConcurrentMockLLMProvider()
+
+        outline1 = self._parse(path, AISplitCache(cache_dir), first)
+        # 別インスタンス（別プロセス相当）でも同じディレクトリを共有できる
+        outline2 = self._parse(path, AISplitCache(cache_dir), second)
+
+        assert first.calls == 3
+        assert second.calls == 0
+        assert outline1 == outline2
+
+    def test_key_includes_prompt_and_model(self, tmp_path):
+        """注意事項・モデルが変われば別のキーになる"""
+        path = _write_large_sections(tmp_path, 1)
+        cache = AISplitCache(tmp_path / "cache")
+        base = ConcurrentMockLLMProvider()
+        notes = ConcurrentMockLLMProvider()
+        model = ConcurrentMockLLMProvider()
+        model._model = "other-model"
+
+        self._parse(path, cache, base)
+        self._parse(path, cache, notes, ai_prompt_extra_notes="- 表の途中で分割しないこと")
+        self._parse(path, cache, model)
+
+        assert (base.calls, notes.calls, model.calls) == (1, 1, 1)
+        key = ai_split_cache_key("a", 2, "s", "p", "m")
+        assert key != ai_split_cache_key("a", 3, "s", "p", "m")
+
+    def test_invalid_response_not_cached(self, tmp_path):
+        """不正な応答（フォールバック分割）はキャッシュしない"""
+        path = _write_large_sections(tmp_path, 1)
+        cache = AISplitCache(tmp_path / "cache")
+        failing = ConcurrentMockLLMProvider(fail_marker="Section 0")
+        retry = ConcurrentMockLLMProvider()
+
+        self._parse(path, cache, failing)
+        self._parse(path, cache, retry)
+
+        assert failing.calls == 1
+        assert retry.calls == 1
+
+    def test_size_bounded_eviction(self, tmp_path):
+        """上限を超えたら最終アクセスの古い順に削除する"""
+        cache = AISplitCache(tmp_path / "cache", max_bytes=250)
+        keys = [ai_split_cache_key(str(i), 2, "s", "p", "m") for i in range(3)]
+        cache.put(keys[0], "x" * 100)
+        cache.put(keys[1], "y" * 100)
+        # keys[0] を参照して keys[1] を最も古くする
+        os.utime(cache._path_for(keys[1]), (1, 1))
+        assert cache.get(keys[0]) == "x" * 100
+        cache.put(keys[2], "z" * 100)
+
+        assert cache.get(keys[0]) == "x" * 100
+        assert cache.get(keys[1]) is None
+        assert cache.get(keys[2]) == "z" * 100
+        # 再起動時も上限を適用する
+        os.utime(cache._path_for(keys[0]), (2, 2))
+        assert AISplitCache(tmp_path / "cache", max_bytes=150).get(keys[2]) == "z" * 100
+        assert cache.get(keys[0]) is None
+
+
+# ---------------------------------------------------------------------------
+# 骨格プロンプト（skeleton モード）テスト
+# ---------------------------------------------------------------------------
+
+
+class RecordingMockLLMProvider(ConcurrentMockLLMProvider):
+    """送信されたユーザーメッセージを記録するテスト用の LLM プロバイダー"""
+
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def send_message(self, system_prompt: str, user_message: str) -> str:
+        self.messages.append(user_message)
+        return super().send_message(system_prompt, user_message)
+
+
+class TestSkeletonPrompt:
+    """skeleton モードの骨格プロンプトのテスト"""
+
+    def test_skeleton_line(self):
+        """構造記法・インデントを残して行頭を省略する"""
+        assert skeleton_line("## 概要と目的について\n", 2) == "## 概要…"
+        assert skeleton_line("    - [x] 完了した項目の説明\n", 3) == "    - [x] 完了し…"
+        assert skeleton_line("1. First step here\n", 5) == "1. First…"
+        assert skeleton_line("| 列1 | 列2 |\n", 0) == "|…"
+        assert skeleton_line("```python\n", 80) == "```python"
+        assert skeleton_line("   \n", 10) == ""
+
+    def test_build_skeleton_within_budget(self):
+        """骨格は予算に収まる最長の行頭で組み立てる"""
+        lines = ["これは段落の本文です。" * 20 + "\n", "\n", "- 項目\n"] * 10
+        skeleton, head_chars, tokens = build_skeleton(lines, 600)
+
+        assert head_chars in SKELETON_HEAD_CHARS and head_chars < 80
+        assert tokens == estimate_tokens(skeleton) <= 600
+        assert len(skeleton.splitlines()) == len(lines)
+        assert skeleton.splitlines()[1] == "   2: "
+
+    def test_skeleton_prompt_for_large_section(self, tmp_path, caplog):
+        """予算を超えるセクションは骨格を送り、同じ行番号で分割される"""
+        path = _write_large_sections(tmp_path, 1)
+        full_provider = RecordingMockLLMProvider()
+        skeleton_provider = RecordingMockLLMProvider()
+
+        full, _ = MarkdownParser(
+            split_mode="ai", split_threshold=50, llm_provider=full_provider,
+        ).parse(path)
+        with caplog.at_level("INFO", logger="md2map"):
+            skeleton, _ = MarkdownParser(
+                split_mode="ai", split_threshold=50, llm_provider=skeleton_provider,
+                ai_prompt_mode="skeleton", ai_prompt_token_budget=60,
+            ).parse(path)
+
+        message = skeleton_provider.messages[0]
+        assert "骨格" in message
+        assert "word word word word word word word word word word" not in message
+        assert len(message) < len(full_provider.messages[0])
+        assert _outline(skeleton) == _outline(full)
+        assert "saved" in caplog.text
+
+    def test_full_text_for_small_section(self, tmp_path):
+        """予算内のセクションは全文を送る"""
+        path = _write_large_sections(tmp_path, 1)
+        provider = RecordingMockLLMProvider()
+        MarkdownParser(
+            split_mode="ai", split_threshold=50, llm_provider=provider,
+            ai_prompt_mode="skeleton", ai_prompt_token_budget=10000,
+        ).parse(path)
+
+        assert "骨格" not in provider.messages[0]
+        assert "word word word word word word word word word word" in provider.messages[0]
+
+    def test_invalid_prompt_mode(self):
+        """未知の ai_prompt_mode はエラー"""
+        with pytest.raises(ValueError):
+            MarkdownParser(ai_prompt_mode="summary")
@@ -6,7 +6,18 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 
+from md2map.parsers import noun_extractor, text_tiling
+from md2map.parsers.heading_scanner import MarkdownSource
+from md2map.parsers.line_stats import LineStats
 from md2map.parsers.markdown_parser import MarkdownParser
+from md2map.parsers.noun_extractor import extract_nouns, get_tokenizer, nouns_for_texts
+from md2map.parsers.text_tiling import (
+    FEATURE_BITS,
+    depth_scores,
+    gap_similarities,
+    paragraph_vectors,
+)
+from md2map.utils.file_utils import read_file
 
 
 FIXTURES_DIR = Path(__file__).parent / "fixtures"
@@ -414,3 +425,399 @@ class TestSectionOverrides:
         )
         parser.parse(str(FIXTURES_DIR / "japanese.md"))
         mock_ensure.assert_called()
+
+
+class TestSectionTree:
+    """セクションの親子関係（children）と再分割後の階層のテスト"""
+
+    CONTENT = (
+        "# Root\n"
+        "\n"
+        "root text\n"
+        "\n"
+        "## Child\n"
+        "\n"
+        "alpha beta gamma delta\n"
+        "epsilon zeta eta theta\n"
+        "iota kappa lambda mu\n"
+        "\n"
+        "#### Deep\n"
+        "\n"
+        "deep text\n"
+        "\n"
+        "## Sibling\n"
+        "\n"
+        "sibling text\n"
+    )
+
+    def _write(self, tmp_path) -> str:
+        path = tmp_path / "tree.md"
+        path.write_text(self.CONTENT, encoding="utf-8")
+        return str(path)
+
+    def test_children_index(self, tmp_path):
+        """見出しの親子関係から children が構築される"""
+        sections, _ = MarkdownParser().parse(self._write(tmp_path), max_depth=6)
+        root, child, deep, sibling = sections
+
+        assert root.children == [child, sibling]
+        assert child.children == [deep]
+        assert deep.children == []
+        assert deep.parent is child
+        assert deep.path == "Root > Child > Deep"
+
+    def test_own_content_range(self, tmp_path):
+        """自身コンテンツ範囲は最初の子セクションの直前まで"""
+        parser = MarkdownParser()
+        sections, _ = parser.parse(self._write(tmp_path), max_depth=6)
+        root, child, deep, sibling = sections
+
+        assert parser._get_own_content_range(root) == (2, 4)
+        assert parser._get_own_content_range(child) == (6, 10)
+        assert parser._get_own_content_range(deep) == (12, 14)
+        assert parser._get_own_content_range(sibling) == (16, 17)
+
+    @patch("md2map.parsers.markdown_parser.MarkdownParser._ensure_llm_provider")
+    def test_refined_hierarchy(self, _mock_ensure, tmp_path):
+        """サブスプリットを挿入した後の親子関係と階層パス"""
+        # LLM プロバイダーなし → 行数ベースのフォールバック分割
+        parser = MarkdownParser(
+            split_mode="ai",
+            split_threshold=10,
+            max_subsections=2,
+            section_overrides=[
+                {"start_line": 1, "split_mode": "heading"},
+                {"start_line": 11, "split_mode": "heading"},
+                {"start_line": 15, "split_mode": "heading"},
+            ],
+        )
+        sections, _ = parser.parse(self._write(tmp_path), max_depth=6)
+
+        titles = [s.display_name() for s in sections]
+        assert titles == [
+            "Root", "Child", "Child: part-1", "Child: part-2", "Deep", "Sibling",
+        ]
+        root, child, part1, part2, deep, sibling = sections
+
+        assert root.children == [child, sibling]
+        assert child.children == [part1, part2]
+        assert part1.parent is child
+        assert part1.path == "Root > Child > Child: part-1"
+        # レベルを飛ばした見出しは直前のサブスプリットの子になる
+        assert deep.parent is part2
+        assert part2.children == [deep]
+        assert deep.path == "Root > Child > Child: part-2 > Deep"
+        assert sibling.parent is root
+
+
+class TestLineStats:
+    """LineStats（行単位の統計索引）のテスト"""
+
+    LINES = [
+        "# Title\n",
+        "\n",
+        "alpha beta gamma\n",
+        "```python\n",
+        "code line\n",
+        "```\n",
+        "日本語 の 本文\n",
+        "delta\n",
+    ]
+
+    def test_count_words_english(self):
+        """日本語を含まない範囲は単語数（見出し記法・コードブロック記法を除く）"""
+        stats = LineStats(self.LINES)
+
+        assert stats.count_words(1, 1) == 1
+        assert stats.count_words(1, 6) == 6
+        assert stats.count_words(8, 8) == 1
+
+    def test_count_words_japanese(self):
+        """日本語を含む範囲は空白を除いた文字数"""
+        stats = LineStats(self.LINES)
+
+        assert stats.count_words(7, 7) == 6
+        assert stats.count_words(3, 8) == len("alphabetagammacodeline日本語の本文delta")
+
+    def test_count_words_empty_range(self):
+        """空の範囲・文書外の範囲は 0"""
+        stats = LineStats(self.LINES)
+
+        assert stats.count_words(5, 4) == 0
+        assert stats.count_words(20, 30) == 0
+        assert LineStats([]).count_words(1, 1) == 0
+
+    def test_bare_heading_mark_carry(self):
+        """見出し記号だけの行に続く行頭の空白は、範囲の先頭かどうかで数え方が変わる"""
+        stats = LineStats(["#\n", "  ```x\n", "y\n"])
+
+        # "#" の行から数えると次の行の行頭の空白ごと除去され、```x はコードブロック記法になる
+        assert stats.count_words(1, 3) == 1
+        # 2 行目から数えると ```x は通常の単語
+        assert stats.count_words(2, 3) == 2
+
+    @patch("md2map.parsers.markdown_parser.MarkdownParser._ensure_llm_provider")
+    def test_subsplit_counts_and_summary(self, _mock_ensure, tmp_path):
+        """サブスプリットの単語数・要約は範囲内のテキストから求める"""
+        path = tmp_path / "doc.md"
+        path.write_text(
+            "# Doc\n\nfirst para one\nfirst para two\n\nsecond para\n\nthird para words\n",
+            encoding="utf-8",
+        )
+        parser = MarkdownParser(split_mode="ai", split_threshold=3, max_subsections=2)
+        sections, _ = parser.parse(str(path))
+
+        doc, part1, part2 = sections
+        assert doc.summary == "first para one first para two"
+        assert part1.summary == doc.summary
+        assert part2.summary == "second para"
+        assert doc.word_count == 12
+        assert part1.word_count + part2.word_count == doc.word_count
+
+
+class TestNounExtractor:
+    """NLP モードの名詞抽出のテスト"""
+
+    TEXTS = [
+        "設計書の仕様を確認する。\n",
+        "ユーザー管理機能では、ユーザーの登録と削除を行う。\n続く行。\n",
+        "English text without Japanese nouns.\n",
+        "設計書の仕様を確認する。\n",
+    ]
+
+    @staticmethod
+    def _nouns_one_by_one(text):
+        return frozenset(
+            m.surface() for m in get_tokenizer().tokenize(text)
+            if m.part_of_speech()[0] == "名詞"
+        )
+
+    def test_batched_matches_per_paragraph(self):
+        """まとめてトークナイズしても段落ごとの結果と同じ"""
+        long_text = "長い段落の本文です。\n" * 5000  # Sudachi の入力長の上限を超える
+        nouns = nouns_for_texts(self.TEXTS + [long_text])
+
+        for text, result in zip(self.TEXTS, nouns):
+            assert frozenset(result) == self._nouns_one_by_one(text)
+        assert set(nouns[-1]) == {"段落", "本文"}
+
+    def test_noun_cache(self):
+        """同じ段落は再度トークナイズしない"""
+        texts = [f"キャッシュ確認用の段落{i}です。\n" for i in range(3)]
+        with patch(
+            "md2map.parsers.noun_extractor.nouns_for_texts", wraps=nouns_for_texts
+        ) as spy:
+            first = extract_nouns(texts + texts[:1])
+            second = extract_nouns(texts)
+
+        assert first[:3] == second
+        assert first[0] == first[3]
+        # 1回目も重複を除いた3段落のみ、2回目はトークナイズしない
+        assert spy.call_count == 1
+        assert len(spy.call_args.args[0]) == 3
+
+    def test_shared_tokenizer(self):
+        """パーサーごとに辞書を読み込み直さない"""
+        parser1 = MarkdownParser(split_mode="nlp")
+        parser2 = MarkdownParser(split_mode="nlp")
+        assert parser1._nlp_tokenizer is parser2._nlp_tokenizer
+
+    def test_worker_processes(self, tmp_path):
+        """ワーカープロセスに分散しても同じ結果になる"""
+        content = ""
+        for i in range(3):
+            content += f"## 機能{i}\n\n"
+            for j in range(6):
+                topic = ["認証", "帳票", "通知"][(i + j) % 3]
+                content += f"{topic}処理の説明{i}-{j}。{topic}の仕様を定義する。" * 3 + "\n\n"
+        path = tmp_path / "doc.md"
+        path.write_text(content, encoding="utf-8")
+
+        results = []
+        with patch("md2map.parsers.noun_extractor.PARALLEL_MIN_PARAGRAPHS", 1):
+            for workers in (1, 2):
+                noun_extractor._noun_cache.clear()
+                parser = MarkdownParser(
+                    split_mode="nlp", split_threshold=50, max_subsections=3, nlp_workers=workers
+                )
+                sections, _ = parser.parse(str(path))
+                results.append([(s.start_line, s.end_line, s.is_subsplit) for s in sections])
+
+        assert results[0] == results[1]
+        assert any(is_subsplit for _, _, is_subsplit in results[0])
+
+
+class TestTextTiling:
+    """tiling モード（TextTiling）のテスト"""
+
+    TOPICS = {
+        "ja": [
+            ["ユーザー認証ではパスワードとワンタイムトークンを検証し、セッションを発行する。",
+             "認証失敗が続いた場合はアカウントをロックし、認証ログに記録する。"],
+            ["帳票出力では月次の売上集計をPDF帳票として生成する。",
+             "帳票テンプレートに売上集計値を埋め込み、帳票を保存する。"],
+            ["通知機能はメール通知とプッシュ通知を送信する。",
+             "通知の送信履歴を保存し、通知の再送を行う。"],
+        ],
+        "en": [
+            ["Authentication verifies the password and the one-time token before a session.",
+             "Repeated authentication failures lock the account and write an audit entry."],
+            ["Monthly sales reports are rendered as PDF documents from report templates.",
+             "Report templates embed the aggregated sales figures for each month."],
+            ["Notifications are delivered by email and push messages to subscribers.",
+             "Delivery history is stored so that failed notifications can be resent."],
+        ],
+    }
+
+    def _write_topics(self, tmp_path, lang):
+        paragraphs = [
+            topic[j % 2] for topic in self.TOPICS[lang] for j in range(4)
+        ]
+        path = tmp_path / f"{lang}.md"
+        path.write_text("# 設計書\n\n" + "\n\n".join(paragraphs) + "\n", encoding="utf-8")
+        return path
+
+    @pytest.mark.parametrize("lang", ["ja", "en"])
+    def test_topic_boundaries(self, tmp_path, lang):
+        """話題の切れ目（4段落ごと）で分割する"""
+        path = self._write_topics(tmp_path, lang)
+        parser = MarkdownParser(split_mode="tiling", split_threshold=50, max_subsections=3)
+        sections, _ = parser.parse(str(path))
+
+        subsplits = [s for s in sections if s.is_subsplit]
+        assert [(s.start_line, s.end_line) for s in subsplits] == [(1, 9), (11, 17), (19, 25)]
+        assert "tiling" in subsplits[0].note
+
+    def test_gap_similarities_match_dense(self):
+        """ブロック類似度が段落ベクトルの和のコサイン類似度と一致する（範囲の外は含めない）"""
+        words = ["認証", "帳票", "通知", "画面", "login", "Report", "session", "の"]
+        texts = [
+            " ".join(words[(i * 7 + k * 3) % len(words)] for k in range(i % 5))
+            for i in range(30)
+        ]
+        vectors = paragraph_vectors(texts)
+        rows = [{} for _ in texts]
+        for key, weight in zip(vectors.keys.tolist(), vectors.weights.tolist()):
+            rows[key >> FEATURE_BITS][key & ((1 << FEATURE_BITS) - 1)] = weight
+
+        def block(start, end):
+            total = {}
+            for row in rows[start:end]:
+                for feature, weight in row.items():
+                    total[feature] = total.get(feature, 0.0) + weight
+            return total
+
+        def cosine(a, b):
+            norm_a = sum(w * w for w in a.values()) ** 0.5
+            norm_b = sum(w * w for w in b.values()) ** 0.5
+            if not norm_a and not norm_b:
+                return 1.0
+            if not norm_a or not norm_b:
+                return 0.0
+            return sum(w * b.get(f, 0.0) for f, w in a.items()) / (norm_a * norm_b)
+
+        ranges = [(0, 1), (1, 12), (12, 14), (14, 30)]
+        for (start, end), sims in zip(ranges, gap_similarities(vectors, ranges, block_size=3)):
+            expected = [
+                cosine(block(max(start, g - 2), g + 1), block(g + 1, min(end, g + 4)))
+                for g in range(start, end - 1)
+            ]
+            assert sims.tolist() == pytest.approx(expected)
+
+    def test_depth_scores(self):
+        """左右の山の高さとの差の和"""
+        sims = text_tiling.np.array([0.9, 0.5, 0.7, 0.2, 0.8, 0.8])
+        depths = depth_scores(sims)
+        assert depths.tolist() == pytest.approx([0.0, 0.6, 0.0, 1.1, 0.0, 0.0])
+
+    def test_uniform_text_falls_back_to_threshold(self, tmp_path):
+        """谷がない場合は閾値ベースで分割する"""
+        path = tmp_path / "doc.md"
+        path.write_text("# 設計書\n\n" + "同じ内容の段落です。\n\n" * 6, encoding="utf-8")
+        parser = MarkdownParser(split_mode="tiling", split_threshold=20, max_subsections=3)
+        sections, _ = parser.parse(str(path))
+
+        assert len([s for s in sections if s.is_subsplit]) == 3
+
+    def test_missing_numpy(self):
+        """numpy がなければ RuntimeError"""
+        with patch.object(text_tiling, "np", None), pytest.raises(
+            RuntimeError, match=r"md2map\[tiling\]"
+        ):
+            MarkdownParser(split_mode="tiling")
+
+
+class TestHeadingScanner:
+    """mmap ベースの見出しスキャナーのテスト"""
+
+    CONTENTS = {
+        "frontmatter": "---\ntitle: x\n# not heading\n---\n# A\n~~~\n# no\n```\n# still\n~~~\n## B",
+        "unclosed_frontmatter": "---\n# a\n",
+        "first_line": "# Only",
+        "crlf": "# A\r\nx\r\n## B\r\n\r\n```\r\n# n\r\n```\r\n# C\r\n",
+        "lone_cr": "# A\rb\n## B\n",
+        "cr": "# A\r本文\r\r## B\r```\r# n\r```\r末尾",
+        "mixed": "# A\r\nx\r## B\ny\r\n",
+        "line_separator": "# A\u2028## B\n### C\n",
+        "japanese": "# 概要\n本文です。\n## 詳細\u3000\n####### seven\n#nospace\n",
+        "empty": "",
+    }
+
+    @pytest.mark.parametrize("name", sorted(CONTENTS))
+    def test_matches_extract_headings(self, tmp_path, name):
+        """ファイルからの見出し一覧が、テキストモードで読んだ本文の extract_headings() と一致する"""
+        content = self.CONTENTS[name]
+        path = tmp_path / "doc.md"
+        path.write_bytes(content.encode("utf-8"))
+        parser = MarkdownParser()
+        # テキストモードの読み込みでは \r\n と単独の \r が \n になる
+        text = path.read_text(encoding="utf-8")
+
+        for max_depth in (6, 2):
+            assert parser.extract_headings_from_file(str(path), max_depth) == (
+                parser.extract_headings(text, max_depth)
+            )
+
+    def test_invalid_utf8(self, tmp_path):
+        """不正なバイト列は置換文字として数える"""
+        data = b"# A\n\xff\xfe bad\n## B\xe3\x81\n x\n"
+        path = tmp_path / "doc.md"
+        path.write_bytes(data)
+        parser = MarkdownParser()
+
+        assert parser.extract_headings_from_file(str(path)) == parser.extract_headings(
+            data.decode("utf-8", errors="replace")
+        )
+
+    def test_offsets_and_text(self, tmp_path):
+        """見出しのバイトオフセットと、任意の行範囲の切り出し"""
+        body = "".join(f"本文{i}\n" for i in range(5000))
+        content = "# 一\n" + body + "## 二\n" + body + "末尾"
+        path = tmp_path / "doc.md"
+        path.write_bytes(content.encode("utf-8"))
+        lines = content.splitlines(keepends=True)
+
+        with MarkdownSource(path) as source:
+            headings = list(source.headings(6))
+            assert [(h.line, h.offset) for h in headings] == [
+                (1, 0), (5002, len(("# 一\n" + body).encode("utf-8"))),
+            ]
+            assert source.line_count == len(lines)
+            for start, end in [(1, 1), (2, 5001), (4000, 9000), (9990, 10003), (5, 4)]:
+                assert source.text(start, end) == "".join(lines[start - 1 : end])
+
+    @pytest.mark.parametrize("newline", ["\r\n", "\r"])
+    def test_text_normalizes_newlines(self, tmp_path, newline):
+        """CRLF・CR の本文は read_file() と同じく \\n に変換して切り出す"""
+        content = (FIXTURES_DIR / "japanese.md").read_text(encoding="utf-8")
+        path = tmp_path / "doc.md"
+        path.write_bytes(content.replace("\n", newline).encode("utf-8"))
+        lines, _ = read_file(str(path))
+
+        with MarkdownSource(path) as source:
+            assert source.line_count == len(lines)
+            for heading in source.headings(6):
+                assert source.text(heading.line, source.line_count) == "".join(
+                    lines[heading.line - 1 :]
+                )
+            assert "\r" not in source.text(1, source.line_count)
@@ -1,22 +1,39 @@
 """spec-code-ai-mapper backend"""
 
+import asyncio
 import os
+from contextlib import asynccontextmanager
 from importlib.metadata import version
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from pathlib import Path
 
-from app.routers import convert, review, organize, split
+from app.routers import artifacts, convert, impact, map_pipeline, metrics, review, organize, split
+from app.services.compression import CompressionMiddleware
+from app.services.profiler import ProfilingMiddleware
+from app.services.static_files import PrecompressedStaticFiles
 
 # pyproject.tomlからバージョンを取得
 APP_VERSION = version("spec-code-ai-mapper-backend")
 
+# 起動時にNLPモード（Sudachi）の辞書を読み込むか
+NLP_WARMUP = os.getenv("NLP_WARMUP", "true").lower() in ("1", "true", "yes")
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # 最初のNLPモードの分割リクエストが辞書の読み込みを待たないようにする
+    if NLP_WARMUP:
+        await asyncio.to_thread(split.warm_up_nlp_tokenizer)
+    yield
+
+
 app = FastAPI(
     title="spec-code-ai-mapper API",
     description="spec-code-ai-mapper API for design-to-code mapping",
     version=APP_VERSION,
+    lifespan=lifespan,
 )
 
 # CORS設定（環境変数で制御、デフォルトは全許可）
@@ -32,17 +49,30 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# リクエスト単位のプロファイリング（管理者ヘッダー・PROFILE_PATHS の対象のみ）
+app.add_middleware(ProfilingMiddleware)
+
+# 圧縮（gzip / zstd のリクエスト展開とレスポンス圧縮）
+app.add_middleware(CompressionMiddleware)
+
 # ルーター登録
 app.include_router(convert.router, prefix="/api/convert", tags=["convert"])
 app.include_router(review.router, prefix="/api", tags=["review"])
 app.include_router(organize.router, prefix="/api", tags=["organize"])
 app.include_router(split.router, prefix="/api", tags=["split"])
+app.include_router(map_pipeline.router, prefix="/api", tags=["map"])
+app.include_router(impact.router, prefix="/api", tags=["impact"])
+app.include_router(artifacts.router, prefix="/api", tags=["artifacts"])
+app.include_router(metrics.router, prefix="/api", tags=["metrics"])
 
 # フロントエンドの静的ファイル配信
 FRONTEND_DIR = Path(__file__).parent.parent.parent / "frontend"
+# ビルド済み（npm run build）であれば dist/ を配信する
+FRONTEND_DIST_DIR = FRONTEND_DIR / "dist"
+STATIC_DIR = FRONTEND_DIST_DIR if FRONTEND_DIST_DIR.is_dir() else FRONTEND_DIR
 
-# 静的ファイル（画像など）を配信
-app.mount("/", StaticFiles(directory=str(FRONTEND_DIR), html=True), name="static")
+# 静的ファイル（画像など）を配信（圧縮済みファイル・キャッシュヘッダーに対応）
+app.mount("/", PrecompressedStaticFiles(directory=str(STATIC_DIR), html=True), name="static")
 
 
 @app.get("/health")
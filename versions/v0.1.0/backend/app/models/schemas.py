@@ -13,6 +13,8 @@ class ConvertResponse(BaseModel):
     content: str | None = None
     filename: str
     line_count: int | None = None
+    contentHash: str | None = None  # 変換結果（markdown/content）のアーティファクトハッシュ
+    sourceHash: str | None = None  # 行番号付与前のテキストのハッシュ（コード分割APIで参照可能）
     error: str | None = None
 
 
@@ -67,6 +69,8 @@ class LLMConfig(BaseModel):
         default=16384,
         validation_alias=AliasChoices("maxTokens", "max_tokens"),
     )
+    # 処理内容・入力規模に応じたモデルの振り分け（LLM_FAST_MODEL 等）を許可するか
+    modelRouting: bool = False
 
 
 # [UNUSED] AIマッパーでは未使用（旧AIレビュアーのレビュー実行API用スキーマ）
@@ -279,13 +283,25 @@ class OrganizeMarkdownResponse(BaseModel):
 
 
 class SplitMarkdownRequest(BaseModel):
-    """Markdown分割APIのリクエスト"""
+    """Markdown分割APIのリクエスト
 
-    content: str  # Markdownテキスト
+    content の代わりに contentHash（変換APIが返したハッシュ）を指定できる。
+    """
+
+    content: str | None = None  # Markdownテキスト
+    contentHash: str | None = None  # アーティファクトストア上のMarkdownのハッシュ
     filename: str  # 元ファイル名
     maxDepth: int = Field(default=2, ge=1, le=6)  # 分割の見出しレベル (H1-H6)
     splitMode: Literal["ai", "heading", "nlp"] = "ai"  # 分割モード
     llmConfig: LLMConfig | None = None  # AIモード用LLM設定
+    includeContent: bool = True  # Falseの場合、content・indexContent・mapJsonを省略しハッシュのみ返す
+    stream: bool = False  # Trueの場合、NDJSON形式でパーツを1件ずつ返す
+
+    @model_validator(mode='after')
+    def validate_content_source(self):
+        if self.content is None and not self.contentHash:
+            raise ValueError("content または contentHash を指定してください。")
+        return self
 
 
 class DocumentPart(BaseModel):
@@ -298,7 +314,8 @@ class DocumentPart(BaseModel):
     path: str  # パス (親セクション > 子セクション)
     startLine: int
     endLine: int
-    content: str  # パーツの内容
+    content: str | None = None  # パーツの内容（includeContent=False時は省略）
+    contentHash: str | None = None  # パーツ内容のアーティファクトハッシュ
     estimatedTokens: int
 
 
@@ -307,16 +324,30 @@ class SplitMarkdownResponse(BaseModel):
 
     success: bool
     parts: list[DocumentPart] = []
-    indexContent: str | None = None  # INDEX.md相当の内容
-    mapJson: list[dict] | None = None  # md2map生成のMAP.json
+    indexContent: str | None = None  # INDEX.md相当の内容（includeContent=False時は省略）
+    mapJson: list[dict] | None = None  # md2map生成のMAP.json（includeContent=False時は省略）
+    indexHash: str | None = None  # INDEX.mdのアーティファクトハッシュ
+    mapHash: str | None = None  # MAP.jsonのアーティファクトハッシュ
     error: str | None = None
 
 
 class SplitCodeRequest(BaseModel):
-    """コード分割APIのリクエスト"""
+    """コード分割APIのリクエスト
 
-    content: str  # 元のコード（行番号なし）
+    content の代わりに contentHash を指定できる。
+    """
+
+    content: str | None = None  # 元のコード（行番号なし）
+    contentHash: str | None = None  # アーティファクトストア上のコードのハッシュ
     filename: str  # ファイル名（拡張子で言語判定）
+    includeContent: bool = True  # Falseの場合、content・indexContent・mapJsonを省略しハッシュのみ返す
+    stream: bool = False  # Trueの場合、NDJSON形式でパーツを1件ずつ返す
+
+    @model_validator(mode='after')
+    def validate_content_source(self):
+        if self.content is None and not self.contentHash:
+            raise ValueError("content または contentHash を指定してください。")
+        return self
 
 
 class CodePart(BaseModel):
@@ -328,7 +359,8 @@ class CodePart(BaseModel):
     parentSymbol: str | None = None  # 親シンボル (メソッドの場合のクラス名)
     startLine: int
     endLine: int
-    content: str  # パーツの内容
+    content: str | None = None  # パーツの内容（includeContent=False時は省略）
+    contentHash: str | None = None  # パーツ内容のアーティファクトハッシュ
     estimatedTokens: int
 
 
@@ -337,8 +369,10 @@ class SplitCodeResponse(BaseModel):
 
     success: bool
     parts: list[CodePart] = []
-    indexContent: str | None = None  # INDEX.md相当の内容
-    mapJson: list[dict] | None = None  # code2map生成のMAP.json
+    indexContent: str | None = None  # INDEX.md相当の内容（includeContent=False時は省略）
+    mapJson: list[dict] | None = None  # code2map生成のMAP.json（includeContent=False時は省略）
+    indexHash: str | None = None  # INDEX.mdのアーティファクトハッシュ
+    mapHash: str | None = None  # MAP.jsonのアーティファクトハッシュ
     language: str | None = None  # 検出された言語
     error: str | None = None
 
@@ -369,18 +403,48 @@ class CodeMapSymbol(BaseModel):
 
 
 class DocumentStructure(BaseModel):
-    """設計書の構造情報"""
+    """設計書の構造情報
+
+    indexMd / mapJson の代わりに、分割APIが返した indexHash / mapHash を指定できる。
+    partHashes は厳密ポリシーのローカル照合で本文（要件IDの記載）を参照する場合に指定する。
+    """
+
+    indexMd: str | None = None
+    mapJson: dict | None = None  # { sections: list[DocumentMapSection] }
+    indexHash: str | None = None
+    mapHash: str | None = None  # md2map生成のMAP.json（リスト）のハッシュ
+    partHashes: dict[str, str] = {}  # セクションID → パーツ内容のハッシュ
 
-    indexMd: str
-    mapJson: dict  # { sections: list[DocumentMapSection] }
+    @model_validator(mode='after')
+    def validate_sources(self):
+        if self.indexMd is None and not self.indexHash:
+            raise ValueError("indexMd または indexHash を指定してください。")
+        if self.mapJson is None and not self.mapHash:
+            raise ValueError("mapJson または mapHash を指定してください。")
+        return self
 
 
 class CodeFileStructure(BaseModel):
-    """コードファイルの構造情報"""
+    """コードファイルの構造情報
+
+    indexMd / mapJson の代わりに、分割APIが返した indexHash / mapHash を指定できる。
+    partHashes は厳密ポリシーのローカル照合で docstring / Javadoc を参照する場合に指定する。
+    """
 
     filename: str
-    indexMd: str
-    mapJson: dict  # { symbols: list[CodeMapSymbol] }
+    indexMd: str | None = None
+    mapJson: dict | None = None  # { symbols: list[CodeMapSymbol] }
+    indexHash: str | None = None
+    mapHash: str | None = None  # code2map生成のMAP.json（リスト）のハッシュ
+    partHashes: dict[str, str] = {}  # シンボルID → パーツ内容のハッシュ
+
+    @model_validator(mode='after')
+    def validate_sources(self):
+        if self.indexMd is None and not self.indexHash:
+            raise ValueError("indexMd または indexHash を指定してください。")
+        if self.mapJson is None and not self.mapHash:
+            raise ValueError("mapJson または mapHash を指定してください。")
+        return self
 
 
 class StructureMatchingRequest(BaseModel):
@@ -389,6 +453,7 @@ class StructureMatchingRequest(BaseModel):
     document: DocumentStructure
     codeFiles: list[CodeFileStructure]
     mappingPolicy: str | None = "standard"  # standard, strict, detailed
+    matchingMode: str | None = "single"  # single, hierarchical（章 → ファイルの段階的照合）
     systemPrompt: SystemPrompt | None = None  # ユーザー指定のシステムプロンプト
     llmConfig: LLMConfig | None = None
 
@@ -427,10 +492,39 @@ class StructureMatchingResponse(BaseModel):
     groups: list[MatchedGroup] = []
     totalGroups: int = 0
     tokensUsed: dict = {}  # トークン使用量 {"input": N, "output": M}
+    llmCalls: int = 0  # LLM呼び出し回数
     reviewMeta: ReviewMeta | None = None  # 実行メタ情報（モデルID、トークン数等）
     error: str | None = None
 
 
+# =============================================================================
+# Map Pipeline API スキーマ
+# =============================================================================
+
+
+class MapDesignOption(BaseModel):
+    """パイプラインAPIの設計書ごとの設定（filename でアップロードファイルと対応付ける）"""
+
+    filename: str
+    isMain: bool = False
+    type: str = ""  # 設計書の種別
+    note: str = ""  # 種別の注意事項
+    tool: str | None = None  # Excelの変換ツール（省略時はmarkitdown）
+
+
+class MapPipelineOptions(BaseModel):
+    """パイプラインAPIのオプション（multipart の options フィールドにJSONで指定）"""
+
+    designs: list[MapDesignOption] = []  # 省略した設計書は種別なし、先頭の設計書をメインとする
+    maxDepth: int = Field(default=2, ge=1, le=6)  # 設計書の分割の見出しレベル
+    splitMode: Literal["ai", "heading", "nlp"] = "ai"  # 設計書の分割モード
+    mappingPolicy: str | None = "standard"  # standard, strict, detailed
+    matchingMode: str | None = "single"  # single, hierarchical
+    systemPrompt: SystemPrompt | None = None
+    llmConfig: LLMConfig | None = None
+    stream: bool = False  # Trueの場合、進捗と結果をNDJSON形式で返す
+
+
 # =============================================================================
 # Group Review API スキーマ
 # [UNUSED] AIマッパーでは未使用（旧AIレビュアーのグループレビューAPI用スキーマ）
@@ -444,16 +538,28 @@ class GroupReviewRequest(BaseModel):
 
     documentContent, codeContent はフロントエンドで結合済みのテキストを受け取る。
     これにより、片方のみ分割の場合でも全体テキストを渡せる。
+    結合済みテキストの代わりに、パーツのハッシュ一覧（*ContentHashes）を指定すると
+    サーバー側でアーティファクトストアから結合する。
     """
 
     groupId: str
     groupName: str
-    documentContent: str  # 結合済みの設計書内容
-    codeContent: str  # 結合済みのコード内容
+    documentContent: str | None = None  # 結合済みの設計書内容
+    codeContent: str | None = None  # 結合済みのコード内容
+    documentContentHashes: list[str] = []  # 設計書パーツのハッシュ（順に結合）
+    codeContentHashes: list[str] = []  # コードパーツのハッシュ（順に結合）
     reviewOptions: dict = {}
     systemPrompt: SystemPrompt | None = None  # ユーザー指定のシステムプロンプト
     llmConfig: LLMConfig | None = None
 
+    @model_validator(mode='after')
+    def validate_content_sources(self):
+        if self.documentContent is None and not self.documentContentHashes:
+            raise ValueError("documentContent または documentContentHashes を指定してください。")
+        if self.codeContent is None and not self.codeContentHashes:
+            raise ValueError("codeContent または codeContentHashes を指定してください。")
+        return self
+
 
 class ReviewFinding(BaseModel):
     """レビュー指摘事項"""
@@ -483,6 +589,52 @@ class GroupReviewResponse(BaseModel):
     error: str | None = None
 
 
+class ReviewPartRef(BaseModel):
+    """バッチグループレビュー用のパーツ参照
+
+    分割APIのパーツをIDで参照する。内容は content または contentHash で指定する。
+    コードのシンボルIDはファイルごとに採番されるため、filename と組で識別する。
+    """
+
+    id: str  # MD1 / CD1 など
+    filename: str | None = None  # コードパーツの場合は必須
+    title: str | None = None  # 表示用の見出し（セクション名・シンボル名）
+    content: str | None = None
+    contentHash: str | None = None
+
+    @model_validator(mode='after')
+    def validate_content_source(self):
+        if self.content is None and not self.contentHash:
+            raise ValueError("content または contentHash を指定してください。")
+        return self
+
+
+class GroupReviewBatchRequest(BaseModel):
+    """バッチグループレビューAPIのリクエスト
+
+    構造マッチング結果のグループと分割パーツを受け取り、サーバー側で
+    グループごとのコンテキストを組み立てる。小さなグループはトークン予算の範囲で
+    1回のLLM呼び出しにまとめ、複数グループで共有するパーツは1度だけ送信する。
+    """
+
+    groups: list[MatchedGroup]
+    documentParts: list[ReviewPartRef]
+    codeParts: list[ReviewPartRef]
+    tokenBudget: int | None = None  # 1回の呼び出しの入力トークン上限（未指定時は環境変数）
+    systemPrompt: SystemPrompt | None = None  # ユーザー指定のシステムプロンプト
+    llmConfig: LLMConfig | None = None
+
+
+class GroupReviewBatchResponse(BaseModel):
+    """バッチグループレビューAPIのレスポンス"""
+
+    success: bool
+    results: list[GroupReviewResponse] = []  # groups と同じ順序
+    llmCalls: int = 0  # 実際に行ったLLM呼び出し回数
+    tokensUsed: dict = {}  # 全呼び出しの合計 { input: int, output: int }
+    error: str | None = None
+
+
 # =============================================================================
 # Integrate API スキーマ
 # [UNUSED] AIマッパーでは未使用（旧AIレビュアーの結果統合API用スキーマ）
@@ -547,3 +699,135 @@ class IntegrateResponse(BaseModel):
     reviewMeta: ReviewMeta | None = None  # 一括レビューと同様のメタ情報
     tokensUsed: dict = {}
     error: str | None = None
+
+
+# =============================================================================
+# Impact API スキーマ
+# =============================================================================
+
+
+class ImpactCodeFile(BaseModel):
+    """影響分析に使うコードファイルのマッピング
+
+    mapJson の代わりに、分割APIが返した mapHash を指定できる。
+    """
+
+    filename: str  # 構造マッチングのグループと同じファイル名
+    mapJson: list[dict] | dict | None = None  # code2map生成のMAP.json（リスト / { symbols: [...] }）
+    mapHash: str | None = None
+
+    @model_validator(mode='after')
+    def validate_sources(self):
+        if self.mapJson is None and not self.mapHash:
+            raise ValueError("mapJson または mapHash を指定してください。")
+        return self
+
+
+class ImpactRequest(BaseModel):
+    """影響分析APIのリクエスト"""
+
+    diff: str  # unified diff（git diff の出力）
+    codeFiles: list[ImpactCodeFile]
+    groups: list[MatchedGroup] = []  # 構造マッチングの結果
+
+
+class ImpactedSymbol(BaseModel):
+    """変更の影響を受けるシンボル"""
+
+    id: str  # シンボルID (CD1, CD2, ...)
+    filename: str
+    symbol: str
+    symbolType: str
+    startLine: int  # マッピング作成時（差分の旧側）の行番号
+    endLine: int
+    changedLines: int  # シンボル内の変更行数
+
+
+class ImpactedGroup(BaseModel):
+    """変更の影響を受けるグループ"""
+
+    groupId: str
+    groupName: str
+    docSections: list[MatchedDocSection]
+    codeSymbols: list[MatchedCodeSymbol]  # グループのシンボルのうち影響を受けるもの
+
+
+class UnmappedChange(BaseModel):
+    """どのシンボルにも含まれない変更"""
+
+    filename: str
+    startLine: int
+    endLine: int
+
+
+class ImpactResponse(BaseModel):
+    """影響分析APIのレスポンス"""
+
+    success: bool
+    symbols: list[ImpactedSymbol] = []
+    groups: list[ImpactedGroup] = []
+    docSections: list[MatchedDocSection] = []  # 影響を受けるグループの設計書セクション（重複なし）
+    unmappedFiles: list[str] = []  # 新規ファイル・マッピングのないファイル
+    unmappedChanges: list[UnmappedChange] = []
+    error: str | None = None
+
+
+# =============================================================================
+# Artifact API スキーマ
+# =============================================================================
+
+
+class ArtifactUploadRequest(BaseModel):
+    """アーティファクト登録APIのリクエスト"""
+
+    content: str
+
+
+class ArtifactUploadResponse(BaseModel):
+    """アーティファクト登録APIのレスポンス"""
+
+    success: bool
+    hash: str | None = None  # sha256（16進数64文字）
+    size: int | None = None  # UTF-8バイト数
+    error: str | None = None
+
+
+class ArtifactExistsRequest(BaseModel):
+    """アーティファクト存在確認APIのリクエスト"""
+
+    hashes: list[str]
+
+
+class ArtifactExistsResponse(BaseModel):
+    """アーティファクト存在確認APIのレスポンス"""
+
+    missing: list[str] = []  # サーバーに存在しない（再送信が必要な）ハッシュ
+
+
+class ArtifactResponse(BaseModel):
+    """アーティファクト取得APIのレスポンス"""
+
+    success: bool
+    hash: str
+    content: str | None = None
+    error: str | None = None
+
+
+# =============================================================================
+# Metrics API スキーマ
+# =============================================================================
+
+
+class MetricsResponse(BaseModel):
+    """メトリクスAPIのレスポンス"""
+
+    counters: dict[str, float] = {}  # 例: {"llm_calls_cancelled_total{operation=review_groups}": 3}
+    observations: dict[str, dict] = {}  # 例: {"llm_call_seconds{...}": {"count", "sum", "max"}}
+
+
+class ProfileResponse(BaseModel):
+    """プロファイル取得APIのレスポンス"""
+
+    success: bool
+    profile: dict | None = None  # サマリー（所要時間・ピークメモリ・上位の関数など）
+    error: str | None = None
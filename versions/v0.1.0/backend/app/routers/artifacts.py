@@ -0,0 +1,61 @@
+"""アーティファクトAPI
+
+変換・分割結果をハッシュで参照するためのコンテンツアドレス型ストアのAPI。
+クライアントは存在確認APIで不足分のみを登録し、以降はハッシュで参照する。
+"""
+
+from fastapi import APIRouter
+
+from app.models.schemas import (
+    ArtifactExistsRequest,
+    ArtifactExistsResponse,
+    ArtifactResponse,
+    ArtifactUploadRequest,
+    ArtifactUploadResponse,
+)
+from app.services.artifact_store import ArtifactNotFoundError, get_artifact_store
+from app.services.json_codec import FastJSONRoute
+
+router = APIRouter(route_class=FastJSONRoute)
+
+# 登録可能な最大サイズ（設計書の上限に合わせる）
+MAX_ARTIFACT_SIZE = 10 * 1024 * 1024  # 10MB
+
+
+@router.post("/artifacts", response_model=ArtifactUploadResponse)
+async def upload_artifact(request: ArtifactUploadRequest):
+    """
+    テキストをアーティファクトとして登録し、sha256ハッシュを返す
+    """
+    size = len(request.content.encode("utf-8"))
+    if size > MAX_ARTIFACT_SIZE:
+        return ArtifactUploadResponse(
+            success=False,
+            error=f"サイズが上限（{MAX_ARTIFACT_SIZE // (1024 * 1024)}MB）を超えています。",
+        )
+
+    artifact_hash = get_artifact_store().put(request.content)
+    return ArtifactUploadResponse(success=True, hash=artifact_hash, size=size)
+
+
+@router.post("/artifacts/exists", response_model=ArtifactExistsResponse)
+async def check_artifacts(request: ArtifactExistsRequest):
+    """
+    指定されたハッシュのうち、サーバーに存在しないものを返す
+    """
+    store = get_artifact_store()
+    return ArtifactExistsResponse(
+        missing=[h for h in request.hashes if not store.exists(h)]
+    )
+
+
+@router.get("/artifacts/{artifact_hash}", response_model=ArtifactResponse)
+async def get_artifact(artifact_hash: str):
+    """
+    ハッシュに対応するアーティファクトの内容を返す
+    """
+    try:
+        content = get_artifact_store().get(artifact_hash)
+    except ArtifactNotFoundError as e:
+        return ArtifactResponse(success=False, hash=artifact_hash, error=str(e))
+    return ArtifactResponse(success=True, hash=artifact_hash, content=content)
@@ -7,9 +7,11 @@ from fastapi import APIRouter, File, Form, UploadFile, HTTPException
 from app.models.schemas import ConvertResponse, AvailableToolsResponse, ToolInfo
 from app.services.markitdown_service import convert_excel_to_markdown
 from app.services.line_numbers_service import add_line_numbers
+from app.services.artifact_store import get_artifact_store
+from app.services.json_codec import FastJSONRoute
 from app.markdown_tools import get_available_tools
 
-router = APIRouter()
+router = APIRouter(route_class=FastJSONRoute)
 
 # ファイルサイズ制限
 MAX_EXCEL_SIZE = 10 * 1024 * 1024  # 10MB
@@ -70,6 +72,7 @@ async def convert_excel_to_markdown_api(
             success=True,
             markdown=markdown,
             filename=filename,
+            contentHash=get_artifact_store().put(markdown),
         )
     except ValueError as e:
         return ConvertResponse(
@@ -125,11 +128,14 @@ async def add_line_numbers_api(file: UploadFile = File(...)):
 
     try:
         numbered_content, line_count = add_line_numbers(content)
+        store = get_artifact_store()
         return ConvertResponse(
             success=True,
             content=numbered_content,
             filename=filename,
             line_count=line_count,
+            contentHash=store.put(numbered_content),
+            sourceHash=store.put(content),
         )
     except Exception as e:
         return ConvertResponse(
@@ -0,0 +1,89 @@
+"""影響分析API
+
+コードの差分（unified diff）と保存済みのマッピングから、影響を受けるシンボル・
+グループ・設計書セクションを返す。LLMは呼び出さない。
+"""
+
+from fastapi import APIRouter
+
+from app.models.schemas import (
+    ImpactedGroup,
+    ImpactedSymbol,
+    ImpactRequest,
+    ImpactResponse,
+    UnmappedChange,
+)
+from app.services.artifact_store import ArtifactNotFoundError, get_artifact_store
+from app.services.impact_analyzer import analyze_impact, parse_unified_diff, symbols_from_map
+from app.services.json_codec import FastJSONRoute
+
+router = APIRouter(route_class=FastJSONRoute)
+
+
+@router.post("/impact", response_model=ImpactResponse)
+async def impact_analysis(request: ImpactRequest):
+    """
+    差分の変更箇所から影響を受けるシンボル・グループ・設計書セクションを求める
+
+    - 変更行は差分の旧側（マッピング作成時のコード）の行番号で照合する
+    - グループは影響を受けるシンボルを1つ以上含むものを返す
+    """
+    store = get_artifact_store()
+    symbols_by_file = {}
+    try:
+        for code_file in request.codeFiles:
+            map_json = (
+                code_file.mapJson
+                if code_file.mapJson is not None
+                else store.get_json(code_file.mapHash)
+            )
+            symbols_by_file[code_file.filename] = symbols_from_map(code_file.filename, map_json)
+    except ArtifactNotFoundError as e:
+        return ImpactResponse(success=False, error=str(e))
+
+    try:
+        result = analyze_impact(parse_unified_diff(request.diff), symbols_by_file)
+    except Exception as e:
+        return ImpactResponse(
+            success=False,
+            error=f"影響分析中にエラーが発生しました: {str(e)}",
+        )
+
+    affected = {(symbol.filename, symbol.id) for symbol, _ in result.symbols}
+    groups = []
+    doc_sections = {}
+    for group in request.groups:
+        hits = [s for s in group.codeSymbols if (s.filename, s.id) in affected]
+        if not hits:
+            continue
+        groups.append(ImpactedGroup(
+            groupId=group.groupId,
+            groupName=group.groupName,
+            docSections=group.docSections,
+            codeSymbols=hits,
+        ))
+        for section in group.docSections:
+            doc_sections.setdefault(section.id, section)
+
+    return ImpactResponse(
+        success=True,
+        symbols=[
+            ImpactedSymbol(
+                id=symbol.id,
+                filename=symbol.filename,
+                symbol=symbol.symbol,
+                symbolType=symbol.type,
+                startLine=symbol.start_line,
+                endLine=symbol.end_line,
+                changedLines=changed_lines,
+            )
+            for symbol, changed_lines in result.symbols
+        ],
+        groups=groups,
+        docSections=list(doc_sections.values()),
+        unmappedFiles=result.unmapped_files,
+        unmappedChanges=[
+            UnmappedChange(filename=filename, startLine=start, endLine=end)
+            for filename, start, end in result.unmapped_ranges
+        ],
+    )
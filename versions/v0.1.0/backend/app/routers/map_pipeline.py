@@ -0,0 +1,381 @@
+"""マッピングパイプラインAPI
+
+設計書（Excel / Markdown）とコードファイルを受け取り、変換・分割・構造マッチングを
+サーバー内で実行して StructureMatchingResponse を返す。
+ブラウザとの往復（変換・ファイルごとの分割・構造マッチング）を1リクエストにまとめる。
+
+処理の依存関係:
+
+    設計書の変換（並列） ──→ 結合・設計書の分割 ──┐
+                                                    ├──→ 構造マッチング
+    コードの分割（並列） ───────────────────────────┘
+
+設計書の変換とコードの分割は互いに依存しないため同時に実行し、
+設計書の分割はコードの分割の完了を待たずに開始する。
+"""
+
+import asyncio
+import json
+from collections.abc import AsyncIterator, Callable
+from dataclasses import dataclass
+
+from fastapi import APIRouter, File, Form, Request, UploadFile
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+
+from app.models.schemas import (
+    CodeFileStructure,
+    DocumentStructure,
+    MapDesignOption,
+    MapPipelineOptions,
+    StructureMatchingRequest,
+    StructureMatchingResponse,
+)
+from app.routers.convert import MAX_CODE_SIZE, MAX_EXCEL_SIZE
+from app.routers.review import run_structure_matching
+from app.routers.split import (
+    NDJSON_MEDIA_TYPE,
+    _build_md2map_llm_provider,
+    _ndjson_error_response,
+    _ndjson_line,
+    detect_code_language,
+    iter_code_parts,
+    iter_document_parts,
+    split_code_source,
+    split_markdown_source,
+)
+from app.services.cancellation import cancel_on_disconnect, current_cancellation_scope
+from app.services.json_codec import FastJSONRoute
+from app.services.markitdown_service import SUPPORTED_EXTENSIONS, convert_excel_to_markdown
+
+router = APIRouter(route_class=FastJSONRoute)
+
+_MARKDOWN_EXTENSIONS = {".md", ".markdown"}
+
+ProgressCallback = Callable[[dict], None]
+
+
+class PipelineError(Exception):
+    """パイプラインの途中で処理を続けられない場合のエラー"""
+
+
+@dataclass
+class PipelineFile:
+    """読み込み済みのアップロードファイル"""
+
+    filename: str
+    data: bytes
+
+    @property
+    def extension(self) -> str:
+        return "." + self.filename.lower().rsplit(".", 1)[-1] if "." in self.filename else ""
+
+
+def _decode_text(data: bytes) -> str | None:
+    """UTF-8 / Shift_JIS のテキストとしてデコードする（変換APIと同様）"""
+    for encoding in ("utf-8", "shift_jis"):
+        try:
+            return data.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return None
+
+
+def _design_options(designs: list[PipelineFile], options: MapPipelineOptions) -> list[MapDesignOption]:
+    """アップロードされた設計書ごとの設定を返す（メイン未指定の場合は先頭をメインとする）"""
+    by_filename = {option.filename: option for option in options.designs}
+    resolved = [by_filename.get(d.filename) or MapDesignOption(filename=d.filename) for d in designs]
+    if resolved and not any(option.isMain for option in resolved):
+        resolved[0] = resolved[0].model_copy(update={"isMain": True})
+    return resolved
+
+
+def _convert_design(design: PipelineFile, tool: str | None) -> str:
+    """設計書を Markdown に変換する（Markdown はそのままデコードする）"""
+    if design.extension in _MARKDOWN_EXTENSIONS:
+        markdown = _decode_text(design.data)
+        if markdown is None:
+            raise PipelineError(
+                f"[{design.filename}] ファイルのエンコーディングを認識できませんでした。"
+                "UTF-8またはShift_JISで保存してください。"
+            )
+        return markdown
+    try:
+        return convert_excel_to_markdown(design.data, design.filename, tool)
+    except ValueError as e:
+        raise PipelineError(f"[{design.filename}] {str(e)}") from e
+    except Exception as e:
+        raise PipelineError(f"[{design.filename}] 変換中にエラーが発生しました: {str(e)}") from e
+
+
+def _combine_designs(options: list[MapDesignOption], markdowns: list[str]) -> str:
+    """設計書を1つのMarkdownに結合する（フロントエンドの結合形式と同じ）"""
+    return "\n\n---\n\n".join(
+        f"# 設計書: {option.filename}\n"
+        f"- 役割: {'メイン' if option.isMain else '参照'}\n"
+        f"- 種別: {option.type}\n"
+        f"- 注意事項: {option.note}\n\n"
+        f"{markdown}"
+        for option, markdown in zip(options, markdowns)
+        if markdown
+    )
+
+
+def _split_code_structure(code_file: PipelineFile, source: str, language: str) -> CodeFileStructure:
+    """コードを分割し、構造マッチング用の構造情報に変換する"""
+    try:
+        output = split_code_source(source, code_file.filename, language)
+        part_hashes = {
+            part.id: part.contentHash
+            for part in iter_code_parts(output.items, output.lines, include_content=False)
+        }
+    except Exception as e:
+        raise PipelineError(
+            f"[{code_file.filename}] コード分割中にエラーが発生しました: {str(e)}"
+        ) from e
+    return CodeFileStructure(
+        filename=code_file.filename,
+        indexMd=output.index_content,
+        mapJson={"symbols": output.map_json or []},
+        partHashes=part_hashes,
+    )
+
+
+def _split_document_structure(
+    markdown: str,
+    filename: str,
+    options: MapPipelineOptions,
+    llm_provider,
+) -> DocumentStructure:
+    """結合した設計書を分割し、構造マッチング用の構造情報に変換する"""
+    try:
+        output = split_markdown_source(
+            markdown, filename, options.maxDepth, options.splitMode, llm_provider
+        )
+        part_hashes = {
+            part.id: part.contentHash
+            for part in iter_document_parts(output.items, output.lines, include_content=False)
+        }
+    except Exception as e:
+        raise PipelineError(f"Markdown分割中にエラーが発生しました: {str(e)}") from e
+    if not output.map_json:
+        raise PipelineError("設計書から分割できるセクションがありません")
+    return DocumentStructure(
+        indexMd=output.index_content,
+        mapJson={"sections": output.map_json},
+        partHashes=part_hashes,
+    )
+
+
+async def run_map_pipeline(
+    designs: list[PipelineFile],
+    code_files: list[tuple[PipelineFile, str, str]],
+    options: MapPipelineOptions,
+    on_progress: ProgressCallback,
+) -> StructureMatchingResponse:
+    """変換・分割・構造マッチングを依存関係に沿って実行する
+
+    Args:
+        code_files: (ファイル, デコード済みのソース, 言語) のリスト
+        on_progress: 各処理の完了時に進捗レコードを受け取るコールバック
+    """
+    design_options = _design_options(designs, options)
+
+    async def convert(design: PipelineFile, option: MapDesignOption) -> str:
+        markdown = await asyncio.to_thread(_convert_design, design, option.tool)
+        on_progress({"type": "progress", "stage": "convert", "filename": design.filename, "status": "done"})
+        return markdown
+
+    async def split_code(code_file: PipelineFile, source: str, language: str) -> CodeFileStructure:
+        structure = await asyncio.to_thread(_split_code_structure, code_file, source, language)
+        on_progress({
+            "type": "progress",
+            "stage": "split_code",
+            "filename": code_file.filename,
+            "status": "done",
+            "symbols": len(structure.mapJson["symbols"]),
+        })
+        return structure
+
+    async def split_document() -> DocumentStructure:
+        markdowns = await asyncio.gather(
+            *(convert(design, option) for design, option in zip(designs, design_options))
+        )
+        llm_provider = None
+        if options.splitMode == "ai":
+            llm_provider = _build_md2map_llm_provider(options.llmConfig)
+        main = next(option for option in design_options if option.isMain)
+        document = await asyncio.to_thread(
+            _split_document_structure,
+            _combine_designs(design_options, markdowns),
+            main.filename.rsplit(".", 1)[0] + ".md",
+            options,
+            llm_provider,
+        )
+        on_progress({
+            "type": "progress",
+            "stage": "split_markdown",
+            "status": "done",
+            "sections": len(document.mapJson["sections"]),
+        })
+        return document
+
+    # 設計書の変換・分割とコードの分割を同時に進め、どちらかが失敗したら残りを打ち切る
+    document_task = asyncio.ensure_future(split_document())
+    code_task = asyncio.ensure_future(
+        asyncio.gather(*(split_code(*code_file) for code_file in code_files))
+    )
+    try:
+        document, code_structures = await asyncio.gather(document_task, code_task)
+    except PipelineError as e:
+        return StructureMatchingResponse(success=False, error=str(e))
+    except Exception as e:
+        return StructureMatchingResponse(
+            success=False, error=f"マッピング中にエラーが発生しました: {str(e)}"
+        )
+    finally:
+        document_task.cancel()
+        code_task.cancel()
+
+    on_progress({"type": "progress", "stage": "matching", "status": "started"})
+    return await run_structure_matching(StructureMatchingRequest(
+        document=document,
+        codeFiles=list(code_structures),
+        mappingPolicy=options.mappingPolicy,
+        matchingMode=options.matchingMode,
+        systemPrompt=options.systemPrompt,
+        llmConfig=options.llmConfig,
+    ))
+
+
+def _requested_stream(options: str | None) -> bool:
+    """不正な options でも stream の指定を読み取る（エラーの返し方を決めるため）"""
+    try:
+        return json.loads(options or "{}").get("stream") is True
+    except (ValueError, AttributeError):
+        return False
+
+
+def _input_error(error: str, stream: bool):
+    """入力エラーのレスポンス（stream=True の場合はエラーレコード1件のNDJSON）"""
+    if stream:
+        return _ndjson_error_response(error)
+    return StructureMatchingResponse(success=False, error=error)
+
+
+async def _read_uploads(
+    designs: list[UploadFile], code_uploads: list[UploadFile]
+) -> tuple[list[PipelineFile], list[tuple[PipelineFile, str, str]], list[str]]:
+    """アップロードファイルを読み込んで検証する
+
+    Returns:
+        (設計書, (コードファイル, デコード済みのソース, 言語) のリスト, 除外したファイル名)
+
+    Raises:
+        PipelineError: 未対応の形式・サイズ超過・デコード不可・コードファイルなしの場合
+    """
+    uploaded_designs = []
+    for upload in designs:
+        design = PipelineFile(filename=upload.filename or "", data=await upload.read())
+        if design.extension not in SUPPORTED_EXTENSIONS | _MARKDOWN_EXTENSIONS:
+            raise PipelineError(
+                f"[{design.filename}] 対応していないファイル形式です。"
+                "Excel (.xlsx, .xls) または Markdown (.md) ファイルを選択してください。"
+            )
+        if len(design.data) > MAX_EXCEL_SIZE:
+            raise PipelineError(
+                f"[{design.filename}] ファイルサイズが上限（{MAX_EXCEL_SIZE // (1024*1024)}MB）を超えています。"
+            )
+        uploaded_designs.append(design)
+
+    skipped = []
+    uploaded_code_files = []
+    for upload in code_uploads:
+        code_file = PipelineFile(filename=upload.filename or "", data=await upload.read())
+        language = detect_code_language(code_file.filename)
+        if not language:
+            # フロントエンドと同様に未対応言語のファイルは分割しない
+            skipped.append(code_file.filename)
+            continue
+        if len(code_file.data) > MAX_CODE_SIZE:
+            raise PipelineError(
+                f"[{code_file.filename}] ファイルサイズが上限（{MAX_CODE_SIZE // (1024*1024)}MB）を超えています。"
+            )
+        source = _decode_text(code_file.data)
+        if source is None:
+            raise PipelineError(
+                f"[{code_file.filename}] ファイルのエンコーディングを認識できませんでした。"
+                "UTF-8またはShift_JISで保存してください。"
+            )
+        uploaded_code_files.append((code_file, source, language))
+
+    if not uploaded_code_files:
+        raise PipelineError("分割できるコードファイルがありません（対応: .py, .java）")
+    return uploaded_designs, uploaded_code_files, skipped
+
+
+def _stream_pipeline(task: asyncio.Future, queue: asyncio.Queue) -> StreamingResponse:
+    """進捗レコードを送出し、最後に結果レコードを返すNDJSONレスポンス
+
+    パイプラインはハンドラー内（キャンセルスコープ・期限の設定済み）で開始した
+    タスクで実行し、ここでは進捗を中継するだけとする。送出中に切断された場合は
+    スコープを取り消して実行中のLLM呼び出しも打ち切る。
+    """
+    scope = current_cancellation_scope()
+
+    async def generate() -> AsyncIterator[bytes]:
+        try:
+            while (record := await queue.get()) is not None:
+                yield _ndjson_line(record)
+            yield _ndjson_line({"type": "result", **task.result().model_dump()})
+        finally:
+            if not task.done():
+                if scope is not None:
+                    scope.cancel()
+                task.cancel()
+
+    return StreamingResponse(generate(), media_type=NDJSON_MEDIA_TYPE)
+
+
+@router.post("/map", response_model=StructureMatchingResponse)
+@cancel_on_disconnect("map_pipeline")
+async def map_pipeline(
+    http_request: Request,
+    designs: list[UploadFile] = File(...),
+    codeFiles: list[UploadFile] = File(...),
+    options: str | None = Form(None),
+):
+    """
+    設計書とコードファイルから構造マッチングの結果を求める（変換・分割・照合を一括実行）
+
+    - designs: 設計書（.xlsx / .xls / .md / .markdown）
+    - codeFiles: コードファイル（.py / .java、それ以外は分割せずに除外）
+    - options: MapPipelineOptions のJSON（分割・照合の設定、設計書ごとの役割・種別）
+    - options.stream=True の場合は進捗レコードをNDJSONで返し、最後に結果レコードを返す。
+      入力エラーもエラーレコード（type: error）1件のNDJSONで返す
+    """
+    try:
+        pipeline_options = (
+            MapPipelineOptions.model_validate_json(options) if options else MapPipelineOptions()
+        )
+    except ValidationError as e:
+        return _input_error(f"options が不正です: {str(e)}", _requested_stream(options))
+
+    try:
+        uploaded_designs, uploaded_code_files, skipped = await _read_uploads(designs, codeFiles)
+    except PipelineError as e:
+        return _input_error(str(e), pipeline_options.stream)
+
+    if not pipeline_options.stream:
+        return await run_map_pipeline(
+            uploaded_designs, uploaded_code_files, pipeline_options, lambda record: None
+        )
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for filename in skipped:
+        queue.put_nowait({"type": "progress", "stage": "split_code", "filename": filename, "status": "skipped"})
+    task = asyncio.ensure_future(
+        run_map_pipeline(uploaded_designs, uploaded_code_files, pipeline_options, queue.put_nowait)
+    )
+    task.add_done_callback(lambda _: queue.put_nowait(None))
+    return _stream_pipeline(task, queue)
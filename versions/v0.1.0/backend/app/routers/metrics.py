@@ -0,0 +1,37 @@
+"""メトリクスAPI
+
+プロセス内で集計したメトリクス（LLM呼び出し数・キャンセル数など）と、
+リクエスト単位で採取したプロファイルのサマリーを返す。
+"""
+
+from fastapi import APIRouter, Header, HTTPException
+
+from app.models.schemas import MetricsResponse, ProfileResponse
+from app.services.json_codec import FastJSONRoute
+from app.services.metrics import get_metrics
+from app.services.profiler import is_admin_token, load_profile_summary
+
+router = APIRouter(route_class=FastJSONRoute)
+
+
+@router.get("/metrics", response_model=MetricsResponse)
+async def get_metrics_api():
+    """
+    メトリクスのスナップショットを返す
+    """
+    return MetricsResponse(**get_metrics().snapshot())
+
+
+@router.get("/profiles/{profile_id}", response_model=ProfileResponse)
+async def get_profile_api(profile_id: str, x_profile: str | None = Header(None)):
+    """
+    プロファイルのサマリーを返す（X-Profile ヘッダーに管理者トークンが必要）
+
+    プロファイル本体（.pstats / .collapsed）は PROFILE_DIR に保存される。
+    """
+    if not is_admin_token(x_profile):
+        raise HTTPException(status_code=403, detail="管理者トークンが必要です")
+    summary = load_profile_summary(profile_id)
+    if summary is None:
+        return ProfileResponse(success=False, error=f"プロファイルが見つかりません: {profile_id}")
+    return ProfileResponse(success=True, profile=summary)
@@ -3,14 +3,17 @@
 import asyncio
 import os
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 
 from app.markdown_tools.registry import get_markdown_tool
 from app.models.schemas import (
     OrganizeMarkdownRequest,
     OrganizeMarkdownResponse,
 )
-from app.services.llm_service import get_llm_provider
+from app.services.cancellation import cancel_on_disconnect
+from app.services.deadline import DeadlineExceededError, call_timeout
+from app.services.json_codec import FastJSONRoute
+from app.services.llm_service import get_llm_provider, run_llm_call
 from app.services.markdown_organizer import (
     assign_reference_ids,
     detect_warnings,
@@ -18,7 +21,7 @@ from app.services.markdown_organizer import (
     split_markdown_by_section,
 )
 
-router = APIRouter()
+router = APIRouter(route_class=FastJSONRoute)
 
 _MAX_INPUT_TOKENS = int(os.environ.get("ORGANIZE_MAX_INPUT_TOKENS", "20000"))
 _TIMEOUT_SECONDS = int(os.environ.get("ORGANIZE_TIMEOUT_SECONDS", "180"))
@@ -43,7 +46,10 @@ def preprocess_markdown(markdown: str, tool_name: str | None = None) -> str:
 
 
 @router.post("/organize-markdown", response_model=OrganizeMarkdownResponse)
-async def organize_markdown_api(request: OrganizeMarkdownRequest):
+@cancel_on_disconnect("organize_markdown")
+async def organize_markdown_api(
+    request: OrganizeMarkdownRequest, http_request: Request
+):
     """Markdown整理API"""
 
     if not request.markdown.strip():
@@ -64,17 +70,20 @@ async def organize_markdown_api(request: OrganizeMarkdownRequest):
     tool = request.source.tool if request.source else None
     preprocessed_markdown = preprocess_markdown(request.markdown, tool)
 
-    provider = get_llm_provider(request.llmConfig)
-
     async def run_with_retry(markdown: str) -> tuple[bool, str | None, str | None, str | None]:
         last_error: str | None = None
         total_attempts = 0
         for attempt in range(_MAX_RETRIES):
             total_attempts = attempt + 1
+            try:
+                # リクエストの残り時間が1回分より短ければ残り時間で打ち切る
+                timeout = call_timeout(_TIMEOUT_SECONDS)
+            except DeadlineExceededError as e:
+                return False, None, "timeout", f"{str(e)}（{attempt}回実行）"
             try:
                 result = await asyncio.wait_for(
-                    asyncio.to_thread(provider.organize_markdown, markdown, request.policy),
-                    timeout=_TIMEOUT_SECONDS,
+                    run_llm_call(provider.organize_markdown, markdown, request.policy),
+                    timeout=timeout,
                 )
                 return True, result, None, None
             except asyncio.TimeoutError:
@@ -88,6 +97,12 @@ async def organize_markdown_api(request: OrganizeMarkdownRequest):
         return False, None, "api_error", last_error
 
     estimated_tokens = estimate_tokens(preprocessed_markdown + "\n" + request.policy)
+    # 章単位に分割する場合も1回の呼び出しは上限以内のため、上限で頭打ちにして振り分ける
+    provider = get_llm_provider(
+        request.llmConfig,
+        route="organize_markdown",
+        prompt_tokens=min(estimated_tokens, _MAX_INPUT_TOKENS),
+    )
     if estimated_tokens > _MAX_INPUT_TOKENS:
         sections = split_markdown_by_section(preprocessed_markdown)
         if len(sections) <= 1:
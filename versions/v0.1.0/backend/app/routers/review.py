@@ -1,10 +1,12 @@
 """レビューAPI"""
 
+import asyncio
 import json
+import os
 import re
 from importlib.metadata import version
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 
 from app.models.schemas import (
     LLMConfig,
@@ -25,13 +27,39 @@ from app.models.schemas import (
     GroupReviewRequest,
     GroupReviewResponse,
     GroupReviewResult,
+    GroupReviewBatchRequest,
+    GroupReviewBatchResponse,
     ReviewFinding,
     # Integrate API
     IntegrateRequest,
     IntegrateResponse,
     IntegratedReport,
 )
-from app.services.llm_service import get_llm_provider
+from app.services.artifact_store import ArtifactNotFoundError, get_artifact_store
+from app.services.group_packer import (
+    Fragment,
+    GroupContext,
+    PackedBatch,
+    build_batch_message,
+    pack_groups,
+    split_batch_output,
+)
+from app.services.cancellation import cancel_on_disconnect
+from app.services.json_codec import FastJSONRoute
+from app.services.llm_service import get_llm_provider, send_message_async
+from app.services.local_matcher import (
+    code_entries_from_map,
+    doc_entries_from_map,
+    filter_index,
+    match_locally,
+    parse_index_annotations,
+)
+from app.services.structure_partitioner import (
+    build_chapter_outline,
+    build_file_outline,
+    parse_chapter_files,
+    split_chapters,
+)
 from app.services.prompt_builder import (
     build_system_prompt,
     build_review_meta,
@@ -40,12 +68,38 @@ from app.services.prompt_builder import (
 # pyproject.tomlからバージョンを取得
 APP_VERSION = version("spec-code-ai-mapper-backend")
 
-router = APIRouter()
+router = APIRouter(route_class=FastJSONRoute)
 
 # ファイルサイズ制限（変換済みテキストベース）
 MAX_DESIGN_SIZE = 10 * 1024 * 1024  # 10MB
 MAX_CODE_SIZE = 5 * 1024 * 1024  # 5MB
 
+# バッチグループレビュー: 1呼び出しの入力トークン上限・最大グループ数・同時呼び出し数
+_GROUP_REVIEW_TOKEN_BUDGET = int(os.environ.get("GROUP_REVIEW_TOKEN_BUDGET", "60000"))
+_GROUP_REVIEW_MAX_GROUPS_PER_CALL = int(
+    os.environ.get("GROUP_REVIEW_MAX_GROUPS_PER_CALL", "8")
+)
+_GROUP_REVIEW_CONCURRENCY = int(os.environ.get("GROUP_REVIEW_CONCURRENCY", "4"))
+
+# 結果統合: 1呼び出しの入力トークン上限・中間サマリー1つにまとめる最大件数・同時呼び出し数
+_INTEGRATE_TOKEN_BUDGET = int(os.environ.get("INTEGRATE_TOKEN_BUDGET", "60000"))
+_INTEGRATE_FAN_IN = max(2, int(os.environ.get("INTEGRATE_FAN_IN", "8")))
+_INTEGRATE_CONCURRENCY = int(os.environ.get("INTEGRATE_CONCURRENCY", "4"))
+
+# 構造マッチングのローカル照合（厳密ポリシー時）
+_LOCAL_MATCHER_ENABLED = os.environ.get("LOCAL_MATCHER_ENABLED", "true").lower() in (
+    "1", "true", "yes",
+)
+_LOCAL_MATCH_REASON_PREFIX = "[ローカル照合] "
+
+# 段階的構造マッチング: 章とみなす見出しレベルの上限・細かい照合の同時呼び出し数
+_STRUCTURE_MATCHING_CHAPTER_LEVEL = int(
+    os.environ.get("STRUCTURE_MATCHING_CHAPTER_LEVEL", "2")
+)
+_STRUCTURE_MATCHING_CONCURRENCY = int(
+    os.environ.get("STRUCTURE_MATCHING_CONCURRENCY", "4")
+)
+
 
 # [UNUSED] AIマッパーでは未使用（旧AIレビュアーのレビュー実行API）
 # マッパーでは /api/review/structure-matching のみ使用する。
@@ -179,49 +233,146 @@ def _extract_json(text: str) -> dict:
     return json.loads(text.strip())
 
 
-# ---------------------------------------------------------------------------
-# 分割レビューAPI
-# ---------------------------------------------------------------------------
+def _resolve_structure(structure, map_key: str) -> tuple[str, dict]:
+    """構造情報（INDEX.md / MAP.json）をインライン値またはハッシュから解決する
 
+    ハッシュ参照のMAP.jsonは分割APIが保存したリスト形式のため、
+    インライン指定時と同じ { map_key: [...] } 形式に包んで返す。
 
-@router.post(
-    "/review/structure-matching", response_model=StructureMatchingResponse
-)
-async def structure_matching(request: StructureMatchingRequest):
+    Raises:
+        ArtifactNotFoundError: ハッシュに対応するアーティファクトが存在しない場合
     """
-    構造マッチング（フェーズ1）
+    store = get_artifact_store()
+    if structure.indexMd is not None:
+        index_md = structure.indexMd
+    else:
+        index_md = store.get(structure.indexHash)
 
-    設計書とコードの構造を比較し、関連性の高いグループを特定する。
-    AIが設計書のINDEX.md / MAP.jsonとコードのINDEX.md / MAP.jsonを分析し、
-    関連する設計書セクションとコードシンボルをグループ化する。
+    if structure.mapJson is not None:
+        map_json = structure.mapJson
+    else:
+        stored = store.get_json(structure.mapHash)
+        map_json = stored if isinstance(stored, dict) else {map_key: stored}
+
+    return index_md, map_json
+
+
+def _estimate_prompt_tokens(system_prompt: str, user_message: str) -> int:
+    """モデルの振り分けに使う推定入力トークン数"""
+    return _estimate_tokens(system_prompt) + _estimate_tokens(user_message)
+
+
+def _routed_provider(
+    provider, llm_config, route: str, system_prompt: str, user_message: str
+):
+    """呼び出し内容の推定トークン数に応じてモデルを振り分けたプロバイダーを返す
+
+    振り分け対象外のLLM設定（modelRouting が無効なユーザー指定）では
+    provider をそのまま返す。
     """
-    try:
-        provider = get_llm_provider(request.llmConfig)
+    if llm_config is not None and not llm_config.modelRouting:
+        return provider
+    return get_llm_provider(
+        llm_config,
+        route=route,
+        prompt_tokens=_estimate_prompt_tokens(system_prompt, user_message),
+    )
+
+
+def _build_group_review_system_prompt(
+    system_prompt_override, batch: bool = False
+) -> str:
+    """グループレビュー用のシステムプロンプトを構築する（prompt_builder使用）
+
+    Args:
+        system_prompt_override: ユーザー指定のシステムプロンプト（None可）
+        batch: 複数グループを1回の呼び出しでレビューする場合はTrue
+    """
+    # roleの設定（systemPrompt.roleがあれば使用）
+    if system_prompt_override and system_prompt_override.role:
+        role = system_prompt_override.role
+    else:
+        role = "設計書とソースコードの整合性をレビューする専門家"
+
+    # purposeの設定（systemPrompt.purposeを引用してグループレビューの目的を説明）
+    if system_prompt_override and system_prompt_override.purpose:
+        purpose = (
+            "最終的な目的:\n"
+            "```\n"
+            f"{system_prompt_override.purpose}\n"
+            "```\n\n"
+            "この目的を達成するため、以下のグループ（関連する設計書セクションとコード）について、"
+            "設計書の記述とコード実装の整合性を確認し、指摘事項を報告してください。"
+        )
+    else:
+        purpose = "設計書の記述とコード実装の整合性を確認し、指摘事項を報告する"
 
-        # システムプロンプト構築（prompt_builder使用）
-        # フロントエンドから送られた systemPrompt の4項目をそのまま使用
-        # 未指定の場合はデフォルト値にフォールバック
+    # output_formatの設定（systemPrompt.formatがあれば使用）
+    if system_prompt_override and system_prompt_override.format:
+        output_format = system_prompt_override.format
+    else:
+        output_format = """マークダウン形式で、以下の内容を出力してください：
+1. サマリー（このグループの整合性評価）
+2. 突合結果一覧（テーブル形式: 設計書箇所、コード箇所、判定、指摘内容）
+3. 詳細（問題点と推奨事項）"""
 
-        # role
-        if request.systemPrompt and request.systemPrompt.role:
-            role = request.systemPrompt.role
-        else:
-            role = "設計書とソースコードの構造を分析する専門家"
+    # 注意事項の構築
+    notes_parts = [
+        "- 提供されている設計書・コードは元ファイルの一部分であり、完全な情報が含まれていない可能性があります",
+        "- 最後に複数グループのレビュー結果を統合するので、統合時への申し送り事項があれば記載してください",
+    ]
+
+    # 複数グループをまとめてレビューする場合は出力の区切り方を指示する
+    if batch:
+        notes_parts.extend([
+            "- 複数のグループを同時にレビューします。参照パーツは複数グループで共有されることがあります",
+            "- グループごとに独立したレポートを出力し、各レポートの先頭行には"
+            "そのグループの「出力マーカー」（例: <!-- group:group1 -->）をそのまま出力してください",
+        ])
 
-        # purpose
-        if request.systemPrompt and request.systemPrompt.purpose:
-            purpose = request.systemPrompt.purpose
-        else:
-            purpose = (
-                "設計書の構造（セクション一覧）とコードの構造（シンボル一覧）を比較し、"
-                "関連性の高い設計書セクションとコードシンボルをグループにまとめる"
-            )
+    # system_prompt_overrideがある場合は注意事項に追加
+    if system_prompt_override and system_prompt_override.notes:
+        notes_parts.extend([
+            "",
+            system_prompt_override.notes,
+        ])
 
-        # format
-        if request.systemPrompt and request.systemPrompt.format:
-            output_format = request.systemPrompt.format
-        else:
-            output_format = """以下のJSON形式で出力してください:
+    notes = "\n".join(notes_parts)
+
+    return build_system_prompt(role, purpose, output_format, notes)
+
+
+# ---------------------------------------------------------------------------
+# 分割レビューAPI
+# ---------------------------------------------------------------------------
+
+
+def _build_structure_matching_system_prompt(system_prompt_override) -> str:
+    """構造マッチング用のシステムプロンプトを構築する（prompt_builder使用）
+
+    フロントエンドから送られた systemPrompt の4項目をそのまま使用し、
+    未指定の場合はデフォルト値にフォールバックする。
+    """
+    # role
+    if system_prompt_override and system_prompt_override.role:
+        role = system_prompt_override.role
+    else:
+        role = "設計書とソースコードの構造を分析する専門家"
+
+    # purpose
+    if system_prompt_override and system_prompt_override.purpose:
+        purpose = system_prompt_override.purpose
+    else:
+        purpose = (
+            "設計書の構造（セクション一覧）とコードの構造（シンボル一覧）を比較し、"
+            "関連性の高い設計書セクションとコードシンボルをグループにまとめる"
+        )
+
+    # format
+    if system_prompt_override and system_prompt_override.format:
+        output_format = system_prompt_override.format
+    else:
+        output_format = """以下のJSON形式で出力してください:
 
 ```json
 {
@@ -249,90 +400,425 @@ async def structure_matching(request: StructureMatchingRequest):
 }
 ```"""
 
-        # notes
-        if request.systemPrompt and request.systemPrompt.notes:
-            notes = request.systemPrompt.notes
-        else:
-            notes_parts = [
-                "- 必ず指定されたJSON形式のみで応答してください",
-                "- 設計書の複数セクションと、複数のコード部分が、1つのグループに対応する場合もあります。",
-                "- 同じ設計書セクション、コード部分が、複数のグループに対応する場合もあります。",
-                "- 文字数の少ないセクション、コードシンボルは、情報が含まれていない可能性があります。他の部分と合わせてグループ化を検討してください。",
-                "- 【重要】出力するdoc_sectionsのidは、設計書MAP.jsonに記載されたid値を正確にそのまま使用してください（例: MD1, MD2, ...）",
-                "- 【重要】出力するcode_symbolsのidは、コードMAP.jsonに記載されたid値を正確にそのまま使用してください（例: CD1, CD2, ...）",
-            ]
-            notes = "\n".join(notes_parts)
+    # notes
+    if system_prompt_override and system_prompt_override.notes:
+        notes = system_prompt_override.notes
+    else:
+        notes_parts = [
+            "- 必ず指定されたJSON形式のみで応答してください",
+            "- 設計書の複数セクションと、複数のコード部分が、1つのグループに対応する場合もあります。",
+            "- 同じ設計書セクション、コード部分が、複数のグループに対応する場合もあります。",
+            "- 文字数の少ないセクション、コードシンボルは、情報が含まれていない可能性があります。他の部分と合わせてグループ化を検討してください。",
+            "- 【重要】出力するdoc_sectionsのidは、設計書MAP.jsonに記載されたid値を正確にそのまま使用してください（例: MD1, MD2, ...）",
+            "- 【重要】出力するcode_symbolsのidは、コードMAP.jsonに記載されたid値を正確にそのまま使用してください（例: CD1, CD2, ...）",
+        ]
+        notes = "\n".join(notes_parts)
 
-        system_prompt = build_system_prompt(role, purpose, output_format, notes)
+    return build_system_prompt(role, purpose, output_format, notes)
 
-        # ユーザーメッセージ構築（データのみ）
-        user_parts = [
-            "## 設計書構造\n",
-            "### INDEX.md",
-            request.document.indexMd,
-            "\n### MAP.json",
-            json.dumps(request.document.mapJson, ensure_ascii=False, indent=2),
+
+def _build_structure_matching_message(
+    document_index: str,
+    document_map: dict,
+    code_structures: list[tuple[str, str, dict]],
+) -> str:
+    """構造マッチング用のユーザーメッセージ（データのみ）を構築する
+
+    Args:
+        document_index: 設計書のINDEX.md
+        document_map: 設計書のMAP.json
+        code_structures: (ファイル名, INDEX.md, MAP.json) のリスト
+    """
+    user_parts = [
+        "## 設計書構造\n",
+        "### INDEX.md",
+        document_index,
+        "\n### MAP.json",
+        json.dumps(document_map, ensure_ascii=False, indent=2),
+    ]
+
+    for filename, code_index, code_map in code_structures:
+        user_parts.extend([
+            f"\n## コード構造: {filename}\n",
+            f"### {filename} - INDEX.md",
+            code_index,
+            f"\n### {filename} - MAP.json",
+            json.dumps(code_map, ensure_ascii=False, indent=2),
+        ])
+
+    return "\n".join(user_parts)
+
+
+def _parse_matched_groups(result: dict) -> list[MatchedGroup]:
+    """構造マッチングのJSON応答を MatchedGroup のリストに変換する"""
+    groups = []
+    for i, g in enumerate(result.get("groups", [])):
+        group_id = g.get("id", f"group_{i + 1}")
+        group_name = g.get("name", group_id)
+
+        doc_sections = [
+            MatchedDocSection(
+                id=ds.get("id", ""),
+                title=ds.get("title", ""),
+                path=ds.get("path", ds.get("title", "")),
+            )
+            for ds in g.get("doc_sections", [])
         ]
 
-        for code_file in request.codeFiles:
-            user_parts.extend([
-                f"\n## コード構造: {code_file.filename}\n",
-                f"### {code_file.filename} - INDEX.md",
-                code_file.indexMd,
-                f"\n### {code_file.filename} - MAP.json",
-                json.dumps(
-                    code_file.mapJson, ensure_ascii=False, indent=2
-                ),
-            ])
+        code_symbols = [
+            MatchedCodeSymbol(
+                id=cs.get("id", ""),
+                filename=cs.get("filename", ""),
+                symbol=cs.get("symbol", ""),
+            )
+            for cs in g.get("code_symbols", [])
+        ]
 
-        user_message = "\n".join(user_parts)
+        # 推定トークン数の計算
+        estimated = _estimate_tokens(
+            json.dumps(g, ensure_ascii=False)
+        )
 
-        # LLM呼び出し
-        response_text, input_tokens, output_tokens = provider.send_message(
-            system_prompt, user_message
+        groups.append(
+            MatchedGroup(
+                groupId=group_id,
+                groupName=group_name,
+                docSections=doc_sections,
+                codeSymbols=code_symbols,
+                reason=g.get("reason", ""),
+                estimatedTokens=estimated,
+            )
         )
+    return groups
 
-        # JSON応答パース
-        result = _extract_json(response_text)
-        groups = []
-        for i, g in enumerate(result.get("groups", [])):
-            group_id = g.get("id", f"group_{i + 1}")
-            group_name = g.get("name", group_id)
 
-            doc_sections = [
-                MatchedDocSection(
-                    id=ds.get("id", ""),
-                    title=ds.get("title", ""),
-                    path=ds.get("path", ds.get("title", "")),
-                )
-                for ds in g.get("doc_sections", [])
-            ]
+def _resolve_part_contents(part_hashes: dict[str, str]) -> dict[str, str]:
+    """パーツIDごとのハッシュからパーツ内容を解決する
+
+    Raises:
+        ArtifactNotFoundError: ハッシュに対応するアーティファクトが存在しない場合
+    """
+    store = get_artifact_store()
+    return {part_id: store.get(h) for part_id, h in part_hashes.items()}
+
+
+def _filter_map(map_json: dict, map_key: str, keep_ids: set[str]) -> dict:
+    """MAP.json から keep_ids のエントリのみを残す"""
+    return {
+        **map_json,
+        map_key: [
+            item for item in map_json.get(map_key, [])
+            if item.get("id") in keep_ids
+        ],
+    }
+
+
+def _local_structure_matching(
+    request: StructureMatchingRequest,
+    document_index: str,
+    document_map: dict,
+    code_structures: list[tuple[str, str, dict]],
+) -> tuple[list[MatchedGroup], str, dict, list[tuple[str, str, dict]]]:
+    """厳密（ID重視）ポリシー用のローカル照合を行う
 
-            code_symbols = [
+    要件ID・シンボル名で決定的に対応付けられたグループを返し、
+    構造情報は対応付けられなかった残り（residue）のみに絞り込んで返す。
+
+    Returns:
+        (ローカル照合のグループ, 設計書INDEX.md, 設計書MAP.json, コード構造のリスト)
+        ※ INDEX.md / MAP.json / コード構造は残りのみ
+    """
+    doc_entries = doc_entries_from_map(
+        document_map,
+        parse_index_annotations(document_index),
+        _resolve_part_contents(request.document.partHashes),
+    )
+    code_entries = []
+    for code_file, (filename, code_index, code_map) in zip(
+        request.codeFiles, code_structures
+    ):
+        code_entries.extend(code_entries_from_map(
+            filename,
+            code_map,
+            parse_index_annotations(code_index),
+            _resolve_part_contents(code_file.partHashes),
+        ))
+
+    result = match_locally(doc_entries, code_entries)
+
+    docs_by_id = {doc.id: doc for doc in doc_entries}
+    codes_by_key = {code.key: code for code in code_entries}
+    groups = []
+    for local_group in result.groups:
+        docs = [docs_by_id[doc_id] for doc_id in local_group.doc_ids]
+        codes = [codes_by_key[key] for key in local_group.code_keys]
+        groups.append(MatchedGroup(
+            groupId="",  # 結果の統合時に採番する
+            groupName=local_group.name,
+            docSections=[
+                MatchedDocSection(id=doc.id, title=doc.title, path=doc.path)
+                for doc in docs
+            ],
+            codeSymbols=[
                 MatchedCodeSymbol(
-                    id=cs.get("id", ""),
-                    filename=cs.get("filename", ""),
-                    symbol=cs.get("symbol", ""),
+                    id=code.id,
+                    filename=code.filename,
+                    symbol=f"{code.parent}.{code.name}" if code.parent else code.name,
                 )
-                for cs in g.get("code_symbols", [])
-            ]
+                for code in codes
+            ],
+            reason=f"{_LOCAL_MATCH_REASON_PREFIX}{local_group.reason}",
+            estimatedTokens=_estimate_tokens(
+                "\n".join(doc.text for doc in docs)
+                + "\n".join(code.text for code in codes)
+            ),
+        ))
+
+    residual_doc_ids = set(result.residual_doc_ids)
+    residual_doc_index = filter_index(document_index, residual_doc_ids)
+    residual_doc_map = _filter_map(document_map, "sections", residual_doc_ids)
+
+    residual_code_structures = []
+    for filename, code_index, code_map in code_structures:
+        residual_ids = {
+            code_id for name, code_id in result.residual_code_keys if name == filename
+        }
+        if not residual_ids:
+            continue
+        residual_code_structures.append((
+            filename,
+            filter_index(code_index, residual_ids),
+            _filter_map(code_map, "symbols", residual_ids),
+        ))
+
+    return groups, residual_doc_index, residual_doc_map, residual_code_structures
 
-            # 推定トークン数の計算
-            estimated = _estimate_tokens(
-                json.dumps(g, ensure_ascii=False)
+
+def _build_chapter_matching_system_prompt(system_prompt_override) -> str:
+    """段階的構造マッチングの粗い照合（章 → ファイル）用のシステムプロンプトを構築する
+
+    出力形式は固定のため、ユーザー指定の systemPrompt は role / notes のみ使用する。
+    """
+    if system_prompt_override and system_prompt_override.role:
+        role = system_prompt_override.role
+    else:
+        role = "設計書とソースコードの構造を分析する専門家"
+
+    purpose = (
+        "設計書の章（タイトル・概要・配下のセクション）とコードファイル（クラス・関数の一覧）を比較し、"
+        "各章の記述を実装しているコードファイルを特定する"
+    )
+
+    output_format = """以下のJSON形式で出力してください:
+
+```json
+{
+  "chapters": [
+    {
+      "id": "章のid値をそのまま使用（例: MD1）",
+      "files": ["関連するコードファイル名"]
+    }
+  ]
+}
+```"""
+
+    notes_parts = [
+        "- 必ず指定されたJSON形式のみで応答してください",
+        "- 1つの章が複数のファイルに、1つのファイルが複数の章に対応する場合もあります。",
+        "- 関連するファイルがない章は出力しないでください。",
+        "- 【重要】idは章一覧のid値、filesはコードファイル一覧のファイル名を正確にそのまま使用してください",
+    ]
+    if system_prompt_override and system_prompt_override.notes:
+        notes_parts.extend(["", system_prompt_override.notes])
+    notes = "\n".join(notes_parts)
+
+    return build_system_prompt(role, purpose, output_format, notes)
+
+
+async def _hierarchical_structure_matching(
+    llm_config,
+    system_prompt_override,
+    system_prompt: str,
+    document_index: str,
+    document_map: dict,
+    code_structures: list[tuple[str, str, dict]],
+) -> tuple[list[MatchedGroup], int, int, int]:
+    """段階的構造マッチング（章 → ファイル、セクション → シンボル）
+
+    1. 章のタイトル・概要とファイルのシンボル一覧のみで、章とファイルを対応付ける
+    2. 対応付いた（章, ファイル群）ごとに、通常の構造マッチングを並列に実行する
+
+    Returns:
+        (グループ, 入力トークン数, 出力トークン数, LLM呼び出し回数)
+        ※ グループIDは呼び出し側で振り直す
+    """
+    chapters = split_chapters(document_map, _STRUCTURE_MATCHING_CHAPTER_LEVEL)
+    doc_annotations = parse_index_annotations(document_index)
+    outline_parts = [
+        "## 設計書の章\n",
+        build_chapter_outline(chapters, document_map, doc_annotations),
+        "\n## コードファイル\n",
+    ]
+    for filename, code_index, code_map in code_structures:
+        outline_parts.append(
+            build_file_outline(filename, code_map, parse_index_annotations(code_index))
+        )
+
+    # 1. 粗い照合（章 → ファイル）
+    chapter_prompt = _build_chapter_matching_system_prompt(system_prompt_override)
+    outline = "\n".join(outline_parts)
+    provider = get_llm_provider(
+        llm_config,
+        route="structure_matching_chapters",
+        prompt_tokens=_estimate_prompt_tokens(chapter_prompt, outline),
+    )
+    response_text, input_tokens, output_tokens = await send_message_async(
+        provider, chapter_prompt, outline
+    )
+    llm_calls = 1
+    pairs = parse_chapter_files(
+        _extract_json(response_text),
+        chapters,
+        [filename for filename, _, _ in code_structures],
+    )
+
+    # 2. 細かい照合（（章, ファイル群）ごとのセクション → シンボル）
+    structures_by_file = {structure[0]: structure for structure in code_structures}
+    semaphore = asyncio.Semaphore(_STRUCTURE_MATCHING_CONCURRENCY)
+
+    async def match_pair(chapter, filenames: list[str]) -> list[MatchedGroup]:
+        nonlocal input_tokens, output_tokens, llm_calls
+        section_ids = set(chapter.section_ids)
+        user_message = _build_structure_matching_message(
+            filter_index(document_index, section_ids),
+            _filter_map(document_map, "sections", section_ids),
+            [structures_by_file[filename] for filename in filenames],
+        )
+        pair_provider = _routed_provider(
+            provider, llm_config, "structure_matching", system_prompt, user_message
+        )
+        async with semaphore:
+            text, in_tokens, out_tokens = await send_message_async(
+                pair_provider, system_prompt, user_message
             )
+        input_tokens += in_tokens
+        output_tokens += out_tokens
+        llm_calls += 1
+        return _parse_matched_groups(_extract_json(text))
+
+    # いずれかの組が失敗したら、残りの組のLLM呼び出しを打ち切る
+    tasks = [
+        asyncio.ensure_future(match_pair(chapter, filenames))
+        for chapter, filenames in pairs
+    ]
+    try:
+        results = await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+    groups = [group for chapter_groups in results for group in chapter_groups]
+    return groups, input_tokens, output_tokens, llm_calls
 
-            groups.append(
-                MatchedGroup(
-                    groupId=group_id,
-                    groupName=group_name,
-                    docSections=doc_sections,
-                    codeSymbols=code_symbols,
-                    reason=g.get("reason", ""),
-                    estimatedTokens=estimated,
-                )
+
+@router.post(
+    "/review/structure-matching", response_model=StructureMatchingResponse
+)
+@cancel_on_disconnect("structure_matching")
+async def structure_matching(request: StructureMatchingRequest, http_request: Request):
+    """
+    構造マッチング（フェーズ1）
+
+    設計書とコードの構造を比較し、関連性の高いグループを特定する。
+    AIが設計書のINDEX.md / MAP.jsonとコードのINDEX.md / MAP.jsonを分析し、
+    関連する設計書セクションとコードシンボルをグループ化する。
+
+    厳密（ID重視）ポリシーでは、要件ID・シンボル名で決定的に対応付けられる組を
+    先にローカルで照合し、残りのみをAIに渡して結果を統合する。
+
+    matchingMode="hierarchical" では、章とファイルを対応付けてから
+    （章, ファイル群）ごとにセクションとシンボルを並列に照合する。
+    """
+    return await run_structure_matching(request)
+
+
+async def run_structure_matching(request: StructureMatchingRequest) -> StructureMatchingResponse:
+    """構造マッチングを実行する（パイプラインAPIと共用）"""
+    try:
+        system_prompt = _build_structure_matching_system_prompt(request.systemPrompt)
+
+        # INDEX.md / MAP.json はハッシュ参照の場合アーティファクトストアから解決する
+        document_index, document_map = _resolve_structure(
+            request.document, "sections"
+        )
+        code_structures = [
+            (code_file.filename, *_resolve_structure(code_file, "symbols"))
+            for code_file in request.codeFiles
+        ]
+
+        local_groups: list[MatchedGroup] = []
+        use_local_matcher = request.mappingPolicy == "strict" and _LOCAL_MATCHER_ENABLED
+        if use_local_matcher:
+            # 照合は CPU 処理のため、イベントループを止めないようスレッドで実行する
+            (
+                local_groups,
+                document_index,
+                document_map,
+                code_structures,
+            ) = await asyncio.to_thread(
+                _local_structure_matching,
+                request, document_index, document_map, code_structures,
             )
 
+        provider = None
+        llm_groups: list[MatchedGroup] = []
+        input_tokens = output_tokens = llm_calls = 0
+        # ローカル照合後、片側の残りが空であれば対応付ける相手がないため、AIを呼び出さない
+        if not use_local_matcher or (document_map.get("sections") and code_structures):
+            if request.matchingMode == "hierarchical":
+                (
+                    llm_groups,
+                    input_tokens,
+                    output_tokens,
+                    llm_calls,
+                ) = await _hierarchical_structure_matching(
+                    request.llmConfig,
+                    request.systemPrompt,
+                    system_prompt,
+                    document_index,
+                    document_map,
+                    code_structures,
+                )
+            else:
+                user_message = _build_structure_matching_message(
+                    document_index, document_map, code_structures
+                )
+
+                # LLM呼び出し（入力規模に応じてモデルを振り分ける）
+                provider = get_llm_provider(
+                    request.llmConfig,
+                    route="structure_matching",
+                    prompt_tokens=_estimate_prompt_tokens(system_prompt, user_message),
+                )
+                response_text, input_tokens, output_tokens = await send_message_async(
+                    provider, system_prompt, user_message
+                )
+                llm_calls = 1
+
+                # JSON応答パース
+                llm_groups = _parse_matched_groups(_extract_json(response_text))
+
+        groups = llm_groups
+        if local_groups or request.matchingMode == "hierarchical":
+            # ローカル照合の結果を先頭に置き、複数呼び出しの結果と合わせてグループIDを振り直す
+            groups = [
+                group.model_copy(update={"groupId": f"group{i}"})
+                for i, group in enumerate(local_groups + llm_groups, start=1)
+            ]
+
+        if provider is None:
+            # AIを呼び出さなかった場合・段階的照合の場合は設定されたモデルを記録する
+            provider = get_llm_provider(request.llmConfig)
+
         # ReviewMeta構築（結果統合APIと同様）
         review_meta_dict = build_review_meta(
             version=f"v{APP_VERSION}",
@@ -350,9 +836,14 @@ async def structure_matching(request: StructureMatchingRequest):
             groups=groups,
             totalGroups=len(groups),
             tokensUsed={"input": input_tokens, "output": output_tokens},
+            llmCalls=llm_calls,
             reviewMeta=review_meta,
         )
-
+    except ArtifactNotFoundError as e:
+        return StructureMatchingResponse(
+            success=False,
+            error=str(e),
+        )
     except json.JSONDecodeError as e:
         return StructureMatchingResponse(
             success=False,
@@ -375,77 +866,48 @@ async def structure_matching(request: StructureMatchingRequest):
 # グループ単位のレビューは行わない。
 # フロントエンド側の呼び出し（executeGroupReview）は削除済み。
 @router.post("/review/group", response_model=GroupReviewResponse)
-async def review_group(request: GroupReviewRequest):
+@cancel_on_disconnect("review_group")
+async def review_group(request: GroupReviewRequest, http_request: Request):
     """
     グループレビュー（フェーズ2）
 
     1グループ（関連する設計書パーツ + コードパーツ）をレビューする。
     """
     try:
-        provider = get_llm_provider(request.llmConfig)
+        system_prompt = _build_group_review_system_prompt(request.systemPrompt)
 
-        # システムプロンプト構築（prompt_builder使用）
-        # roleの設定（systemPrompt.roleがあれば使用）
-        if request.systemPrompt and request.systemPrompt.role:
-            role = request.systemPrompt.role
-        else:
-            role = "設計書とソースコードの整合性をレビューする専門家"
-
-        # purposeの設定（systemPrompt.purposeを引用してグループレビューの目的を説明）
-        if request.systemPrompt and request.systemPrompt.purpose:
-            purpose = (
-                "最終的な目的:\n"
-                "```\n"
-                f"{request.systemPrompt.purpose}\n"
-                "```\n\n"
-                "この目的を達成するため、以下のグループ（関連する設計書セクションとコード）について、"
-                "設計書の記述とコード実装の整合性を確認し、指摘事項を報告してください。"
-            )
+        # ユーザーメッセージ構築（データのみ）
+        # documentContent, codeContent はフロントエンドで結合済みのテキスト
+        # ハッシュ一覧が指定された場合はアーティファクトストアから結合する
+        store = get_artifact_store()
+        if request.documentContent is not None:
+            document_content = request.documentContent
         else:
-            purpose = "設計書の記述とコード実装の整合性を確認し、指摘事項を報告する"
-
-        # output_formatの設定（systemPrompt.formatがあれば使用）
-        if request.systemPrompt and request.systemPrompt.format:
-            output_format = request.systemPrompt.format
+            document_content = store.get_many(request.documentContentHashes)
+        if request.codeContent is not None:
+            code_content = request.codeContent
         else:
-            output_format = """マークダウン形式で、以下の内容を出力してください：
-1. サマリー（このグループの整合性評価）
-2. 突合結果一覧（テーブル形式: 設計書箇所、コード箇所、判定、指摘内容）
-3. 詳細（問題点と推奨事項）"""
+            code_content = store.get_many(request.codeContentHashes)
 
-        # 注意事項の構築
-        notes_parts = [
-            "- 提供されている設計書・コードは元ファイルの一部分であり、完全な情報が含まれていない可能性があります",
-            "- 最後に複数グループのレビュー結果を統合するので、統合時への申し送り事項があれば記載してください",
-        ]
-
-        # request.systemPromptがある場合は注意事項に追加
-        if request.systemPrompt and request.systemPrompt.notes:
-            notes_parts.extend([
-                "",
-                request.systemPrompt.notes,
-            ])
-
-        notes = "\n".join(notes_parts)
-
-        system_prompt = build_system_prompt(role, purpose, output_format, notes)
-
-        # ユーザーメッセージ構築（データのみ）
-        # documentContent, codeContent はフロントエンドで結合済みのテキスト
         user_parts = [
             f"## レビュー対象グループ: {request.groupName}\n",
             f"- グループID: {request.groupId}\n",
             "## 設計書内容\n",
-            request.documentContent,
+            document_content,
             "\n## コード内容\n",
-            request.codeContent,
+            code_content,
         ]
 
         user_message = "\n".join(user_parts)
 
-        # LLM呼び出し
-        response_text, input_tokens, output_tokens = provider.send_message(
-            system_prompt, user_message
+        # LLM呼び出し（入力規模に応じてモデルを振り分ける）
+        provider = get_llm_provider(
+            request.llmConfig,
+            route="review_group",
+            prompt_tokens=_estimate_prompt_tokens(system_prompt, user_message),
+        )
+        response_text, input_tokens, output_tokens = await send_message_async(
+            provider, system_prompt, user_message
         )
 
         # Markdown形式のレスポンスをそのまま格納
@@ -459,6 +921,12 @@ async def review_group(request: GroupReviewRequest):
             reviewResult=review_result,
             tokensUsed={"input": input_tokens, "output": output_tokens},
         )
+    except ArtifactNotFoundError as e:
+        return GroupReviewResponse(
+            success=False,
+            groupId=request.groupId,
+            error=str(e),
+        )
     except RuntimeError as e:
         return GroupReviewResponse(
             success=False,
@@ -473,97 +941,420 @@ async def review_group(request: GroupReviewRequest):
         )
 
 
-# [UNUSED] AIマッパーでは未使用（旧AIレビュアーの結果統合API）
-# マッパーでは構造マッチング（/api/review/structure-matching）のみ使用し、
-# グループレビュー結果の統合は行わない。
-# フロントエンド側の呼び出し（executeIntegrate）は削除済み。
-@router.post("/review/integrate", response_model=IntegrateResponse)
-async def integrate_reviews(request: IntegrateRequest):
+def _collect_group_contexts(
+    request: GroupReviewBatchRequest,
+) -> tuple[list[GroupContext], dict[tuple, Fragment]]:
+    """グループごとのコンテキストを分割パーツから組み立てる
+
+    同じパーツは1つの断片として共有する。
+
+    Raises:
+        ValueError: グループが参照するパーツが存在しない場合
+        ArtifactNotFoundError: パーツのハッシュに対応する内容が存在しない場合
     """
-    結果統合（フェーズ3）
+    store = get_artifact_store()
+    doc_parts = {part.id: part for part in request.documentParts}
+    code_parts = {(part.filename or "", part.id): part for part in request.codeParts}
+    fragments: dict[tuple, Fragment] = {}
+
+    def add_fragment(context: GroupContext, key: tuple, part, title: str) -> None:
+        if key not in fragments:
+            content = (
+                part.content if part.content is not None else store.get(part.contentHash)
+            )
+            fragments[key] = Fragment(
+                key=key, title=title, content=content, tokens=_estimate_tokens(content)
+            )
+        if key not in context.fragment_keys:
+            context.fragment_keys.append(key)
+
+    contexts = []
+    for group in request.groups:
+        context = GroupContext(group_id=group.groupId, group_name=group.groupName)
+        for section in group.docSections:
+            part = doc_parts.get(section.id)
+            if part is None:
+                raise ValueError(f"設計書パーツが見つかりません: {section.id}")
+            add_fragment(
+                context,
+                ("document", "", section.id),
+                part,
+                f"{section.id}: {part.title or section.title}",
+            )
+        for symbol in group.codeSymbols:
+            part = code_parts.get((symbol.filename, symbol.id))
+            if part is None:
+                raise ValueError(
+                    f"コードパーツが見つかりません: {symbol.filename} {symbol.id}"
+                )
+            add_fragment(
+                context,
+                ("code", symbol.filename, symbol.id),
+                part,
+                f"{symbol.filename}: {part.title or symbol.symbol} ({symbol.id})",
+            )
+        contexts.append(context)
 
-    全グループのレビュー結果を統合し、最終レポートを生成する。
-    システムプロンプト設定に基づいて、AIがMarkdown形式のレビューレポートを生成する。
+    return contexts, fragments
+
+
+@router.post("/review/groups", response_model=GroupReviewBatchResponse)
+@cancel_on_disconnect("review_groups")
+async def review_groups(request: GroupReviewBatchRequest, http_request: Request):
     """
+    バッチグループレビュー（フェーズ2）
+
+    構造マッチング結果のグループをサーバー側でまとめてレビューする。
+
+    - 各グループのコンテキストは分割パーツ（content / contentHash）から組み立てる
+    - 小さなグループはトークン予算の範囲で1回のLLM呼び出しにまとめる
+    - 共有パーツは1呼び出し内で1度だけ送信する
+    - まとめた出力はグループごとのマーカーで分解し、欠けたグループは単独で再実行する
+    """
+    try:
+        contexts, fragments = _collect_group_contexts(request)
+    except ValueError as e:
+        return GroupReviewBatchResponse(success=False, error=str(e))
+
     try:
         provider = get_llm_provider(request.llmConfig)
+    except Exception as e:
+        return GroupReviewBatchResponse(
+            success=False,
+            error=f"グループレビュー中にエラーが発生しました: {str(e)}",
+        )
 
-        # システムプロンプト構築（prompt_builder使用）
-        # roleの設定（systemPrompt.roleがあれば使用）
-        if request.systemPrompt and request.systemPrompt.role:
-            role = request.systemPrompt.role
-        else:
-            role = "レビュー結果を統合するエキスパート"
-
-        # purposeの設定（systemPrompt.purposeを引用して統合の目的を説明）
-        if request.systemPrompt and request.systemPrompt.purpose:
-            purpose = (
-                "最終的な目的:\n"
-                "```\n"
-                f"{request.systemPrompt.purpose}\n"
-                "```\n\n"
-                "複数のグループに分けてレビューを行いました。"
-                "各グループのレビュー結果を統合し、1つの最終的なレビューレポートを生成してください。"
+    token_budget = request.tokenBudget or _GROUP_REVIEW_TOKEN_BUDGET
+    batch_prompt = _build_group_review_system_prompt(request.systemPrompt, batch=True)
+    single_prompt = _build_group_review_system_prompt(request.systemPrompt)
+    semaphore = asyncio.Semaphore(_GROUP_REVIEW_CONCURRENCY)
+    tokens_used = {"input": 0, "output": 0}
+    llm_calls = 0
+
+    async def run_batch(batch: PackedBatch) -> dict[str, str]:
+        nonlocal llm_calls
+        system_prompt = batch_prompt if len(batch.groups) > 1 else single_prompt
+        user_message = build_batch_message(batch, fragments)
+        batch_provider = _routed_provider(
+            provider, request.llmConfig, "review_groups", system_prompt, user_message
+        )
+        async with semaphore:
+            response_text, input_tokens, output_tokens = await send_message_async(
+                batch_provider, system_prompt, user_message
             )
+        llm_calls += 1
+        tokens_used["input"] += input_tokens
+        tokens_used["output"] += output_tokens
+        return split_batch_output(response_text, [g.group_id for g in batch.groups])
+
+    reports: dict[str, str] = {}
+    errors: dict[str, str] = {}
+
+    async def run_all(batches: list[PackedBatch]) -> list[GroupContext]:
+        """バッチを並列実行し、結果を取得できなかったグループを返す"""
+        outcomes = await asyncio.gather(
+            *(run_batch(batch) for batch in batches), return_exceptions=True
+        )
+        missing = []
+        for batch, outcome in zip(batches, outcomes):
+            for group in batch.groups:
+                if isinstance(outcome, BaseException):
+                    errors[group.group_id] = str(outcome)
+                elif group.group_id in outcome:
+                    reports[group.group_id] = outcome[group.group_id]
+                else:
+                    missing.append(group)
+        return missing
+
+    batches = pack_groups(
+        contexts, fragments, token_budget, _GROUP_REVIEW_MAX_GROUPS_PER_CALL
+    )
+    missing = await run_all(batches)
+    if missing:
+        # マーカーが欠けたグループは単独で再実行する
+        retry_batches = []
+        for group in missing:
+            retry = PackedBatch(groups=[group])
+            retry.fragment_keys.update(group.fragment_keys)
+            retry_batches.append(retry)
+        for group in await run_all(retry_batches):
+            errors[group.group_id] = "グループのレビュー結果を取得できませんでした"
+
+    results = []
+    for group in request.groups:
+        if group.groupId in reports:
+            results.append(GroupReviewResponse(
+                success=True,
+                groupId=group.groupId,
+                reviewResult=GroupReviewResult(report=reports[group.groupId]),
+            ))
         else:
-            purpose = (
-                "複数のグループレビュー結果を統合し、最終的なレビューレポートを"
-                "Markdown形式で生成する"
-            )
+            results.append(GroupReviewResponse(
+                success=False,
+                groupId=group.groupId,
+                error=errors.get(group.groupId),
+            ))
+
+    return GroupReviewBatchResponse(
+        success=all(r.success for r in results),
+        results=results,
+        llmCalls=llm_calls,
+        tokensUsed=tokens_used,
+    )
+
+
+def _build_integrate_system_prompt(system_prompt_override) -> str:
+    """結果統合用のシステムプロンプトを構築する（prompt_builder使用）"""
+    # roleの設定（systemPrompt.roleがあれば使用）
+    if system_prompt_override and system_prompt_override.role:
+        role = system_prompt_override.role
+    else:
+        role = "レビュー結果を統合するエキスパート"
+
+    # purposeの設定（systemPrompt.purposeを引用して統合の目的を説明）
+    if system_prompt_override and system_prompt_override.purpose:
+        purpose = (
+            "最終的な目的:\n"
+            "```\n"
+            f"{system_prompt_override.purpose}\n"
+            "```\n\n"
+            "複数のグループに分けてレビューを行いました。"
+            "各グループのレビュー結果を統合し、1つの最終的なレビューレポートを生成してください。"
+        )
+    else:
+        purpose = (
+            "複数のグループレビュー結果を統合し、最終的なレビューレポートを"
+            "Markdown形式で生成する"
+        )
 
-        # output_formatの設定（systemPrompt.formatがあれば使用）
-        if request.systemPrompt and request.systemPrompt.format:
-            output_format = request.systemPrompt.format
-        else:
-            output_format = "Markdown形式のレビューレポートを出力してください。"
+    # output_formatの設定（systemPrompt.formatがあれば使用）
+    if system_prompt_override and system_prompt_override.format:
+        output_format = system_prompt_override.format
+    else:
+        output_format = "Markdown形式のレビューレポートを出力してください。"
+
+    # 注意事項の構築
+    notes_parts = [
+        "- 各グループのレビュー結果を統合し、重複する指摘を排除してください",
+        "- グループ分けは参考に止め、元々の設計書、コードの記載、構造を尊重してください。",
+        "- 出力形式の指定に従い、全体を一括で評価した場合と同様になるよう出力してください。",
+        "- マッチング処理やグループレビューで統合実行用に付与された付加情報は、レポートに含めないでください。",
+    ]
+
+    # system_prompt_overrideがある場合は注意事項に追加
+    if system_prompt_override and system_prompt_override.notes:
+        notes_parts.extend([
+            "",
+            system_prompt_override.notes,
+        ])
 
-        # 注意事項の構築
-        notes_parts = [
-            "- 各グループのレビュー結果を統合し、重複する指摘を排除してください",
-            "- グループ分けは参考に止め、元々の設計書、コードの記載、構造を尊重してください。",
-            "- 出力形式の指定に従い、全体を一括で評価した場合と同様になるよう出力してください。",
-            "- マッチング処理やグループレビューで統合実行用に付与された付加情報は、レポートに含めないでください。",
-        ]
+    notes = "\n".join(notes_parts)
 
-        # request.systemPromptがある場合は注意事項に追加
-        if request.systemPrompt and request.systemPrompt.notes:
-            notes_parts.extend([
-                "",
-                request.systemPrompt.notes,
-            ])
+    return build_system_prompt(role, purpose, output_format, notes)
 
-        notes = "\n".join(notes_parts)
 
-        system_prompt = build_system_prompt(role, purpose, output_format, notes)
+def _build_reduce_system_prompt(system_prompt_override) -> str:
+    """中間サマリー（階層統合のreduce段階）用のシステムプロンプトを構築する"""
+    role = "レビュー結果を統合するエキスパート"
 
-        # ユーザーメッセージ構築（データのみ）
-        user_parts = []
+    purpose = (
+        "多数のグループレビュー結果を段階的に統合しています。"
+        "渡された一部のグループのレビュー結果を、最終統合の入力となる中間サマリーに集約してください。"
+    )
+    if system_prompt_override and system_prompt_override.purpose:
+        purpose = (
+            "最終的な目的:\n"
+            "```\n"
+            f"{system_prompt_override.purpose}\n"
+            "```\n\n"
+            + purpose
+        )
 
-        # 構造マッチング結果
+    output_format = (
+        "Markdown形式で、指摘事項を一覧で出力してください"
+        "（グループ名、設計書箇所、コード箇所、判定、指摘内容）。"
+        "グループをまたがる問題があれば最後に記載してください。"
+    )
+
+    notes = "\n".join([
+        "- 指摘事項は省略・要約しすぎず、最終統合で必要な情報（箇所・判定・根拠）を残してください",
+        "- 重複する指摘はまとめ、どのグループの指摘かを併記してください",
+        "- 最終レポートではないため、前置きや結論は不要です",
+    ])
+
+    return build_system_prompt(role, purpose, output_format, notes)
+
+
+def _build_integrate_message(
+    structure_json: str | None, items: list[tuple[str, str]]
+) -> str:
+    """結果統合用のユーザーメッセージを構築する（データのみ）"""
+    user_parts = []
+
+    # 構造マッチング結果
+    if structure_json is not None:
         user_parts.extend([
             "## 構造マッチング結果\n",
             "```json",
-            json.dumps(
-                request.structureMatching, ensure_ascii=False, indent=2
-            ),
+            structure_json,
             "```\n",
         ])
 
-        # グループレビュー結果
-        user_parts.append("## グループレビュー結果\n")
-        for gr in request.groupReviews:
-            user_parts.extend([
-                f"### {gr.groupName} ({gr.groupId})\n",
-                gr.report if gr.report else f"**サマリー**: {gr.summary}\n",
-                "",
-            ])
+    # グループレビュー結果（または中間サマリー）
+    user_parts.append("## グループレビュー結果\n")
+    for title, report in items:
+        user_parts.extend([
+            f"### {title}\n",
+            report,
+            "",
+        ])
 
-        user_message = "\n".join(user_parts)
+    return "\n".join(user_parts)
+
+
+def _compact_structure_matching(structure_matching: dict) -> dict:
+    """構造マッチング結果をグループとパーツIDのみに縮約する"""
+    groups = []
+    for group in structure_matching.get("groups", []):
+        groups.append({
+            "groupId": group.get("groupId"),
+            "groupName": group.get("groupName"),
+            "docSections": [s.get("id") for s in group.get("docSections", [])],
+            "codeSymbols": [
+                f"{s.get('filename')}:{s.get('id')}"
+                for s in group.get("codeSymbols", [])
+            ],
+        })
+    return {"groups": groups}
+
+
+def _chunk_reports(
+    items: list[tuple[str, str]], fan_in: int, token_budget: int, min_batch: int = 1
+) -> list[list[tuple[str, str]]]:
+    """レビュー結果を順序を保ったまま、fan-in数とトークン予算以内のバッチに分ける
+
+    min_batch 件に満たないバッチは予算を超えても区切らない（末尾の端数は直前のバッチに含める）。
+    """
+    batches: list[list[tuple[str, str]]] = []
+    current: list[tuple[str, str]] = []
+    current_tokens = 0
+    for item in items:
+        tokens = _estimate_tokens(item[0]) + _estimate_tokens(item[1])
+        if len(current) >= max(1, min_batch) and (
+            len(current) >= fan_in or current_tokens + tokens > token_budget
+        ):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(item)
+        current_tokens += tokens
+    if current:
+        if batches and len(current) < min_batch:
+            batches[-1].extend(current)
+        else:
+            batches.append(current)
+    return batches
+
+
+# [UNUSED] AIマッパーでは未使用（旧AIレビュアーの結果統合API）
+# マッパーでは構造マッチング（/api/review/structure-matching）のみ使用し、
+# グループレビュー結果の統合は行わない。
+# フロントエンド側の呼び出し（executeIntegrate）は削除済み。
+@router.post("/review/integrate", response_model=IntegrateResponse)
+@cancel_on_disconnect("integrate_reviews")
+async def integrate_reviews(request: IntegrateRequest, http_request: Request):
+    """
+    結果統合（フェーズ3）
+
+    全グループのレビュー結果を統合し、最終レポートを生成する。
+    システムプロンプト設定に基づいて、AIがMarkdown形式のレビューレポートを生成する。
+
+    入力がトークン予算を超える場合は、グループ結果をfan-in件ずつ並列に
+    中間サマリーへ集約し、予算に収まるまで繰り返してから最終統合する。
+    """
+    try:
+        provider = get_llm_provider(request.llmConfig)
 
-        # LLM呼び出し
-        response_text, input_tokens, output_tokens = provider.send_message(
-            system_prompt, user_message
+        system_prompt = _build_integrate_system_prompt(request.systemPrompt)
+
+        items = [
+            (f"{gr.groupName} ({gr.groupId})", gr.report)
+            for gr in request.groupReviews
+        ]
+        structure_json = json.dumps(
+            request.structureMatching, ensure_ascii=False, indent=2
+        )
+        # 構造マッチング結果だけで予算を圧迫する場合は要約版を使用する
+        if _estimate_tokens(structure_json) > _INTEGRATE_TOKEN_BUDGET // 4:
+            structure_json = json.dumps(
+                _compact_structure_matching(request.structureMatching),
+                ensure_ascii=False,
+            )
+
+        # 予算を超える場合は中間サマリーへの集約（reduce）を繰り返す
+        input_tokens = 0
+        output_tokens = 0
+        llm_calls = 0
+        levels = 0
+        user_message = _build_integrate_message(structure_json, items)
+        if _estimate_tokens(user_message) > _INTEGRATE_TOKEN_BUDGET:
+            reduce_prompt = _build_reduce_system_prompt(request.systemPrompt)
+            semaphore = asyncio.Semaphore(_INTEGRATE_CONCURRENCY)
+
+            async def reduce_batch(batch: list[tuple[str, str]]) -> tuple[str, str]:
+                nonlocal input_tokens, output_tokens, llm_calls
+                if len(batch) == 1:
+                    return batch[0]
+                reduce_message = _build_integrate_message(None, batch)
+                reduce_provider = _routed_provider(
+                    provider,
+                    request.llmConfig,
+                    "integrate_reduce",
+                    reduce_prompt,
+                    reduce_message,
+                )
+                async with semaphore:
+                    text, in_tokens, out_tokens = await send_message_async(
+                        reduce_provider, reduce_prompt, reduce_message
+                    )
+                input_tokens += in_tokens
+                output_tokens += out_tokens
+                llm_calls += 1
+                titles = "、".join(title for title, _ in batch)
+                return f"中間サマリー（{titles}）", text
+
+            while (
+                len(items) > 1
+                and _estimate_tokens(user_message) > _INTEGRATE_TOKEN_BUDGET
+            ):
+                batches = _chunk_reports(
+                    items, _INTEGRATE_FAN_IN, _INTEGRATE_TOKEN_BUDGET
+                )
+                # どの2件も予算に収まらない場合、1件ずつのバッチはそのまま返るため件数が減らない。
+                # 予算を超えても2件以上ずつまとめ、各段で必ず件数を減らす
+                if all(len(batch) == 1 for batch in batches):
+                    batches = _chunk_reports(
+                        items, _INTEGRATE_FAN_IN, _INTEGRATE_TOKEN_BUDGET, min_batch=2
+                    )
+                # いずれかのバッチが失敗したら、残りのバッチのLLM呼び出しを打ち切る
+                tasks = [asyncio.ensure_future(reduce_batch(b)) for b in batches]
+                try:
+                    items = list(await asyncio.gather(*tasks))
+                finally:
+                    for task in tasks:
+                        task.cancel()
+                levels += 1
+                user_message = _build_integrate_message(structure_json, items)
+
+        # LLM呼び出し（最終統合。入力規模に応じてモデルを振り分ける）
+        provider = _routed_provider(
+            provider, request.llmConfig, "integrate_reviews", system_prompt, user_message
+        )
+        response_text, final_input, final_output = await send_message_async(
+            provider, system_prompt, user_message
         )
+        input_tokens += final_input
+        output_tokens += final_output
+        llm_calls += 1
 
         # IntegratedReport構築
         integrated_report = IntegratedReport(
@@ -573,6 +1364,8 @@ async def integrate_reviews(request: IntegrateRequest):
             crossGroupIssues=[],
             statistics={
                 "totalGroupsReviewed": len(request.groupReviews),
+                "reduceLevels": levels,
+                "llmCalls": llm_calls,
             },
             deduplicatedFindings=[],
         )
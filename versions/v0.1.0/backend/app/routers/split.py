@@ -4,11 +4,17 @@
 md2map / code2map ライブラリを使用してファイルを分割する。
 """
 
+import asyncio
 import json
 import os
 import tempfile
+import threading
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
 
 from app.models.schemas import (
     LLMConfig,
@@ -19,8 +25,23 @@ from app.models.schemas import (
     DocumentPart,
     CodePart,
 )
-
-router = APIRouter()
+from app.services.artifact_store import ArtifactNotFoundError, get_artifact_store
+from app.services.cancellation import cancel_on_disconnect, current_cancellation_scope
+from app.services.deadline import check_deadline, remaining_seconds
+from app.services.json_codec import FastJSONRoute, dumps as json_dumps
+from app.services.llm_service import route_llm_config
+from app.services.model_router import TIER_DEFAULT
+
+router = APIRouter(route_class=FastJSONRoute)
+
+# md2map の AI 分割結果のキャッシュ（空文字で無効化）。複数ワーカーで同じディレクトリを共有できる
+_MD2MAP_AI_CACHE_DIR = os.environ.get(
+    "MD2MAP_AI_CACHE_DIR",
+    os.path.join(tempfile.gettempdir(), "spec-code-ai-mapper-md2map-ai-cache"),
+)
+_MD2MAP_AI_CACHE_MAX_BYTES = int(
+    os.environ.get("MD2MAP_AI_CACHE_MAX_BYTES", str(64 * 1024 * 1024))
+)
 
 
 # ---------------------------------------------------------------------------
@@ -56,125 +77,456 @@ def _convert_to_md2map_llm_config(llm_config: LLMConfig | None):
     )
 
 
+class _CancellableMd2mapProvider:
+    """md2map の LLM プロバイダーをクライアント切断で打ち切れるようにするラッパー
+
+    close() 後の呼び出しは即座に失敗させる。md2map は AI 呼び出しの失敗時に
+    見出し分割へフォールバックするため、残りのセクションは LLM を呼ばずに終わる。
+    """
+
+    def __init__(self, provider):
+        self._provider = provider
+        self._closed = False
+
+    def send_message(self, system_prompt: str, user_message: str) -> str:
+        if self._closed:
+            raise RuntimeError("クライアントが切断されたため中断しました")
+        # 期限までに完了の見込みがなければ呼び出さない（見出し分割にフォールバックする）
+        check_deadline()
+        scope = current_cancellation_scope()
+        if scope is None:
+            return self._provider.send_message(system_prompt, user_message)
+        with scope.track_call():
+            return self._provider.send_message(system_prompt, user_message)
+
+    # md2map の AI 分割キャッシュのキーに使う
+    @property
+    def provider_name(self) -> str:
+        return getattr(self._provider, "provider_name", "")
+
+    @property
+    def model_id(self) -> str:
+        return getattr(self._provider, "model_id", "")
+
+    def close(self) -> None:
+        self._closed = True
+        client = getattr(self._provider, "_client", None)
+        close = getattr(client, "close", None)
+        if callable(close):
+            close()
+
+
+def _build_md2map_llm_provider(llm_config: LLMConfig | None):
+    """AIモード用の md2map プロバイダーを生成し、切断時に打ち切れるよう登録する"""
+    from md2map.llm.factory import get_llm_provider as md2map_get_llm_provider
+
+    # セクション単位の小さな呼び出しのため、処理名のみで振り分ける（LLM_ROUTE_OVERRIDES）
+    routed_config, decision = route_llm_config(llm_config, route="split_markdown")
+    if decision is not None and decision.tier != TIER_DEFAULT:
+        llm_config = routed_config
+    md2map_config = _convert_to_md2map_llm_config(llm_config)
+    # SDKのタイムアウトをリクエストの残り時間に合わせる
+    remaining = remaining_seconds()
+    if remaining is not None:
+        md2map_config.timeout = max(1.0, remaining)
+    provider = _CancellableMd2mapProvider(md2map_get_llm_provider(md2map_config))
+    scope = current_cancellation_scope()
+    if scope is not None:
+        scope.register(provider)
+    return provider
+
+
+def warm_up_nlp_tokenizer() -> None:
+    """md2map のNLPモード（Sudachi）の辞書を読み込んでおく（起動時に呼ぶ）
+
+    辞書はプロセスで共有されるため、以降のリクエストでは読み込みを待たない。
+    """
+    try:
+        from md2map.parsers.noun_extractor import warm_up
+    except ImportError:
+        return
+    try:
+        warm_up()
+    except RuntimeError:
+        # sudachipy がない環境では、NLPモードのリクエスト時にエラーを返す
+        pass
+
+
+_md2map_ai_cache = None
+_md2map_ai_cache_lock = threading.Lock()
+
+
+def _get_md2map_ai_cache():
+    """プロセス共通の md2map AI 分割キャッシュを返す（無効の場合は None）"""
+    global _md2map_ai_cache
+    if not _MD2MAP_AI_CACHE_DIR:
+        return None
+    with _md2map_ai_cache_lock:
+        if _md2map_ai_cache is None:
+            from md2map.llm.split_cache import AISplitCache
+
+            _md2map_ai_cache = AISplitCache(
+                _MD2MAP_AI_CACHE_DIR, max_bytes=_MD2MAP_AI_CACHE_MAX_BYTES
+            )
+        return _md2map_ai_cache
+
+
 # ---------------------------------------------------------------------------
-# 分割API
+# NDJSON ストリーミング
 # ---------------------------------------------------------------------------
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
 
-@router.post("/split/markdown", response_model=SplitMarkdownResponse)
-async def split_markdown(request: SplitMarkdownRequest):
-    """
-    Markdownをセクション単位で分割する（md2map使用）
 
-    - 3つの分割モードに対応: heading / nlp / ai
-    - maxDepthで分割の見出しレベルを指定（デフォルト: H2まで）
+def _ndjson_line(record: dict) -> bytes:
+    """1レコードをNDJSONの1行に変換する"""
+    return json_dumps(record) + b"\n"
+
+
+def _ndjson_error_response(error: str) -> StreamingResponse:
+    """エラーレコード1件のみのNDJSONレスポンス"""
+    record = {"type": "error", "success": False, "error": error}
+    return StreamingResponse(iter([_ndjson_line(record)]), media_type=NDJSON_MEDIA_TYPE)
+
+
+def _ndjson_split_response(
+    parts: Iterable[BaseModel],
+    index_content: str,
+    map_json: list[dict] | None,
+    error_prefix: str,
+    include_content: bool = True,
+    **summary,
+) -> StreamingResponse:
+    """分割結果をNDJSONで返す
+
+    パーツを1件ずつ生成しながら送出し、INDEX.md・MAP.json・完了を末尾のレコードとする。
+    全パーツをまとめたレスポンスモデルとJSON文字列を作らない分だけメモリを節約できるが、
+    入力本文・行リスト・セクション（シンボル）一覧・MAP.json は分割の時点で全体を保持している。
+
+    レコード:
+    - {"type": "part", "part": {...}}
+    - {"type": "index", "indexContent": ..., "indexHash": ...}
+    - {"type": "map", "mapJson": ..., "mapHash": ...}（MAP.jsonがある場合のみ）
+    - {"type": "done", "success": true, "totalParts": N, ...summary}
+    - {"type": "error", "success": false, "error": ...}（途中で失敗した場合）
+
+    include_content=False の場合、indexContent / mapJson は省略しハッシュのみ送る。
     """
-    try:
-        from md2map.generators.index_generator import (
-            generate_index as md2map_generate_index,
+
+    def generate() -> Iterator[bytes]:
+        store = get_artifact_store()
+        total = 0
+        try:
+            for part in parts:
+                total += 1
+                yield _ndjson_line({"type": "part", "part": part.model_dump()})
+            index_record = {"type": "index", "indexHash": store.put(index_content)}
+            if include_content:
+                index_record["indexContent"] = index_content
+            yield _ndjson_line(index_record)
+            if map_json is not None:
+                map_record = {"type": "map", "mapHash": store.put_json(map_json)}
+                if include_content:
+                    map_record["mapJson"] = map_json
+                yield _ndjson_line(map_record)
+        except Exception as e:
+            yield _ndjson_line({
+                "type": "error",
+                "success": False,
+                "error": f"{error_prefix}: {str(e)}",
+            })
+            return
+        yield _ndjson_line({"type": "done", "success": True, "totalParts": total, **summary})
+
+    return StreamingResponse(generate(), media_type=NDJSON_MEDIA_TYPE)
+
+
+def iter_document_parts(sections, lines: list[str], include_content: bool) -> Iterator[DocumentPart]:
+    """セクションから DocumentPart を1件ずつ生成し、内容をアーティファクトストアに登録する"""
+    store = get_artifact_store()
+    for section in sections:
+        content = "".join(lines[section.start_line - 1 : section.end_line])
+        yield DocumentPart(
+            id=section.id,
+            section=section.title,
+            displayName=section.display_name(),
+            level=section.level,
+            path=section.path,
+            startLine=section.start_line,
+            endLine=section.end_line,
+            content=content if include_content else None,
+            contentHash=store.put(content),
+            estimatedTokens=_estimate_tokens(content),
         )
-        from md2map.generators.map_generator import (
-            generate_map as md2map_generate_map,
+
+
+def iter_code_parts(symbols, lines: list[str], include_content: bool) -> Iterator[CodePart]:
+    """シンボルから CodePart を1件ずつ生成し、内容をアーティファクトストアに登録する"""
+    from code2map.utils.file_utils import slice_lines
+
+    store = get_artifact_store()
+    for symbol in symbols:
+        content = slice_lines(lines, symbol.start_line, symbol.end_line)
+        yield CodePart(
+            id=symbol.id,
+            symbol=symbol.name,
+            symbolType=symbol.kind,
+            parentSymbol=symbol.parent,
+            startLine=symbol.start_line,
+            endLine=symbol.end_line,
+            content=content if include_content else None,
+            contentHash=store.put(content),
+            estimatedTokens=_estimate_tokens(content),
         )
-        from md2map.generators.parts_generator import (
-            generate_parts as md2map_generate_parts,
+
+
+# ---------------------------------------------------------------------------
+# md2map / code2map による分割
+# ---------------------------------------------------------------------------
+
+
+def detect_code_language(filename: str) -> str | None:
+    """ファイル拡張子から code2map の言語を判定する（未対応の場合はNone）"""
+    ext = filename.lower().split(".")[-1] if "." in filename else ""
+    return {"py": "python", "java": "java"}.get(ext)
+
+
+class SplitSourceError(Exception):
+    """分割対象のファイルを読み込めない場合のエラー"""
+
+
+@dataclass
+class SplitOutput:
+    """md2map / code2map による分割結果"""
+
+    items: list  # md2map のセクション / code2map のシンボル（IDは割り当て済み）
+    lines: list[str]
+    index_content: str
+    map_json: list[dict] | None  # 分割対象がない場合は None
+
+
+def split_markdown_source(
+    source: str,
+    filename: str | None,
+    max_depth: int,
+    split_mode: str,
+    llm_provider=None,
+) -> SplitOutput:
+    """Markdownを md2map で分割する
+
+    AIモードではLLMを呼び出すため、呼び出し側でスレッドに逃がすこと。
+    """
+    from md2map.generators.index_generator import (
+        generate_index as md2map_generate_index,
+    )
+    from md2map.generators.map_generator import (
+        generate_map as md2map_generate_map,
+    )
+    from md2map.generators.parts_generator import (
+        generate_parts as md2map_generate_parts,
+    )
+    from md2map.parsers.markdown_parser import MarkdownParser
+    from md2map.utils.file_utils import read_file as md2map_read_file
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        # 入力ファイルを書き込み
+        input_path = os.path.join(tmpdir, os.path.basename(filename or "input.md"))
+        with open(input_path, "w", encoding="utf-8") as f:
+            f.write(source)
+
+        # パース
+        # AIモードでは同じ本文のセクションの分割結果をキャッシュから再利用する
+        ai_cache = _get_md2map_ai_cache() if split_mode == "ai" else None
+        parser = MarkdownParser(
+            split_mode=split_mode, llm_provider=llm_provider, ai_cache=ai_cache
         )
-        from md2map.parsers.markdown_parser import MarkdownParser
-        from md2map.utils.file_utils import read_file as md2map_read_file
-
-        with tempfile.TemporaryDirectory() as tmpdir:
-            # 入力ファイルを書き込み
-            input_path = os.path.join(tmpdir, request.filename or "input.md")
-            with open(input_path, "w", encoding="utf-8") as f:
-                f.write(request.content)
-
-            # AIモードの場合のみ LLMConfig を変換
-            md2map_llm_config = None
-            if request.splitMode == "ai":
-                md2map_llm_config = _convert_to_md2map_llm_config(
-                    request.llmConfig
-                )
+        sections, warnings = parser.parse(input_path, max_depth)
 
-            # パース
-            parser = MarkdownParser(
-                split_mode=request.splitMode,
-                llm_config=md2map_llm_config,
-            )
-            sections, warnings = parser.parse(input_path, request.maxDepth)
+        if not sections:
+            return SplitOutput([], [], "# No sections found\n", None)
 
-            if not sections:
-                return SplitMarkdownResponse(
-                    success=True,
-                    parts=[],
-                    indexContent="# No sections found\n",
-                )
+        # 行を読み込み（md2mapはkeepends=Trueの行リストを返す）
+        lines, _ = md2map_read_file(input_path)
+        if lines is None:
+            raise SplitSourceError("ファイルの読み込みに失敗しました")
 
-            # 行を読み込み（md2mapはkeepends=Trueの行リストを返す）
-            lines, _ = md2map_read_file(input_path)
-            if lines is None:
-                return SplitMarkdownResponse(
-                    success=False,
-                    error="ファイルの読み込みに失敗しました",
-                )
+        # セクションIDの割り当て（md2mapのCLIと同様）
+        for i, section in enumerate(sections, start=1):
+            section.id = f"MD{i}"
 
-            # セクションIDの割り当て（md2mapのCLIと同様）
-            for i, section in enumerate(sections, start=1):
-                section.id = f"MD{i}"
+        # パーツ生成（section.part_fileを設定するために必要）
+        out_dir = os.path.join(tmpdir, "output")
+        md2map_generate_parts(sections, lines, out_dir)
 
-            # パーツ生成（section.part_fileを設定するために必要）
-            out_dir = os.path.join(tmpdir, "output")
-            md2map_generate_parts(sections, lines, out_dir)
+        # INDEX.md生成
+        index_path = os.path.join(out_dir, "INDEX.md")
+        md2map_generate_index(sections, warnings, index_path, filename)
 
-            # INDEX.md生成
-            index_path = os.path.join(out_dir, "INDEX.md")
-            md2map_generate_index(
-                sections, warnings, index_path, request.filename
-            )
+        # MAP.json生成
+        map_path = os.path.join(out_dir, "MAP.json")
+        md2map_generate_map(sections, out_dir, map_path)
 
-            # MAP.json生成
-            map_path = os.path.join(out_dir, "MAP.json")
-            md2map_generate_map(sections, out_dir, map_path)
+        # INDEX.md読み取り
+        with open(index_path, "r", encoding="utf-8") as f:
+            index_content = f.read()
 
-            # INDEX.md読み取り
-            with open(index_path, "r", encoding="utf-8") as f:
-                index_content = f.read()
+        # MAP.json読み取り
+        with open(map_path, "r", encoding="utf-8") as f:
+            map_json = json.load(f)
 
-            # MAP.json読み取り
-            with open(map_path, "r", encoding="utf-8") as f:
-                map_json = json.load(f)
+    return SplitOutput(sections, lines, index_content, map_json)
 
-            # DocumentPartリスト構築
-            parts = []
-            for section in sections:
-                content = "".join(
-                    lines[section.start_line - 1 : section.end_line]
-                )
-                parts.append(
-                    DocumentPart(
-                        id=section.id,
-                        section=section.title,
-                        displayName=section.display_name(),
-                        level=section.level,
-                        path=section.path,
-                        startLine=section.start_line,
-                        endLine=section.end_line,
-                        content=content,
-                        estimatedTokens=_estimate_tokens(content),
-                    )
+
+def split_code_source(source: str, filename: str, language: str) -> SplitOutput:
+    """コードを code2map で分割する（language は detect_code_language() の結果）"""
+    from code2map.generators.index_generator import (
+        generate_index as code2map_generate_index,
+    )
+    from code2map.generators.map_generator import (
+        generate_map as code2map_generate_map,
+    )
+    from code2map.generators.parts_generator import (
+        generate_parts as code2map_generate_parts,
+    )
+    from code2map.utils.file_utils import read_lines as code2map_read_lines
+
+    if language == "python":
+        from code2map.parsers.python_parser import PythonParser
+
+        code_parser = PythonParser()
+    else:
+        from code2map.parsers.java_parser import JavaParser
+
+        code_parser = JavaParser()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        # 入力ファイルを書き込み
+        input_path = os.path.join(tmpdir, os.path.basename(filename))
+        with open(input_path, "w", encoding="utf-8") as f:
+            f.write(source)
+
+        # パース
+        symbols, warnings = code_parser.parse(input_path)
+
+        if not symbols:
+            return SplitOutput([], [], "# No symbols found\n", None)
+
+        # 行を読み込み（code2mapはsplitlines()の行リストを返す）
+        c2m_lines = code2map_read_lines(input_path)
+
+        # シンボルIDの割り当て（code2mapのCLIと同様）
+        for i, symbol in enumerate(symbols, start=1):
+            symbol.id = f"CD{i}"
+
+        # パーツ生成（symbol.part_fileを設定するために必要）
+        # 戻り値 entries は MAP.json 生成に使用
+        out_dir = os.path.join(tmpdir, "output")
+        entries = code2map_generate_parts(symbols, c2m_lines, out_dir)
+
+        # INDEX.md生成
+        index_path = os.path.join(out_dir, "INDEX.md")
+        code2map_generate_index(symbols, warnings, c2m_lines, index_path, filename)
+
+        # MAP.json生成
+        map_path = os.path.join(out_dir, "MAP.json")
+        code2map_generate_map(entries, map_path)
+
+        # INDEX.md読み取り
+        with open(index_path, "r", encoding="utf-8") as f:
+            index_content = f.read()
+
+        # MAP.json読み取り
+        with open(map_path, "r", encoding="utf-8") as f:
+            map_json = json.load(f)
+
+    return SplitOutput(symbols, c2m_lines, index_content, map_json)
+
+
+# ---------------------------------------------------------------------------
+# 分割API
+# ---------------------------------------------------------------------------
+
+
+@router.post("/split/markdown", response_model=SplitMarkdownResponse)
+@cancel_on_disconnect("split_markdown")
+async def split_markdown(request: SplitMarkdownRequest, http_request: Request):
+    """
+    Markdownをセクション単位で分割する（md2map使用）
+
+    - 3つの分割モードに対応: heading / nlp / ai
+    - maxDepthで分割の見出しレベルを指定（デフォルト: H2まで）
+    - パーツ・INDEX.md・MAP.jsonはアーティファクトストアに登録し、ハッシュを返す
+    - stream=True の場合はパーツを1件ずつNDJSONで返す（INDEX.md・MAP.jsonは末尾）
+    """
+    store = get_artifact_store()
+    try:
+        source = (
+            request.content
+            if request.content is not None
+            else store.get(request.contentHash)
+        )
+    except ArtifactNotFoundError as e:
+        if request.stream:
+            return _ndjson_error_response(str(e))
+        return SplitMarkdownResponse(success=False, error=str(e))
+
+    try:
+        # AIモードの場合のみ LLM プロバイダーを生成
+        md2map_llm_provider = None
+        if request.splitMode == "ai":
+            md2map_llm_provider = _build_md2map_llm_provider(request.llmConfig)
+
+        # AI呼び出しを含むためスレッドで実行し、切断を監視できるようにする
+        output = await asyncio.to_thread(
+            split_markdown_source,
+            source,
+            request.filename,
+            request.maxDepth,
+            request.splitMode,
+            md2map_llm_provider,
+        )
+
+        # includeContent=False の場合は INDEX.md・MAP.json もハッシュのみ返す
+        include = request.includeContent
+        if output.map_json is None:
+            if request.stream:
+                return _ndjson_split_response(
+                    [], output.index_content, None, "Markdown分割中にエラーが発生しました",
+                    include_content=include,
                 )
+            return SplitMarkdownResponse(
+                success=True,
+                parts=[],
+                indexContent=output.index_content if include else None,
+                indexHash=store.put(output.index_content),
+            )
+
+        # DocumentPart はストリーミング時は送出しながら、それ以外はまとめて構築する
+        parts = iter_document_parts(output.items, output.lines, include)
+        if request.stream:
+            return _ndjson_split_response(
+                parts, output.index_content, output.map_json,
+                "Markdown分割中にエラーが発生しました", include_content=include,
+            )
 
         return SplitMarkdownResponse(
             success=True,
-            parts=parts,
-            indexContent=index_content,
-            mapJson=map_json,
+            parts=list(parts),
+            indexContent=output.index_content if include else None,
+            mapJson=output.map_json if include else None,
+            indexHash=store.put(output.index_content),
+            mapHash=store.put_json(output.map_json),
         )
 
+    except SplitSourceError as e:
+        if request.stream:
+            return _ndjson_error_response(str(e))
+        return SplitMarkdownResponse(success=False, error=str(e))
     except Exception as e:
-        return SplitMarkdownResponse(
-            success=False,
-            error=f"Markdown分割中にエラーが発生しました: {str(e)}",
-        )
+        error = f"Markdown分割中にエラーが発生しました: {str(e)}"
+        if request.stream:
+            return _ndjson_error_response(error)
+        return SplitMarkdownResponse(success=False, error=error)
 
 
 @router.post("/split/code", response_model=SplitCodeResponse)
@@ -184,121 +536,71 @@ async def split_code(request: SplitCodeRequest):
 
     - ファイル拡張子から言語を自動判定
     - 対応言語: Python (.py), Java (.java)
+    - stream=True の場合はパーツを1件ずつNDJSONで返す（INDEX.md・MAP.jsonは末尾）
     """
     # 言語判定
-    ext = (
-        request.filename.lower().split(".")[-1]
-        if "." in request.filename
-        else ""
-    )
-    language = {"py": "python", "java": "java"}.get(ext)
+    language = detect_code_language(request.filename)
 
     if not language:
-        return SplitCodeResponse(
-            success=False,
-            error=f"未対応の言語です: .{ext} (対応: .py, .java)",
-        )
+        ext = request.filename.lower().split(".")[-1] if "." in request.filename else ""
+        error = f"未対応の言語です: .{ext} (対応: .py, .java)"
+        if request.stream:
+            return _ndjson_error_response(error)
+        return SplitCodeResponse(success=False, error=error)
 
+    store = get_artifact_store()
     try:
-        from code2map.generators.index_generator import (
-            generate_index as code2map_generate_index,
-        )
-        from code2map.generators.map_generator import (
-            generate_map as code2map_generate_map,
-        )
-        from code2map.generators.parts_generator import (
-            generate_parts as code2map_generate_parts,
+        source = (
+            request.content
+            if request.content is not None
+            else store.get(request.contentHash)
         )
-        from code2map.utils.file_utils import (
-            read_lines as code2map_read_lines,
-            slice_lines,
-        )
-
-        if language == "python":
-            from code2map.parsers.python_parser import PythonParser
-
-            code_parser = PythonParser()
-        else:
-            from code2map.parsers.java_parser import JavaParser
-
-            code_parser = JavaParser()
+    except ArtifactNotFoundError as e:
+        if request.stream:
+            return _ndjson_error_response(str(e))
+        return SplitCodeResponse(success=False, error=str(e))
 
-        with tempfile.TemporaryDirectory() as tmpdir:
-            # 入力ファイルを書き込み
-            input_path = os.path.join(tmpdir, request.filename)
-            with open(input_path, "w", encoding="utf-8") as f:
-                f.write(request.content)
-
-            # パース
-            symbols, warnings = code_parser.parse(input_path)
-
-            if not symbols:
-                return SplitCodeResponse(
-                    success=True,
-                    parts=[],
-                    indexContent="# No symbols found\n",
-                    language=language,
+    try:
+        output = split_code_source(source, request.filename, language)
+
+        # includeContent=False の場合は INDEX.md・MAP.json もハッシュのみ返す
+        include = request.includeContent
+        if output.map_json is None:
+            if request.stream:
+                return _ndjson_split_response(
+                    [], output.index_content, None,
+                    "コード分割中にエラーが発生しました",
+                    include_content=include, language=language,
                 )
-
-            # 行を読み込み（code2mapはsplitlines()の行リストを返す）
-            c2m_lines = code2map_read_lines(input_path)
-
-            # シンボルIDの割り当て（code2mapのCLIと同様）
-            for i, symbol in enumerate(symbols, start=1):
-                symbol.id = f"CD{i}"
-
-            # パーツ生成（symbol.part_fileを設定するために必要）
-            # 戻り値 entries は MAP.json 生成に使用
-            out_dir = os.path.join(tmpdir, "output")
-            entries = code2map_generate_parts(symbols, c2m_lines, out_dir)
-
-            # INDEX.md生成
-            index_path = os.path.join(out_dir, "INDEX.md")
-            code2map_generate_index(
-                symbols, warnings, c2m_lines, index_path, request.filename
+            return SplitCodeResponse(
+                success=True,
+                parts=[],
+                indexContent=output.index_content if include else None,
+                indexHash=store.put(output.index_content),
+                language=language,
             )
 
-            # MAP.json生成
-            map_path = os.path.join(out_dir, "MAP.json")
-            code2map_generate_map(entries, map_path)
-
-            # INDEX.md読み取り
-            with open(index_path, "r", encoding="utf-8") as f:
-                index_content = f.read()
-
-            # MAP.json読み取り
-            with open(map_path, "r", encoding="utf-8") as f:
-                map_json = json.load(f)
-
-            # CodePartリスト構築
-            parts = []
-            for symbol in symbols:
-                content = slice_lines(
-                    c2m_lines, symbol.start_line, symbol.end_line
-                )
-                parts.append(
-                    CodePart(
-                        id=symbol.id,
-                        symbol=symbol.name,
-                        symbolType=symbol.kind,
-                        parentSymbol=symbol.parent,
-                        startLine=symbol.start_line,
-                        endLine=symbol.end_line,
-                        content=content,
-                        estimatedTokens=_estimate_tokens(content),
-                    )
-                )
+        # CodePart はストリーミング時は送出しながら、それ以外はまとめて構築する
+        parts = iter_code_parts(output.items, output.lines, include)
+        if request.stream:
+            return _ndjson_split_response(
+                parts, output.index_content, output.map_json,
+                "コード分割中にエラーが発生しました",
+                include_content=include, language=language,
+            )
 
         return SplitCodeResponse(
             success=True,
-            parts=parts,
-            indexContent=index_content,
-            mapJson=map_json,
+            parts=list(parts),
+            indexContent=output.index_content if include else None,
+            mapJson=output.map_json if include else None,
+            indexHash=store.put(output.index_content),
+            mapHash=store.put_json(output.map_json),
             language=language,
         )
 
     except Exception as e:
-        return SplitCodeResponse(
-            success=False,
-            error=f"コード分割中にエラーが発生しました: {str(e)}",
-        )
+        error = f"コード分割中にエラーが発生しました: {str(e)}"
+        if request.stream:
+            return _ndjson_error_response(error)
+        return SplitCodeResponse(success=False, error=error)
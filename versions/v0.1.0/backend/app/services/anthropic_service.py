@@ -5,7 +5,8 @@ from typing import TYPE_CHECKING
 from anthropic import Anthropic, APIError, AuthenticationError
 
 from app.models.schemas import LLMConfig, ReviewResponse
-from app.services.llm_service import LLMProvider
+from app.services.deadline import timeout_kwargs
+from app.services.llm_service import LLMProvider, credential_fingerprint
 
 if TYPE_CHECKING:
     from app.models.schemas import ReviewRequest
@@ -32,6 +33,7 @@ class AnthropicProvider(LLMProvider):
         self._client = Anthropic(api_key=llm_config.apiKey)
         self._model_id = llm_config.model
         self._max_tokens = llm_config.maxTokens
+        self._credential_fingerprint = credential_fingerprint(llm_config)
 
     @property
     def provider_name(self) -> str:
@@ -87,12 +89,15 @@ class AnthropicProvider(LLMProvider):
     def send_message(
         self, system_prompt: str, user_message: str
     ) -> tuple[str, int, int]:
+        # リクエストの期限がある場合は残り時間をタイムアウトとする
+        timeout = timeout_kwargs()
         try:
             response = self._client.messages.create(
                 model=self._model_id,
                 max_tokens=self._max_tokens,
                 system=system_prompt,
                 messages=[{"role": "user", "content": user_message}],
+                **timeout,
             )
             return (
                 response.content[0].text,
@@ -129,12 +134,14 @@ class AnthropicProvider(LLMProvider):
             markdown, policy
         )
 
+        timeout = timeout_kwargs()
         try:
             response = self._client.messages.create(
                 model=self._model_id,
                 max_tokens=self._max_tokens,
                 system=system_prompt,
                 messages=[{"role": "user", "content": user_message}],
+                **timeout,
             )
             return response.content[0].text
         except Exception as e:
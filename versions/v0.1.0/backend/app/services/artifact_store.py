@@ -0,0 +1,281 @@
+"""コンテンツアドレス型アーティファクトストア
+
+変換済みMarkdown、分割パーツ、INDEX.md、MAP.json を sha256 ハッシュをキーに保持し、
+クライアントが同じ内容を再送信せずにハッシュで参照できるようにする。
+
+メモリ上のLRUキャッシュと、ディスク上のサイズ上限付きLRUの2層構成。
+ディスク層は再起動後も有効で、メモリから追い出された内容もハッシュで復元できる。
+ディスクへの書き込みは専用のスレッドで後から行い、put() を呼ぶイベントループを止めない。
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+_MEMORY_MAX_BYTES = int(
+    os.environ.get("ARTIFACT_STORE_MEMORY_MAX_BYTES", str(64 * 1024 * 1024))
+)
+_DISK_MAX_BYTES = int(
+    os.environ.get("ARTIFACT_STORE_DISK_MAX_BYTES", str(1024 * 1024 * 1024))
+)
+# 空文字を指定した場合はディスク層を無効化する
+_DISK_DIR = os.environ.get(
+    "ARTIFACT_STORE_DIR",
+    os.path.join(tempfile.gettempdir(), "spec-code-ai-mapper-artifacts"),
+)
+
+_HASH_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+class ArtifactNotFoundError(ValueError):
+    """指定されたハッシュのアーティファクトが存在しない場合の例外"""
+
+    def __init__(self, artifact_hash: str):
+        super().__init__(
+            f"アーティファクトが見つかりません: {artifact_hash}"
+            "（有効期限切れの可能性があります。内容を再送信してください）"
+        )
+        self.artifact_hash = artifact_hash
+
+
+def compute_hash(content: str) -> str:
+    """テキストの sha256 ハッシュ（16進数64文字）を返す"""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def dumps_json(data: Any) -> str:
+    """JSONを正規化してシリアライズする（同じ内容は同じハッシュになる）"""
+    return json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+class ArtifactStore:
+    """sha256 をキーとする2層（メモリ / ディスク）LRUストア
+
+    スレッドセーフ。ルーターからは to_thread 経由でも呼び出される。
+    put() はメモリ層への追加のみを行い、ディスクへの書き込みは書き込み用スレッドに任せる
+    （書き込み待ちの内容も get() で取得できる）。
+    """
+
+    def __init__(
+        self,
+        disk_dir: str | None = None,
+        memory_max_bytes: int = _MEMORY_MAX_BYTES,
+        disk_max_bytes: int = _DISK_MAX_BYTES,
+    ):
+        """ArtifactStoreを初期化する
+
+        Args:
+            disk_dir: ディスク層のディレクトリ。Noneの場合はメモリのみ
+            memory_max_bytes: メモリ層の上限バイト数
+            disk_max_bytes: ディスク層の上限バイト数
+        """
+        self._lock = threading.Lock()
+        self._memory: OrderedDict[str, str] = OrderedDict()
+        self._memory_sizes: dict[str, int] = {}
+        self._memory_bytes = 0
+        self._memory_max_bytes = memory_max_bytes
+
+        self._disk_dir = Path(disk_dir) if disk_dir else None
+        self._disk_max_bytes = disk_max_bytes
+        self._disk: OrderedDict[str, int] = OrderedDict()
+        self._disk_bytes = 0
+        # 書き込み待ちの内容（ハッシュ → バイト列）
+        self._pending: dict[str, bytes] = {}
+        self._writer: ThreadPoolExecutor | None = None
+        if self._disk_dir is not None:
+            self._load_disk_index()
+        if self._disk_dir is not None:
+            self._writer = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="artifact-store-writer"
+            )
+
+    # ------------------------------------------------------------------
+    # 公開API
+    # ------------------------------------------------------------------
+
+    def put(self, content: str) -> str:
+        """テキストを保存してハッシュを返す（既存の場合は参照を更新するのみ）
+
+        ハッシュの計算はロックの外で行い、ディスクへの書き込みは書き込み用スレッドに依頼する。
+        """
+        data = content.encode("utf-8")
+        artifact_hash = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            self._remember(artifact_hash, content, len(data))
+            if self._writer is None or artifact_hash in self._pending:
+                return artifact_hash
+            if artifact_hash in self._disk:
+                self._disk.move_to_end(artifact_hash)
+                return artifact_hash
+            self._pending[artifact_hash] = data
+        self._writer.submit(self._write_disk, artifact_hash, data)
+        return artifact_hash
+
+    def put_json(self, data: Any) -> str:
+        """JSONデータを正規化して保存し、ハッシュを返す"""
+        return self.put(dumps_json(data))
+
+    def get(self, artifact_hash: str) -> str:
+        """ハッシュに対応するテキストを返す
+
+        Raises:
+            ArtifactNotFoundError: 存在しない、または不正なハッシュの場合
+        """
+        if not _HASH_PATTERN.match(artifact_hash or ""):
+            raise ArtifactNotFoundError(artifact_hash)
+
+        with self._lock:
+            content = self._memory.get(artifact_hash)
+            if content is not None:
+                self._memory.move_to_end(artifact_hash)
+                return content
+
+            pending = self._pending.get(artifact_hash)
+            if pending is not None:
+                content = pending.decode("utf-8")
+                self._remember(artifact_hash, content, len(pending))
+                return content
+
+            content = self._read_disk(artifact_hash)
+            if content is None:
+                raise ArtifactNotFoundError(artifact_hash)
+            self._remember(artifact_hash, content, self._disk[artifact_hash])
+            return content
+
+    def get_json(self, artifact_hash: str) -> Any:
+        """ハッシュに対応するJSONデータを返す"""
+        return json.loads(self.get(artifact_hash))
+
+    def get_many(self, artifact_hashes: list[str], separator: str = "\n\n") -> str:
+        """複数ハッシュの内容を順に結合して返す"""
+        return separator.join(self.get(h) for h in artifact_hashes)
+
+    def exists(self, artifact_hash: str) -> bool:
+        """ハッシュに対応するアーティファクトが存在するかを返す"""
+        with self._lock:
+            return (
+                artifact_hash in self._memory
+                or artifact_hash in self._pending
+                or artifact_hash in self._disk
+            )
+
+    def flush(self) -> None:
+        """書き込み待ちの内容をディスクに書き終えるまで待つ"""
+        if self._writer is not None:
+            self._writer.submit(lambda: None).result()
+
+    # ------------------------------------------------------------------
+    # メモリ層
+    # ------------------------------------------------------------------
+
+    def _remember(self, artifact_hash: str, content: str, size: int) -> None:
+        """メモリ層に追加し、上限を超えた分を古い順に追い出す（ロック保持前提）"""
+        if size > self._memory_max_bytes:
+            return
+        if artifact_hash in self._memory:
+            self._memory.move_to_end(artifact_hash)
+            return
+        self._memory[artifact_hash] = content
+        self._memory_sizes[artifact_hash] = size
+        self._memory_bytes += size
+        while self._memory_bytes > self._memory_max_bytes:
+            evicted, _ = self._memory.popitem(last=False)
+            self._memory_bytes -= self._memory_sizes.pop(evicted)
+
+    # ------------------------------------------------------------------
+    # ディスク層
+    # ------------------------------------------------------------------
+
+    def _path_for(self, artifact_hash: str) -> Path:
+        return self._disk_dir / artifact_hash[:2] / artifact_hash
+
+    def _load_disk_index(self) -> None:
+        """起動時に既存ファイルを最終アクセス順（mtime）で索引化する"""
+        try:
+            self._disk_dir.mkdir(parents=True, exist_ok=True)
+            found: list[tuple[float, str, int]] = []
+            for path in self._disk_dir.glob("??/*"):
+                if not _HASH_PATTERN.match(path.name):
+                    continue
+                stat = path.stat()
+                found.append((stat.st_mtime, path.name, stat.st_size))
+        except OSError:
+            # ディスクが使えない場合はメモリのみで動作する
+            self._disk_dir = None
+            return
+
+        for _, artifact_hash, size in sorted(found):
+            self._disk[artifact_hash] = size
+            self._disk_bytes += size
+        self._evict_disk()
+
+    def _write_disk(self, artifact_hash: str, data: bytes) -> None:
+        """一時ファイル経由でアトミックに書き込む（書き込み用スレッドで実行。書き込みはロック外）"""
+        path = self._path_for(artifact_hash)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            with self._lock:
+                self._pending.pop(artifact_hash, None)
+            return
+        with self._lock:
+            self._pending.pop(artifact_hash, None)
+            self._disk[artifact_hash] = len(data)
+            self._disk_bytes += len(data)
+            self._evict_disk()
+
+    def _read_disk(self, artifact_hash: str) -> str | None:
+        """ディスク層から読み込み、破損していれば破棄する（ロック保持前提）"""
+        if self._disk_dir is None or artifact_hash not in self._disk:
+            return None
+        path = self._path_for(artifact_hash)
+        try:
+            data = path.read_bytes()
+            os.utime(path)  # LRU用に最終アクセス時刻を更新
+        except OSError:
+            self._forget_disk(artifact_hash)
+            return None
+        if hashlib.sha256(data).hexdigest() != artifact_hash:
+            self._forget_disk(artifact_hash, unlink=True)
+            return None
+        self._disk.move_to_end(artifact_hash)
+        return data.decode("utf-8")
+
+    def _forget_disk(self, artifact_hash: str, unlink: bool = False) -> None:
+        size = self._disk.pop(artifact_hash, 0)
+        self._disk_bytes -= size
+        if unlink:
+            try:
+                self._path_for(artifact_hash).unlink()
+            except OSError:
+                pass
+
+    def _evict_disk(self) -> None:
+        """ディスク層が上限を超えていれば古い順に削除する（ロック保持前提）"""
+        while self._disk_bytes > self._disk_max_bytes and self._disk:
+            oldest = next(iter(self._disk))
+            self._forget_disk(oldest, unlink=True)
+
+
+_store: ArtifactStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_artifact_store() -> ArtifactStore:
+    """プロセス共通のArtifactStoreを返す（初回呼び出し時に生成）"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ArtifactStore(disk_dir=_DISK_DIR or None)
+        return _store
@@ -6,16 +6,38 @@ Converse APIを使用してAnthropicおよびAmazon Novaモデルに対応。
 from typing import TYPE_CHECKING
 
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
 from app.models.schemas import LLMConfig, ReviewResponse
-from app.services.llm_service import LLMProvider
+from app.services.deadline import check_deadline, remaining_seconds
+from app.services.llm_service import LLMProvider, credential_fingerprint
 
 if TYPE_CHECKING:
     from app.models.schemas import ReviewRequest
 
 # IAMロール認証時のデフォルトリージョン
 _DEFAULT_REGION = "ap-northeast-1"
+# リクエストの期限がある場合の接続タイムアウトの上限（秒）
+_MAX_CONNECT_TIMEOUT_SECONDS = 10
+
+
+def _client_config() -> Config | None:
+    """リクエストの期限がある場合、残り時間をタイムアウトとするクライアント設定を返す
+
+    boto3 は呼び出しごとにタイムアウトを指定できないため、プロバイダー生成時
+    （リクエスト内）の残り時間を設定する。期限がない場合は None（SDKの既定値）。
+    """
+    remaining = remaining_seconds()
+    if remaining is None:
+        return None
+    timeout = max(1.0, remaining)
+    return Config(
+        connect_timeout=min(timeout, _MAX_CONNECT_TIMEOUT_SECONDS),
+        read_timeout=timeout,
+        # リトライで期限を超えないよう、再試行は1回までとする
+        retries={"max_attempts": 2, "mode": "standard"},
+    )
 
 
 class BedrockProvider(LLMProvider):
@@ -35,6 +57,10 @@ class BedrockProvider(LLMProvider):
             これはシステムLLM（EC2/Lambda等で実行）の場合に該当する。
         """
         region = llm_config.region or _DEFAULT_REGION
+        client_kwargs = {}
+        config = _client_config()
+        if config is not None:
+            client_kwargs["config"] = config
 
         # accessKeyId/secretAccessKeyがNoneの場合はIAMロール認証
         if llm_config.accessKeyId and llm_config.secretAccessKey:
@@ -43,13 +69,17 @@ class BedrockProvider(LLMProvider):
                 region_name=region,
                 aws_access_key_id=llm_config.accessKeyId,
                 aws_secret_access_key=llm_config.secretAccessKey,
+                **client_kwargs,
             )
         else:
             # IAMロール認証（システムLLM用）
-            self._client = boto3.client("bedrock-runtime", region_name=region)
+            self._client = boto3.client(
+                "bedrock-runtime", region_name=region, **client_kwargs
+            )
 
         self._model_id = llm_config.model
         self._max_tokens = llm_config.maxTokens
+        self._credential_fingerprint = credential_fingerprint(llm_config)
 
     @property
     def provider_name(self) -> str:
@@ -114,6 +144,8 @@ class BedrockProvider(LLMProvider):
     def send_message(
         self, system_prompt: str, user_message: str
     ) -> tuple[str, int, int]:
+        # 残り時間が少なく完了の見込みがない場合は呼び出さない
+        check_deadline()
         try:
             response = self._client.converse(
                 modelId=self._model_id,
@@ -166,6 +198,7 @@ class BedrockProvider(LLMProvider):
             markdown, policy
         )
 
+        check_deadline()
         try:
             response = self._client.converse(
                 modelId=self._model_id,
@@ -0,0 +1,219 @@
+"""クライアント切断時のキャンセル処理
+
+タブを閉じる・再実行するなどでクライアントが切断した場合に、
+処理中のLLM呼び出し（並列実行中のものを含む）を中断する。
+
+- ハンドラーは @cancel_on_disconnect で処理全体をタスクとして実行し、
+  request.is_disconnected() を定期的に確認する
+- 切断を検知したらタスクをキャンセルし、リクエスト内で生成したプロバイダーを
+  close() して、スレッドで実行中のSDK呼び出しも打ち切る
+- キャンセルした呼び出し数はメトリクスに記録する
+- リクエストの期限（deadline.py）を設定し、期限を過ぎても終わらない処理は
+  同様に中断してステータス504を返す
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import functools
+import os
+import time
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+
+from app.services.deadline import (
+    DeadlineExceededError,
+    deadline_scope,
+    remaining_seconds,
+    request_deadline_seconds,
+)
+from app.services.metrics import get_metrics
+
+_POLL_INTERVAL_SECONDS = float(
+    os.environ.get("DISCONNECT_POLL_INTERVAL_SECONDS", "0.5")
+)
+
+# 期限を過ぎてから強制的に中断するまでの猶予（各呼び出しの期限切れエラーを優先する）
+_DEADLINE_GRACE_SECONDS = float(os.environ.get("REQUEST_DEADLINE_GRACE_SECONDS", "1"))
+
+# nginx と同じ「Client Closed Request」
+CLIENT_CLOSED_REQUEST = 499
+GATEWAY_TIMEOUT = 504
+
+_current_scope: contextvars.ContextVar["CancellationScope | None"] = (
+    contextvars.ContextVar("cancellation_scope", default=None)
+)
+
+
+class CancellationScope:
+    """1リクエスト内のLLM呼び出しを追跡し、切断時にまとめて中断する"""
+
+    def __init__(self, operation: str):
+        self.operation = operation
+        self.cancelled = False
+        self._closeables: list = []
+        self._shared: dict = {}
+        self._inflight = 0
+
+    def register(self, closeable) -> None:
+        """切断時に close() するオブジェクト（プロバイダーなど）を登録する"""
+        self._closeables.append(closeable)
+
+    def get_or_create(self, key, factory):
+        """key ごとに factory() で1回だけ生成して登録し、以降は同じオブジェクトを返す
+
+        リクエスト内でプロバイダー（SDKクライアントの接続）を使い回すために使う。
+        """
+        shared = self._shared.get(key)
+        if shared is None:
+            shared = factory()
+            self._shared[key] = shared
+            self.register(shared)
+        return shared
+
+    @contextlib.contextmanager
+    def track_call(self):
+        """実行中のLLM呼び出しとして数える"""
+        if self.cancelled:
+            raise asyncio.CancelledError()
+        self._inflight += 1
+        try:
+            yield
+        finally:
+            self._inflight -= 1
+
+    def cancel(self, deadline_exceeded: bool = False) -> None:
+        """実行中の呼び出しを打ち切り、メトリクスに記録する
+
+        Args:
+            deadline_exceeded: 切断ではなくリクエストの期限切れで打ち切る場合はTrue
+        """
+        if self.cancelled:
+            return
+        self.cancelled = True
+        metrics = get_metrics()
+        if deadline_exceeded:
+            metrics.increment("deadline_exceeded_total", operation=self.operation)
+            if self._inflight:
+                metrics.increment(
+                    "llm_calls_timed_out_total", self._inflight, operation=self.operation
+                )
+        else:
+            metrics.increment("client_disconnects_total", operation=self.operation)
+            if self._inflight:
+                metrics.increment(
+                    "llm_calls_cancelled_total", self._inflight, operation=self.operation
+                )
+        for closeable in self._closeables:
+            try:
+                closeable.close()
+            except Exception:
+                pass
+
+
+def current_cancellation_scope() -> CancellationScope | None:
+    """現在のリクエストのCancellationScopeを返す（スコープ外ではNone）"""
+    return _current_scope.get()
+
+
+def clear_cancellation_scope() -> None:
+    """現在のコンテキストのCancellationScopeを解除する
+
+    複数のリクエストで共有する処理を実行するコピーしたコンテキストで呼ぶ。
+    """
+    _current_scope.set(None)
+
+
+async def _wait_for_disconnect(http_request: Request) -> None:
+    """クライアントが切断するまで待機する"""
+    while not await http_request.is_disconnected():
+        await asyncio.sleep(_POLL_INTERVAL_SECONDS)
+
+
+async def run_until_disconnected(
+    http_request: Request,
+    operation: str,
+    coro,
+    deadline_seconds: float | None = None,
+):
+    """クライアント切断を監視しながらコルーチンを実行する
+
+    Args:
+        deadline_seconds: リクエストの制限時間（秒）。None の場合は期限なし
+
+    Returns:
+        コルーチンの戻り値。切断した場合は 499、期限を過ぎた場合は 504 の JSONResponse
+    """
+    scope = CancellationScope(operation)
+    token = _current_scope.set(scope)
+    try:
+        # タスクは生成時点のコンテキスト（スコープ・期限設定済み）を引き継ぐ
+        with deadline_scope(deadline_seconds):
+            task = asyncio.ensure_future(coro)
+            remaining = remaining_seconds()
+    finally:
+        _current_scope.reset(token)
+    watcher = asyncio.ensure_future(_wait_for_disconnect(http_request))
+    timeout = None if remaining is None else max(0.0, remaining) + _DEADLINE_GRACE_SECONDS
+
+    try:
+        await asyncio.wait(
+            {task, watcher}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+        )
+    except asyncio.CancelledError:
+        # サーバー側のキャンセル（シャットダウン等）も同様に伝播する
+        scope.cancel()
+        task.cancel()
+        watcher.cancel()
+        raise
+
+    if task.done():
+        watcher.cancel()
+        return task.result()
+
+    deadline_exceeded = not watcher.done()
+    started = time.monotonic()
+    scope.cancel(deadline_exceeded=deadline_exceeded)
+    task.cancel()
+    watcher.cancel()
+    with contextlib.suppress(asyncio.CancelledError, Exception):
+        await task
+    get_metrics().observe(
+        "cancellation_seconds", time.monotonic() - started, operation=operation
+    )
+    if deadline_exceeded:
+        return JSONResponse(
+            status_code=GATEWAY_TIMEOUT,
+            content={"success": False, "error": str(DeadlineExceededError())},
+        )
+    return JSONResponse(
+        status_code=CLIENT_CLOSED_REQUEST,
+        content={
+            "success": False,
+            "error": "クライアントが切断されたため処理を中断しました",
+        },
+    )
+
+
+def cancel_on_disconnect(operation: str):
+    """クライアント切断時に処理を中断するハンドラー用デコレーター
+
+    デコレート対象のハンドラーは引数 http_request: Request を受け取ること。
+    リクエストの期限（X-Request-Timeout ヘッダー / REQUEST_DEADLINE_SECONDS）も設定する。
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            http_request = kwargs["http_request"]
+            return await run_until_disconnected(
+                http_request,
+                operation,
+                func(*args, **kwargs),
+                deadline_seconds=request_deadline_seconds(http_request),
+            )
+
+        return wrapper
+
+    return decorator
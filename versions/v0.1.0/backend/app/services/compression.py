@@ -0,0 +1,292 @@
+"""リクエスト・レスポンスの圧縮（gzip / zstd）
+
+- Content-Encoding: gzip / zstd のリクエストボディを展開してからアプリへ渡す
+- Accept-Encoding に応じてレスポンスを圧縮する（zstd を優先し、次に gzip）
+- ストリーミングレスポンス（NDJSON）はチャンクごとにフラッシュし、逐次受信を妨げない
+
+zstd は zstandard（extra: speedups）がインストールされている場合のみ有効。
+
+環境変数:
+- REQUEST_MAX_DECOMPRESSED_BYTES: 展開後のリクエストボディの上限バイト数
+- RESPONSE_COMPRESSION_MIN_BYTES: レスポンスを圧縮する最小バイト数
+"""
+
+import gzip
+import io
+import os
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import zstandard
+except ImportError:  # extra "speedups" 未インストール時は zstd を扱わない
+    zstandard = None
+
+_MAX_DECOMPRESSED_BYTES = int(
+    os.environ.get("REQUEST_MAX_DECOMPRESSED_BYTES", str(100 * 1024 * 1024))
+)
+_MIN_COMPRESS_BYTES = int(os.environ.get("RESPONSE_COMPRESSION_MIN_BYTES", "1024"))
+
+_GZIP_LEVEL = 6
+_ZSTD_LEVEL = 3
+
+# 圧縮対象のContent-Type（text/event-stream は逐次性を優先して除外）
+_COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "image/svg+xml",
+)
+
+
+def supported_encodings() -> list[str]:
+    """利用可能なエンコーディングを優先順に返す"""
+    return (["zstd"] if zstandard is not None else []) + ["gzip"]
+
+
+def parse_accept_encoding(accept_encoding: str) -> dict[str, float]:
+    """Accept-Encoding をエンコーディング名 → q値 の辞書に変換する"""
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name.strip().lower()] = quality
+    return accepted
+
+
+def accepts_encoding(accepted: dict[str, float], encoding: str) -> bool:
+    """parse_accept_encoding() の結果がエンコーディングを受け付けるかを返す"""
+    return accepted.get(encoding, accepted.get("*", 0.0)) > 0
+
+
+def select_encoding(accept_encoding: str) -> str | None:
+    """Accept-Encoding から使用するエンコーディングを選択する（なければ None）"""
+    accepted = parse_accept_encoding(accept_encoding)
+    for encoding in supported_encodings():
+        if accepts_encoding(accepted, encoding):
+            return encoding
+    return None
+
+
+def _is_compressible(content_type: str) -> bool:
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    if media_type == "text/event-stream":
+        return False
+    return media_type.startswith("text/") or media_type in _COMPRESSIBLE_TYPES
+
+
+class _GzipEncoder:
+    def __init__(self):
+        self._compressor = zlib.compressobj(_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _ZstdEncoder:
+    def __init__(self):
+        self._compressor = zstandard.ZstdCompressor(level=_ZSTD_LEVEL).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+_ENCODERS = {"gzip": _GzipEncoder, "zstd": _ZstdEncoder}
+
+
+class RequestDecodeError(ValueError):
+    """リクエストボディを展開できない場合のエラー"""
+
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def decompress_body(encoding: str, data: bytes, max_bytes: int | None = None) -> bytes:
+    """圧縮されたリクエストボディを展開する
+
+    Raises:
+        RequestDecodeError: 未対応のエンコーディング（415）、不正なデータ（400）、
+            展開後のサイズが上限を超える場合（413）
+    """
+    limit = _MAX_DECOMPRESSED_BYTES if max_bytes is None else max_bytes
+    encoding = encoding.strip().lower()
+    if encoding == "gzip":
+        reader = gzip.GzipFile(fileobj=io.BytesIO(data))
+        errors: tuple[type[Exception], ...] = (OSError, EOFError, zlib.error)
+    elif encoding == "zstd" and zstandard is not None:
+        reader = zstandard.ZstdDecompressor().stream_reader(io.BytesIO(data))
+        errors = (zstandard.ZstdError,)
+    else:
+        raise RequestDecodeError(f"未対応のContent-Encodingです: {encoding}", 415)
+
+    try:
+        # 上限+1バイトまで読み、超えていれば展開を打ち切る（圧縮爆弾対策）
+        body = reader.read(limit + 1)
+    except errors as e:
+        raise RequestDecodeError(f"リクエストボディを展開できません: {e}", 400) from e
+    if len(body) > limit:
+        raise RequestDecodeError(
+            f"展開後のリクエストボディが上限（{limit}バイト）を超えています。", 413
+        )
+    return body
+
+
+class CompressionMiddleware:
+    """リクエストの展開とレスポンスの圧縮を行うASGIミドルウェア"""
+
+    def __init__(self, app: ASGIApp, minimum_size: int | None = None):
+        self.app = app
+        self.minimum_size = _MIN_COMPRESS_BYTES if minimum_size is None else minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        content_encoding = headers.get("content-encoding", "").strip().lower()
+        if content_encoding and content_encoding != "identity":
+            try:
+                scope, receive = await self._decoded_request(scope, receive, content_encoding)
+            except RequestDecodeError as e:
+                response = JSONResponse(
+                    {"success": False, "error": str(e)}, status_code=e.status_code
+                )
+                await response(scope, receive, send)
+                return
+
+        encoding = select_encoding(headers.get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressedResponder(self.app, encoding, self.minimum_size)
+        await responder(scope, receive, send)
+
+    async def _decoded_request(
+        self, scope: Scope, receive: Receive, encoding: str
+    ) -> tuple[Scope, Receive]:
+        """ボディを読み切って展開し、展開後のボディを返す scope / receive を作る"""
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                # ボディ受信前に切断された場合はそのままアプリに任せる
+                break
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        body = decompress_body(encoding, b"".join(chunks))
+
+        headers = MutableHeaders(scope={**scope, "headers": list(scope["headers"])})
+        del headers["content-encoding"]
+        headers["content-length"] = str(len(body))
+        scope = {**scope, "headers": headers.raw}
+
+        sent = False
+
+        async def decoded_receive() -> Message:
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            # 以降は切断の監視のため元の receive に委ねる
+            return await receive()
+
+        return scope, decoded_receive
+
+
+class _CompressedResponder:
+    """レスポンスを圧縮して送信する
+
+    1回で送られるボディは最小サイズ以上の場合のみ圧縮する。
+    複数回に分けて送られるボディ（ストリーミング）はチャンクごとにフラッシュする。
+    """
+
+    def __init__(self, app: ASGIApp, encoding: str, minimum_size: int):
+        self.app = app
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.encoder = None
+        self.initial_message: Message | None = None
+        self.started = False
+        self.passthrough = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_with_compression)
+
+    def _set_encoding_headers(self, headers: MutableHeaders) -> None:
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+
+    async def send_with_compression(self, message: Message) -> None:
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            self.initial_message = message
+            headers = Headers(raw=message["headers"])
+            self.passthrough = "content-encoding" in headers or not _is_compressible(
+                headers.get("content-type", "")
+            )
+            return
+        if message_type != "http.response.body" or self.passthrough:
+            if not self.started:
+                self.started = True
+                await self.send(self.initial_message)
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if not self.started:
+            self.started = True
+            headers = MutableHeaders(raw=self.initial_message["headers"])
+            if not more_body:
+                if len(body) < self.minimum_size:
+                    await self.send(self.initial_message)
+                    await self.send(message)
+                    return
+                encoder = _ENCODERS[self.encoding]()
+                body = encoder.compress(body) + encoder.finish()
+                self._set_encoding_headers(headers)
+                headers["Content-Length"] = str(len(body))
+                await self.send(self.initial_message)
+                await self.send({"type": "http.response.body", "body": body})
+                return
+            # ストリーミング: 全体のサイズが不明なため Content-Length は付けない
+            self.encoder = _ENCODERS[self.encoding]()
+            self._set_encoding_headers(headers)
+            if "content-length" in headers:
+                del headers["Content-Length"]
+            await self.send(self.initial_message)
+
+        if self.encoder is None:
+            # 1回で送られた小さいボディの後続（通常は発生しない）
+            await self.send(message)
+            return
+        chunk = self.encoder.compress(body)
+        chunk += self.encoder.flush() if more_body else self.encoder.finish()
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
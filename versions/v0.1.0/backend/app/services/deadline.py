@@ -0,0 +1,122 @@
+"""リクエスト単位の期限（deadline）
+
+リクエストヘッダー X-Request-Timeout（秒）または環境変数 REQUEST_DEADLINE_SECONDS
+から期限を決め、同じリクエスト内の全てのLLM呼び出し・並列実行・リトライで共有する。
+どちらも指定しない場合は期限なし（従来どおり）とする。
+
+- 期限は contextvars で保持する（asyncio のタスク・to_thread のスレッドにも引き継がれる）
+- SDK呼び出しのタイムアウトには残り時間を設定する
+- 残り時間が少なく完了の見込みがない呼び出しは、実行せずに DeadlineExceededError とする
+"""
+
+import contextlib
+import contextvars
+import os
+import time
+
+from fastapi import Request
+
+DEADLINE_HEADER = "X-Request-Timeout"
+
+# 既定は期限なし（長時間の処理の挙動を変えないため、設定した場合のみ期限を設ける）
+_DEFAULT_DEADLINE_SECONDS = float(os.environ.get("REQUEST_DEADLINE_SECONDS", "0"))
+_MAX_DEADLINE_SECONDS = float(os.environ.get("REQUEST_DEADLINE_MAX_SECONDS", "3600"))
+# 残り時間がこれ未満であれば新たなLLM呼び出しを開始しない
+_MIN_CALL_SECONDS = float(os.environ.get("REQUEST_DEADLINE_MIN_CALL_SECONDS", "2"))
+
+_deadline: contextvars.ContextVar[float | None] = contextvars.ContextVar(
+    "request_deadline", default=None
+)
+
+
+class DeadlineExceededError(RuntimeError):
+    """リクエストの期限までに処理を完了できない場合のエラー"""
+
+    def __init__(self, message: str = "リクエストの制限時間を超えたため処理を中断しました"):
+        super().__init__(message)
+
+
+def request_deadline_seconds(http_request: Request) -> float | None:
+    """リクエストの制限時間（秒）を返す（未設定・0以下の場合は None）
+
+    ヘッダーの値は REQUEST_DEADLINE_MAX_SECONDS を上限とする。
+    不正なヘッダー値は無視して環境変数の値を使う。
+    """
+    seconds = _DEFAULT_DEADLINE_SECONDS
+    header = http_request.headers.get(DEADLINE_HEADER)
+    if header:
+        try:
+            seconds = min(float(header), _MAX_DEADLINE_SECONDS)
+        except ValueError:
+            pass
+    return seconds if seconds > 0 else None
+
+
+@contextlib.contextmanager
+def deadline_scope(seconds: float | None):
+    """現在時刻から seconds 秒後を期限とするスコープ（None の場合は期限なし）
+
+    外側に期限がある場合は、より早い方を期限とする。
+    """
+    deadline = _deadline.get()
+    if seconds is not None:
+        candidate = time.monotonic() + seconds
+        deadline = candidate if deadline is None else min(deadline, candidate)
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def clear_deadline() -> None:
+    """現在のコンテキストの期限を解除する
+
+    複数のリクエストで共有する処理を実行するコピーしたコンテキストで呼ぶ。
+    """
+    _deadline.set(None)
+
+
+def remaining_seconds() -> float | None:
+    """期限までの残り時間（秒）を返す（期限なしの場合は None）"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def check_deadline() -> None:
+    """新たな呼び出しを開始できる残り時間があるかを確認する
+
+    Raises:
+        DeadlineExceededError: 残り時間が REQUEST_DEADLINE_MIN_CALL_SECONDS 未満の場合
+    """
+    remaining = remaining_seconds()
+    if remaining is not None and remaining < _MIN_CALL_SECONDS:
+        raise DeadlineExceededError()
+
+
+def call_timeout(default: float | None = None) -> float | None:
+    """1回の呼び出しに設定するタイムアウト（秒）を返す
+
+    期限がある場合は残り時間（default より短ければ残り時間）、
+    期限がない場合は default を返す。
+
+    Raises:
+        DeadlineExceededError: 残り時間が呼び出しを開始できないほど少ない場合
+    """
+    check_deadline()
+    remaining = remaining_seconds()
+    if remaining is None:
+        return default
+    return remaining if default is None else min(default, remaining)
+
+
+def timeout_kwargs() -> dict:
+    """SDKの呼び出し引数に追加するタイムアウト指定（期限なしの場合は空）
+
+    Raises:
+        DeadlineExceededError: 残り時間が呼び出しを開始できないほど少ない場合
+    """
+    timeout = call_timeout()
+    return {} if timeout is None else {"timeout": timeout}
@@ -0,0 +1,168 @@
+"""グループレビュー用のコンテキストパッキング
+
+構造マッチングで得たグループを、トークン予算の範囲で1回のLLM呼び出しにまとめる。
+
+- 複数グループで共有するパーツ（断片）は1呼び出し内で1度だけ送信する
+- 小さなグループは First-Fit Decreasing でまとめ、呼び出し回数を減らす
+- 出力はグループごとのマーカー（<!-- group:ID -->）で区切り、呼び出し後に分解する
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+
+
+# グループごとの見出し・指示などの固定オーバーヘッド（トークン）
+GROUP_OVERHEAD_TOKENS = 50
+
+_GROUP_MARKER_RE = re.compile(r"^[ \t]*<!--\s*group:\s*(.+?)\s*-->[ \t]*$", re.MULTILINE)
+
+
+def group_marker(group_id: str) -> str:
+    """グループ出力の区切りマーカーを返す"""
+    return f"<!-- group:{group_id} -->"
+
+
+@dataclass
+class Fragment:
+    """レビューコンテキストの断片（設計書セクションまたはコードシンボル1つ分）"""
+
+    key: tuple[str, str, str]  # (kind, filename, id)
+    title: str
+    content: str
+    tokens: int
+
+
+@dataclass
+class GroupContext:
+    """1グループ分のコンテキスト（断片キーの並び）"""
+
+    group_id: str
+    group_name: str
+    fragment_keys: list[tuple[str, str, str]] = field(default_factory=list)
+
+
+@dataclass
+class PackedBatch:
+    """1回のLLM呼び出しにまとめたグループ群"""
+
+    groups: list[GroupContext] = field(default_factory=list)
+    fragment_keys: set[tuple[str, str, str]] = field(default_factory=set)
+    tokens: int = 0
+
+
+def _added_tokens(
+    batch: PackedBatch, group: GroupContext, fragments: dict[tuple, Fragment]
+) -> int:
+    """バッチにグループを追加した場合の増分トークン数（共有断片は数えない）"""
+    new_keys = set(group.fragment_keys) - batch.fragment_keys
+    return GROUP_OVERHEAD_TOKENS + sum(fragments[k].tokens for k in new_keys)
+
+
+def pack_groups(
+    groups: list[GroupContext],
+    fragments: dict[tuple, Fragment],
+    token_budget: int,
+    max_groups_per_batch: int,
+) -> list[PackedBatch]:
+    """グループをトークン予算内のバッチに詰める（First-Fit Decreasing）
+
+    単独で予算を超えるグループは、それだけで1バッチとする。
+
+    Args:
+        groups: パッキング対象のグループ
+        fragments: 断片キー → 断片
+        token_budget: 1バッチの入力トークン上限
+        max_groups_per_batch: 1バッチに含める最大グループ数
+
+    Returns:
+        バッチのリスト
+    """
+    standalone = {
+        g.group_id: GROUP_OVERHEAD_TOKENS
+        + sum(fragments[k].tokens for k in set(g.fragment_keys))
+        for g in groups
+    }
+    ordered = sorted(groups, key=lambda g: standalone[g.group_id], reverse=True)
+
+    batches: list[PackedBatch] = []
+    for group in ordered:
+        target = None
+        for batch in batches:
+            if len(batch.groups) >= max_groups_per_batch:
+                continue
+            if batch.tokens + _added_tokens(batch, group, fragments) <= token_budget:
+                target = batch
+                break
+        if target is None:
+            target = PackedBatch()
+            batches.append(target)
+        target.tokens += _added_tokens(target, group, fragments)
+        target.groups.append(group)
+        target.fragment_keys.update(group.fragment_keys)
+
+    return batches
+
+
+def build_batch_message(batch: PackedBatch, fragments: dict[tuple, Fragment]) -> str:
+    """バッチ用のユーザーメッセージを組み立てる
+
+    共有断片を「参照パーツ」として1度だけ列挙し、各グループはパーツ番号で参照する。
+    """
+    # グループの出現順で断片に番号を振る
+    numbering: dict[tuple, str] = {}
+    for group in batch.groups:
+        for key in group.fragment_keys:
+            if key not in numbering:
+                numbering[key] = f"P{len(numbering) + 1}"
+
+    doc_parts: list[str] = []
+    code_parts: list[str] = []
+    for key, label in numbering.items():
+        fragment = fragments[key]
+        block = f"### [{label}] {fragment.title}\n\n{fragment.content}\n"
+        (doc_parts if key[0] == "document" else code_parts).append(block)
+
+    lines = ["## 参照パーツ\n", "### 設計書パーツ\n"]
+    lines.extend(doc_parts or ["（なし）\n"])
+    lines.append("\n### コードパーツ\n")
+    lines.extend(code_parts or ["（なし）\n"])
+
+    lines.append("\n## レビュー対象グループ\n")
+    for group in batch.groups:
+        doc_refs = [numbering[k] for k in group.fragment_keys if k[0] == "document"]
+        code_refs = [numbering[k] for k in group.fragment_keys if k[0] == "code"]
+        lines.extend([
+            f"### {group.group_name}",
+            f"- グループID: {group.group_id}",
+            f"- 出力マーカー: {group_marker(group.group_id)}",
+            f"- 設計書パーツ: {', '.join(doc_refs) or '（なし）'}",
+            f"- コードパーツ: {', '.join(code_refs) or '（なし）'}\n",
+        ])
+
+    return "\n".join(lines)
+
+
+def split_batch_output(text: str, group_ids: list[str]) -> dict[str, str]:
+    """LLM出力をグループごとのマーカーで分解する
+
+    単一グループのバッチでマーカーが無い場合は、出力全体をそのグループの結果とする。
+    マーカーが見つからないグループは結果に含めない（呼び出し側で再実行する）。
+
+    Returns:
+        グループID → レポート
+    """
+    matches = [m for m in _GROUP_MARKER_RE.finditer(text) if m.group(1) in group_ids]
+    if not matches:
+        if len(group_ids) == 1 and text.strip():
+            return {group_ids[0]: text.strip()}
+        return {}
+
+    results: dict[str, str] = {}
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        report = text[match.end():end].strip()
+        if report and match.group(1) not in results:
+            results[match.group(1)] = report
+    return results
@@ -0,0 +1,251 @@
+"""差分からの影響分析
+
+unified diff の変更箇所を、保存済みのマッピング（code2map の MAP.json と
+構造マッチングのグループ）に照らして、影響を受けるシンボル・グループ・
+設計書セクションを求める。LLMは呼び出さない。
+
+- 変更行は差分の旧側（マッピング作成時のコード）の行番号で扱う
+  - 削除・変更された行はその行、追加のみの箇所は直前の行と直後の行とする
+- シンボルの行範囲（original_start_line / original_end_line）はファイルごとに
+  区間インデックスにまとめ、変更範囲と重なるシンボルを二分探索で求める
+- 新規ファイル・マッピングのないファイルは unmapped_files、
+  どのシンボルにも含まれない変更は unmapped_ranges として返す
+"""
+
+import bisect
+import posixpath
+import re
+from dataclasses import dataclass, field
+
+_HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+_DEV_NULL = "/dev/null"
+
+
+@dataclass
+class FileChange:
+    """1ファイル分の変更"""
+
+    old_path: str | None  # 新規ファイルの場合は None
+    new_path: str | None  # 削除されたファイルの場合は None
+    old_lines: list[int] = field(default_factory=list)  # 変更のあった旧側の行番号（昇順・重複なし）
+
+    @property
+    def path(self) -> str:
+        return self.old_path or self.new_path or ""
+
+    @property
+    def is_new(self) -> bool:
+        return self.old_path is None
+
+    @property
+    def is_deleted(self) -> bool:
+        return self.new_path is None
+
+
+def _strip_prefix(path: str) -> str | None:
+    """diff のパス（a/... / b/... / /dev/null）を正規化する"""
+    path = path.split("\t", 1)[0].strip()
+    if path == _DEV_NULL:
+        return None
+    if path.startswith(("a/", "b/")):
+        path = path[2:]
+    return path
+
+
+def parse_unified_diff(diff: str) -> list[FileChange]:
+    """unified diff（git diff 形式を含む）をファイルごとの変更行に変換する"""
+    changes: list[FileChange] = []
+    current: FileChange | None = None
+    lines: set[int] = set()
+    old_line = 0
+    old_remaining = new_remaining = 0
+    after_removal = False
+
+    def finish() -> None:
+        if current is not None:
+            current.old_lines = sorted(lines)
+            changes.append(current)
+
+    for line in diff.splitlines():
+        if old_remaining > 0 or new_remaining > 0:
+            # ハンクの本文
+            if line.startswith("-"):
+                lines.add(old_line)
+                old_line += 1
+                old_remaining -= 1
+                after_removal = True
+                continue
+            if line.startswith("+"):
+                # 置き換えは削除行で記録済み。追加のみの箇所は前後の行に影響するものとする
+                if not after_removal:
+                    if old_line > 1:
+                        lines.add(old_line - 1)
+                    lines.add(old_line)
+                new_remaining -= 1
+                continue
+            if line.startswith("\\"):
+                continue  # "\ No newline at end of file"
+            old_line += 1
+            old_remaining -= 1
+            new_remaining -= 1
+            after_removal = False
+            continue
+
+        if line.startswith("--- "):
+            finish()
+            current = FileChange(old_path=_strip_prefix(line[4:]), new_path=None)
+            lines = set()
+        elif line.startswith("+++ ") and current is not None:
+            current.new_path = _strip_prefix(line[4:])
+        elif current is not None:
+            match = _HUNK_HEADER.match(line)
+            if match:
+                after_removal = False
+                old_line = int(match.group(1))
+                old_remaining = int(match.group(2)) if match.group(2) is not None else 1
+                new_remaining = int(match.group(4)) if match.group(4) is not None else 1
+                if old_remaining == 0:
+                    # 旧側が空のハンク（"-N,0"）は N 行目の直後への追加
+                    old_line += 1
+    finish()
+    return changes
+
+
+def _line_ranges(lines: list[int]) -> list[tuple[int, int]]:
+    """昇順の行番号を連続する範囲にまとめる"""
+    ranges: list[tuple[int, int]] = []
+    for line in lines:
+        if ranges and line == ranges[-1][1] + 1:
+            ranges[-1] = (ranges[-1][0], line)
+        else:
+            ranges.append((line, line))
+    return ranges
+
+
+class IntervalIndex:
+    """区間（開始行・終了行）と値の組を保持し、範囲と重なる値を返す
+
+    開始行でソートした配列と終了行の累積最大値を持ち、
+    開始行が範囲の終わり以下の区間を二分探索で絞り込んでから後方に走査する。
+    """
+
+    def __init__(self, intervals: list[tuple[int, int, object]]):
+        items = sorted(intervals, key=lambda item: (item[0], item[1]))
+        self._starts = [start for start, _, _ in items]
+        self._ends = [end for _, end, _ in items]
+        self._values = [value for _, _, value in items]
+        self._max_ends: list[int] = []
+        running = 0
+        for end in self._ends:
+            running = max(running, end)
+            self._max_ends.append(running)
+
+    def overlapping(self, start: int, end: int) -> list:
+        """[start, end] と重なる区間の値を開始行の順に返す"""
+        found = []
+        i = bisect.bisect_right(self._starts, end) - 1
+        while i >= 0 and self._max_ends[i] >= start:
+            if self._ends[i] >= start:
+                found.append(self._values[i])
+            i -= 1
+        found.reverse()
+        return found
+
+
+@dataclass
+class MappedSymbol:
+    """MAP.json のシンボル"""
+
+    id: str
+    filename: str
+    symbol: str
+    type: str
+    start_line: int
+    end_line: int
+
+
+@dataclass
+class ImpactResult:
+    """影響分析の結果"""
+
+    symbols: list[tuple[MappedSymbol, int]] = field(default_factory=list)  # (シンボル, 変更行数)
+    unmapped_files: list[str] = field(default_factory=list)
+    unmapped_ranges: list[tuple[str, int, int]] = field(default_factory=list)  # (ファイル名, 開始行, 終了行)
+
+
+def symbols_from_map(filename: str, map_json: dict | list) -> list[MappedSymbol]:
+    """code2map の MAP.json（リスト / {"symbols": [...]}）からシンボルを取り出す"""
+    items = map_json.get("symbols", []) if isinstance(map_json, dict) else map_json
+    symbols = []
+    for item in items:
+        start = item.get("original_start_line") or item.get("startLine")
+        end = item.get("original_end_line") or item.get("endLine")
+        if not item.get("id") or not start or not end:
+            continue
+        symbols.append(MappedSymbol(
+            id=item["id"],
+            filename=filename,
+            symbol=item.get("symbol") or item.get("name") or "",
+            type=item.get("type") or item.get("symbolType") or "",
+            start_line=int(start),
+            end_line=int(end),
+        ))
+    return symbols
+
+
+def _match_filename(path: str, filenames: list[str]) -> str | None:
+    """diff のパスに対応するマッピングのファイル名を返す
+
+    完全一致、パスの末尾一致、ファイル名（basename）一致の順に探す。
+    """
+    if path in filenames:
+        return path
+    suffix_matches = [f for f in filenames if path.endswith("/" + f.lstrip("/"))]
+    if suffix_matches:
+        return max(suffix_matches, key=len)
+    basename = posixpath.basename(path)
+    basename_matches = [f for f in filenames if posixpath.basename(f) == basename]
+    return basename_matches[0] if len(basename_matches) == 1 else None
+
+
+def analyze_impact(changes: list[FileChange], symbols_by_file: dict[str, list[MappedSymbol]]) -> ImpactResult:
+    """変更箇所に重なるシンボルを求める"""
+    indexes = {
+        filename: IntervalIndex([(s.start_line, s.end_line, s) for s in symbols])
+        for filename, symbols in symbols_by_file.items()
+    }
+    filenames = list(indexes)
+    result = ImpactResult()
+    # シンボルIDはファイルごとに振られるため、(ファイル名, ID) で区別する
+    changed_lines: dict[tuple[str, str], int] = {}
+    seen: dict[tuple[str, str], MappedSymbol] = {}
+
+    for change in changes:
+        filename = None if change.is_new else _match_filename(change.path, filenames)
+        if filename is None:
+            result.unmapped_files.append(change.new_path or change.path)
+            continue
+        index = indexes[filename]
+        if change.is_deleted:
+            # 削除されたファイルは全シンボルが影響を受ける
+            for symbol in symbols_by_file[filename]:
+                key = (filename, symbol.id)
+                seen.setdefault(key, symbol)
+                changed_lines[key] = symbol.end_line - symbol.start_line + 1
+            continue
+        for start, end in _line_ranges(change.old_lines):
+            hits = index.overlapping(start, end)
+            if not hits:
+                result.unmapped_ranges.append((filename, start, end))
+                continue
+            for symbol in hits:
+                key = (filename, symbol.id)
+                seen.setdefault(key, symbol)
+                overlap = min(end, symbol.end_line) - max(start, symbol.start_line) + 1
+                changed_lines[key] = changed_lines.get(key, 0) + overlap
+
+    result.symbols = [
+        (seen[key], changed_lines[key])
+        for key in sorted(seen, key=lambda k: (k[0], seen[k].start_line, k[1]))
+    ]
+    return result
@@ -0,0 +1,61 @@
+"""JSONのエンコード・デコード
+
+orjson（extra: speedups）がインストールされていれば使用し、なければ標準の json を使う。
+
+- リクエストボディのJSON解析: FastJSONRoute（各ルーターの route_class）
+- 手動でのシリアライズ（NDJSONのレコードなど）: dumps()
+
+レスポンスモデルを指定したエンドポイントは FastAPI が Pydantic で直接JSONに
+シリアライズするため、レスポンスクラスは変更しない。
+"""
+
+import json
+from collections.abc import Callable, Coroutine
+from typing import Any
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+try:
+    import orjson
+except ImportError:  # extra "speedups" 未インストール時は標準の json を使う
+    orjson = None
+
+
+def dumps(obj: Any) -> bytes:
+    """オブジェクトをUTF-8のJSONバイト列に変換する（非ASCII文字はエスケープしない）"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+def loads(data: bytes | str) -> Any:
+    """JSONを解析する
+
+    Raises:
+        json.JSONDecodeError: 不正なJSONの場合（orjson のエラーも同じ型のサブクラス）
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONRequest(Request):
+    """ボディのJSON解析に loads() を使うリクエスト"""
+
+    async def json(self) -> Any:
+        if not hasattr(self, "_json"):
+            self._json = loads(await self.body())
+        return self._json
+
+
+class FastJSONRoute(APIRoute):
+    """FastJSONRequest でエンドポイントを呼び出すルート"""
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            return await handler(FastJSONRequest(request.scope, request.receive))
+
+        return route_handler
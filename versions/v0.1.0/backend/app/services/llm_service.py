@@ -4,11 +4,19 @@
 抽象インターフェースとプロバイダー選択ロジックを提供する。
 """
 
+import asyncio
+import hashlib
 import os
+import time
 from abc import ABC, abstractmethod
 from typing import TYPE_CHECKING
 
 from app.models.schemas import ReviewMeta, ReviewResponse
+from app.services.cancellation import current_cancellation_scope
+from app.services.deadline import check_deadline
+from app.services.metrics import get_metrics
+from app.services.model_router import RouteDecision, get_model_router
+from app.services.single_flight import SingleFlight
 from app.services.prompt_builder import (
     build_review_info_markdown,
     build_review_meta,
@@ -108,6 +116,39 @@ class LLMProvider(ABC):
         """
         pass
 
+    # モデル振り分けの段階（fast / default / long。振り分けていない場合は None）
+    _route_tier = None
+
+    # 共有中の呼び出し数（single-flight で他リクエストと共有している間は閉じない）
+    _pin_count = 0
+    _close_pending = False
+
+    def close(self) -> None:
+        """SDKクライアントを閉じる
+
+        実行中のHTTPリクエストも打ち切られるため、クライアント切断時の
+        キャンセル処理から呼び出される。閉じた後のプロバイダーは使用しない。
+        他のリクエストと共有中の呼び出しがある場合は、共有が終わるまで遅延する。
+        """
+        if self._pin_count > 0:
+            self._close_pending = True
+            return
+        client = getattr(self, "_client", None)
+        close = getattr(client, "close", None)
+        if callable(close):
+            close()
+
+    def pin(self) -> None:
+        """共有中の呼び出しを開始する（close() を遅延させる）"""
+        self._pin_count += 1
+
+    def unpin(self) -> None:
+        """共有中の呼び出しを終了し、遅延していた close() を実行する"""
+        self._pin_count -= 1
+        if self._pin_count == 0 and self._close_pending:
+            self._close_pending = False
+            self.close()
+
     def _build_prompts(self, request: "ReviewRequest") -> tuple[str, str]:
         """プロンプトを構築する（共通処理）
 
@@ -198,6 +239,18 @@ class LLMProvider(ABC):
         return ReviewResponse(success=False, error=error_message)
 
 
+def credential_fingerprint(llm_config: "LLMConfig") -> str:
+    """認証情報の指紋を返す（single-flight のキーに使用し、認証情報そのものは保持しない）"""
+    material = "|".join([
+        llm_config.provider,
+        llm_config.apiKey or "",
+        llm_config.accessKeyId or "",
+        llm_config.secretAccessKey or "",
+        llm_config.region or "",
+    ])
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()[:16]
+
+
 def get_system_llm_config() -> "LLMConfig":
     """環境変数からシステムLLM用のLLMConfigを生成する
 
@@ -218,11 +271,48 @@ def get_system_llm_config() -> "LLMConfig":
     )
 
 
-def get_llm_provider(llm_config: "LLMConfig | None") -> LLMProvider:
+def route_llm_config(
+    llm_config: "LLMConfig | None",
+    route: str | None = None,
+    prompt_tokens: int | None = None,
+) -> tuple["LLMConfig", RouteDecision | None]:
+    """処理名と推定入力トークン数に応じてモデルを振り分けた LLMConfig を返す
+
+    システムLLM（llm_config が None）は常に、ユーザー指定のLLM設定は
+    modelRouting が有効な場合のみ振り分ける。
+
+    Returns:
+        tuple: (振り分け後の LLMConfig, 振り分け結果。振り分けない場合は None)
+    """
+    if llm_config is None:
+        llm_config = get_system_llm_config()
+    elif not llm_config.modelRouting:
+        return llm_config, None
+    if route is None:
+        return llm_config, None
+
+    decision = get_model_router().decide(
+        llm_config.provider, llm_config.model, route, prompt_tokens
+    )
+    get_metrics().increment(
+        "llm_route_decisions_total", route=route, tier=decision.tier, reason=decision.reason
+    )
+    if decision.model != llm_config.model:
+        llm_config = llm_config.model_copy(update={"model": decision.model})
+    return llm_config, decision
+
+
+def get_llm_provider(
+    llm_config: "LLMConfig | None",
+    route: str | None = None,
+    prompt_tokens: int | None = None,
+) -> LLMProvider:
     """LLMConfigに基づいて適切なプロバイダーを返す
 
     Args:
         llm_config: LLM設定。Noneの場合はシステムLLMを使用。
+        route: 処理名。指定した場合はモデルの振り分け対象とする（route_llm_config参照）
+        prompt_tokens: 推定入力トークン数（モデルの振り分けに使用）
 
     Returns:
         LLMProvider: プロバイダーインスタンス
@@ -235,15 +325,119 @@ def get_llm_provider(llm_config: "LLMConfig | None") -> LLMProvider:
     from app.services.bedrock_service import BedrockProvider
     from app.services.openai_service import OpenAIProvider
 
-    # llm_configがNoneの場合はシステムLLM設定を使用
-    if llm_config is None:
-        llm_config = get_system_llm_config()
+    # llm_configがNoneの場合はシステムLLM設定を使用（処理に応じてモデルを振り分ける）
+    llm_config, decision = route_llm_config(llm_config, route, prompt_tokens)
+
+    def create_provider() -> LLMProvider:
+        if llm_config.provider == "anthropic":
+            provider = AnthropicProvider(llm_config)
+        elif llm_config.provider == "openai":
+            provider = OpenAIProvider(llm_config)
+        elif llm_config.provider == "bedrock":
+            provider = BedrockProvider(llm_config)
+        else:
+            raise ValueError(f"Unknown provider: {llm_config.provider}")
+
+        if decision is not None:
+            provider._route_tier = decision.tier
+        return provider
+
+    scope = current_cancellation_scope()
+    if scope is None:
+        return create_provider()
+    # リクエスト内では同じ設定（振り分け後のモデル）・段階のプロバイダーを使い回し、
+    # SDKクライアントの接続を再利用する。クライアント切断時に実行中の呼び出しを
+    # 打ち切れるよう、生成したプロバイダーはスコープに登録される
+    key = (llm_config.model_dump_json(), decision.tier if decision is not None else None)
+    return scope.get_or_create(key, create_provider)
+
+
+async def _execute_llm_call(func, args: tuple, operation: str):
+    """同期のLLM呼び出しをスレッドで実行し、回数・所要時間をメトリクスに記録する
+
+    振り分けたプロバイダーの呼び出しは、段階（tier）ごとの所要時間・エラー数も記録する。
+    """
+    metrics = get_metrics()
+    tier = getattr(getattr(func, "__self__", None), "_route_tier", None)
+    metrics.increment("llm_calls_total", operation=operation)
+    started = time.monotonic()
+    try:
+        return await asyncio.to_thread(func, *args)
+    except Exception:
+        metrics.increment("llm_call_errors_total", operation=operation)
+        if tier is not None:
+            metrics.increment("llm_routed_call_errors_total", operation=operation, tier=tier)
+        raise
+    finally:
+        elapsed = time.monotonic() - started
+        metrics.observe("llm_call_seconds", elapsed, operation=operation)
+        if tier is not None:
+            metrics.observe(
+                "llm_routed_call_seconds", elapsed, operation=operation, tier=tier
+            )
+
+
+async def run_llm_call(func, *args):
+    """同期のLLM呼び出しをスレッドで実行する
+
+    呼び出し回数・所要時間をメトリクスに記録し、リクエストのCancellationScope
+    がある場合は実行中の呼び出しとして追跡する（切断時のキャンセル数の集計用）。
+
+    Args:
+        func: プロバイダーのメソッド（send_message / organize_markdown など）
+        *args: func に渡す引数
+    """
+    check_deadline()
+    scope = current_cancellation_scope()
+    if scope is None:
+        return await _execute_llm_call(func, args, "unknown")
+    with scope.track_call():
+        return await _execute_llm_call(func, args, scope.operation)
+
+
+# 同一内容の send_message を同時実行しないための集約（プロセス共通）
+_single_flight = SingleFlight()
+
+
+def _coalescing_key(provider: LLMProvider, system_prompt: str, user_message: str) -> str:
+    """send_message の呼び出し内容を識別するハッシュを返す"""
+    digest = hashlib.sha256()
+    for part in (
+        str(provider.provider_name),
+        str(provider.model_id),
+        str(getattr(provider, "_max_tokens", "")),
+        str(getattr(provider, "_credential_fingerprint", "")),
+        system_prompt,
+        user_message,
+    ):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+async def send_message_async(
+    provider: LLMProvider, system_prompt: str, user_message: str
+) -> tuple[str, int, int]:
+    """provider.send_message() を非同期に実行する
+
+    同じ内容の呼び出しが実行中であれば合流し、結果（または例外）を共有する。
+    合流した待機者のキャンセルは他の待機者に影響しない。
+
+    Raises:
+        DeadlineExceededError: リクエストの残り時間が少なく、呼び出しを開始できない場合
+    """
+    # リクエストの期限までに完了の見込みがない呼び出しは開始しない
+    check_deadline()
+    scope = current_cancellation_scope()
+    operation = scope.operation if scope is not None else "unknown"
+    key = _coalescing_key(provider, system_prompt, user_message)
+
+    def factory():
+        return _execute_llm_call(
+            provider.send_message, (system_prompt, user_message), operation
+        )
 
-    if llm_config.provider == "anthropic":
-        return AnthropicProvider(llm_config)
-    elif llm_config.provider == "openai":
-        return OpenAIProvider(llm_config)
-    elif llm_config.provider == "bedrock":
-        return BedrockProvider(llm_config)
-    else:
-        raise ValueError(f"Unknown provider: {llm_config.provider}")
+    if scope is None:
+        return await _single_flight.do(key, factory, pin=provider)
+    with scope.track_call():
+        return await _single_flight.do(key, factory, pin=provider)
@@ -0,0 +1,408 @@
+"""構造マッチングのローカル照合（厳密 / ID重視ポリシー用）
+
+LLMを呼び出す前に、設計書セクションとコードシンボルを決定的に対応付ける。
+
+- 要件ID照合: セクションのタイトル・概要・本文に記載された項番（REQ-001 等）が、
+  シンボルの docstring / Javadoc / 役割（role）に記載されていれば対応付ける
+- 名称照合: セクションに記載された識別子（UserService, create_user 等）と
+  シンボル名を camelCase / snake_case の違いを無視して比較する
+  （全角英数字は NFKC 正規化、日本語の直後の識別子も抽出する）
+
+対応付けられなかった残り（residue）のみをLLMに渡す。
+MD1 / CD1 等のツールが付与した連番は照合に使用しない。
+"""
+
+from __future__ import annotations
+
+import bisect
+import difflib
+import re
+import unicodedata
+from dataclasses import dataclass, field
+
+
+# 要件ID: 英大文字で始まる接頭辞 + 区切り（任意）+ 数字（階層可）
+_REQUIREMENT_ID_RE = re.compile(
+    r"(?<![A-Za-z0-9])([A-Z][A-Z0-9]{0,9}?)([-_]?)(\d{1,6}(?:[.\-_]\d{1,4})*)(?![A-Za-z0-9])"
+)
+# ツールの連番・行番号・見出しレベル・一般的な規格名などは要件IDとみなさない
+_ID_PREFIX_STOPLIST = {
+    "MD", "CD", "H", "L", "V", "P", "UTF", "ISO", "JIS", "SHA", "MD5", "AES",
+    "HTTP", "TLS", "SSL", "INT", "UINT", "X", "Y", "Z", "ES", "PEP", "JDK", "JSR",
+}
+# 識別子の候補（日本語に隣接していても抽出できるよう単語境界は使わない）
+_IDENTIFIER_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+_CAMEL_BOUNDARY_RE = re.compile(r"(?<=[a-z0-9])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])")
+# 照合の根拠としては一般的すぎるシンボル名
+_NAME_STOPLIST = {
+    "main", "init", "run", "get", "set", "test", "execute", "process", "handle",
+    "tostring", "equals", "hashcode", "setup", "teardown", "call", "apply",
+    "new", "create", "update", "delete", "build", "start", "stop", "close",
+}
+_MIN_NAME_LENGTH = 4
+# ファジー一致の閾値（difflib の類似度）と、適用する最小の長さ
+FUZZY_THRESHOLD = 0.9
+_FUZZY_MIN_LENGTH = 8
+
+_INDEX_ID_LINE_RE = re.compile(r"^\s*(?:#{1,6}|[-*])\s*\[([A-Za-z]+\d+)\]")
+_INDEX_ANNOTATION_RE = re.compile(r"^\s*[-*]\s*(summary|keywords|role|note):\s*(.+)$")
+
+
+@dataclass
+class DocEntry:
+    """照合対象の設計書セクション"""
+
+    id: str
+    title: str
+    path: str
+    start_line: int = 0
+    end_line: int = 0
+    text: str = ""  # 照合に使うテキスト（タイトル・パス・概要・本文）
+
+
+@dataclass
+class CodeEntry:
+    """照合対象のコードシンボル"""
+
+    id: str
+    filename: str
+    name: str
+    parent: str | None = None
+    start_line: int = 0
+    end_line: int = 0
+    text: str = ""  # 照合に使うテキスト（役割・docstring / Javadoc）
+
+    @property
+    def key(self) -> tuple[str, str]:
+        return (self.filename, self.id)
+
+
+@dataclass
+class LocalGroup:
+    """ローカル照合で得たグループ"""
+
+    name: str
+    doc_ids: list[str] = field(default_factory=list)
+    code_keys: list[tuple[str, str]] = field(default_factory=list)
+    reason: str = ""
+
+
+@dataclass
+class LocalMatchResult:
+    """ローカル照合の結果"""
+
+    groups: list[LocalGroup]
+    residual_doc_ids: list[str]
+    residual_code_keys: list[tuple[str, str]]
+
+
+# ---------------------------------------------------------------------------
+# 正規化・抽出
+# ---------------------------------------------------------------------------
+
+
+def normalize_identifier(name: str) -> str:
+    """識別子を camelCase / snake_case に依存しない形に正規化する
+
+    例: UserService / user_service / USER_SERVICE / userService → userservice
+    """
+    name = unicodedata.normalize("NFKC", name)
+    words = []
+    for chunk in re.split(r"[_\-\s.]+", name):
+        words.extend(w for w in _CAMEL_BOUNDARY_RE.split(chunk) if w)
+    return "".join(words).lower()
+
+
+def extract_requirement_ids(text: str) -> set[str]:
+    """テキストから要件IDを抽出し、正規化して返す
+
+    区切り・先頭ゼロの違いを吸収する（REQ-001 / REQ_1 / REQ001 → REQ-1）。
+    区切りなしの場合は接頭辞2文字以上・数字3桁以上のみを対象とする（UTF8 などの誤検出防止）。
+    """
+    text = unicodedata.normalize("NFKC", text)
+    ids = set()
+    for prefix, separator, number in _REQUIREMENT_ID_RE.findall(text):
+        if prefix in _ID_PREFIX_STOPLIST or (len(prefix) < 2 and not separator):
+            continue
+        if not separator and len(re.split(r"[.\-_]", number)[0]) < 3:
+            continue
+        components = [str(int(n)) for n in re.split(r"[.\-_]", number)]
+        ids.add(f"{prefix}-{'.'.join(components)}")
+    return ids
+
+
+def identifier_tokens(text: str) -> set[str]:
+    """テキスト中の識別子候補を正規化して返す（日本語に隣接していても抽出）"""
+    text = unicodedata.normalize("NFKC", text)
+    tokens = set()
+    for token in _IDENTIFIER_RE.findall(text):
+        for part in token.split("."):
+            normalized = normalize_identifier(part)
+            if len(normalized) >= _MIN_NAME_LENGTH:
+                tokens.add(normalized)
+    return tokens
+
+
+def _own_text(content: str, start_line: int, first_child_start: int | None) -> str:
+    """パーツ本文のうち、子要素（入れ子のセクション・シンボル）より前の部分を返す"""
+    if first_child_start is None or start_line <= 0:
+        return content
+    own_lines = first_child_start - start_line
+    if own_lines <= 0:
+        return ""
+    return "".join(content.splitlines(keepends=True)[:own_lines])
+
+
+def _first_child_starts(entries) -> list[int | None]:
+    """各要素について、入れ子の子要素のうち最初の開始行を返す（entries と同じ順）
+
+    開始行でソートして二分探索するため、全要素の総当たりにはならない。
+    """
+    order = sorted(range(len(entries)), key=lambda i: entries[i].start_line)
+    starts = [entries[i].start_line for i in order]
+    result: list[int | None] = []
+    for entry in entries:
+        first = None
+        pos = bisect.bisect_right(starts, entry.start_line)
+        while pos < len(order) and starts[pos] <= entry.end_line:
+            if entries[order[pos]].end_line <= entry.end_line:
+                first = starts[pos]
+                break
+            pos += 1
+        result.append(first)
+    return result
+
+
+# ---------------------------------------------------------------------------
+# INDEX.md / MAP.json の読み取り
+# ---------------------------------------------------------------------------
+
+
+def parse_index_annotations(index_md: str) -> dict[str, str]:
+    """INDEX.md から ID ごとの補足情報（summary / keywords / role / note）を抽出する"""
+    annotations: dict[str, list[str]] = {}
+    current = None
+    for line in index_md.splitlines():
+        id_match = _INDEX_ID_LINE_RE.match(line)
+        if id_match:
+            current = id_match.group(1)
+            continue
+        if not line.strip() or line.lstrip().startswith("#"):
+            current = None
+            continue
+        annotation = _INDEX_ANNOTATION_RE.match(line)
+        if current and annotation:
+            annotations.setdefault(current, []).append(annotation.group(2))
+    return {k: "\n".join(v) for k, v in annotations.items()}
+
+
+def filter_index(index_md: str, keep_ids: set[str]) -> str:
+    """INDEX.md から keep_ids 以外のIDの行（補足行を含む）を取り除く"""
+    kept = []
+    skipping = False
+    for line in index_md.splitlines(keepends=True):
+        id_match = _INDEX_ID_LINE_RE.match(line)
+        if id_match:
+            skipping = id_match.group(1) not in keep_ids
+        elif not line.strip() or line.lstrip().startswith("#"):
+            skipping = False
+        if not skipping:
+            kept.append(line)
+    return "".join(kept)
+
+
+def doc_entries_from_map(
+    map_json: dict,
+    annotations: dict[str, str] | None = None,
+    contents: dict[str, str] | None = None,
+) -> list[DocEntry]:
+    """設計書の MAP.json（md2map 形式 / フロントエンド形式）を DocEntry に変換する"""
+    annotations = annotations or {}
+    contents = contents or {}
+    entries = []
+    for item in map_json.get("sections", []):
+        if not item.get("id"):
+            continue
+        title = item.get("title") or item.get("section") or ""
+        entries.append(DocEntry(
+            id=item["id"],
+            title=title,
+            path=item.get("path") or title,
+            start_line=item.get("startLine") or item.get("original_start_line") or 0,
+            end_line=item.get("endLine") or item.get("original_end_line") or 0,
+        ))
+
+    for entry, first_child_start in zip(entries, _first_child_starts(entries)):
+        body = contents.get(entry.id, "")
+        if body:
+            body = _own_text(body, entry.start_line, first_child_start)
+        entry.text = "\n".join(
+            [entry.title, entry.path, annotations.get(entry.id, ""), body]
+        )
+    return entries
+
+
+def code_entries_from_map(
+    filename: str,
+    map_json: dict,
+    annotations: dict[str, str] | None = None,
+    contents: dict[str, str] | None = None,
+) -> list[CodeEntry]:
+    """コードの MAP.json（code2map 形式 / フロントエンド形式）を CodeEntry に変換する"""
+    annotations = annotations or {}
+    contents = contents or {}
+    entries = []
+    for item in map_json.get("symbols", []):
+        if not item.get("id"):
+            continue
+        name = item.get("name") or item.get("symbol") or ""
+        parent = item.get("parentSymbol")
+        if "." in name and not parent:
+            parent, name = name.rsplit(".", 1)
+        entries.append(CodeEntry(
+            id=item["id"],
+            filename=filename,
+            name=name,
+            parent=parent,
+            start_line=item.get("startLine") or item.get("original_start_line") or 0,
+            end_line=item.get("endLine") or item.get("original_end_line") or 0,
+        ))
+
+    for entry, first_child_start in zip(entries, _first_child_starts(entries)):
+        body = contents.get(entry.id, "")
+        if body:
+            # クラスは自身の docstring / Javadoc のみ（メソッド部分を除く）
+            body = _own_text(body, entry.start_line, first_child_start)
+        entry.text = "\n".join([annotations.get(entry.id, ""), body])
+    return entries
+
+
+# ---------------------------------------------------------------------------
+# 照合
+# ---------------------------------------------------------------------------
+
+
+class _NameIndex:
+    """シンボル名の照合用の索引
+
+    シンボル名の正規化はシンボルごとに一度だけ行い、完全一致は辞書引きで判定する。
+    ファジー一致は長さの差が3以内のシンボル名に限り、difflib の上界
+    （real_quick_ratio / quick_ratio）で候補を絞ってから ratio を計算する。
+    結果は識別子ごとに記憶し、複数のセクションに現れる識別子は再計算しない。
+    """
+
+    def __init__(self, code_entries: list[CodeEntry]):
+        self._exact: dict[str, list[int]] = {}
+        self._non_ascii: list[tuple[str, int]] = []
+        for i, code in enumerate(code_entries):
+            if not code.name.isascii():
+                # 日本語などの非ASCIIシンボル名はそのまま包含判定する
+                normalized = unicodedata.normalize("NFKC", code.name)
+                if len(normalized) >= 2:
+                    self._non_ascii.append((normalized, i))
+                continue
+            normalized = normalize_identifier(code.name)
+            if len(normalized) < _MIN_NAME_LENGTH or normalized in _NAME_STOPLIST:
+                continue
+            self._exact.setdefault(normalized, []).append(i)
+
+        self._fuzzy_by_length: dict[int, list[tuple[str, difflib.SequenceMatcher]]] = {}
+        for name in self._exact:
+            if len(name) >= _FUZZY_MIN_LENGTH:
+                self._fuzzy_by_length.setdefault(len(name), []).append(
+                    (name, difflib.SequenceMatcher(None, "", name))
+                )
+        self._fuzzy_cache: dict[str, list[str]] = {}
+
+    def _fuzzy_names(self, token: str) -> list[str]:
+        names = self._fuzzy_cache.get(token)
+        if names is not None:
+            return names
+        names = []
+        for length in range(len(token) - 3, len(token) + 4):
+            for name, matcher in self._fuzzy_by_length.get(length, ()):
+                matcher.set_seq1(token)
+                if (
+                    matcher.real_quick_ratio() >= FUZZY_THRESHOLD
+                    and matcher.quick_ratio() >= FUZZY_THRESHOLD
+                    and matcher.ratio() >= FUZZY_THRESHOLD
+                ):
+                    names.append(name)
+        self._fuzzy_cache[token] = names
+        return names
+
+    def match(self, doc_text: str) -> list[int]:
+        """セクションのテキストに名称が記載されているシンボルの位置を昇順で返す"""
+        hits: set[int] = set()
+        for token in identifier_tokens(doc_text):
+            hits.update(self._exact.get(token, ()))
+            if self._fuzzy_by_length and len(token) >= _FUZZY_MIN_LENGTH - 3:
+                for name in self._fuzzy_names(token):
+                    hits.update(self._exact[name])
+        if self._non_ascii:
+            normalized_text = unicodedata.normalize("NFKC", doc_text)
+            hits.update(i for name, i in self._non_ascii if name in normalized_text)
+        return sorted(hits)
+
+
+def match_locally(
+    doc_entries: list[DocEntry], code_entries: list[CodeEntry]
+) -> LocalMatchResult:
+    """設計書セクションとコードシンボルを決定的に対応付ける
+
+    1. 要件IDが両側に記載されていれば、IDごとに1グループとする
+    2. 残りの対応はシンボル名の一致で、設計書セクションごとに1グループとする
+
+    Returns:
+        ローカル照合のグループと、対応付けられなかったセクション・シンボル
+    """
+    groups: list[LocalGroup] = []
+    matched_pairs: set[tuple[str, tuple[str, str]]] = set()
+
+    # 1. 要件ID照合
+    doc_ids_by_req: dict[str, list[str]] = {}
+    for doc in doc_entries:
+        for req_id in extract_requirement_ids(doc.text):
+            doc_ids_by_req.setdefault(req_id, []).append(doc.id)
+    code_keys_by_req: dict[str, list[tuple[str, str]]] = {}
+    for code in code_entries:
+        for req_id in extract_requirement_ids(code.text):
+            code_keys_by_req.setdefault(req_id, []).append(code.key)
+
+    for req_id in sorted(set(doc_ids_by_req) & set(code_keys_by_req)):
+        group = LocalGroup(
+            name=req_id,
+            doc_ids=doc_ids_by_req[req_id],
+            code_keys=code_keys_by_req[req_id],
+            reason=f"要件ID {req_id} が設計書とコードの両方に記載されている",
+        )
+        groups.append(group)
+        matched_pairs.update(
+            (doc_id, key) for doc_id in group.doc_ids for key in group.code_keys
+        )
+
+    # 2. 名称照合
+    name_index = _NameIndex(code_entries)
+    for doc in doc_entries:
+        matched = [
+            code_entries[i] for i in name_index.match(doc.text)
+            if (doc.id, code_entries[i].key) not in matched_pairs
+        ]
+        if not matched:
+            continue
+        names = ", ".join(dict.fromkeys(code.name for code in matched))
+        groups.append(LocalGroup(
+            name=doc.title,
+            doc_ids=[doc.id],
+            code_keys=[code.key for code in matched],
+            reason=f"セクションにシンボル名（{names}）が記載されている",
+        ))
+        matched_pairs.update((doc.id, code.key) for code in matched)
+
+    matched_docs = {doc_id for doc_id, _ in matched_pairs}
+    matched_codes = {key for _, key in matched_pairs}
+    return LocalMatchResult(
+        groups=groups,
+        residual_doc_ids=[d.id for d in doc_entries if d.id not in matched_docs],
+        residual_code_keys=[c.key for c in code_entries if c.key not in matched_codes],
+    )
@@ -0,0 +1,71 @@
+"""プロセス内メトリクス
+
+LLM呼び出し回数・所要時間・キャンセル数などをプロセス内で集計する。
+外部の監視基盤には依存せず、/api/metrics でスナップショットを返す。
+"""
+
+import threading
+
+
+def _metric_key(name: str, labels: dict[str, str]) -> str:
+    """メトリクス名とラベルからキーを組み立てる（例: name{a=1,b=2}）"""
+    if not labels:
+        return name
+    label_text = ",".join(f"{k}={labels[k]}" for k in sorted(labels))
+    return f"{name}{{{label_text}}}"
+
+
+class MetricsRegistry:
+    """カウンターと観測値（件数・合計・最大）を保持するレジストリ
+
+    スレッドセーフ。to_thread で実行される処理からも記録できる。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: dict[str, float] = {}
+        self._observations: dict[str, dict[str, float]] = {}
+
+    def increment(self, name: str, value: float = 1, **labels: str) -> None:
+        """カウンターを加算する"""
+        key = _metric_key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        """観測値を記録する（所要時間・トークン数など）"""
+        key = _metric_key(name, labels)
+        with self._lock:
+            stats = self._observations.setdefault(
+                key, {"count": 0, "sum": 0.0, "max": 0.0}
+            )
+            stats["count"] += 1
+            stats["sum"] += value
+            stats["max"] = max(stats["max"], value)
+
+    def get_counter(self, name: str, **labels: str) -> float:
+        """カウンターの現在値を返す（未記録の場合は0）"""
+        with self._lock:
+            return self._counters.get(_metric_key(name, labels), 0)
+
+    def snapshot(self) -> dict:
+        """全メトリクスのスナップショットを返す"""
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "observations": {k: dict(v) for k, v in self._observations.items()},
+            }
+
+    def reset(self) -> None:
+        """全メトリクスを破棄する（テスト用）"""
+        with self._lock:
+            self._counters.clear()
+            self._observations.clear()
+
+
+_registry = MetricsRegistry()
+
+
+def get_metrics() -> MetricsRegistry:
+    """プロセス共通のMetricsRegistryを返す"""
+    return _registry
@@ -0,0 +1,133 @@
+"""プロンプトの規模と処理内容によるモデルの振り分け
+
+小さく単純な呼び出しは高速・低コストのモデルへ、長いコンテキストの呼び出しは
+長文対応のモデルへ振り分ける。振り分け先のモデルはプロバイダーごとに環境変数で指定し、
+未指定の段階（tier）は設定されたモデルをそのまま使用する。
+
+環境変数:
+- LLM_FAST_MODEL: 高速モデル（例: "anthropic=claude-haiku-4-5,openai=gpt-4o-mini"。
+  プロバイダー名を省略した値は全プロバイダー共通）
+- LLM_LONG_CONTEXT_MODEL: 長文対応モデル（形式は LLM_FAST_MODEL と同じ）
+- LLM_FAST_MAX_PROMPT_TOKENS: 高速モデルを使う推定入力トークン数の上限
+- LLM_LONG_CONTEXT_MIN_PROMPT_TOKENS: 長文対応モデルを使う推定入力トークン数の下限
+- LLM_ROUTE_OVERRIDES: 処理ごとの段階の固定（例: "structure_matching=long,review_group=fast"）
+"""
+
+import os
+from dataclasses import dataclass
+
+TIER_FAST = "fast"
+TIER_DEFAULT = "default"
+TIER_LONG = "long"
+_TIERS = (TIER_FAST, TIER_DEFAULT, TIER_LONG)
+
+_ANY_PROVIDER = "*"
+
+
+def _parse_mapping(value: str) -> dict[str, str]:
+    """"key=value,key=value" 形式を辞書に変換する（key 省略時は "*"）"""
+    mapping = {}
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        key, sep, val = item.partition("=")
+        if sep:
+            mapping[key.strip()] = val.strip()
+        else:
+            mapping[_ANY_PROVIDER] = key
+    return mapping
+
+
+@dataclass
+class RouteDecision:
+    """振り分け結果"""
+
+    route: str
+    tier: str
+    model: str
+    reason: str
+
+
+class ModelRouter:
+    """推定入力トークン数と処理名からモデルを選択する"""
+
+    def __init__(
+        self,
+        fast_models: dict[str, str] | None = None,
+        long_models: dict[str, str] | None = None,
+        fast_max_tokens: int = 4000,
+        long_min_tokens: int = 100000,
+        route_overrides: dict[str, str] | None = None,
+    ):
+        self._models = {
+            TIER_FAST: fast_models or {},
+            TIER_LONG: long_models or {},
+        }
+        self._fast_max_tokens = fast_max_tokens
+        self._long_min_tokens = long_min_tokens
+        self._route_overrides = {
+            route: tier
+            for route, tier in (route_overrides or {}).items()
+            if tier in _TIERS
+        }
+
+    @classmethod
+    def from_env(cls) -> "ModelRouter":
+        return cls(
+            fast_models=_parse_mapping(os.environ.get("LLM_FAST_MODEL", "")),
+            long_models=_parse_mapping(os.environ.get("LLM_LONG_CONTEXT_MODEL", "")),
+            fast_max_tokens=int(os.environ.get("LLM_FAST_MAX_PROMPT_TOKENS", "4000")),
+            long_min_tokens=int(
+                os.environ.get("LLM_LONG_CONTEXT_MIN_PROMPT_TOKENS", "100000")
+            ),
+            route_overrides=_parse_mapping(os.environ.get("LLM_ROUTE_OVERRIDES", "")),
+        )
+
+    def _tier_model(self, tier: str, provider: str) -> str | None:
+        models = self._models.get(tier, {})
+        return models.get(provider) or models.get(_ANY_PROVIDER)
+
+    def decide(
+        self,
+        provider: str,
+        configured_model: str,
+        route: str,
+        prompt_tokens: int | None = None,
+    ) -> RouteDecision:
+        """呼び出しのモデルを決定する
+
+        Args:
+            provider: プロバイダー名
+            configured_model: 設定されたモデル（default 段階で使用）
+            route: 処理名（structure_matching / review_group など）
+            prompt_tokens: 推定入力トークン数（不明な場合は None）
+        """
+        if route in self._route_overrides:
+            tier = self._route_overrides[route]
+            reason = "override"
+        elif prompt_tokens is None:
+            tier, reason = TIER_DEFAULT, "unknown_size"
+        elif prompt_tokens >= self._long_min_tokens:
+            tier, reason = TIER_LONG, "long_prompt"
+        elif prompt_tokens <= self._fast_max_tokens:
+            tier, reason = TIER_FAST, "short_prompt"
+        else:
+            tier, reason = TIER_DEFAULT, "medium_prompt"
+
+        model = self._tier_model(tier, provider) if tier != TIER_DEFAULT else None
+        if model is None:
+            # 段階のモデルが未設定であれば設定されたモデルを使う
+            return RouteDecision(route, TIER_DEFAULT, configured_model, reason)
+        return RouteDecision(route, tier, model, reason)
+
+
+_router: ModelRouter | None = None
+
+
+def get_model_router() -> ModelRouter:
+    """プロセス共通の ModelRouter を返す（環境変数から生成）"""
+    global _router
+    if _router is None:
+        _router = ModelRouter.from_env()
+    return _router
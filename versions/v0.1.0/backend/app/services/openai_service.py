@@ -5,7 +5,8 @@ from typing import TYPE_CHECKING
 from openai import APIError, AuthenticationError, OpenAI
 
 from app.models.schemas import LLMConfig, ReviewResponse
-from app.services.llm_service import LLMProvider
+from app.services.deadline import timeout_kwargs
+from app.services.llm_service import LLMProvider, credential_fingerprint
 
 if TYPE_CHECKING:
     from app.models.schemas import ReviewRequest
@@ -32,6 +33,7 @@ class OpenAIProvider(LLMProvider):
         self._client = OpenAI(api_key=llm_config.apiKey)
         self._model_id = llm_config.model
         self._max_tokens = llm_config.maxTokens
+        self._credential_fingerprint = credential_fingerprint(llm_config)
 
     @property
     def provider_name(self) -> str:
@@ -91,6 +93,8 @@ class OpenAIProvider(LLMProvider):
     def send_message(
         self, system_prompt: str, user_message: str
     ) -> tuple[str, int, int]:
+        # リクエストの期限がある場合は残り時間をタイムアウトとする
+        timeout = timeout_kwargs()
         try:
             response = self._client.chat.completions.create(
                 model=self._model_id,
@@ -99,6 +103,7 @@ class OpenAIProvider(LLMProvider):
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_message},
                 ],
+                **timeout,
             )
             usage = response.usage
             return (
@@ -137,6 +142,7 @@ class OpenAIProvider(LLMProvider):
             markdown, policy
         )
 
+        timeout = timeout_kwargs()
         try:
             response = self._client.chat.completions.create(
                 model=self._model_id,
@@ -145,6 +151,7 @@ class OpenAIProvider(LLMProvider):
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_message},
                 ],
+                **timeout,
             )
             return response.choices[0].message.content or ""
         except Exception as e:
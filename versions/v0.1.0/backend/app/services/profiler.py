@@ -0,0 +1,303 @@
+"""リクエスト単位のプロファイリング
+
+管理者ヘッダー（X-Profile: <PROFILE_ADMIN_TOKEN>）またはパスの許可リスト
+（PROFILE_PATHS）に一致したリクエストについて、処理時間のプロファイルと
+tracemalloc のピークメモリを採取し、PROFILE_DIR に保存する。
+レスポンスヘッダー X-Profile-Id でプロファイルIDを返す。
+
+モード（X-Profile-Mode ヘッダー、省略時は PROFILE_MODE）:
+- cprofile: イベントループのスレッドを cProfile で計測する（<id>.pstats）
+- sampling: 全スレッドのスタックを一定間隔で採取する（<id>.collapsed、flamegraph形式）。
+  to_thread で実行される分割・LLM呼び出しも含まれる
+
+プロファイラーはプロセス全体に作用するため、同時に採取するのは1リクエストのみとし、
+採取中に届いたリクエストは X-Profile-Status: busy を返して通常どおり処理する。
+採取中は同時に処理中の他のリクエストもプロファイルに含まれる。
+"""
+
+import asyncio
+import cProfile
+import hmac
+import json
+import os
+import pstats
+import secrets
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime, timezone
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.services.metrics import get_metrics
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_MODE_HEADER = "X-Profile-Mode"
+PROFILE_ID_HEADER = "X-Profile-Id"
+PROFILE_STATUS_HEADER = "X-Profile-Status"
+
+MODE_CPROFILE = "cprofile"
+MODE_SAMPLING = "sampling"
+_MODES = (MODE_CPROFILE, MODE_SAMPLING)
+
+_ADMIN_TOKEN = os.environ.get("PROFILE_ADMIN_TOKEN", "")
+_PROFILE_PATHS = [
+    p.strip() for p in os.environ.get("PROFILE_PATHS", "").split(",") if p.strip()
+]
+_PROFILE_DIR = os.environ.get(
+    "PROFILE_DIR", os.path.join(tempfile.gettempdir(), "spec-code-ai-mapper-profiles")
+)
+_DEFAULT_MODE = os.environ.get("PROFILE_MODE", MODE_CPROFILE)
+_SAMPLING_INTERVAL_SECONDS = float(os.environ.get("PROFILE_SAMPLING_INTERVAL_SECONDS", "0.005"))
+_MAX_PROFILES = int(os.environ.get("PROFILE_MAX_COUNT", "50"))
+
+# プロファイル取得API自体は採取しない（同じ管理者ヘッダーを使うため）
+_EXCLUDED_PATH_PREFIX = "/api/profiles/"
+
+# サマリーに含める関数の件数
+_TOP_FUNCTIONS = 30
+
+# 同時に採取するのは1リクエストのみ
+_active = threading.Lock()
+
+
+def is_admin_token(token: str | None) -> bool:
+    """管理者トークンと一致するかを返す（トークン未設定の場合は常に False）"""
+    return bool(_ADMIN_TOKEN) and bool(token) and hmac.compare_digest(token, _ADMIN_TOKEN)
+
+
+def should_profile(headers: Headers, path: str) -> bool:
+    """リクエストをプロファイルするかを返す"""
+    if path.startswith(_EXCLUDED_PATH_PREFIX):
+        return False
+    if is_admin_token(headers.get(PROFILE_HEADER)):
+        return True
+    return any(path.startswith(prefix) for prefix in _PROFILE_PATHS)
+
+
+def _new_profile_id() -> str:
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(4)}"
+
+
+def _frame_label(filename: str, lineno: int, name: str) -> str:
+    return f"{name} ({os.path.basename(filename)}:{lineno})"
+
+
+class _SamplingProfiler:
+    """全スレッドのスタックを一定間隔で採取するプロファイラー"""
+
+    def __init__(self, interval: float):
+        self._interval = interval
+        self._stacks: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self._interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(_frame_label(code.co_filename, code.co_firstlineno, code.co_name))
+                    frame = frame.f_back
+                self._stacks[";".join(reversed(stack))] += 1
+
+    @property
+    def samples(self) -> int:
+        return sum(self._stacks.values())
+
+    def write_collapsed(self, path: str) -> None:
+        """flamegraph 形式（"関数;関数;... 件数"）で書き出す"""
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self._stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def top_functions(self, limit: int) -> list[dict]:
+        """スタックの末端（自身で実行中）の関数を採取件数の多い順に返す"""
+        leaves: Counter[str] = Counter()
+        for stack, count in self._stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        return [{"function": name, "samples": count} for name, count in leaves.most_common(limit)]
+
+
+def _cprofile_top_functions(profile: cProfile.Profile, limit: int) -> list[dict]:
+    """累積時間の長い順に関数を返す"""
+    stats = pstats.Stats(profile).stats
+    rows = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    return [
+        {
+            "function": _frame_label(filename, lineno, name),
+            "calls": calls,
+            "totalSeconds": round(total, 6),
+            "cumulativeSeconds": round(cumulative, 6),
+        }
+        for (filename, lineno, name), (_, calls, total, cumulative, _) in rows
+    ]
+
+
+def _prune_profiles(directory: str) -> None:
+    """古いプロファイルを削除し、PROFILE_MAX_COUNT 件以内に保つ"""
+    summaries = sorted(
+        (entry for entry in os.scandir(directory) if entry.name.endswith(".json")),
+        key=lambda entry: entry.stat().st_mtime,
+    )
+    for entry in summaries[: max(0, len(summaries) - _MAX_PROFILES)]:
+        profile_id = entry.name[: -len(".json")]
+        for name in os.listdir(directory):
+            if name.startswith(profile_id + "."):
+                try:
+                    os.remove(os.path.join(directory, name))
+                except OSError:
+                    pass
+
+
+def load_profile_summary(profile_id: str) -> dict | None:
+    """保存したプロファイルのサマリーを返す（存在しない場合は None）"""
+    if not profile_id or os.path.basename(profile_id) != profile_id:
+        return None
+    path = os.path.join(_PROFILE_DIR, f"{profile_id}.json")
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class ProfilingMiddleware:
+    """対象のリクエストをプロファイルするASGIミドルウェア
+
+    ストリーミングレスポンスを含め、レスポンスの送信完了までを計測する。
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        if not should_profile(headers, scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        if not _active.acquire(blocking=False):
+            await self.app(scope, receive, _with_headers(send, {PROFILE_STATUS_HEADER: "busy"}))
+            return
+        try:
+            mode = headers.get(PROFILE_MODE_HEADER, _DEFAULT_MODE).lower()
+            if mode not in _MODES:
+                mode = MODE_CPROFILE
+            await self._profile(scope, receive, send, mode)
+        finally:
+            _active.release()
+
+    async def _profile(self, scope: Scope, receive: Receive, send: Send, mode: str) -> None:
+        profile_id = _new_profile_id()
+        status = {"code": None}
+
+        async def send_with_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                MutableHeaders(scope=message)[PROFILE_ID_HEADER] = profile_id
+            await send(message)
+
+        # tracemalloc が既に有効（PYTHONTRACEMALLOC など）であれば停止しない
+        started_tracemalloc = not tracemalloc.is_tracing()
+        if started_tracemalloc:
+            tracemalloc.start()
+        else:
+            tracemalloc.reset_peak()
+
+        profiler = cProfile.Profile() if mode == MODE_CPROFILE else _SamplingProfiler(
+            _SAMPLING_INTERVAL_SECONDS
+        )
+        started = time.perf_counter()
+        if mode == MODE_CPROFILE:
+            profiler.enable()
+        else:
+            profiler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            if mode == MODE_CPROFILE:
+                profiler.disable()
+            else:
+                profiler.stop()
+            duration = time.perf_counter() - started
+            _, peak = tracemalloc.get_traced_memory()
+            if started_tracemalloc:
+                tracemalloc.stop()
+            # レスポンスの送信後にファイルへ書き出す（イベントループを止めない）
+            await asyncio.to_thread(
+                self._save, profile_id, scope, status["code"], mode, profiler, duration, peak
+            )
+
+    def _save(
+        self,
+        profile_id: str,
+        scope: Scope,
+        status_code: int | None,
+        mode: str,
+        profiler,
+        duration: float,
+        peak_bytes: int,
+    ) -> None:
+        """プロファイル本体とサマリー（<id>.json）を保存する"""
+        summary = {
+            "id": profile_id,
+            "method": scope["method"],
+            "path": scope["path"],
+            "statusCode": status_code,
+            "mode": mode,
+            "durationSeconds": round(duration, 6),
+            "tracemallocPeakBytes": peak_bytes,
+            "createdAt": datetime.now(timezone.utc).isoformat(),
+        }
+        try:
+            os.makedirs(_PROFILE_DIR, exist_ok=True)
+            if mode == MODE_CPROFILE:
+                profile_file = f"{profile_id}.pstats"
+                profiler.dump_stats(os.path.join(_PROFILE_DIR, profile_file))
+                summary["topFunctions"] = _cprofile_top_functions(profiler, _TOP_FUNCTIONS)
+            else:
+                profile_file = f"{profile_id}.collapsed"
+                profiler.write_collapsed(os.path.join(_PROFILE_DIR, profile_file))
+                summary["samples"] = profiler.samples
+                summary["topFunctions"] = profiler.top_functions(_TOP_FUNCTIONS)
+            summary["profileFile"] = profile_file
+            with open(os.path.join(_PROFILE_DIR, f"{profile_id}.json"), "w", encoding="utf-8") as f:
+                json.dump(summary, f, ensure_ascii=False, indent=2)
+            _prune_profiles(_PROFILE_DIR)
+        except OSError:
+            # 保存に失敗してもリクエストの処理には影響させない
+            get_metrics().increment("profiles_failed_total", mode=mode)
+            return
+        get_metrics().increment("profiles_captured_total", mode=mode)
+
+
+def _with_headers(send: Send, extra: dict[str, str]) -> Send:
+    """レスポンス開始時にヘッダーを追加する send を返す"""
+
+    async def wrapped(message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = MutableHeaders(scope=message)
+            for key, value in extra.items():
+                headers[key] = value
+        await send(message)
+
+    return wrapped
@@ -0,0 +1,106 @@
+"""同一LLMリクエストの重複実行の抑止（single-flight）
+
+同じ内容（プロバイダー・モデル・認証情報・プロンプトが同一）のLLM呼び出しが
+同時に実行された場合、1回だけ実行して結果を全ての待機者で共有する。
+
+- 実行中の呼び出しは asyncio.Task として保持し、待機者は shield 経由で待つ
+- 呼び出しは先頭の待機者の期限・CancellationScope を引き継がないコンテキストで実行し、
+  期限は待機者ごとに自身の待機に適用する（期限の長い待機者が先頭の期限で失敗しない）
+- 例外は全ての待機者に伝播する
+- 待機者のキャンセルは他の待機者に影響しない。最後の待機者がキャンセルされた
+  場合のみ、実行中の呼び出し自体をキャンセルする
+- 完了した呼び出しは保持しない（結果のキャッシュではない）
+"""
+
+import asyncio
+import contextvars
+from typing import Awaitable, Callable, TypeVar
+
+from app.services.cancellation import clear_cancellation_scope
+from app.services.deadline import DeadlineExceededError, clear_deadline, remaining_seconds
+from app.services.metrics import get_metrics
+
+T = TypeVar("T")
+
+
+class _Flight:
+    """実行中の呼び出し1件"""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """キーごとに実行中の呼び出しを1つに集約する"""
+
+    def __init__(self, metric_name: str = "llm_calls"):
+        self._flights: dict[str, _Flight] = {}
+        self._metric_name = metric_name
+
+    def _start(self, key: str, factory: Callable[[], Awaitable[T]], pin) -> _Flight:
+        # タスクは生成時点のコンテキストのコピーで実行されるため、期限とスコープを
+        # 解除したコンテキストで生成する
+        context = contextvars.copy_context()
+        context.run(clear_deadline)
+        context.run(clear_cancellation_scope)
+        task = context.run(lambda: asyncio.ensure_future(factory()))
+        flight = _Flight(task)
+        self._flights[key] = flight
+        if pin is not None:
+            pin.pin()
+
+        def on_done(_task: asyncio.Task) -> None:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            if pin is not None:
+                pin.unpin()
+
+        task.add_done_callback(on_done)
+        return flight
+
+    async def do(
+        self, key: str, factory: Callable[[], Awaitable[T]], pin=None
+    ) -> T:
+        """キーに対応する呼び出しを実行する（実行中であれば合流する）
+
+        Args:
+            key: 呼び出し内容のハッシュ
+            factory: 実際の呼び出しを行うコルーチンを返す関数
+            pin: 実行中は pin()、終了時に unpin() するオブジェクト（プロバイダー）。
+                 合流した他の待機者がいる間、先頭の待機者の切断でクライアントが
+                 閉じられないようにする
+
+        Returns:
+            呼び出し結果（合流した場合は共有の結果）
+
+        Raises:
+            DeadlineExceededError: 呼び出しの完了前にこの待機者の期限を過ぎた場合
+        """
+        flight = self._flights.get(key)
+        if flight is not None and flight.task.get_loop() is not asyncio.get_running_loop():
+            flight = None
+        if flight is None:
+            flight = self._start(key, factory, pin)
+        else:
+            get_metrics().increment(f"{self._metric_name}_coalesced_total")
+
+        flight.waiters += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(flight.task), remaining_seconds())
+        except asyncio.TimeoutError:
+            if flight.task.done():
+                # 呼び出し自体のタイムアウトはそのまま伝播する
+                raise
+            raise DeadlineExceededError() from None
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # 最後の待機者が離脱した場合のみ、呼び出し自体を中断する
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+                flight.task.cancel()
+
+    def inflight_count(self) -> int:
+        """実行中の呼び出し数を返す"""
+        return len(self._flights)
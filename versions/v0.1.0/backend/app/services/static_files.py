@@ -0,0 +1,101 @@
+"""フロントエンドの静的ファイル配信
+
+StaticFiles に以下を加える。
+
+- ビルド時に生成した圧縮済みファイル（<ファイル>.br / <ファイル>.gz）があれば、
+  Accept-Encoding に応じてそのまま返す（リクエストごとの圧縮を行わない）
+- ファイル名にハッシュを含むビルド成果物（assets/index-<hash>.js 等）は内容が変わらないため
+  Cache-Control: immutable で長期間キャッシュさせる
+- それ以外（index.html 等）は Cache-Control: no-cache とし、ETag / If-None-Match で再検証させる
+
+ETag と 304 応答は StaticFiles（FileResponse）の仕組みをそのまま使う。
+圧縮済みファイルは元のファイルとサイズが異なるため、エンコーディングごとに別の ETag になる。
+"""
+
+import mimetypes
+import os
+import re
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, PathLike, StaticFiles
+from starlette.types import Scope
+
+from app.services.compression import accepts_encoding, parse_accept_encoding
+
+# 圧縮済みファイルの拡張子（優先順）
+_PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+
+# Vite のビルド成果物（assets/<名前>-<8文字のハッシュ>.<拡張子>）
+_HASHED_ASSET = re.compile(r"-[A-Za-z0-9_-]{8}\.[A-Za-z0-9]+$")
+_ASSETS_DIR = "assets"
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+
+def is_hashed_asset(full_path: str) -> bool:
+    """ファイル名にハッシュを含むビルド成果物かどうかを返す"""
+    parent, name = os.path.split(full_path)
+    return os.path.basename(parent) == _ASSETS_DIR and bool(_HASHED_ASSET.search(name))
+
+
+def _precompressed_variant(full_path: str, accept_encoding: str) -> tuple[str, str, os.stat_result] | None:
+    """受け付け可能な圧縮済みファイルを (エンコーディング, パス, stat) で返す"""
+    accepted = parse_accept_encoding(accept_encoding)
+    for encoding, suffix in _PRECOMPRESSED:
+        if not accepts_encoding(accepted, encoding):
+            continue
+        try:
+            stat_result = os.stat(full_path + suffix)
+        except OSError:
+            continue
+        return encoding, full_path + suffix, stat_result
+    return None
+
+
+def _has_precompressed(full_path: str) -> bool:
+    return any(os.path.isfile(full_path + suffix) for _, suffix in _PRECOMPRESSED)
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """圧縮済みファイルとキャッシュヘッダーに対応した StaticFiles"""
+
+    def file_response(
+        self,
+        full_path: PathLike,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        full_path = os.fspath(full_path)
+        headers = {
+            "Cache-Control": IMMUTABLE_CACHE_CONTROL
+            if is_hashed_asset(full_path)
+            else REVALIDATE_CACHE_CONTROL
+        }
+
+        variant = _precompressed_variant(full_path, request_headers.get("accept-encoding", ""))
+        if variant is not None:
+            encoding, path, variant_stat = variant
+            media_type = mimetypes.guess_type(full_path)[0] or "text/plain"
+            headers.update({"Content-Encoding": encoding, "Vary": "Accept-Encoding"})
+            response = FileResponse(
+                path,
+                status_code=status_code,
+                headers=headers,
+                media_type=media_type,
+                stat_result=variant_stat,
+            )
+        else:
+            if _has_precompressed(full_path):
+                # 圧縮済みファイルを返すクライアントと共有キャッシュで区別させる
+                headers["Vary"] = "Accept-Encoding"
+            response = FileResponse(
+                full_path, status_code=status_code, headers=headers, stat_result=stat_result
+            )
+
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
@@ -0,0 +1,112 @@
+"""構造マッチングの段階的実行（章 → ファイル、セクション → シンボル）のための分割
+
+大きな設計書・コードを1回の呼び出しで照合すると遅く精度も下がるため、
+
+1. 設計書の章（md2map の H1 / H2 相当のセクション）とコードファイルを、
+   タイトル・概要・クラス名のみで対応付ける（粗い照合）
+2. 対応付いた（章, ファイル群）ごとに、セクションとシンボルを照合する（細かい照合）
+
+の2段階に分ける。本モジュールは章の切り出しと、粗い照合用の概要テキストの構築、
+粗い照合の応答の解釈を行う。
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+# 概要テキストに含める配下セクション・シンボルの最大件数
+_OUTLINE_MAX_CHILDREN = 20
+
+
+@dataclass
+class Chapter:
+    """設計書の章（見出しレベルが閾値以下のセクションと、その配下のセクション）"""
+
+    id: str
+    title: str
+    section_ids: list[str] = field(default_factory=list)
+
+
+def split_chapters(map_json: dict, max_level: int = 2) -> list[Chapter]:
+    """設計書の MAP.json を章に分割する
+
+    見出しレベルが max_level 以下のセクション（レベル不明を含む）を章の先頭とし、
+    後続のより深いセクションを直前の章に含める。
+    """
+    chapters: list[Chapter] = []
+    for item in map_json.get("sections", []):
+        section_id = item.get("id")
+        if not section_id:
+            continue
+        level = item.get("level")
+        if not chapters or level is None or level <= max_level:
+            chapters.append(Chapter(
+                id=section_id,
+                title=item.get("title") or item.get("section") or "",
+            ))
+        chapters[-1].section_ids.append(section_id)
+    return chapters
+
+
+def build_chapter_outline(
+    chapters: list[Chapter], map_json: dict, annotations: dict[str, str]
+) -> str:
+    """粗い照合用の章一覧（タイトル・概要・配下セクションのタイトル）を構築する"""
+    titles = {
+        item.get("id"): item.get("title") or item.get("section") or ""
+        for item in map_json.get("sections", [])
+    }
+    lines = []
+    for chapter in chapters:
+        lines.append(f"- [{chapter.id}] {chapter.title}")
+        summary = annotations.get(chapter.id)
+        if summary:
+            lines.append(f"  - 概要: {' / '.join(summary.splitlines())}")
+        children = [titles[i] for i in chapter.section_ids[1:] if titles.get(i)]
+        if children:
+            shown = "、".join(children[:_OUTLINE_MAX_CHILDREN])
+            rest = len(children) - _OUTLINE_MAX_CHILDREN
+            if rest > 0:
+                shown += f" ほか{rest}件"
+            lines.append(f"  - 配下: {shown}")
+    return "\n".join(lines)
+
+
+def build_file_outline(
+    filename: str, map_json: dict, annotations: dict[str, str]
+) -> str:
+    """粗い照合用のファイル概要（トップレベルのシンボル名と役割）を構築する"""
+    lines = [f"- {filename}"]
+    top_level = [
+        item for item in map_json.get("symbols", [])
+        if not item.get("parentSymbol") and "." not in (item.get("symbol") or "")
+    ]
+    for item in top_level[:_OUTLINE_MAX_CHILDREN]:
+        name = item.get("name") or item.get("symbol") or ""
+        role = annotations.get(item.get("id", ""), "").split("\n")[0]
+        lines.append(f"  - {name}: {role}" if role else f"  - {name}")
+    rest = len(top_level) - _OUTLINE_MAX_CHILDREN
+    if rest > 0:
+        lines.append(f"  - ほか{rest}件")
+    return "\n".join(lines)
+
+
+def parse_chapter_files(
+    result: dict, chapters: list[Chapter], filenames: list[str]
+) -> list[tuple[Chapter, list[str]]]:
+    """粗い照合の応答を（章, ファイル名のリスト）の組に変換する
+
+    応答に含まれない章・存在しないファイル名は無視する。組の順序は章の順序に従う。
+    """
+    known_files = set(filenames)
+    files_by_chapter: dict[str, list[str]] = {}
+    for item in result.get("chapters", []):
+        files = files_by_chapter.setdefault(item.get("id", ""), [])
+        for filename in item.get("files", []):
+            if filename in known_files and filename not in files:
+                files.append(filename)
+    return [
+        (chapter, files_by_chapter[chapter.id])
+        for chapter in chapters
+        if files_by_chapter.get(chapter.id)
+    ]
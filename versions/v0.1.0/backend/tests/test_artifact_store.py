@@ -0,0 +1,228 @@
+"""artifact_store.py / artifacts.py の単体テスト
+
+テストケース:
+- UT-ART-001: ArtifactStore.put() / get() - 正常系（ハッシュで取得）
+- UT-ART-002: ArtifactStore.get() - エラー（存在しない・不正なハッシュ）
+- UT-ART-003: ArtifactStore - メモリ層のLRU追い出し
+- UT-ART-004: ArtifactStore - ディスク層から復元（再起動相当）
+- UT-ART-005: ArtifactStore - ディスク層の破損ファイルを破棄
+- UT-ART-006: ArtifactStore - ディスク層の上限による追い出し
+- UT-ART-007: ArtifactStore.put_json() - キー順に依存しないハッシュ
+- UT-ART-008: POST /api/artifacts, /api/artifacts/exists, GET /api/artifacts/{hash}
+- UT-ART-009: structure_matching() - ハッシュ参照の INDEX.md / MAP.json
+- UT-ART-010: review_group() - ハッシュ参照の内容、存在しないハッシュ
+- UT-ART-011: ArtifactStore.put() - ディスクへの書き込みを待たずに返る
+"""
+
+import json
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.artifact_store import (
+    ArtifactNotFoundError,
+    ArtifactStore,
+    compute_hash,
+)
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def store():
+    """ディスク層なしのストアをルーターに差し込む"""
+    memory_store = ArtifactStore()
+    with patch("app.routers.artifacts.get_artifact_store", return_value=memory_store), \
+            patch("app.routers.review.get_artifact_store", return_value=memory_store):
+        yield memory_store
+
+
+class TestArtifactStore:
+    """ArtifactStore のテスト"""
+
+    def test_ut_art_001_put_and_get(self):
+        """UT-ART-001: 正常系（ハッシュで取得）"""
+        store = ArtifactStore()
+        artifact_hash = store.put("# 設計書\n")
+
+        assert artifact_hash == compute_hash("# 設計書\n")
+        assert store.get(artifact_hash) == "# 設計書\n"
+        assert store.exists(artifact_hash)
+        # 同じ内容は同じハッシュ
+        assert store.put("# 設計書\n") == artifact_hash
+
+    def test_ut_art_002_not_found(self):
+        """UT-ART-002: エラー（存在しない・不正なハッシュ）"""
+        store = ArtifactStore()
+
+        with pytest.raises(ArtifactNotFoundError):
+            store.get("0" * 64)
+        with pytest.raises(ArtifactNotFoundError):
+            store.get("../../etc/passwd")
+
+    def test_ut_art_003_memory_lru_eviction(self):
+        """UT-ART-003: メモリ層のLRU追い出し"""
+        store = ArtifactStore(memory_max_bytes=10)
+        first = store.put("aaaaa")
+        second = store.put("bbbbb")
+        store.get(first)  # first を最近使用にする
+        store.put("ccccc")
+
+        assert store.exists(first)
+        assert not store.exists(second)
+
+    def test_ut_art_004_restore_from_disk(self, tmp_path):
+        """UT-ART-004: ディスク層から復元（再起動相当）"""
+        store = ArtifactStore(disk_dir=str(tmp_path))
+        artifact_hash = store.put("def foo(): pass\n")
+        store.flush()
+
+        restarted = ArtifactStore(disk_dir=str(tmp_path))
+        assert restarted.get(artifact_hash) == "def foo(): pass\n"
+
+    def test_ut_art_005_corrupt_disk_file(self, tmp_path):
+        """UT-ART-005: ディスク層の破損ファイルを破棄"""
+        store = ArtifactStore(disk_dir=str(tmp_path))
+        artifact_hash = store.put("original")
+        store.flush()
+        path = tmp_path / artifact_hash[:2] / artifact_hash
+        path.write_text("tampered", encoding="utf-8")
+
+        restarted = ArtifactStore(disk_dir=str(tmp_path))
+        with pytest.raises(ArtifactNotFoundError):
+            restarted.get(artifact_hash)
+        assert not path.exists()
+
+    def test_ut_art_006_disk_eviction(self, tmp_path):
+        """UT-ART-006: ディスク層の上限による追い出し"""
+        store = ArtifactStore(disk_dir=str(tmp_path), disk_max_bytes=10)
+        first = store.put("aaaaa")
+        store.put("bbbbb")
+        store.put("ccccc")
+        store.flush()
+
+        assert not (tmp_path / first[:2] / first).exists()
+        assert len(list(tmp_path.glob("??/*"))) == 2
+
+    def test_ut_art_007_put_json_canonical(self):
+        """UT-ART-007: キー順に依存しないハッシュ"""
+        store = ArtifactStore()
+        first = store.put_json({"a": 1, "b": "日本語"})
+        second = store.put_json({"b": "日本語", "a": 1})
+
+        assert first == second
+        assert store.get_json(first) == {"a": 1, "b": "日本語"}
+
+
+    def test_ut_art_011_put_does_not_wait_for_disk(self, tmp_path):
+        """UT-ART-011: ディスクへの書き込みを待たずに返る"""
+        store = ArtifactStore(disk_dir=str(tmp_path), memory_max_bytes=0)
+        release = threading.Event()
+        original_write = store._write_disk
+
+        def blocked_write(artifact_hash, data):
+            release.wait(timeout=5)
+            original_write(artifact_hash, data)
+
+        with patch.object(store, "_write_disk", side_effect=blocked_write):
+            artifact_hash = store.put("書き込み待ち")
+            # メモリ層に載らない内容も、書き込み待ちの間は取得できる
+            assert store.exists(artifact_hash)
+            assert store.get(artifact_hash) == "書き込み待ち"
+            assert not (tmp_path / artifact_hash[:2] / artifact_hash).exists()
+            release.set()
+            store.flush()
+
+        assert (tmp_path / artifact_hash[:2] / artifact_hash).exists()
+        assert ArtifactStore(disk_dir=str(tmp_path)).get(artifact_hash) == "書き込み待ち"
+
+
+class TestArtifactsAPI:
+    """artifacts.py のテスト"""
+
+    def test_ut_art_008_upload_exists_get(self, store):
+        """UT-ART-008: 登録・存在確認・取得"""
+        response = client.post("/api/artifacts", json={"content": "# 設計書"})
+        data = response.json()
+        assert data["success"] is True
+        assert data["hash"] == compute_hash("# 設計書")
+        assert data["size"] == len("# 設計書".encode("utf-8"))
+
+        missing_hash = "f" * 64
+        response = client.post(
+            "/api/artifacts/exists", json={"hashes": [data["hash"], missing_hash]}
+        )
+        assert response.json()["missing"] == [missing_hash]
+
+        response = client.get(f"/api/artifacts/{data['hash']}")
+        assert response.json()["content"] == "# 設計書"
+
+        response = client.get(f"/api/artifacts/{missing_hash}")
+        assert response.json()["success"] is False
+        assert "見つかりません" in response.json()["error"]
+
+
+class TestReviewWithHashes:
+    """ハッシュ参照によるレビューAPIのテスト"""
+
+    @patch("app.routers.review.get_llm_provider")
+    def test_ut_art_009_structure_matching_with_hashes(self, mock_get_provider, store):
+        """UT-ART-009: ハッシュ参照の INDEX.md / MAP.json"""
+        mock_provider = MagicMock()
+        mock_provider.send_message.return_value = (json.dumps({"groups": []}), 100, 50)
+        mock_provider.model_id = "test-model"
+        mock_provider.provider_name = "test"
+        mock_get_provider.return_value = mock_provider
+
+        doc_map = [{"id": "MD1", "title": "概要"}]
+        code_map = [{"id": "CD1", "symbol": "UserService"}]
+        request = {
+            "document": {
+                "filename": "design.md",
+                "indexHash": store.put("# 設計書 INDEX"),
+                "mapHash": store.put_json(doc_map),
+            },
+            "codeFiles": [{
+                "filename": "user.py",
+                "indexHash": store.put("# コード INDEX"),
+                "mapHash": store.put_json(code_map),
+            }],
+        }
+
+        response = client.post("/api/review/structure-matching", json=request)
+
+        assert response.json()["success"] is True
+        user_message = mock_provider.send_message.call_args[0][1]
+        assert "# 設計書 INDEX" in user_message
+        assert "# コード INDEX" in user_message
+        assert '"sections"' in user_message
+        assert '"symbols"' in user_message
+        assert "UserService" in user_message
+
+    @patch("app.routers.review.get_llm_provider")
+    def test_ut_art_010_review_group_with_hashes(self, mock_get_provider, store):
+        """UT-ART-010: ハッシュ参照の内容、存在しないハッシュ"""
+        mock_provider = MagicMock()
+        mock_provider.send_message.return_value = ("## レビュー結果", 100, 50)
+        mock_get_provider.return_value = mock_provider
+
+        request = {
+            "groupId": "group1",
+            "groupName": "ユーザー管理",
+            "documentContentHashes": [store.put("## 概要"), store.put("## 詳細")],
+            "codeContentHashes": [store.put("def foo(): pass")],
+        }
+        response = client.post("/api/review/group", json=request)
+
+        assert response.json()["success"] is True
+        user_message = mock_provider.send_message.call_args[0][1]
+        assert "## 概要\n\n## 詳細" in user_message
+        assert "def foo(): pass" in user_message
+
+        request["codeContentHashes"] = ["e" * 64]
+        response = client.post("/api/review/group", json=request)
+        assert response.json()["success"] is False
+        assert "見つかりません" in response.json()["error"]
@@ -0,0 +1,167 @@
+"""cancellation.py / metrics.py の単体テスト
+
+テストケース:
+- UT-CAN-001: run_until_disconnected() - 正常系（切断なし）
+- UT-CAN-002: run_until_disconnected() - 切断時のキャンセル・close・メトリクス記録
+- UT-CAN-003: run_llm_call() - 呼び出し回数・所要時間の記録
+- UT-CAN-004: LLMProvider.close() - SDKクライアントを閉じる
+- UT-CAN-005: _CancellableMd2mapProvider - close() 後の呼び出しは失敗する
+- UT-CAN-006: GET /api/metrics - スナップショット取得
+"""
+
+import asyncio
+import threading
+from unittest.mock import MagicMock
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.cancellation import (
+    CLIENT_CLOSED_REQUEST,
+    current_cancellation_scope,
+    run_until_disconnected,
+)
+from app.services.llm_service import run_llm_call
+from app.services.metrics import get_metrics
+
+client = TestClient(app)
+
+
+class _FakeRequest:
+    """is_disconnected() の結果を切り替えられるリクエスト"""
+
+    def __init__(self):
+        self.disconnected = False
+
+    async def is_disconnected(self) -> bool:
+        return self.disconnected
+
+
+class _BlockingProvider:
+    """close() されるまで send_message がブロックするプロバイダー"""
+
+    def __init__(self):
+        self.closed = threading.Event()
+        self.started = threading.Event()
+
+    def send_message(self, system_prompt, user_message):
+        self.started.set()
+        self.closed.wait(timeout=5)
+        raise RuntimeError("connection closed")
+
+    def close(self):
+        self.closed.set()
+
+
+class TestRunUntilDisconnected:
+    """run_until_disconnected() のテスト"""
+
+    def setup_method(self):
+        get_metrics().reset()
+
+    def test_ut_can_001_completes(self):
+        """UT-CAN-001: 正常系（切断なし）"""
+
+        async def work():
+            assert current_cancellation_scope().operation == "test_op"
+            return "done"
+
+        result = asyncio.run(run_until_disconnected(_FakeRequest(), "test_op", work()))
+
+        assert result == "done"
+        assert get_metrics().get_counter("client_disconnects_total", operation="test_op") == 0
+
+    def test_ut_can_002_cancel_on_disconnect(self):
+        """UT-CAN-002: 切断時のキャンセル・close・メトリクス記録"""
+        provider = _BlockingProvider()
+        request = _FakeRequest()
+
+        async def work():
+            current_cancellation_scope().register(provider)
+            # 並列に2件のLLM呼び出しを実行中に切断される
+            await asyncio.gather(
+                run_llm_call(provider.send_message, "s", "u"),
+                run_llm_call(provider.send_message, "s", "u"),
+            )
+            return "not reached"
+
+        async def scenario():
+            runner = asyncio.ensure_future(
+                run_until_disconnected(request, "test_op", work())
+            )
+            await asyncio.to_thread(provider.started.wait, 5)
+            request.disconnected = True
+            return await runner
+
+        response = asyncio.run(scenario())
+
+        assert response.status_code == CLIENT_CLOSED_REQUEST
+        assert provider.closed.is_set()
+        metrics = get_metrics()
+        assert metrics.get_counter("client_disconnects_total", operation="test_op") == 1
+        assert metrics.get_counter("llm_calls_cancelled_total", operation="test_op") == 2
+
+    def test_ut_can_003_run_llm_call_metrics(self):
+        """UT-CAN-003: 呼び出し回数・所要時間の記録"""
+
+        async def work():
+            return await run_llm_call(lambda a, b: (a + b, 1, 1), "x", "y")
+
+        result = asyncio.run(run_until_disconnected(_FakeRequest(), "test_op", work()))
+
+        assert result == ("xy", 1, 1)
+        snapshot = get_metrics().snapshot()
+        assert snapshot["counters"]["llm_calls_total{operation=test_op}"] == 1
+        assert snapshot["observations"]["llm_call_seconds{operation=test_op}"]["count"] == 1
+
+
+class TestProviderClose:
+    """プロバイダーの close() のテスト"""
+
+    def test_ut_can_004_llm_provider_close(self):
+        """UT-CAN-004: SDKクライアントを閉じる"""
+        from app.models.schemas import LLMConfig
+        from app.services.anthropic_service import AnthropicProvider
+
+        provider = AnthropicProvider(
+            LLMConfig(provider="anthropic", model="test-model", apiKey="test-key")
+        )
+        provider._client = MagicMock()
+
+        provider.close()
+
+        provider._client.close.assert_called_once()
+
+    def test_ut_can_005_md2map_provider_close(self):
+        """UT-CAN-005: close() 後の呼び出しは失敗する"""
+        from app.routers.split import _CancellableMd2mapProvider
+
+        inner = MagicMock()
+        inner.send_message.return_value = "[]"
+        provider = _CancellableMd2mapProvider(inner)
+
+        assert provider.send_message("s", "u") == "[]"
+        provider.close()
+
+        inner._client.close.assert_called_once()
+        try:
+            provider.send_message("s", "u")
+            raise AssertionError("RuntimeError が発生すること")
+        except RuntimeError:
+            pass
+        assert inner.send_message.call_count == 1
+
+
+class TestMetricsAPI:
+    """GET /api/metrics のテスト"""
+
+    def test_ut_can_006_metrics_snapshot(self):
+        """UT-CAN-006: スナップショット取得"""
+        get_metrics().reset()
+        get_metrics().increment("llm_calls_cancelled_total", 3, operation="review_groups")
+
+        response = client.get("/api/metrics")
+
+        assert response.status_code == 200
+        counters = response.json()["counters"]
+        assert counters["llm_calls_cancelled_total{operation=review_groups}"] == 3
@@ -0,0 +1,170 @@
+"""compression.py / json_codec.py の単体テスト
+
+テストケース:
+- UT-CMP-001: select_encoding() - Accept-Encoding の解釈
+- UT-CMP-002: decompress_body() - 展開・未対応・不正データ・上限超過
+- UT-CMP-003: CompressionMiddleware - gzip のリクエストボディを展開する
+- UT-CMP-004: CompressionMiddleware - 展開できないリクエストはエラーを返す
+- UT-CMP-005: CompressionMiddleware - 最小サイズ以上のレスポンスのみ圧縮する
+- UT-CMP-006: CompressionMiddleware - NDJSONストリーミングをチャンクごとに圧縮する
+- UT-CMP-007: CompressionMiddleware - zstd のリクエスト展開とレスポンス圧縮
+- UT-CMP-008: FastJSONRoute - 不正なJSONはバリデーションエラーとする
+"""
+
+import gzip
+import json
+import zlib
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import compression
+from app.services.compression import RequestDecodeError, decompress_body, select_encoding
+from app.services.json_codec import dumps, loads
+
+client = TestClient(app)
+
+
+class TestEncodingHelpers:
+    """エンコーディングの選択・展開のテスト"""
+
+    def test_ut_cmp_001_select_encoding(self, monkeypatch):
+        """UT-CMP-001: Accept-Encoding の解釈"""
+        monkeypatch.setattr(compression, "zstandard", None)
+
+        assert select_encoding("gzip, deflate") == "gzip"
+        assert select_encoding("zstd, gzip;q=0.5") == "gzip"
+        assert select_encoding("gzip;q=0, deflate") is None
+        assert select_encoding("*") == "gzip"
+        assert select_encoding("") is None
+
+    def test_ut_cmp_002_decompress_body(self):
+        """UT-CMP-002: 展開・未対応・不正データ・上限超過"""
+        data = "設計書".encode("utf-8") * 100
+
+        assert decompress_body("gzip", gzip.compress(data)) == data
+
+        with pytest.raises(RequestDecodeError) as unsupported:
+            decompress_body("br", data)
+        with pytest.raises(RequestDecodeError) as corrupt:
+            decompress_body("gzip", b"not gzip")
+        with pytest.raises(RequestDecodeError) as too_large:
+            decompress_body("gzip", gzip.compress(data), max_bytes=len(data) - 1)
+
+        assert unsupported.value.status_code == 415
+        assert corrupt.value.status_code == 400
+        assert too_large.value.status_code == 413
+
+    def test_json_codec_round_trip(self):
+        """dumps() は非ASCII文字をエスケープしない"""
+        encoded = dumps({"title": "概要", "n": 1})
+
+        assert "概要".encode("utf-8") in encoded
+        assert loads(encoded) == {"title": "概要", "n": 1}
+
+
+class TestCompressionMiddleware:
+    """CompressionMiddleware のテスト"""
+
+    def test_ut_cmp_003_gzip_request(self):
+        """UT-CMP-003: gzip のリクエストボディを展開する"""
+        content = "# 設計書\n" * 1000
+        body = gzip.compress(json.dumps({"content": content}).encode("utf-8"))
+
+        response = client.post(
+            "/api/artifacts",
+            content=body,
+            headers={"Content-Type": "application/json", "Content-Encoding": "gzip"},
+        )
+
+        data = response.json()
+        assert data["success"] is True
+        assert data["size"] == len(content.encode("utf-8"))
+
+    def test_ut_cmp_004_invalid_request(self):
+        """UT-CMP-004: 展開できないリクエストはエラーを返す"""
+        corrupt = client.post(
+            "/api/artifacts",
+            content=b"not gzip",
+            headers={"Content-Type": "application/json", "Content-Encoding": "gzip"},
+        )
+        unsupported = client.post(
+            "/api/artifacts",
+            content=b"{}",
+            headers={"Content-Type": "application/json", "Content-Encoding": "compress"},
+        )
+
+        assert corrupt.status_code == 400
+        assert corrupt.json()["success"] is False
+        assert unsupported.status_code == 415
+
+    def test_ut_cmp_005_response_compression(self):
+        """UT-CMP-005: 最小サイズ以上のレスポンスのみ圧縮する"""
+        large_hash = client.post("/api/artifacts", json={"content": "a" * 10000}).json()["hash"]
+        small_hash = client.post("/api/artifacts", json={"content": "a"}).json()["hash"]
+
+        large = client.get(f"/api/artifacts/{large_hash}", headers={"Accept-Encoding": "gzip"})
+        small = client.get(f"/api/artifacts/{small_hash}", headers={"Accept-Encoding": "gzip"})
+        plain = client.get(f"/api/artifacts/{large_hash}", headers={"Accept-Encoding": "identity"})
+
+        assert large.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in large.headers["vary"]
+        assert int(large.headers["content-length"]) < 10000
+        assert large.json()["content"] == "a" * 10000
+        assert "content-encoding" not in small.headers
+        assert "content-encoding" not in plain.headers
+
+    def test_ut_cmp_006_streaming_compression(self):
+        """UT-CMP-006: NDJSONストリーミングをチャンクごとに圧縮する"""
+        with client.stream(
+            "POST",
+            "/api/split/markdown",
+            json={
+                "content": "# 概要\n\n概要です。\n\n## 詳細\n\n詳細です。\n",
+                "filename": "test.md",
+                "splitMode": "heading",
+                "stream": True,
+            },
+            headers={"Accept-Encoding": "gzip"},
+        ) as response:
+            raw = b"".join(response.iter_raw())
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        lines = zlib.decompress(raw, 16 + zlib.MAX_WBITS).decode("utf-8").splitlines()
+        assert [json.loads(line)["type"] for line in lines] == [
+            "part", "part", "index", "map", "done"
+        ]
+
+    def test_ut_cmp_007_zstd(self):
+        """UT-CMP-007: zstd のリクエスト展開とレスポンス圧縮"""
+        zstandard = pytest.importorskip("zstandard")
+        content = "コード" * 5000
+        body = zstandard.ZstdCompressor().compress(json.dumps({"content": content}).encode("utf-8"))
+
+        upload = client.post(
+            "/api/artifacts",
+            content=body,
+            headers={"Content-Type": "application/json", "Content-Encoding": "zstd"},
+        )
+        artifact_hash = upload.json()["hash"]
+        with client.stream(
+            "GET", f"/api/artifacts/{artifact_hash}", headers={"Accept-Encoding": "zstd, gzip"}
+        ) as response:
+            raw = b"".join(response.iter_raw())
+
+        assert response.headers["content-encoding"] == "zstd"
+        decoded = zstandard.ZstdDecompressor().decompressobj().decompress(raw)
+        assert json.loads(decoded)["content"] == content
+
+    def test_ut_cmp_008_invalid_json(self):
+        """UT-CMP-008: 不正なJSONはバリデーションエラーとする"""
+        response = client.post(
+            "/api/artifacts",
+            content=b"{invalid",
+            headers={"Content-Type": "application/json"},
+        )
+
+        assert response.status_code == 422
+        assert response.json()["detail"][0]["type"] == "json_invalid"
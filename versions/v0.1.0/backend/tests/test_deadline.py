@@ -0,0 +1,197 @@
+"""deadline.py / リクエスト期限の伝播の単体テスト
+
+テストケース:
+- UT-DLN-001: request_deadline_seconds() - ヘッダー・環境変数・上限
+- UT-DLN-002: deadline_scope() - 入れ子の期限と残り時間・期限切れの判定
+- UT-DLN-003: timeout_kwargs() - SDK呼び出しのタイムアウト指定
+- UT-DLN-004: run_until_disconnected() - 期限切れで処理を中断して504を返す
+- UT-DLN-005: send_message_async() - 残り時間が少なければ呼び出さない
+- UT-DLN-006: AnthropicProvider.send_message() - 残り時間をタイムアウトに設定
+- UT-DLN-007: structure_matching() - X-Request-Timeout が短すぎる場合はエラー
+- UT-DLN-008: organize_markdown_api() - 期限切れはタイムアウトとして返す
+"""
+
+import asyncio
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models.schemas import LLMConfig
+from app.services import deadline
+from app.services.anthropic_service import AnthropicProvider
+from app.services.cancellation import GATEWAY_TIMEOUT, run_until_disconnected
+from app.services.deadline import (
+    DeadlineExceededError,
+    check_deadline,
+    deadline_scope,
+    remaining_seconds,
+    request_deadline_seconds,
+    timeout_kwargs,
+)
+from app.services.llm_service import send_message_async
+from app.services.metrics import get_metrics
+
+client = TestClient(app)
+
+
+class _FakeRequest:
+    """ヘッダーを指定でき、切断しないリクエスト"""
+
+    def __init__(self, headers: dict | None = None):
+        self.headers = headers or {}
+
+    async def is_disconnected(self) -> bool:
+        return False
+
+
+class TestDeadline:
+    """期限の設定・参照のテスト"""
+
+    def test_ut_dln_001_request_deadline_seconds(self, monkeypatch):
+        """UT-DLN-001: ヘッダー・環境変数・上限"""
+        monkeypatch.setattr(deadline, "_DEFAULT_DEADLINE_SECONDS", 300.0)
+        monkeypatch.setattr(deadline, "_MAX_DEADLINE_SECONDS", 600.0)
+
+        assert request_deadline_seconds(_FakeRequest()) == 300.0
+        assert request_deadline_seconds(_FakeRequest({"X-Request-Timeout": "30"})) == 30.0
+        assert request_deadline_seconds(_FakeRequest({"X-Request-Timeout": "9999"})) == 600.0
+        assert request_deadline_seconds(_FakeRequest({"X-Request-Timeout": "abc"})) == 300.0
+
+        monkeypatch.setattr(deadline, "_DEFAULT_DEADLINE_SECONDS", 0.0)
+        assert request_deadline_seconds(_FakeRequest()) is None
+
+    def test_ut_dln_002_scope(self):
+        """UT-DLN-002: 入れ子の期限と残り時間・期限切れの判定"""
+        assert remaining_seconds() is None
+        check_deadline()
+
+        with deadline_scope(100):
+            assert 99 < remaining_seconds() <= 100
+            # 内側で長い期限を指定しても外側の期限を超えない
+            with deadline_scope(500):
+                assert remaining_seconds() <= 100
+            with deadline_scope(1):
+                assert remaining_seconds() <= 1
+                with pytest.raises(DeadlineExceededError):
+                    check_deadline()
+            check_deadline()
+
+        assert remaining_seconds() is None
+
+    def test_ut_dln_003_timeout_kwargs(self):
+        """UT-DLN-003: SDK呼び出しのタイムアウト指定"""
+        assert timeout_kwargs() == {}
+
+        with deadline_scope(60):
+            kwargs = timeout_kwargs()
+
+        assert 59 < kwargs["timeout"] <= 60
+
+
+class TestDeadlinePropagation:
+    """期限の伝播のテスト"""
+
+    def setup_method(self):
+        get_metrics().reset()
+
+    def test_ut_dln_004_run_until_deadline(self):
+        """UT-DLN-004: 期限切れで処理を中断して504を返す"""
+        closed = []
+
+        class _Provider:
+            def close(self):
+                closed.append(1)
+
+        async def work():
+            from app.services.cancellation import current_cancellation_scope
+
+            current_cancellation_scope().register(_Provider())
+            assert remaining_seconds() <= 0.1
+            await asyncio.sleep(5)
+
+        with patch("app.services.cancellation._DEADLINE_GRACE_SECONDS", 0):
+            started = time.monotonic()
+            response = asyncio.run(
+                run_until_disconnected(_FakeRequest(), "test_op", work(), deadline_seconds=0.1)
+            )
+
+        assert time.monotonic() - started < 2
+        assert response.status_code == GATEWAY_TIMEOUT
+        assert closed == [1]
+        metrics = get_metrics()
+        assert metrics.get_counter("deadline_exceeded_total", operation="test_op") == 1
+        assert metrics.get_counter("client_disconnects_total", operation="test_op") == 0
+
+    def test_ut_dln_005_short_circuit(self):
+        """UT-DLN-005: 残り時間が少なければ呼び出さない"""
+        provider = MagicMock()
+
+        async def scenario():
+            with deadline_scope(0.5):
+                return await send_message_async(provider, "sys", "msg")
+
+        with pytest.raises(DeadlineExceededError):
+            asyncio.run(scenario())
+        provider.send_message.assert_not_called()
+
+    def test_ut_dln_006_anthropic_timeout(self):
+        """UT-DLN-006: 残り時間をタイムアウトに設定"""
+        provider = AnthropicProvider(
+            LLMConfig(provider="anthropic", model="test-model", apiKey="test-key")
+        )
+        provider._client = MagicMock()
+        response = MagicMock()
+        response.content = [MagicMock(text="ok")]
+        response.usage.input_tokens = 1
+        response.usage.output_tokens = 1
+        provider._client.messages.create.return_value = response
+
+        with deadline_scope(30):
+            provider.send_message("sys", "msg")
+
+        timeout = provider._client.messages.create.call_args.kwargs["timeout"]
+        assert 29 < timeout <= 30
+
+
+class TestDeadlineInRouters:
+    """ルーターでの期限の扱いのテスト"""
+
+    @patch("app.routers.review.get_llm_provider")
+    def test_ut_dln_007_structure_matching_deadline(self, mock_get_provider):
+        """UT-DLN-007: X-Request-Timeout が短すぎる場合はエラー"""
+        mock_provider = MagicMock()
+        mock_get_provider.return_value = mock_provider
+
+        response = client.post(
+            "/api/review/structure-matching",
+            json={
+                "document": {"indexMd": "# INDEX", "mapJson": {"sections": []}},
+                "codeFiles": [],
+            },
+            headers={"X-Request-Timeout": "1"},
+        )
+
+        data = response.json()
+        assert data["success"] is False
+        assert "制限時間" in data["error"]
+        mock_provider.send_message.assert_not_called()
+
+    @patch("app.routers.organize.get_llm_provider")
+    def test_ut_dln_008_organize_deadline(self, mock_get_provider):
+        """UT-DLN-008: 期限切れはタイムアウトとして返す"""
+        mock_provider = MagicMock()
+        mock_get_provider.return_value = mock_provider
+
+        response = client.post(
+            "/api/organize-markdown",
+            json={"markdown": "## 機能\n内容", "policy": "整理してください。"},
+            headers={"X-Request-Timeout": "1"},
+        )
+
+        data = response.json()
+        assert data["success"] is False
+        assert data["errorCode"] == "timeout"
+        mock_provider.organize_markdown.assert_not_called()
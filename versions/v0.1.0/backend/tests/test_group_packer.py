@@ -0,0 +1,209 @@
+"""group_packer.py / バッチグループレビューAPIの単体テスト
+
+テストケース:
+- UT-GPK-001: pack_groups() - 小さなグループを1バッチにまとめる
+- UT-GPK-002: pack_groups() - 共有断片は予算に1度だけ計上する
+- UT-GPK-003: pack_groups() - 予算超過・最大グループ数でバッチを分ける
+- UT-GPK-004: build_batch_message() - 共有断片を1度だけ出力する
+- UT-GPK-005: split_batch_output() - マーカーで分解する
+- UT-GPK-006: review_groups() - 正常系（1回の呼び出しで複数グループ）
+- UT-GPK-007: review_groups() - マーカー欠落グループの単独再実行
+- UT-GPK-008: review_groups() - エラー（存在しないパーツ参照）
+"""
+
+from unittest.mock import MagicMock, patch
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.group_packer import (
+    GROUP_OVERHEAD_TOKENS,
+    Fragment,
+    GroupContext,
+    build_batch_message,
+    group_marker,
+    pack_groups,
+    split_batch_output,
+)
+
+client = TestClient(app)
+
+
+def _fragment(kind: str, part_id: str, tokens: int, filename: str = "") -> Fragment:
+    key = (kind, filename, part_id)
+    return Fragment(key=key, title=part_id, content=f"content of {part_id}", tokens=tokens)
+
+
+def _fragments(*items: Fragment) -> dict:
+    return {f.key: f for f in items}
+
+
+class TestPackGroups:
+    """pack_groups() のテスト"""
+
+    def test_ut_gpk_001_pack_small_groups(self):
+        """UT-GPK-001: 小さなグループを1バッチにまとめる"""
+        md1 = _fragment("document", "MD1", 100)
+        md2 = _fragment("document", "MD2", 100)
+        fragments = _fragments(md1, md2)
+        groups = [
+            GroupContext("g1", "G1", [md1.key]),
+            GroupContext("g2", "G2", [md2.key]),
+        ]
+
+        batches = pack_groups(groups, fragments, token_budget=1000, max_groups_per_batch=8)
+
+        assert len(batches) == 1
+        assert {g.group_id for g in batches[0].groups} == {"g1", "g2"}
+
+    def test_ut_gpk_002_shared_fragment_counted_once(self):
+        """UT-GPK-002: 共有断片は予算に1度だけ計上する"""
+        shared = _fragment("code", "CD1", 400, "a.py")
+        md1 = _fragment("document", "MD1", 50)
+        md2 = _fragment("document", "MD2", 50)
+        fragments = _fragments(shared, md1, md2)
+        groups = [
+            GroupContext("g1", "G1", [md1.key, shared.key]),
+            GroupContext("g2", "G2", [md2.key, shared.key]),
+        ]
+
+        # 共有断片を重複計上すると 1000 を超えるが、1度だけなら収まる
+        batches = pack_groups(groups, fragments, token_budget=700, max_groups_per_batch=8)
+
+        assert len(batches) == 1
+        assert batches[0].tokens == 400 + 50 + 50 + 2 * GROUP_OVERHEAD_TOKENS
+
+    def test_ut_gpk_003_split_by_budget_and_count(self):
+        """UT-GPK-003: 予算超過・最大グループ数でバッチを分ける"""
+        big = _fragment("document", "MD1", 5000)
+        small = [_fragment("document", f"MD{i}", 10) for i in range(2, 6)]
+        fragments = _fragments(big, *small)
+        groups = [GroupContext("big", "Big", [big.key])] + [
+            GroupContext(f"s{i}", f"S{i}", [f.key]) for i, f in enumerate(small)
+        ]
+
+        batches = pack_groups(groups, fragments, token_budget=1000, max_groups_per_batch=2)
+
+        # 予算超過のグループは単独、小さなグループは2つずつ
+        assert [len(b.groups) for b in batches] == [1, 2, 2]
+        assert batches[0].groups[0].group_id == "big"
+
+
+class TestBatchMessage:
+    """build_batch_message() / split_batch_output() のテスト"""
+
+    def test_ut_gpk_004_shared_fragment_once(self):
+        """UT-GPK-004: 共有断片を1度だけ出力する"""
+        shared = _fragment("code", "CD1", 10, "a.py")
+        md1 = _fragment("document", "MD1", 10)
+        fragments = _fragments(shared, md1)
+        groups = [
+            GroupContext("g1", "G1", [md1.key, shared.key]),
+            GroupContext("g2", "G2", [shared.key]),
+        ]
+        batch = pack_groups(groups, fragments, token_budget=1000, max_groups_per_batch=8)[0]
+
+        message = build_batch_message(batch, fragments)
+
+        assert message.count("content of CD1") == 1
+        assert group_marker("g1") in message
+        assert group_marker("g2") in message
+
+    def test_ut_gpk_005_split_output(self):
+        """UT-GPK-005: マーカーで分解する"""
+        text = (
+            "前置き\n"
+            "<!-- group:g1 -->\n## G1 レポート\n\n"
+            "<!-- group:unknown -->\n無関係\n"
+            "<!-- group:g2 -->\n## G2 レポート\n"
+        )
+
+        result = split_batch_output(text, ["g1", "g2", "g3"])
+
+        assert result["g1"].startswith("## G1 レポート")
+        assert "<!-- group:unknown -->" in result["g1"]
+        assert result["g2"] == "## G2 レポート"
+        assert "g3" not in result
+        # 単一グループでマーカーなしの場合は全体を結果とする
+        assert split_batch_output("## レポート", ["g1"]) == {"g1": "## レポート"}
+
+
+def _batch_request(groups: list[dict]) -> dict:
+    return {
+        "groups": groups,
+        "documentParts": [
+            {"id": "MD1", "title": "概要", "content": "## 概要"},
+            {"id": "MD2", "title": "詳細", "content": "## 詳細"},
+        ],
+        "codeParts": [
+            {"id": "CD1", "filename": "a.py", "title": "foo", "content": "def foo(): pass"},
+            {"id": "CD1", "filename": "b.py", "title": "bar", "content": "def bar(): pass"},
+        ],
+    }
+
+
+def _group(group_id: str, doc_id: str, filename: str) -> dict:
+    return {
+        "groupId": group_id,
+        "groupName": f"グループ{group_id}",
+        "docSections": [{"id": doc_id, "title": doc_id, "path": doc_id}],
+        "codeSymbols": [{"id": "CD1", "filename": filename, "symbol": "sym"}],
+        "reason": "",
+        "estimatedTokens": 0,
+    }
+
+
+class TestReviewGroupsAPI:
+    """review_groups() のテスト"""
+
+    @patch("app.routers.review.get_llm_provider")
+    def test_ut_gpk_006_success_single_call(self, mock_get_provider):
+        """UT-GPK-006: 正常系（1回の呼び出しで複数グループ）"""
+        mock_provider = MagicMock()
+        mock_provider.send_message.return_value = (
+            "<!-- group:g1 -->\nG1の結果\n<!-- group:g2 -->\nG2の結果\n", 300, 100
+        )
+        mock_get_provider.return_value = mock_provider
+
+        request = _batch_request([_group("g1", "MD1", "a.py"), _group("g2", "MD2", "b.py")])
+        response = client.post("/api/review/groups", json=request)
+
+        data = response.json()
+        assert data["success"] is True
+        assert data["llmCalls"] == 1
+        assert data["tokensUsed"] == {"input": 300, "output": 100}
+        assert [r["reviewResult"]["report"] for r in data["results"]] == [
+            "G1の結果", "G2の結果"
+        ]
+        # ファイルごとに採番されたシンボルIDを取り違えない
+        user_message = mock_provider.send_message.call_args[0][1]
+        assert "def foo(): pass" in user_message
+        assert "def bar(): pass" in user_message
+
+    @patch("app.routers.review.get_llm_provider")
+    def test_ut_gpk_007_retry_missing_group(self, mock_get_provider):
+        """UT-GPK-007: マーカー欠落グループの単独再実行"""
+        mock_provider = MagicMock()
+        mock_provider.send_message.side_effect = [
+            ("<!-- group:g1 -->\nG1の結果\n", 300, 100),
+            ("G2の単独結果", 200, 50),
+        ]
+        mock_get_provider.return_value = mock_provider
+
+        request = _batch_request([_group("g1", "MD1", "a.py"), _group("g2", "MD2", "b.py")])
+        response = client.post("/api/review/groups", json=request)
+
+        data = response.json()
+        assert data["success"] is True
+        assert data["llmCalls"] == 2
+        assert data["results"][1]["reviewResult"]["report"] == "G2の単独結果"
+        assert data["tokensUsed"] == {"input": 500, "output": 150}
+
+    def test_ut_gpk_008_missing_part(self):
+        """UT-GPK-008: エラー（存在しないパーツ参照）"""
+        request = _batch_request([_group("g1", "MD9", "a.py")])
+        response = client.post("/api/review/groups", json=request)
+
+        data = response.json()
+        assert data["success"] is False
+        assert "MD9" in data["error"]
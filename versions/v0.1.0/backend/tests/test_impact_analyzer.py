@@ -0,0 +1,212 @@
+"""impact_analyzer.py / 影響分析APIの単体テスト
+
+テストケース:
+- UT-IMP-001: parse_unified_diff() - 変更・追加・置き換えの旧側の行番号
+- UT-IMP-002: parse_unified_diff() - 新規・削除ファイルと複数ファイル
+- UT-IMP-003: IntervalIndex.overlapping() - 入れ子・隣接する区間
+- UT-IMP-004: analyze_impact() - シンボルの特定・マッピング外の変更・ファイル名の照合
+- UT-IMP-005: impact_analysis() - 影響を受けるグループ・設計書セクション
+- UT-IMP-006: impact_analysis() - mapHash の参照と存在しないハッシュ
+"""
+
+import random
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.artifact_store import get_artifact_store
+from app.services.impact_analyzer import (
+    FileChange,
+    IntervalIndex,
+    analyze_impact,
+    parse_unified_diff,
+    symbols_from_map,
+)
+
+client = TestClient(app)
+
+
+USER_MAP = [
+    {"id": "CD1", "symbol": "UserService", "type": "class", "original_file": "user.py",
+     "original_start_line": 1, "original_end_line": 30},
+    {"id": "CD2", "symbol": "UserService.create", "type": "method", "original_file": "user.py",
+     "original_start_line": 3, "original_end_line": 12},
+    {"id": "CD3", "symbol": "UserService.delete", "type": "method", "original_file": "user.py",
+     "original_start_line": 14, "original_end_line": 30},
+    {"id": "CD4", "symbol": "helper", "type": "function", "original_file": "user.py",
+     "original_start_line": 34, "original_end_line": 40},
+]
+
+REPORT_MAP = [
+    {"id": "CD1", "symbol": "ReportWriter", "type": "class", "original_file": "report.py",
+     "original_start_line": 1, "original_end_line": 20},
+]
+
+DIFF = """diff --git a/src/app/user.py b/src/app/user.py
+index 1111111..2222222 100644
+--- a/src/app/user.py
++++ b/src/app/user.py
+@@ -5,3 +5,3 @@ class UserService:
+     def create(self):
+-        validate()
++        validate(strict=True)
+         save()
+@@ -31,2 +31,3 @@ class UserService:
+
++CONSTANT = 1
+
+diff --git a/src/app/new.py b/src/app/new.py
+new file mode 100644
+--- /dev/null
++++ b/src/app/new.py
+@@ -0,0 +1,2 @@
++def added():
++    pass
+"""
+
+
+class TestParseUnifiedDiff:
+    """parse_unified_diff() のテスト"""
+
+    def test_ut_imp_001_old_lines(self):
+        """UT-IMP-001: 変更・追加・置き換えの旧側の行番号"""
+        diff = """--- a/x.py
++++ b/x.py
+@@ -10,4 +10,5 @@
+ a
+-b
++B
+ c
++inserted
+ d
+@@ -20,0 +22,1 @@
++appended
+"""
+        [change] = parse_unified_diff(diff)
+
+        # 置き換えは削除行のみ、追加のみは前後の行、"-20,0" は20行目の直後
+        assert change.old_lines == [11, 12, 13, 20, 21]
+        assert (change.old_path, change.new_path) == ("x.py", "x.py")
+
+    def test_ut_imp_002_files(self):
+        """UT-IMP-002: 新規・削除ファイルと複数ファイル"""
+        diff = DIFF + """diff --git a/report.py b/report.py
+deleted file mode 100644
+--- a/report.py
++++ /dev/null
+@@ -1,2 +0,0 @@
+-class ReportWriter:
+-    pass
+"""
+        changes = parse_unified_diff(diff)
+
+        assert [c.path for c in changes] == ["src/app/user.py", "src/app/new.py", "report.py"]
+        assert changes[0].old_lines == [6, 31, 32]
+        assert changes[1].is_new and not changes[1].is_deleted
+        assert changes[2].is_deleted and changes[2].old_lines == [1, 2]
+
+
+class TestIntervalIndex:
+    """IntervalIndex のテスト"""
+
+    def test_ut_imp_003_overlapping(self):
+        """UT-IMP-003: 入れ子・隣接する区間"""
+        index = IntervalIndex([(1, 30, "class"), (3, 12, "create"), (14, 30, "delete"), (34, 40, "helper")])
+
+        assert index.overlapping(5, 5) == ["class", "create"]
+        assert index.overlapping(12, 14) == ["class", "create", "delete"]
+        assert index.overlapping(31, 33) == []
+        assert index.overlapping(40, 100) == ["helper"]
+
+        # 総当たりと同じ結果になる
+        rng = random.Random(0)
+        intervals = []
+        for i in range(200):
+            start = rng.randint(1, 1000)
+            intervals.append((start, start + rng.randint(0, 50), i))
+        index = IntervalIndex(intervals)
+        for _ in range(200):
+            lo = rng.randint(1, 1000)
+            hi = lo + rng.randint(0, 20)
+            expected = {v for s, e, v in intervals if s <= hi and e >= lo}
+            assert set(index.overlapping(lo, hi)) == expected
+
+
+class TestAnalyzeImpact:
+    """analyze_impact() のテスト"""
+
+    def test_ut_imp_004_analyze(self):
+        """UT-IMP-004: シンボルの特定・マッピング外の変更・ファイル名の照合"""
+        symbols_by_file = {
+            "user.py": symbols_from_map("user.py", USER_MAP),
+            "report.py": symbols_from_map("report.py", {"symbols": REPORT_MAP}),
+        }
+
+        result = analyze_impact(parse_unified_diff(DIFF), symbols_by_file)
+
+        assert [(s.filename, s.id, n) for s, n in result.symbols] == [
+            ("user.py", "CD1", 1),
+            ("user.py", "CD2", 1),
+        ]
+        assert result.unmapped_files == ["src/app/new.py"]
+        assert result.unmapped_ranges == [("user.py", 31, 32)]
+
+        # 削除されたファイルは全シンボルが影響を受ける
+        deleted = analyze_impact([FileChange(old_path="report.py", new_path=None)], symbols_by_file)
+        assert [(s.filename, s.id, n) for s, n in deleted.symbols] == [("report.py", "CD1", 20)]
+
+
+def _group(group_id: str, filename: str, symbol_id: str, section_id: str) -> dict:
+    return {
+        "groupId": group_id,
+        "groupName": f"{group_id} name",
+        "docSections": [{"id": section_id, "title": section_id, "path": section_id}],
+        "codeSymbols": [{"id": symbol_id, "filename": filename, "symbol": symbol_id}],
+        "reason": "test",
+        "estimatedTokens": 100,
+    }
+
+
+class TestImpactAPI:
+    """impact_analysis() のテスト"""
+
+    def test_ut_imp_005_groups(self):
+        """UT-IMP-005: 影響を受けるグループ・設計書セクション"""
+        response = client.post("/api/impact", json={
+            "diff": DIFF,
+            "codeFiles": [
+                {"filename": "user.py", "mapJson": USER_MAP},
+                {"filename": "report.py", "mapJson": REPORT_MAP},
+            ],
+            "groups": [
+                _group("group1", "user.py", "CD2", "MD2"),
+                _group("group2", "user.py", "CD3", "MD3"),
+                # 別ファイルの同じIDは影響を受けない
+                _group("group3", "report.py", "CD1", "MD4"),
+                _group("group4", "user.py", "CD1", "MD2"),
+            ],
+        })
+
+        data = response.json()
+        assert data["success"] is True
+        assert [s["symbol"] for s in data["symbols"]] == ["UserService", "UserService.create"]
+        assert [g["groupId"] for g in data["groups"]] == ["group1", "group4"]
+        assert [s["id"] for s in data["docSections"]] == ["MD2"]
+        assert data["unmappedFiles"] == ["src/app/new.py"]
+        assert data["unmappedChanges"] == [{"filename": "user.py", "startLine": 31, "endLine": 32}]
+
+    def test_ut_imp_006_map_hash(self):
+        """UT-IMP-006: mapHash の参照と存在しないハッシュ"""
+        map_hash = get_artifact_store().put_json(USER_MAP)
+
+        found = client.post("/api/impact", json={
+            "diff": DIFF,
+            "codeFiles": [{"filename": "user.py", "mapHash": map_hash}],
+        }).json()
+        missing = client.post("/api/impact", json={
+            "diff": DIFF,
+            "codeFiles": [{"filename": "user.py", "mapHash": "0" * 64}],
+        }).json()
+
+        assert [s["id"] for s in found["symbols"]] == ["CD1", "CD2"]
+        assert missing["success"] is False
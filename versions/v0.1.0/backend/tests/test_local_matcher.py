@@ -0,0 +1,333 @@
+"""local_matcher.py / 構造マッチングのローカル照合の単体テスト
+
+テストケース:
+- UT-LMT-001: normalize_identifier() - camelCase / snake_case / 全角の正規化
+- UT-LMT-002: extract_requirement_ids() - 区切り・先頭ゼロの吸収と誤検出の除外
+- UT-LMT-003: identifier_tokens() - 日本語に隣接した識別子の抽出
+- UT-LMT-004: parse_index_annotations() / filter_index() - INDEX.md の読み取りと絞り込み
+- UT-LMT-005: code_entries_from_map() - code2map 形式の変換とクラス本文の切り出し
+- UT-LMT-006: match_locally() - 要件ID照合・名称照合・残りの算出
+- UT-LMT-007: match_locally() - ファジー一致と一般的な名称の除外
+- UT-LMT-008: structure_matching() - 厳密ポリシーで残りのみをAIに渡して統合
+- UT-LMT-009: structure_matching() - 全て照合できた場合はAIを呼び出さない
+- UT-LMT-010: structure_matching() - 標準ポリシーではローカル照合を行わない
+- UT-LMT-011: match_locally() - 大規模入力での名称照合（索引による照合）
+- UT-LMT-012: _first_child_starts() - 入れ子の子要素の開始行
+"""
+
+import hashlib
+import json
+import time
+from unittest.mock import MagicMock, patch
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.artifact_store import get_artifact_store
+from app.services.local_matcher import (
+    CodeEntry,
+    DocEntry,
+    _first_child_starts,
+    code_entries_from_map,
+    extract_requirement_ids,
+    filter_index,
+    identifier_tokens,
+    match_locally,
+    normalize_identifier,
+    parse_index_annotations,
+)
+
+client = TestClient(app)
+
+
+DOC_INDEX = """# INDEX
+
+### [MD1] 機能一覧 (H1)
+- summary: システムの機能一覧
+
+### [MD2] REQ-001 ユーザー登録 (H2)
+- summary: 新規ユーザーを登録する
+- keywords: 登録, ユーザー
+
+### [MD3] 注文処理 (H2)
+- summary: OrderService が注文を確定する
+
+### [MD4] 帳票出力 (H2)
+- summary: 月次帳票を出力する
+"""
+
+DOC_MAP = {
+    "sections": [
+        {"id": "MD1", "title": "機能一覧", "level": 1, "path": "機能一覧", "startLine": 1, "endLine": 40},
+        {"id": "MD2", "title": "REQ-001 ユーザー登録", "level": 2, "path": "機能一覧 > REQ-001 ユーザー登録", "startLine": 3, "endLine": 10},
+        {"id": "MD3", "title": "注文処理", "level": 2, "path": "機能一覧 > 注文処理", "startLine": 11, "endLine": 20},
+        {"id": "MD4", "title": "帳票出力", "level": 2, "path": "機能一覧 > 帳票出力", "startLine": 21, "endLine": 40},
+    ]
+}
+
+CODE_INDEX = """# CODE INDEX
+
+- [CD1] UserController.register (L1-L20)
+  - role: ユーザー登録を受け付ける（REQ_001）
+- [CD2] OrderService (L21-L60)
+  - role: 注文サービス
+- [CD3] ReportWriter (L61-L90)
+  - role: 帳票の書き出し
+"""
+
+CODE_MAP = {
+    "symbols": [
+        {"id": "CD1", "symbol": "UserController.register", "type": "method", "original_file": "app.py", "original_start_line": 1, "original_end_line": 20},
+        {"id": "CD2", "symbol": "OrderService", "type": "class", "original_file": "app.py", "original_start_line": 21, "original_end_line": 60},
+        {"id": "CD3", "symbol": "ReportWriter", "type": "class", "original_file": "app.py", "original_start_line": 61, "original_end_line": 90},
+    ]
+}
+
+
+def _mock_provider(groups: list[dict]) -> MagicMock:
+    provider = MagicMock()
+    provider.send_message.return_value = (json.dumps({"groups": groups}), 100, 50)
+    provider.model_id = "test-model"
+    provider.provider_name = "test"
+    return provider
+
+
+def _request(policy: str = "strict", **document) -> dict:
+    return {
+        "document": {"indexMd": DOC_INDEX, "mapJson": DOC_MAP, **document},
+        "codeFiles": [{"filename": "app.py", "indexMd": CODE_INDEX, "mapJson": CODE_MAP}],
+        "mappingPolicy": policy,
+    }
+
+
+class TestNormalization:
+    """正規化・抽出のテスト"""
+
+    def test_ut_lmt_001_normalize_identifier(self):
+        """UT-LMT-001: camelCase / snake_case / 全角の正規化"""
+        expected = "userservice"
+        assert normalize_identifier("UserService") == expected
+        assert normalize_identifier("user_service") == expected
+        assert normalize_identifier("USER_SERVICE") == expected
+        assert normalize_identifier("ＵｓｅｒＳｅｒｖｉｃｅ") == expected
+        assert normalize_identifier("HTTPServerError") == normalize_identifier("http_server_error")
+
+    def test_ut_lmt_002_extract_requirement_ids(self):
+        """UT-LMT-002: 区切り・先頭ゼロの吸収と誤検出の除外"""
+        assert extract_requirement_ids("REQ-001 / REQ_1 / REQ001") == {"REQ-1"}
+        assert extract_requirement_ids("UC-3.01 と F-12") == {"UC-3.1", "F-12"}
+        # 全角の要件ID
+        assert extract_requirement_ids("ＲＥＱ－００３") == {"REQ-3"}
+        # ツールの連番・見出しレベル・規格名・短い数字は対象外
+        assert extract_requirement_ids("MD12 CD3 H2 UTF8 SHA256 ISO-8601 AB12") == set()
+
+    def test_ut_lmt_003_identifier_tokens(self):
+        """UT-LMT-003: 日本語に隣接した識別子の抽出"""
+        tokens = identifier_tokens("UserServiceクラスのcreate_user()メソッド　ｇｅｔＵｓｅｒ")
+
+        assert tokens == {"userservice", "createuser", "getuser"}
+
+
+class TestIndexAndMap:
+    """INDEX.md / MAP.json の読み取りのテスト"""
+
+    def test_ut_lmt_004_index_annotations_and_filter(self):
+        """UT-LMT-004: INDEX.md の読み取りと絞り込み"""
+        annotations = parse_index_annotations(DOC_INDEX)
+
+        assert annotations["MD2"] == "新規ユーザーを登録する\n登録, ユーザー"
+        assert "MD1" in annotations and "MD4" in annotations
+
+        filtered = filter_index(DOC_INDEX, {"MD4"})
+        assert filtered.startswith("# INDEX")
+        assert "[MD4]" in filtered and "月次帳票" in filtered
+        assert "[MD2]" not in filtered and "新規ユーザー" not in filtered
+
+    def test_ut_lmt_005_code_entries_from_map(self):
+        """UT-LMT-005: code2map 形式の変換とクラス本文の切り出し"""
+        map_json = {
+            "symbols": [
+                {"id": "CD1", "symbol": "Order", "original_start_line": 1, "original_end_line": 6},
+                {"id": "CD2", "symbol": "Order.cancel", "original_start_line": 4, "original_end_line": 6},
+            ]
+        }
+        contents = {
+            "CD1": 'class Order:\n    """注文 REQ-010"""\n\n    def cancel(self):\n        """REQ-020"""\n        pass\n',
+        }
+
+        entries = code_entries_from_map("order.py", map_json, contents=contents)
+
+        assert entries[0].name == "Order" and entries[0].parent is None
+        assert entries[1].name == "cancel" and entries[1].parent == "Order"
+        assert entries[1].key == ("order.py", "CD2")
+        # クラス自身の本文にはメソッドの docstring を含めない
+        assert extract_requirement_ids(entries[0].text) == {"REQ-10"}
+
+
+class TestMatchLocally:
+    """match_locally() のテスト"""
+
+    def test_ut_lmt_006_match(self):
+        """UT-LMT-006: 要件ID照合・名称照合・残りの算出"""
+        docs = [
+            DocEntry(id="MD1", title="REQ-001 ユーザー登録", path="", text="REQ-001 ユーザー登録"),
+            DocEntry(id="MD2", title="注文処理", path="", text="注文処理\nOrderServiceが注文を確定する"),
+            DocEntry(id="MD3", title="帳票出力", path="", text="帳票出力"),
+        ]
+        codes = [
+            CodeEntry(id="CD1", filename="a.py", name="register", text="REQ_001 の実装"),
+            CodeEntry(id="CD1", filename="b.py", name="order_service"),
+            CodeEntry(id="CD2", filename="b.py", name="ReportWriter"),
+        ]
+
+        result = match_locally(docs, codes)
+
+        assert [(g.name, g.doc_ids, g.code_keys) for g in result.groups] == [
+            ("REQ-1", ["MD1"], [("a.py", "CD1")]),
+            ("注文処理", ["MD2"], [("b.py", "CD1")]),
+        ]
+        assert result.residual_doc_ids == ["MD3"]
+        assert result.residual_code_keys == [("b.py", "CD2")]
+
+    def test_ut_lmt_007_fuzzy_and_stoplist(self):
+        """UT-LMT-007: ファジー一致と一般的な名称の除外"""
+        docs = [DocEntry(id="MD1", title="", path="", text="PaymentProcesser と execute を使う")]
+        codes = [
+            CodeEntry(id="CD1", filename="a.py", name="PaymentProcessor"),
+            CodeEntry(id="CD2", filename="a.py", name="execute"),
+        ]
+
+        result = match_locally(docs, codes)
+
+        assert result.groups[0].code_keys == [("a.py", "CD1")]
+        assert result.residual_code_keys == [("a.py", "CD2")]
+
+
+    def test_ut_lmt_011_large_input(self):
+        """UT-LMT-011: 大規模入力での名称照合（索引による照合）"""
+        size = 300
+
+        def word(seed: str) -> str:
+            digest = hashlib.sha256(seed.encode()).hexdigest()
+            return "".join(chr(ord("a") + int(c, 16)) for c in digest[:12])
+
+        names = [word(f"symbol{i}") for i in range(size)]
+        codes = [
+            CodeEntry(id=f"CD{i}", filename="a.py", name=name)
+            for i, name in enumerate(names)
+        ]
+        codes.append(CodeEntry(id="CD9999", filename="a.py", name="在庫引当"))
+        vocabulary = [word(f"filler{j}") for j in range(300)]
+        docs = [
+            DocEntry(
+                id=f"MD{i}",
+                title=f"節{i}",
+                path="",
+                # 1件は完全一致、1件は1文字欠け（ファジー一致）
+                text=" ".join(
+                    [names[i], names[(i + 1) % size][:-1]]
+                    + vocabulary[i % 200 : i % 200 + 100]
+                ),
+            )
+            for i in range(size)
+        ]
+        docs[0].text += " 在庫引当を行う"
+
+        started = time.perf_counter()
+        result = match_locally(docs, codes)
+        elapsed = time.perf_counter() - started
+
+        assert len(result.groups) == size
+        assert result.groups[1].code_keys == [("a.py", "CD1"), ("a.py", "CD2")]
+        assert ("a.py", "CD9999") in result.groups[0].code_keys
+        assert result.residual_doc_ids == [] and result.residual_code_keys == []
+        # 総当たり（セクション数 × シンボル数 × 識別子数）では数十秒かかる規模
+        assert elapsed < 10
+
+    def test_ut_lmt_012_first_child_starts(self):
+        """UT-LMT-012: 入れ子の子要素の開始行"""
+        entries = [
+            CodeEntry(id="CD1", filename="a.py", name="Order", start_line=1, end_line=30),
+            CodeEntry(id="CD3", filename="a.py", name="total", start_line=20, end_line=30),
+            CodeEntry(id="CD2", filename="a.py", name="cancel", start_line=10, end_line=15),
+            CodeEntry(id="CD4", filename="a.py", name="helper", start_line=40, end_line=45),
+            # 範囲外に伸びる要素は子とみなさない
+            CodeEntry(id="CD5", filename="a.py", name="spill", start_line=44, end_line=50),
+        ]
+
+        assert _first_child_starts(entries) == [10, None, None, None, None]
+
+
+class TestStructureMatchingLocal:
+    """structure_matching() のローカル照合のテスト"""
+
+    @patch("app.routers.review.get_llm_provider")
+    def test_ut_lmt_008_residue_to_llm(self, mock_get_provider):
+        """UT-LMT-008: 厳密ポリシーで残りのみをAIに渡して統合"""
+        mock_provider = _mock_provider([
+            {
+                "id": "group1",
+                "name": "帳票",
+                "doc_sections": [{"id": "MD4", "title": "帳票出力", "path": "機能一覧 > 帳票出力"}],
+                "code_symbols": [{"id": "CD3", "filename": "app.py", "symbol": "ReportWriter"}],
+                "reason": "帳票の出力処理",
+            }
+        ])
+        mock_get_provider.return_value = mock_provider
+
+        response = client.post("/api/review/structure-matching", json=_request())
+
+        data = response.json()
+        assert data["success"] is True
+        assert [g["groupId"] for g in data["groups"]] == ["group1", "group2", "group3"]
+        local_req, local_name, llm_group = data["groups"]
+        assert local_req["docSections"][0]["id"] == "MD2"
+        assert local_req["codeSymbols"] == [
+            {"id": "CD1", "filename": "app.py", "symbol": "UserController.register"}
+        ]
+        assert local_req["reason"].startswith("[ローカル照合]")
+        assert local_name["codeSymbols"][0]["id"] == "CD2"
+        assert llm_group["groupName"] == "帳票"
+
+        # AIには照合できなかったセクション・シンボルのみが渡される
+        user_message = mock_provider.send_message.call_args[0][1]
+        assert '"MD4"' in user_message and '"CD3"' in user_message
+        assert '"MD2"' not in user_message and '"CD1"' not in user_message
+        assert "[MD4]" in user_message and "[MD2]" not in user_message
+
+    @patch("app.routers.review.get_llm_provider")
+    def test_ut_lmt_009_all_matched_locally(self, mock_get_provider):
+        """UT-LMT-009: 全て照合できた場合はAIを呼び出さない"""
+        mock_provider = _mock_provider([])
+        mock_get_provider.return_value = mock_provider
+        store = get_artifact_store()
+        # 本文（パーツ内容）に記載された要件IDでも照合できる
+        part_hashes = {"MD4": store.put("## 帳票出力\n\n対応: REQ-100\n")}
+        request = _request(partHashes=part_hashes)
+        request["codeFiles"][0]["indexMd"] = CODE_INDEX.replace(
+            "帳票の書き出し", "帳票の書き出し REQ-100"
+        )
+
+        response = client.post("/api/review/structure-matching", json=request)
+
+        data = response.json()
+        assert data["success"] is True
+        assert data["totalGroups"] == 3
+        assert data["tokensUsed"] == {"input": 0, "output": 0}
+        mock_provider.send_message.assert_not_called()
+
+    @patch("app.routers.review.get_llm_provider")
+    def test_ut_lmt_010_standard_policy(self, mock_get_provider):
+        """UT-LMT-010: 標準ポリシーではローカル照合を行わない"""
+        mock_provider = _mock_provider([])
+        mock_get_provider.return_value = mock_provider
+
+        response = client.post(
+            "/api/review/structure-matching", json=_request(policy="standard")
+        )
+
+        data = response.json()
+        assert data["success"] is True
+        assert data["totalGroups"] == 0
+        user_message = mock_provider.send_message.call_args[0][1]
+        assert '"MD2"' in user_message and '"CD1"' in user_message
@@ -0,0 +1,196 @@
+"""map_pipeline.py / マッピングパイプラインAPIの単体テスト
+
+テストケース:
+- UT-MAP-001: map_pipeline() - 変換・分割・構造マッチングの一括実行
+- UT-MAP-002: map_pipeline() - 設計書の結合（役割・種別）と未対応言語の除外
+- UT-MAP-003: map_pipeline() - stream=True（進捗と結果のNDJSON）
+- UT-MAP-004: map_pipeline() - 入力エラー（ファイル形式・options・コードファイルなし）
+- UT-MAP-005: run_map_pipeline() - 変換の失敗で残りの処理を打ち切る
+- UT-MAP-006: map_pipeline() - stream=True の入力エラーはNDJSONのエラーレコード
+"""
+
+import json
+from unittest.mock import MagicMock, patch
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routers import map_pipeline
+
+client = TestClient(app)
+
+
+DESIGN_MD = """# ユーザー管理
+
+## ユーザー登録
+
+ユーザーを登録する。
+
+## ユーザー削除
+
+ユーザーを削除する。
+"""
+
+CODE_PY = """class UserService:
+    def create(self):
+        pass
+
+    def delete(self):
+        pass
+"""
+
+LLM_RESPONSE = json.dumps({
+    "groups": [
+        {
+            "id": "group1",
+            "name": "ユーザー登録",
+            "doc_sections": [{"id": "MD2", "title": "ユーザー登録", "path": "ユーザー登録"}],
+            "code_symbols": [{"id": "CD2", "filename": "user.py", "symbol": "UserService.create"}],
+            "reason": "登録処理",
+        }
+    ]
+})
+
+
+def _mock_provider(mock_get_provider) -> MagicMock:
+    provider = MagicMock()
+    provider.send_message.return_value = (LLM_RESPONSE, 100, 50)
+    provider.model_id = "test-model"
+    provider.provider_name = "test"
+    mock_get_provider.return_value = provider
+    return provider
+
+
+def _post(design_files, code_files, **options):
+    files = [("designs", (name, content)) for name, content in design_files]
+    files += [("codeFiles", (name, content)) for name, content in code_files]
+    return client.post(
+        "/api/map",
+        files=files,
+        data={"options": json.dumps({"splitMode": "heading", **options})},
+    )
+
+
+class TestMapPipelineAPI:
+    """map_pipeline() のテスト"""
+
+    @patch("app.routers.review.get_llm_provider")
+    def test_ut_map_001_success(self, mock_get_provider):
+        """UT-MAP-001: 変換・分割・構造マッチングの一括実行"""
+        provider = _mock_provider(mock_get_provider)
+
+        response = _post([("spec.md", DESIGN_MD.encode())], [("user.py", CODE_PY.encode())])
+
+        data = response.json()
+        assert data["success"] is True
+        assert data["totalGroups"] == 1
+        assert data["groups"][0]["codeSymbols"][0]["id"] == "CD2"
+        assert data["tokensUsed"] == {"input": 100, "output": 50}
+
+        # 構造マッチングには分割結果（INDEX.md）が渡される
+        _, user_message = provider.send_message.call_args.args
+        assert "ユーザー登録" in user_message
+        assert "# Index: spec.md" in user_message
+        assert "UserService" in user_message
+
+    @patch("app.routers.review.get_llm_provider")
+    def test_ut_map_002_combine_designs(self, mock_get_provider):
+        """UT-MAP-002: 設計書の結合（役割・種別）と未対応言語の除外"""
+        _mock_provider(mock_get_provider)
+        captured = {}
+        original = map_pipeline._split_document_structure
+
+        def capture(markdown, *args):
+            captured["markdown"] = markdown
+            return original(markdown, *args)
+
+        with patch.object(map_pipeline, "_split_document_structure", side_effect=capture):
+            response = _post(
+                [("a.md", b"# A\n\n## A1\n"), ("b.md", "# B\n\n## B1\n".encode("shift_jis"))],
+                [("user.py", CODE_PY.encode()), ("script.js", b"console.log(1);")],
+                designs=[{"filename": "b.md", "isMain": True, "type": "詳細設計書", "note": "注意"}],
+            )
+
+        assert response.json()["success"] is True
+        assert captured["markdown"] == (
+            "# 設計書: a.md\n- 役割: 参照\n- 種別: \n- 注意事項: \n\n# A\n\n## A1\n"
+            "\n\n---\n\n"
+            "# 設計書: b.md\n- 役割: メイン\n- 種別: 詳細設計書\n- 注意事項: 注意\n\n# B\n\n## B1\n"
+        )
+
+    @patch("app.routers.review.get_llm_provider")
+    def test_ut_map_003_stream(self, mock_get_provider):
+        """UT-MAP-003: stream=True（進捗と結果のNDJSON）"""
+        _mock_provider(mock_get_provider)
+
+        response = _post(
+            [("spec.md", DESIGN_MD.encode())],
+            [("user.py", CODE_PY.encode()), ("script.js", b"console.log(1);")],
+            stream=True,
+        )
+
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        records = [json.loads(line) for line in response.text.splitlines()]
+        stages = {(r.get("stage"), r.get("filename"), r.get("status")) for r in records[:-1]}
+        assert stages == {
+            ("split_code", "script.js", "skipped"),
+            ("convert", "spec.md", "done"),
+            ("split_code", "user.py", "done"),
+            ("split_markdown", None, "done"),
+            ("matching", None, "started"),
+        }
+        assert records[-2]["stage"] == "matching"
+        assert records[-1]["type"] == "result"
+        assert records[-1]["success"] is True
+        assert records[-1]["totalGroups"] == 1
+
+    def test_ut_map_004_invalid_input(self):
+        """UT-MAP-004: 入力エラー（ファイル形式・options・コードファイルなし）"""
+        unsupported = _post([("spec.pdf", b"%PDF")], [("user.py", CODE_PY.encode())]).json()
+        no_code = _post([("spec.md", DESIGN_MD.encode())], [("script.js", b"1")]).json()
+        bad_options = client.post(
+            "/api/map",
+            files=[("designs", ("spec.md", DESIGN_MD.encode())), ("codeFiles", ("user.py", CODE_PY.encode()))],
+            data={"options": json.dumps({"maxDepth": 9})},
+        ).json()
+
+        assert unsupported["success"] is False
+        assert "spec.pdf" in unsupported["error"]
+        assert no_code["success"] is False
+        assert bad_options["success"] is False
+        assert "options" in bad_options["error"]
+
+    def test_ut_map_006_stream_invalid_input(self):
+        """UT-MAP-006: stream=True の入力エラーはNDJSONのエラーレコード"""
+        unsupported = _post(
+            [("spec.pdf", b"%PDF")], [("user.py", CODE_PY.encode())], stream=True
+        )
+        bad_options = _post(
+            [("spec.md", DESIGN_MD.encode())], [("user.py", CODE_PY.encode())],
+            stream=True, maxDepth=9,
+        )
+
+        for response, expected in ((unsupported, "spec.pdf"), (bad_options, "options")):
+            assert response.headers["content-type"].startswith("application/x-ndjson")
+            records = [json.loads(line) for line in response.text.splitlines()]
+            assert len(records) == 1
+            assert records[0]["type"] == "error"
+            assert records[0]["success"] is False
+            assert expected in records[0]["error"]
+
+
+class TestRunMapPipeline:
+    """run_map_pipeline() のテスト"""
+
+    @patch("app.routers.review.get_llm_provider")
+    @patch("app.routers.map_pipeline.convert_excel_to_markdown")
+    def test_ut_map_005_convert_failure(self, mock_convert, mock_get_provider):
+        """UT-MAP-005: 変換の失敗で残りの処理を打ち切る"""
+        provider = _mock_provider(mock_get_provider)
+        mock_convert.side_effect = ValueError("変換できません")
+
+        data = _post([("spec.xlsx", b"PK")], [("user.py", CODE_PY.encode())]).json()
+
+        assert data["success"] is False
+        assert data["error"] == "[spec.xlsx] 変換できません"
+        provider.send_message.assert_not_called()
@@ -0,0 +1,184 @@
+"""model_router.py / モデル振り分けの単体テスト
+
+テストケース:
+- UT-MRT-001: ModelRouter.decide() - 推定トークン数による段階の選択
+- UT-MRT-002: ModelRouter.decide() - 処理ごとの固定と未設定の段階のフォールバック
+- UT-MRT-003: ModelRouter.from_env() - 環境変数の解釈（プロバイダー別・共通）
+- UT-MRT-004: route_llm_config() - システムLLM / ユーザー指定（modelRouting）の振り分けとメトリクス
+- UT-MRT-005: get_llm_provider() - 振り分けたプロバイダーの呼び出し所要時間を段階別に記録
+- UT-MRT-006: review_group() - 処理名と推定トークン数をプロバイダー取得に渡す
+- UT-MRT-007: get_llm_provider() - リクエスト内では振り分け先のモデルごとにプロバイダーを使い回す
+"""
+
+import asyncio
+from unittest.mock import MagicMock, patch
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models.schemas import LLMConfig
+from app.services.cancellation import run_until_disconnected
+from app.services.llm_service import get_llm_provider, route_llm_config, send_message_async
+from app.services.metrics import get_metrics
+from app.services.model_router import ModelRouter
+
+client = TestClient(app)
+
+
+def _router(**kwargs) -> ModelRouter:
+    params = {
+        "fast_models": {"anthropic": "fast-model"},
+        "long_models": {"*": "long-model"},
+        "fast_max_tokens": 1000,
+        "long_min_tokens": 50000,
+    }
+    params.update(kwargs)
+    return ModelRouter(**params)
+
+
+class TestModelRouter:
+    """ModelRouter のテスト"""
+
+    def test_ut_mrt_001_decide_by_size(self):
+        """UT-MRT-001: 推定トークン数による段階の選択"""
+        router = _router()
+
+        short = router.decide("anthropic", "base", "review_group", 500)
+        medium = router.decide("anthropic", "base", "review_group", 5000)
+        long = router.decide("anthropic", "base", "review_group", 80000)
+        unknown = router.decide("anthropic", "base", "review_group")
+
+        assert (short.tier, short.model, short.reason) == ("fast", "fast-model", "short_prompt")
+        assert (medium.tier, medium.model) == ("default", "base")
+        assert (long.tier, long.model) == ("long", "long-model")
+        assert (unknown.tier, unknown.reason) == ("default", "unknown_size")
+
+    def test_ut_mrt_002_override_and_fallback(self):
+        """UT-MRT-002: 処理ごとの固定と未設定の段階のフォールバック"""
+        router = _router(route_overrides={"structure_matching": "long", "bad": "huge"})
+
+        forced = router.decide("anthropic", "base", "structure_matching", 10)
+        # 段階のモデルが未設定のプロバイダーは設定されたモデルを使う
+        fallback = router.decide("openai", "base", "review_group", 10)
+        # 不正な段階の指定は無視する
+        ignored = router.decide("anthropic", "base", "bad", 10)
+
+        assert (forced.tier, forced.model, forced.reason) == ("long", "long-model", "override")
+        assert (fallback.tier, fallback.model) == ("default", "base")
+        assert ignored.tier == "fast"
+
+    def test_ut_mrt_003_from_env(self, monkeypatch):
+        """UT-MRT-003: 環境変数の解釈（プロバイダー別・共通）"""
+        monkeypatch.setenv("LLM_FAST_MODEL", "anthropic=haiku, openai=mini")
+        monkeypatch.setenv("LLM_LONG_CONTEXT_MODEL", "long-any")
+        monkeypatch.setenv("LLM_FAST_MAX_PROMPT_TOKENS", "200")
+        monkeypatch.setenv("LLM_ROUTE_OVERRIDES", "integrate_reviews=fast")
+
+        router = ModelRouter.from_env()
+
+        assert router.decide("openai", "base", "x", 100).model == "mini"
+        assert router.decide("openai", "base", "x", 300).model == "base"
+        assert router.decide("bedrock", "base", "x", 10**6).model == "long-any"
+        assert router.decide("anthropic", "base", "integrate_reviews", 10**6).model == "haiku"
+
+
+class TestRouteLLMConfig:
+    """route_llm_config() / get_llm_provider() のテスト"""
+
+    def setup_method(self):
+        get_metrics().reset()
+
+    @patch("app.services.llm_service.get_model_router")
+    def test_ut_mrt_004_route_llm_config(self, mock_get_router):
+        """UT-MRT-004: システムLLM / ユーザー指定（modelRouting）の振り分けとメトリクス"""
+        mock_get_router.return_value = _router(fast_models={"*": "fast-model"})
+        user_config = LLMConfig(provider="anthropic", model="base", apiKey="k")
+
+        system_config, system_decision = route_llm_config(None, "review_group", 10)
+        unrouted, unrouted_decision = route_llm_config(user_config, "review_group", 10)
+        opted_in = user_config.model_copy(update={"modelRouting": True})
+        routed, routed_decision = route_llm_config(opted_in, "review_group", 10)
+        no_route, no_route_decision = route_llm_config(opted_in)
+
+        assert system_config.provider == "bedrock" and system_config.model == "fast-model"
+        assert system_decision.tier == "fast"
+        # ユーザー指定のモデルは modelRouting が無効なら変更しない
+        assert unrouted is user_config and unrouted_decision is None
+        assert routed.model == "fast-model" and routed.apiKey == "k"
+        assert routed_decision.tier == "fast"
+        assert no_route.model == "base" and no_route_decision is None
+        assert get_metrics().get_counter(
+            "llm_route_decisions_total", route="review_group", tier="fast", reason="short_prompt"
+        ) == 2
+
+    @patch("app.services.llm_service.get_model_router")
+    def test_ut_mrt_005_routed_call_metrics(self, mock_get_router):
+        """UT-MRT-005: 振り分けたプロバイダーの呼び出し所要時間を段階別に記録"""
+        mock_get_router.return_value = _router()
+        config = LLMConfig(provider="anthropic", model="base", apiKey="k", modelRouting=True)
+
+        provider = get_llm_provider(config, route="review_group", prompt_tokens=100)
+        provider.send_message = MagicMock(return_value=("ok", 1, 1))
+        provider.send_message.__self__ = provider
+
+        result = asyncio.run(send_message_async(provider, "sys", "msg"))
+
+        assert result == ("ok", 1, 1)
+        assert provider.model_id == "fast-model"
+        observations = get_metrics().snapshot()["observations"]
+        assert observations["llm_routed_call_seconds{operation=unknown,tier=fast}"]["count"] == 1
+
+    @patch("app.services.llm_service.get_model_router")
+    def test_ut_mrt_007_reuse_provider_in_request(self, mock_get_router):
+        """UT-MRT-007: リクエスト内では振り分け先のモデルごとにプロバイダーを使い回す"""
+        mock_get_router.return_value = _router(fast_models={"*": "fast-model"})
+        config = LLMConfig(provider="anthropic", model="base", apiKey="k", modelRouting=True)
+
+        class _Request:
+            async def is_disconnected(self):
+                return False
+
+        async def handler():
+            return (
+                [get_llm_provider(config, route="review_group", prompt_tokens=10) for _ in range(3)],
+                [get_llm_provider(config, route="review_group", prompt_tokens=5000) for _ in range(2)],
+            )
+
+        with patch(
+            "app.services.anthropic_service.AnthropicProvider", side_effect=lambda c: MagicMock()
+        ) as mock_cls:
+            fast, default = asyncio.run(run_until_disconnected(_Request(), "test", handler()))
+            # スコープ外では呼び出しごとに生成する
+            outside = [get_llm_provider(config, route="review_group", prompt_tokens=10)
+                       for _ in range(2)]
+
+        assert all(p is fast[0] for p in fast)
+        assert all(p is default[0] for p in default)
+        assert fast[0] is not default[0]
+        assert outside[0] is not outside[1]
+        models = [call.args[0].model for call in mock_cls.call_args_list]
+        assert models == ["fast-model", "base", "fast-model", "fast-model"]
+
+
+class TestRoutingInRouters:
+    """ルーターからのモデル振り分けのテスト"""
+
+    @patch("app.routers.review.get_llm_provider")
+    def test_ut_mrt_006_review_group_route(self, mock_get_provider):
+        """UT-MRT-006: 処理名と推定トークン数をプロバイダー取得に渡す"""
+        mock_provider = MagicMock()
+        mock_provider.send_message.return_value = ("report", 10, 5)
+        mock_get_provider.return_value = mock_provider
+
+        response = client.post("/api/review/group", json={
+            "groupId": "group1",
+            "groupName": "ユーザー管理",
+            "documentContent": "設計書",
+            "codeContent": "code",
+        })
+
+        assert response.json()["success"] is True
+        mock_get_provider.assert_called_once()
+        kwargs = mock_get_provider.call_args.kwargs
+        assert kwargs["route"] == "review_group"
+        assert kwargs["prompt_tokens"] > 0
@@ -24,6 +24,20 @@ from app.models.schemas import LLMConfig, MarkdownSourceInfo, OrganizeMarkdownRe
 client = TestClient(app)
 
 
+def _failing_wait_for(exc: BaseException):
+    """待機対象のコルーチンを閉じてから exc を送出する wait_for の代替
+
+    コルーチンを閉じずに送出すると、未実行の run_llm_call が後続のテストの
+    ガベージコレクションで "never awaited" の警告になる。
+    """
+
+    def wait_for(coro, *args, **kwargs):
+        coro.close()
+        raise exc
+
+    return wait_for
+
+
 class TestOrganizeMarkdownAPI:
     """organize_markdown_api() のテスト"""
 
@@ -135,7 +149,7 @@ class TestOrganizeMarkdownAPI:
     def test_ut_org_006_timeout(self, mock_wait_for, mock_get_provider):
         """UT-ORG-006: タイムアウト"""
         # タイムアウトをシミュレート
-        mock_wait_for.side_effect = asyncio.TimeoutError()
+        mock_wait_for.side_effect = _failing_wait_for(asyncio.TimeoutError())
         mock_get_provider.return_value = MagicMock()
 
         request = OrganizeMarkdownRequest(
@@ -156,7 +170,7 @@ class TestOrganizeMarkdownAPI:
     def test_ut_org_007_api_error(self, mock_wait_for, mock_get_provider):
         """UT-ORG-007: APIエラー（リトライ後失敗）"""
         # APIエラーをシミュレート
-        mock_wait_for.side_effect = Exception("API Error")
+        mock_wait_for.side_effect = _failing_wait_for(Exception("API Error"))
         mock_get_provider.return_value = MagicMock()
 
         request = OrganizeMarkdownRequest(
@@ -0,0 +1,156 @@
+"""profiler.py / リクエスト単位のプロファイリングの単体テスト
+
+テストケース:
+- UT-PRF-001: should_profile() - 管理者トークン・パスの許可リスト
+- UT-PRF-002: ProfilingMiddleware - cProfile の採取とサマリーの保存
+- UT-PRF-003: ProfilingMiddleware - サンプリングの採取（flamegraph形式）
+- UT-PRF-004: ProfilingMiddleware - 採取中のリクエストはプロファイルしない
+- UT-PRF-005: get_profile_api() - 管理者トークンの確認とサマリーの取得
+- UT-PRF-006: _prune_profiles() - 保存件数の上限
+"""
+
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.datastructures import Headers
+
+from app.main import app
+from app.services import profiler
+from app.services.metrics import get_metrics
+from app.services.profiler import should_profile
+
+client = TestClient(app)
+
+TOKEN = "secret-token"
+
+SPLIT_CODE_REQUEST = {
+    "content": "def hello():\n    return 1\n\n\nclass User:\n    def run(self):\n        pass\n",
+    "filename": "test.py",
+}
+
+
+@pytest.fixture(autouse=True)
+def profile_settings(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiler, "_ADMIN_TOKEN", TOKEN)
+    monkeypatch.setattr(profiler, "_PROFILE_PATHS", [])
+    monkeypatch.setattr(profiler, "_PROFILE_DIR", str(tmp_path))
+    get_metrics().reset()
+    return tmp_path
+
+
+class TestShouldProfile:
+    """should_profile() のテスト"""
+
+    def test_ut_prf_001_should_profile(self, monkeypatch):
+        """UT-PRF-001: 管理者トークン・パスの許可リスト"""
+        assert should_profile(Headers({"X-Profile": TOKEN}), "/api/split/code") is True
+        assert should_profile(Headers({"X-Profile": "wrong"}), "/api/split/code") is False
+        assert should_profile(Headers({}), "/api/split/code") is False
+
+        monkeypatch.setattr(profiler, "_PROFILE_PATHS", ["/api/review/"])
+        assert should_profile(Headers({}), "/api/review/group") is True
+        assert should_profile(Headers({}), "/api/split/code") is False
+
+        # トークン未設定の場合はヘッダーでは有効にならない
+        monkeypatch.setattr(profiler, "_ADMIN_TOKEN", "")
+        assert should_profile(Headers({"X-Profile": ""}), "/api/split/code") is False
+
+
+class TestProfilingMiddleware:
+    """ProfilingMiddleware のテスト"""
+
+    def test_ut_prf_002_cprofile(self, profile_settings):
+        """UT-PRF-002: cProfile の採取とサマリーの保存"""
+        response = client.post(
+            "/api/split/code", json=SPLIT_CODE_REQUEST, headers={"X-Profile": TOKEN}
+        )
+
+        assert response.json()["success"] is True
+        profile_id = response.headers["x-profile-id"]
+        assert os.path.exists(profile_settings / f"{profile_id}.pstats")
+
+        summary = client.get(
+            f"/api/profiles/{profile_id}", headers={"X-Profile": TOKEN}
+        ).json()["profile"]
+        assert summary["path"] == "/api/split/code"
+        assert summary["statusCode"] == 200
+        assert summary["mode"] == "cprofile"
+        assert summary["tracemallocPeakBytes"] > 0
+        assert any("split_code" in f["function"] for f in summary["topFunctions"])
+        assert get_metrics().get_counter("profiles_captured_total", mode="cprofile") == 1
+
+    def test_ut_prf_003_sampling(self, profile_settings):
+        """UT-PRF-003: サンプリングの採取（flamegraph形式）"""
+        response = client.post(
+            "/api/split/code",
+            json=SPLIT_CODE_REQUEST,
+            headers={"X-Profile": TOKEN, "X-Profile-Mode": "sampling"},
+        )
+
+        profile_id = response.headers["x-profile-id"]
+        summary = profiler.load_profile_summary(profile_id)
+        assert summary["mode"] == "sampling"
+        assert summary["profileFile"] == f"{profile_id}.collapsed"
+        with open(profile_settings / summary["profileFile"], encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        assert sum(int(line.rsplit(" ", 1)[1]) for line in lines) == summary["samples"]
+
+    def test_ut_prf_004_busy(self):
+        """UT-PRF-004: 採取中のリクエストはプロファイルしない"""
+        profiler._active.acquire()
+        try:
+            response = client.post(
+                "/api/split/code", json=SPLIT_CODE_REQUEST, headers={"X-Profile": TOKEN}
+            )
+        finally:
+            profiler._active.release()
+
+        assert response.json()["success"] is True
+        assert response.headers["x-profile-status"] == "busy"
+        assert "x-profile-id" not in response.headers
+
+    def test_no_profile_without_header(self, profile_settings):
+        """対象外のリクエストは何も保存しない"""
+        response = client.post("/api/split/code", json=SPLIT_CODE_REQUEST)
+
+        assert "x-profile-id" not in response.headers
+        assert os.listdir(profile_settings) == []
+
+
+class TestProfileAPI:
+    """get_profile_api() のテスト"""
+
+    def test_ut_prf_005_get_profile(self):
+        """UT-PRF-005: 管理者トークンの確認とサマリーの取得"""
+        profile_id = client.post(
+            "/api/split/code", json=SPLIT_CODE_REQUEST, headers={"X-Profile": TOKEN}
+        ).headers["x-profile-id"]
+
+        forbidden = client.get(f"/api/profiles/{profile_id}")
+        found = client.get(f"/api/profiles/{profile_id}", headers={"X-Profile": TOKEN})
+        missing = client.get("/api/profiles/unknown", headers={"X-Profile": TOKEN})
+
+        assert forbidden.status_code == 403
+        assert found.json()["profile"]["id"] == profile_id
+        assert missing.json()["success"] is False
+        assert profiler.load_profile_summary("../etc") is None
+
+
+class TestPruneProfiles:
+    """_prune_profiles() のテスト"""
+
+    def test_ut_prf_006_prune(self, monkeypatch, profile_settings):
+        """UT-PRF-006: 保存件数の上限"""
+        monkeypatch.setattr(profiler, "_MAX_PROFILES", 2)
+        for i in range(4):
+            for ext in ("json", "pstats"):
+                path = profile_settings / f"p{i}.{ext}"
+                path.write_text("{}")
+                os.utime(path, (i, i))
+
+        profiler._prune_profiles(str(profile_settings))
+
+        assert sorted(os.listdir(profile_settings)) == [
+            "p2.json", "p2.pstats", "p3.json", "p3.pstats"
+        ]
@@ -12,8 +12,13 @@
 - UT-RSP-009: integrate_reviews() - 正常系（カスタムシステムプロンプト）
 - UT-RSP-010: integrate_reviews() - エラー（LLMエラー）
 - UT-RSP-011: _extract_json() - JSON抽出テスト
+- UT-RSP-012: integrate_reviews() - 正常系（予算超過時の階層統合）
+- UT-RSP-013: _chunk_reports() - fan-in数・トークン予算によるバッチ分割
+- UT-RSP-014: integrate_reviews() - 2件で予算を超えるレポートのみの場合も統合が終わる
+- UT-RSP-015: integrate_reviews() - 1バッチの集約が失敗したら残りのバッチを打ち切る
 """
 
+import asyncio
 import json
 from unittest.mock import MagicMock, patch
 
@@ -469,6 +474,130 @@ class TestExtractJson:
             _extract_json(text)
 
 
+class TestHierarchicalIntegrate:
+    """階層統合のテスト"""
+
+    @patch("app.routers.review._INTEGRATE_FAN_IN", 4)
+    @patch("app.routers.review._INTEGRATE_TOKEN_BUDGET", 2000)
+    @patch("app.routers.review.get_llm_provider")
+    def test_ut_rsp_012_hierarchical_integrate(self, mock_get_provider):
+        """UT-RSP-012: 正常系（予算超過時の階層統合）"""
+        mock_provider = MagicMock()
+        mock_provider.send_message.return_value = ("中間サマリー", 100, 10)
+        mock_provider.model_id = "test-model"
+        mock_provider.provider_name = "test"
+        mock_get_provider.return_value = mock_provider
+
+        # 16グループ × 約250トークン = 予算（2000）超過
+        request = IntegrateRequest(
+            structureMatching={"groups": []},
+            groupReviews=[
+                GroupReviewSummary(
+                    groupId=f"group{i}", groupName=f"G{i}", report="指摘" * 100
+                )
+                for i in range(16)
+            ],
+        )
+
+        response = client.post("/api/review/integrate", json=request.model_dump())
+
+        data = response.json()
+        assert data["success"] is True
+        # reduce 4回（16件 → 4件）+ 最終統合 1回
+        assert mock_provider.send_message.call_count == 5
+        assert data["tokensUsed"] == {"input": 500, "output": 50}
+        assert data["integratedReport"]["statistics"]["reduceLevels"] == 1
+        final_message = mock_provider.send_message.call_args[0][1]
+        assert final_message.count("### 中間サマリー") == 4
+        assert "指摘指摘" not in final_message
+
+    def test_ut_rsp_013_chunk_reports(self):
+        """UT-RSP-013: fan-in数・トークン予算によるバッチ分割"""
+        from app.routers.review import _chunk_reports
+
+        items = [(f"G{i}", "x" * 40) for i in range(5)]  # 各約10トークン
+
+        assert [len(b) for b in _chunk_reports(items, 2, 1000)] == [2, 2, 1]
+        assert [len(b) for b in _chunk_reports(items, 8, 25)] == [2, 2, 1]
+        # 順序を保持する
+        flattened = [item for b in _chunk_reports(items, 3, 1000) for item in b]
+        assert flattened == items
+        # min_batch 未満のバッチは予算を超えても区切らない
+        assert [len(b) for b in _chunk_reports(items, 8, 5, min_batch=2)] == [2, 3]
+
+    @patch("app.routers.review._INTEGRATE_TOKEN_BUDGET", 2000)
+    @patch("app.routers.review.get_llm_provider")
+    def test_ut_rsp_014_near_budget_reports(self, mock_get_provider):
+        """UT-RSP-014: どの2件も予算に収まらないレポートでも統合が終わる"""
+        mock_provider = MagicMock()
+        mock_provider.send_message.return_value = ("中間サマリー", 100, 10)
+        mock_provider.model_id = "test-model"
+        mock_provider.provider_name = "test"
+        mock_get_provider.return_value = mock_provider
+
+        # 各約1500トークン（1件は予算内、2件では予算超過）
+        request = IntegrateRequest(
+            structureMatching={"groups": []},
+            groupReviews=[
+                GroupReviewSummary(groupId=f"group{i}", groupName=f"G{i}", report="指摘" * 500)
+                for i in range(2)
+            ],
+        )
+
+        response = client.post("/api/review/integrate", json=request.model_dump())
+
+        data = response.json()
+        assert data["success"] is True
+        # reduce 1回（2件 → 1件）+ 最終統合 1回
+        assert mock_provider.send_message.call_count == 2
+        assert data["integratedReport"]["statistics"]["reduceLevels"] == 1
+
+
+    @patch("app.routers.review._INTEGRATE_FAN_IN", 4)
+    @patch("app.routers.review._INTEGRATE_TOKEN_BUDGET", 2000)
+    @patch("app.routers.review.get_llm_provider")
+    def test_ut_rsp_015_cancel_reduce_on_failure(self, mock_get_provider):
+        """UT-RSP-015: 1バッチの集約が失敗したら残りのバッチを打ち切る"""
+        from app.routers.review import integrate_reviews
+
+        mock_get_provider.return_value = MagicMock()
+        cancelled = []
+
+        async def send_message_async(provider, system_prompt, user_message):
+            if "G0" in user_message:
+                raise RuntimeError("LLM error")
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                cancelled.append(user_message)
+                raise
+            return "中間サマリー", 0, 0
+
+        class _Request:
+            headers: dict = {}
+
+            async def is_disconnected(self) -> bool:
+                return False
+
+        request = IntegrateRequest(
+            structureMatching={"groups": []},
+            groupReviews=[
+                GroupReviewSummary(groupId=f"group{i}", groupName=f"G{i}", report="指摘" * 100)
+                for i in range(16)
+            ],
+        )
+
+        async def scenario():
+            response = await integrate_reviews(request, http_request=_Request())
+            assert response.success is False
+            # キャンセルされたタスクが CancelledError を処理するまで進める
+            await asyncio.sleep(0)
+            # イベントループの終了時ではなく、失敗の時点で打ち切られている
+            assert len(cancelled) == 3
+
+        with patch("app.routers.review.send_message_async", side_effect=send_message_async):
+            asyncio.run(asyncio.wait_for(scenario(), timeout=5))
+
 class TestStructureMatchingWithLLMConfig:
     """LLMConfig指定時のstructure_matching()テスト"""
 
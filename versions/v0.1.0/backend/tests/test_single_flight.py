@@ -0,0 +1,209 @@
+"""single_flight.py / send_message_async() の単体テスト
+
+テストケース:
+- UT-SFL-001: SingleFlight.do() - 同時の同一キーは1回だけ実行して結果を共有
+- UT-SFL-002: SingleFlight.do() - 例外を全ての待機者に伝播
+- UT-SFL-003: SingleFlight.do() - 一部の待機者のキャンセルは他に影響しない
+- UT-SFL-004: SingleFlight.do() - 全ての待機者がキャンセルされたら呼び出しを中断
+- UT-SFL-005: SingleFlight.do() - 完了後の同一キーは再実行（結果をキャッシュしない）
+- UT-SFL-006: send_message_async() - 同一内容の集約と、認証情報の異なる呼び出しの分離
+- UT-SFL-007: LLMProvider.close() - 共有中は close を遅延する
+- UT-SFL-008: SingleFlight.do() - 期限は待機者ごとに適用し、呼び出しは先頭の期限を引き継がない
+"""
+
+import asyncio
+import time
+from unittest.mock import MagicMock
+
+from app.models.schemas import LLMConfig
+from app.services.anthropic_service import AnthropicProvider
+from app.services.deadline import DeadlineExceededError, deadline_scope, remaining_seconds
+from app.services.llm_service import send_message_async
+from app.services.single_flight import SingleFlight
+
+
+class TestSingleFlight:
+    """SingleFlight のテスト"""
+
+    def test_ut_sfl_001_coalesce(self):
+        """UT-SFL-001: 同時の同一キーは1回だけ実行して結果を共有"""
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "result"
+
+        async def scenario():
+            flight = SingleFlight()
+            results = await asyncio.gather(*(flight.do("k", work) for _ in range(5)))
+            return results, flight.inflight_count()
+
+        results, inflight = asyncio.run(scenario())
+
+        assert results == ["result"] * 5
+        assert len(calls) == 1
+        assert inflight == 0
+
+    def test_ut_sfl_002_error_propagation(self):
+        """UT-SFL-002: 例外を全ての待機者に伝播"""
+
+        async def work():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("API error")
+
+        async def scenario():
+            flight = SingleFlight()
+            return await asyncio.gather(
+                flight.do("k", work), flight.do("k", work), return_exceptions=True
+            )
+
+        results = asyncio.run(scenario())
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+    def test_ut_sfl_003_partial_cancel(self):
+        """UT-SFL-003: 一部の待機者のキャンセルは他に影響しない"""
+        cancelled = []
+
+        async def work():
+            try:
+                await asyncio.sleep(0.1)
+            except asyncio.CancelledError:
+                cancelled.append(1)
+                raise
+            return "result"
+
+        async def scenario():
+            flight = SingleFlight()
+            first = asyncio.ensure_future(flight.do("k", work))
+            second = asyncio.ensure_future(flight.do("k", work))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            return await second, first.cancelled()
+
+        result, first_cancelled = asyncio.run(scenario())
+
+        assert result == "result"
+        assert first_cancelled
+        assert cancelled == []
+
+    def test_ut_sfl_004_cancel_all(self):
+        """UT-SFL-004: 全ての待機者がキャンセルされたら呼び出しを中断"""
+        cancelled = []
+
+        async def work():
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                cancelled.append(1)
+                raise
+
+        async def scenario():
+            flight = SingleFlight()
+            waiters = [asyncio.ensure_future(flight.do("k", work)) for _ in range(2)]
+            await asyncio.sleep(0.01)
+            for waiter in waiters:
+                waiter.cancel()
+            await asyncio.sleep(0.01)
+            return flight.inflight_count()
+
+        inflight = asyncio.run(scenario())
+
+        assert cancelled == [1]
+        assert inflight == 0
+
+    def test_ut_sfl_005_no_caching(self):
+        """UT-SFL-005: 完了後の同一キーは再実行（結果をキャッシュしない）"""
+        calls = []
+
+        async def work():
+            calls.append(1)
+            return len(calls)
+
+        async def scenario():
+            flight = SingleFlight()
+            return [await flight.do("k", work), await flight.do("k", work)]
+
+        assert asyncio.run(scenario()) == [1, 2]
+
+    def test_ut_sfl_008_deadline_per_waiter(self):
+        """UT-SFL-008: 期限は待機者ごとに適用し、呼び出しは先頭の期限を引き継がない"""
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.2)
+            return remaining_seconds()
+
+        async def leader(flight):
+            with deadline_scope(0.05):
+                return await flight.do("k", work)
+
+        async def joiner(flight):
+            await asyncio.sleep(0)
+            with deadline_scope(10):
+                return await flight.do("k", work)
+
+        async def scenario():
+            flight = SingleFlight()
+            return await asyncio.gather(
+                leader(flight), joiner(flight), return_exceptions=True
+            )
+
+        leader_result, joiner_result = asyncio.run(scenario())
+
+        assert isinstance(leader_result, DeadlineExceededError)
+        # 先頭の待機者の期限切れ後も、合流した待機者は共有の結果を受け取る
+        assert joiner_result is None
+        assert calls == [1]
+
+
+def _provider(api_key: str, delay: float = 0.05) -> AnthropicProvider:
+    provider = AnthropicProvider(
+        LLMConfig(provider="anthropic", model="test-model", apiKey=api_key)
+    )
+    provider._client = MagicMock()
+
+    def send_message(system_prompt, user_message):
+        time.sleep(delay)
+        return f"{system_prompt}:{user_message}", 10, 5
+
+    provider.send_message = MagicMock(side_effect=send_message)
+    return provider
+
+
+class TestSendMessageAsync:
+    """send_message_async() のテスト"""
+
+    def test_ut_sfl_006_coalesce_by_content_and_credentials(self):
+        """UT-SFL-006: 同一内容の集約と、認証情報の異なる呼び出しの分離"""
+        first = _provider("key-a")
+        second = _provider("key-a")
+        other_key = _provider("key-b")
+
+        async def scenario():
+            return await asyncio.gather(
+                send_message_async(first, "sys", "msg"),
+                send_message_async(second, "sys", "msg"),
+                send_message_async(first, "sys", "other"),
+                send_message_async(other_key, "sys", "msg"),
+            )
+
+        results = asyncio.run(scenario())
+
+        assert results[0] == results[1] == ("sys:msg", 10, 5)
+        # 同一内容・同一認証情報の2件は1回の呼び出しに集約される
+        assert first.send_message.call_count + second.send_message.call_count == 2
+        assert other_key.send_message.call_count == 1
+
+    def test_ut_sfl_007_close_deferred_while_pinned(self):
+        """UT-SFL-007: 共有中は close を遅延する"""
+        provider = _provider("key-a")
+
+        provider.pin()
+        provider.close()
+        provider._client.close.assert_not_called()
+
+        provider.unpin()
+        provider._client.close.assert_called_once()
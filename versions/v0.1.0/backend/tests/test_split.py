@@ -11,8 +11,16 @@
 - UT-SPL-008: split_code() - エラー（未対応言語）
 - UT-SPL-009: split_code() - エラー（パースエラー）
 - UT-SPL-010: _estimate_tokens() - トークン数推定
+- UT-SPL-011: split_markdown() - NDJSONストリーミング（パーツ → INDEX → MAP → 完了）
+- UT-SPL-012: split_code() - NDJSONストリーミング（言語を完了レコードに含む）
+- UT-SPL-013: split_code() - NDJSONストリーミングのエラー
+- UT-SPL-014: split_markdown_source() - AIモードの分割結果のキャッシュ
+- UT-SPL-015: warm_up_nlp_tokenizer() - 起動時のNLP辞書の読み込み
+- UT-SPL-016: split_markdown() / split_code() - includeContent=False はハッシュのみ返す
 """
 
+import json
+
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -488,6 +496,108 @@ class TestSplitCodeAPI:
         assert "エラー" in data["error"]
 
 
+def _ndjson_records(response) -> list[dict]:
+    return [json.loads(line) for line in response.text.splitlines() if line]
+
+
+class TestSplitStreaming:
+    """stream=True（NDJSON）のテスト"""
+
+    def test_ut_spl_011_markdown_stream(self):
+        """UT-SPL-011: NDJSONストリーミング（パーツ → INDEX → MAP → 完了）"""
+        request = SplitMarkdownRequest(
+            content="# 概要\n\n概要です。\n\n## 詳細\n\n詳細です。\n",
+            filename="test.md",
+            splitMode="heading",
+            stream=True,
+        )
+
+        response = client.post("/api/split/markdown", json=request.model_dump())
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        records = _ndjson_records(response)
+        assert [r["type"] for r in records] == ["part", "part", "index", "map", "done"]
+        assert [r["part"]["id"] for r in records[:2]] == ["MD1", "MD2"]
+        assert "詳細です。" in records[1]["part"]["content"]
+        assert records[2]["indexHash"] and records[3]["mapHash"]
+        assert records[4] == {"type": "done", "success": True, "totalParts": 2}
+
+        # 非ストリーミングと同じパーツを返す
+        plain = client.post(
+            "/api/split/markdown", json={**request.model_dump(), "stream": False}
+        ).json()
+        assert plain["parts"] == [r["part"] for r in records[:2]]
+        assert plain["mapJson"] == records[3]["mapJson"]
+
+    def test_ut_spl_012_code_stream(self):
+        """UT-SPL-012: NDJSONストリーミング（言語を完了レコードに含む）"""
+        request = SplitCodeRequest(
+            content="def hello():\n    return 1\n\n\ndef bye():\n    return 2\n",
+            filename="test.py",
+            includeContent=False,
+            stream=True,
+        )
+
+        response = client.post("/api/split/code", json=request.model_dump())
+
+        records = _ndjson_records(response)
+        parts = [r["part"] for r in records if r["type"] == "part"]
+        assert [p["symbol"] for p in parts] == ["hello", "bye"]
+        assert all(p["content"] is None and p["contentHash"] for p in parts)
+        index, map_record = [r for r in records if r["type"] in ("index", "map")]
+        assert index["indexHash"] and "indexContent" not in index
+        assert map_record["mapHash"] and "mapJson" not in map_record
+        assert records[-1] == {
+            "type": "done", "success": True, "totalParts": 2, "language": "python"
+        }
+
+    def test_ut_spl_013_stream_error(self):
+        """UT-SPL-013: NDJSONストリーミングのエラー"""
+        request = SplitCodeRequest(
+            content="console.log('hello');", filename="test.js", stream=True
+        )
+
+        response = client.post("/api/split/code", json=request.model_dump())
+
+        records = _ndjson_records(response)
+        assert len(records) == 1
+        assert records[0]["type"] == "error"
+        assert records[0]["success"] is False
+        assert "未対応" in records[0]["error"]
+
+
+class TestSplitHashOnly:
+    """includeContent=False のテスト"""
+
+    def test_ut_spl_016_hash_only(self):
+        """UT-SPL-016: includeContent=False はパーツ・INDEX.md・MAP.json をハッシュのみ返す"""
+        from app.services.artifact_store import get_artifact_store
+
+        store = get_artifact_store()
+        for path, body in (
+            ("/api/split/markdown", {
+                "content": "# 概要\n\n概要です。\n\n## 詳細\n\n詳細です。\n",
+                "filename": "test.md",
+                "splitMode": "heading",
+            }),
+            ("/api/split/code", {
+                "content": "def hello():\n    return 1\n",
+                "filename": "test.py",
+            }),
+        ):
+            full = client.post(path, json=body).json()
+            hashed = client.post(path, json={**body, "includeContent": False}).json()
+
+            assert hashed["success"] is True
+            assert hashed["indexContent"] is None and hashed["mapJson"] is None
+            assert all(p["content"] is None for p in hashed["parts"])
+            # ハッシュから同じ内容を取得できる
+            assert hashed["indexHash"] == full["indexHash"]
+            assert store.get(hashed["indexHash"]) == full["indexContent"]
+            assert store.get_json(hashed["mapHash"]) == full["mapJson"]
+
+
 class TestEstimateTokens:
     """_estimate_tokens() のテスト"""
 
@@ -517,3 +627,73 @@ class TestEstimateTokens:
         tokens = _estimate_tokens(text)
         expected = int(2 * 1.5 + 5 * 0.25)  # 日本語2文字 + 英語5文字
         assert tokens == expected
+
+
+class TestMd2mapAICache:
+    """md2map の AI 分割キャッシュのテスト"""
+
+    def test_ut_spl_014_ai_cache(self, tmp_path, monkeypatch):
+        """UT-SPL-014: AIモードの分割結果のキャッシュ"""
+        from md2map.llm.split_cache import AISplitCache
+
+        from app.routers import split
+        from app.routers.split import _CancellableMd2mapProvider, split_markdown_source
+
+        monkeypatch.setattr(split, "_md2map_ai_cache", AISplitCache(tmp_path))
+        source = "# 概要\n\n" + "".join(f"段落{i}の本文です。" * 60 + "\n\n" for i in range(4))
+
+        def build_provider(model):
+            inner = MagicMock()
+            inner.provider_name = "bedrock"
+            inner.model_id = model
+            inner.send_message.return_value = json.dumps([
+                {"start_line": 1, "end_line": 4},
+                {"start_line": 5, "end_line": 9},
+            ])
+            return inner
+
+        first = build_provider("model-a")
+        second = build_provider("model-a")
+        other_model = build_provider("model-b")
+        outputs = [
+            split_markdown_source(source, "spec.md", 2, "ai", _CancellableMd2mapProvider(inner))
+            for inner in (first, second, other_model)
+        ]
+
+        assert first.send_message.call_count == 1
+        # 同じ本文・モデルならLLMを呼び出さずに同じ結果を返す
+        assert second.send_message.call_count == 0
+        assert other_model.send_message.call_count == 1
+        assert outputs[0].map_json == outputs[1].map_json
+        assert len(outputs[0].items) == 3
+
+
+class TestNlpWarmUp:
+    """warm_up_nlp_tokenizer() のテスト"""
+
+    def test_ut_spl_015_warm_up(self):
+        """UT-SPL-015: 起動時のNLP辞書の読み込み"""
+        from app.routers import split
+
+        with patch.object(split, "warm_up_nlp_tokenizer") as warm_up:
+            with TestClient(app):
+                pass
+        warm_up.assert_called_once()
+
+        # sudachipy がない環境でも起動を妨げない
+        with patch(
+            "md2map.parsers.noun_extractor.warm_up", side_effect=RuntimeError("no sudachipy")
+        ):
+            split.warm_up_nlp_tokenizer()
+
+        # NLPモードの分割リクエストはプロセス共通の辞書で処理する
+        split.warm_up_nlp_tokenizer()
+        response = client.post(
+            "/api/split/markdown",
+            json={
+                "content": "# 概要\n\n" + "設計書の仕様を説明する。\n\n" * 80,
+                "filename": "spec.md",
+                "splitMode": "nlp",
+            },
+        )
+        assert response.json()["success"] is True
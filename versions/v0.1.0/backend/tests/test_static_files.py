@@ -0,0 +1,103 @@
+"""static_files.py / フロントエンドの静的ファイル配信の単体テスト
+
+テストケース:
+- UT-STA-001: is_hashed_asset() - ハッシュ付きのビルド成果物の判定
+- UT-STA-002: PrecompressedStaticFiles - Accept-Encoding に応じた圧縮済みファイルの配信
+- UT-STA-003: PrecompressedStaticFiles - Cache-Control（immutable / no-cache）
+- UT-STA-004: PrecompressedStaticFiles - ETag / If-None-Match による 304 応答
+"""
+
+import gzip
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.services.static_files import (
+    IMMUTABLE_CACHE_CONTROL,
+    REVALIDATE_CACHE_CONTROL,
+    PrecompressedStaticFiles,
+    is_hashed_asset,
+)
+
+INDEX_HTML = b"<!doctype html><html><body>" + b"x" * 2000 + b"</body></html>"
+BUNDLE_JS = b"console.log('hello');\n" * 200
+
+
+@pytest.fixture
+def static_client(tmp_path):
+    (tmp_path / "assets").mkdir()
+    (tmp_path / "index.html").write_bytes(INDEX_HTML)
+    (tmp_path / "index.html.gz").write_bytes(gzip.compress(INDEX_HTML))
+    (tmp_path / "assets" / "index-AbC_12-z.js").write_bytes(BUNDLE_JS)
+    (tmp_path / "assets" / "index-AbC_12-z.js.br").write_bytes(b"brotli-bytes")
+    (tmp_path / "assets" / "index-AbC_12-z.js.gz").write_bytes(gzip.compress(BUNDLE_JS))
+    (tmp_path / "favicon.svg").write_bytes(b"<svg/>")
+    return TestClient(PrecompressedStaticFiles(directory=str(tmp_path), html=True))
+
+
+class TestIsHashedAsset:
+    """is_hashed_asset() のテスト"""
+
+    def test_ut_sta_001_hashed_asset(self):
+        """UT-STA-001: ハッシュ付きのビルド成果物の判定"""
+        assert is_hashed_asset("/dist/assets/index-AbC_12-z.js") is True
+        assert is_hashed_asset("/dist/assets/vendor-0123abcd.css") is True
+        assert is_hashed_asset("/dist/index.html") is False
+        assert is_hashed_asset("/dist/assets/logo.svg") is False
+        assert is_hashed_asset("/dist/images/photo-0123abcd.png") is False
+
+
+class TestPrecompressedStaticFiles:
+    """PrecompressedStaticFiles のテスト"""
+
+    def test_ut_sta_002_precompressed(self, static_client):
+        """UT-STA-002: Accept-Encoding に応じた圧縮済みファイルの配信"""
+        # brotli の展開にはライブラリが必要なため本文を受け取らない HEAD で確認する
+        br = static_client.head("/assets/index-AbC_12-z.js", headers={"Accept-Encoding": "gzip, br"})
+        gz = static_client.get("/assets/index-AbC_12-z.js", headers={"Accept-Encoding": "gzip"})
+        identity = static_client.get("/assets/index-AbC_12-z.js", headers={"Accept-Encoding": "identity"})
+        no_variant = static_client.get("/favicon.svg", headers={"Accept-Encoding": "gzip, br"})
+
+        assert br.headers["content-encoding"] == "br"
+        assert br.headers["content-type"].split(";")[0] in ("text/javascript", "application/javascript")
+        assert br.headers["vary"] == "Accept-Encoding"
+        assert gz.headers["content-encoding"] == "gzip"
+        assert gz.content == BUNDLE_JS  # httpx が展開する
+        assert "content-encoding" not in identity.headers
+        assert identity.content == BUNDLE_JS
+        assert identity.headers["vary"] == "Accept-Encoding"
+        # 圧縮済みファイルがなければ元のファイルのみ（Vary も付けない）
+        assert "content-encoding" not in no_variant.headers
+        assert "vary" not in no_variant.headers
+        # エンコーディングごとに別の ETag になる
+        assert len({br.headers["etag"], gz.headers["etag"], identity.headers["etag"]}) == 3
+
+    def test_ut_sta_003_cache_control(self, static_client):
+        """UT-STA-003: Cache-Control（immutable / no-cache）"""
+        asset = static_client.head("/assets/index-AbC_12-z.js")
+        index = static_client.get("/")
+        favicon = static_client.get("/favicon.svg")
+
+        assert asset.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+        assert index.headers["cache-control"] == REVALIDATE_CACHE_CONTROL
+        assert favicon.headers["cache-control"] == REVALIDATE_CACHE_CONTROL
+
+    def test_ut_sta_004_not_modified(self, static_client):
+        """UT-STA-004: ETag / If-None-Match による 304 応答"""
+        first = static_client.get("/index.html", headers={"Accept-Encoding": "gzip"})
+        etag = first.headers["etag"]
+
+        cached = static_client.get(
+            "/index.html", headers={"Accept-Encoding": "gzip", "If-None-Match": etag}
+        )
+        other_encoding = static_client.get(
+            "/index.html", headers={"Accept-Encoding": "identity", "If-None-Match": etag}
+        )
+
+        assert first.headers["content-encoding"] == "gzip"
+        assert cached.status_code == 304
+        assert cached.content == b""
+        assert cached.headers["etag"] == etag
+        assert cached.headers["cache-control"] == REVALIDATE_CACHE_CONTROL
+        assert other_encoding.status_code == 200
+        assert other_encoding.content == INDEX_HTML
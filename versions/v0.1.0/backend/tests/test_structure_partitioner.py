@@ -0,0 +1,234 @@
+"""structure_partitioner.py / 段階的構造マッチングの単体テスト
+
+テストケース:
+- UT-SPT-001: split_chapters() - 見出しレベルによる章の分割
+- UT-SPT-002: build_chapter_outline() / build_file_outline() - 粗い照合用の概要
+- UT-SPT-003: parse_chapter_files() - 不明な章・ファイルの除外
+- UT-SPT-004: structure_matching() - 段階的照合（粗い照合 → 章ごとの細かい照合 → 統合）
+- UT-SPT-005: structure_matching() - 関連ファイルのない章は細かい照合を行わない
+- UT-SPT-006: _hierarchical_structure_matching() - 1組の失敗で残りの組を打ち切る
+"""
+
+import asyncio
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routers.review import _hierarchical_structure_matching
+from app.services.structure_partitioner import (
+    Chapter,
+    build_chapter_outline,
+    build_file_outline,
+    parse_chapter_files,
+    split_chapters,
+)
+
+client = TestClient(app)
+
+
+DOC_INDEX = """# INDEX
+
+### [MD1] ユーザー管理 (H1)
+- summary: ユーザーの登録・削除
+
+### [MD2] 登録 (H2)
+- summary: ユーザーを登録する
+
+### [MD3] 入力チェック (H3)
+- summary: 入力値を検証する
+
+### [MD4] 帳票 (H2)
+- summary: 帳票を出力する
+"""
+
+DOC_MAP = {
+    "sections": [
+        {"id": "MD1", "title": "ユーザー管理", "level": 1, "path": "ユーザー管理", "startLine": 1, "endLine": 40},
+        {"id": "MD2", "title": "登録", "level": 2, "path": "ユーザー管理 > 登録", "startLine": 3, "endLine": 20},
+        {"id": "MD3", "title": "入力チェック", "level": 3, "path": "ユーザー管理 > 登録 > 入力チェック", "startLine": 10, "endLine": 20},
+        {"id": "MD4", "title": "帳票", "level": 2, "path": "ユーザー管理 > 帳票", "startLine": 21, "endLine": 40},
+    ]
+}
+
+
+def _code_file(filename: str, symbol: str) -> dict:
+    return {
+        "filename": filename,
+        "indexMd": f"# CODE INDEX\n\n- [CD1] {symbol} (L1-L50)\n  - role: {symbol} の実装\n",
+        "mapJson": {
+            "symbols": [
+                {"id": "CD1", "symbol": symbol, "type": "class", "original_file": filename},
+                {"id": "CD2", "symbol": f"{symbol}.run", "type": "method", "original_file": filename},
+            ]
+        },
+    }
+
+
+class TestPartitioner:
+    """章の分割・概要構築のテスト"""
+
+    def test_ut_spt_001_split_chapters(self):
+        """UT-SPT-001: 見出しレベルによる章の分割"""
+        chapters = split_chapters(DOC_MAP)
+
+        assert [(c.id, c.section_ids) for c in chapters] == [
+            ("MD1", ["MD1"]),
+            ("MD2", ["MD2", "MD3"]),
+            ("MD4", ["MD4"]),
+        ]
+        # 閾値を下げると H2 以下は直前の章に含まれる
+        assert [c.section_ids for c in split_chapters(DOC_MAP, max_level=1)] == [
+            ["MD1", "MD2", "MD3", "MD4"]
+        ]
+
+    def test_ut_spt_002_outlines(self):
+        """UT-SPT-002: 粗い照合用の概要"""
+        chapters = split_chapters(DOC_MAP)
+        outline = build_chapter_outline(chapters, DOC_MAP, {"MD2": "ユーザーを登録する"})
+
+        assert "- [MD2] 登録\n  - 概要: ユーザーを登録する\n  - 配下: 入力チェック" in outline
+
+        code = _code_file("user.py", "UserService")
+        file_outline = build_file_outline("user.py", code["mapJson"], {"CD1": "登録処理"})
+
+        # トップレベルのシンボルのみを列挙する
+        assert file_outline == "- user.py\n  - UserService: 登録処理"
+
+    def test_ut_spt_003_parse_chapter_files(self):
+        """UT-SPT-003: 不明な章・ファイルの除外"""
+        chapters = [Chapter(id="MD1", title="a"), Chapter(id="MD2", title="b")]
+        result = {
+            "chapters": [
+                {"id": "MD2", "files": ["b.py", "unknown.py", "b.py"]},
+                {"id": "MD9", "files": ["a.py"]},
+                {"id": "MD1", "files": ["a.py"]},
+            ]
+        }
+
+        pairs = parse_chapter_files(result, chapters, ["a.py", "b.py"])
+
+        assert [(chapter.id, files) for chapter, files in pairs] == [
+            ("MD1", ["a.py"]),
+            ("MD2", ["b.py"]),
+        ]
+
+
+def _hierarchical_provider(chapter_files: list[dict]) -> MagicMock:
+    """粗い照合には chapter_files を、細かい照合には受け取ったIDで1グループを返すプロバイダー"""
+
+    def send_message(system_prompt, user_message):
+        if '"chapters"' in system_prompt:
+            return json.dumps({"chapters": chapter_files}), 10, 5
+        map_json = user_message.split("### MAP.json\n", 1)[1].split("\n\n## コード構造", 1)[0]
+        section = json.loads(map_json)["sections"][0]
+        filename = user_message.split("## コード構造: ", 1)[1].split("\n", 1)[0]
+        return json.dumps({
+            "groups": [{
+                "id": "group1",
+                "name": section["title"],
+                "doc_sections": [{"id": section["id"], "title": section["title"], "path": section["path"]}],
+                "code_symbols": [{"id": "CD1", "filename": filename, "symbol": "X"}],
+                "reason": "test",
+            }]
+        }), 100, 50
+
+    provider = MagicMock()
+    provider.send_message.side_effect = send_message
+    provider.model_id = "test-model"
+    provider.provider_name = "test"
+    return provider
+
+
+class TestHierarchicalStructureMatching:
+    """structure_matching() の段階的照合のテスト"""
+
+    @patch("app.routers.review.get_llm_provider")
+    def test_ut_spt_004_hierarchical(self, mock_get_provider):
+        """UT-SPT-004: 段階的照合（粗い照合 → 章ごとの細かい照合 → 統合）"""
+        mock_provider = _hierarchical_provider([
+            {"id": "MD2", "files": ["user.py"]},
+            {"id": "MD4", "files": ["report.py"]},
+        ])
+        mock_get_provider.return_value = mock_provider
+
+        response = client.post("/api/review/structure-matching", json={
+            "document": {"indexMd": DOC_INDEX, "mapJson": DOC_MAP},
+            "codeFiles": [_code_file("user.py", "UserService"), _code_file("report.py", "ReportWriter")],
+            "matchingMode": "hierarchical",
+        })
+
+        data = response.json()
+        assert data["success"] is True
+        assert data["llmCalls"] == 3
+        assert data["tokensUsed"] == {"input": 210, "output": 105}
+        assert [(g["groupId"], g["docSections"][0]["id"], g["codeSymbols"][0]["filename"]) for g in data["groups"]] == [
+            ("group1", "MD2", "user.py"),
+            ("group2", "MD4", "report.py"),
+        ]
+
+        # 粗い照合には章とトップレベルのシンボルのみ、細かい照合には章の範囲のみが渡される
+        coarse, *fine = [call.args[1] for call in mock_provider.send_message.call_args_list]
+        assert "[MD2] 登録" in coarse and "UserService.run" not in coarse
+        user_call = next(m for m in fine if "user.py" in m)
+        assert '"MD3"' in user_call and '"MD4"' not in user_call
+        assert "report.py" not in user_call
+
+    @patch("app.routers.review.get_llm_provider")
+    def test_ut_spt_005_no_files_for_chapter(self, mock_get_provider):
+        """UT-SPT-005: 関連ファイルのない章は細かい照合を行わない"""
+        mock_provider = _hierarchical_provider([{"id": "MD1", "files": []}])
+        mock_get_provider.return_value = mock_provider
+
+        response = client.post("/api/review/structure-matching", json={
+            "document": {"indexMd": DOC_INDEX, "mapJson": DOC_MAP},
+            "codeFiles": [_code_file("user.py", "UserService")],
+            "matchingMode": "hierarchical",
+        })
+
+        data = response.json()
+        assert data["success"] is True
+        assert data["totalGroups"] == 0
+        assert data["llmCalls"] == 1
+
+    @patch("app.routers.review.get_llm_provider")
+    def test_ut_spt_006_cancel_on_failure(self, mock_get_provider):
+        """UT-SPT-006: 1組の失敗で残りの組を打ち切る"""
+        mock_get_provider.return_value = MagicMock()
+        cancelled = []
+
+        async def send_message_async(provider, system_prompt, user_message):
+            if '"chapters"' in system_prompt:
+                return json.dumps({"chapters": [
+                    {"id": "MD2", "files": ["user.py"]},
+                    {"id": "MD4", "files": ["report.py"]},
+                ]}), 10, 5
+            if "user.py" in user_message:
+                raise RuntimeError("LLM error")
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                cancelled.append("report.py")
+                raise
+            return "{}", 0, 0
+
+        code_structures = [
+            (code["filename"], code["indexMd"], code["mapJson"])
+            for code in (_code_file("user.py", "UserService"), _code_file("report.py", "ReportWriter"))
+        ]
+
+        async def scenario():
+            with pytest.raises(RuntimeError):
+                await _hierarchical_structure_matching(
+                    None, None, "system", DOC_INDEX, DOC_MAP, code_structures
+                )
+            # キャンセルされたタスクが CancelledError を処理するまで進める
+            await asyncio.sleep(0)
+            # イベントループの終了時ではなく、失敗の時点で打ち切られている
+            assert cancelled == ["report.py"]
+
+        with patch("app.routers.review.send_message_async", side_effect=send_message_async):
+            asyncio.run(asyncio.wait_for(scenario(), timeout=5))
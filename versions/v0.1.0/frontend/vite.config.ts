@@ -1,15 +1,52 @@
 /// <reference types="vitest" />
-import { defineConfig, loadEnv } from 'vite'
+import { defineConfig, loadEnv, type Plugin } from 'vite'
 import react from '@vitejs/plugin-react'
 import tailwindcss from '@tailwindcss/vite'
+import fs from 'fs'
 import path from 'path'
+import zlib from 'zlib'
+
+// ビルド成果物の圧縮済みファイル（.br / .gz）を生成する
+// バックエンドの静的ファイル配信は Accept-Encoding に応じてこれらをそのまま返す
+const PRECOMPRESS_PATTERN = /\.(js|mjs|css|html|svg|json|txt)$/
+const PRECOMPRESS_MIN_BYTES = 1024
+
+function precompress(): Plugin {
+  let outDir = 'dist'
+  return {
+    name: 'precompress',
+    apply: 'build',
+    configResolved(config) {
+      outDir = path.resolve(config.root, config.build.outDir)
+    },
+    writeBundle(_options, bundle) {
+      for (const fileName of Object.keys(bundle)) {
+        if (!PRECOMPRESS_PATTERN.test(fileName)) continue
+        const filePath = path.join(outDir, fileName)
+        const content = fs.readFileSync(filePath)
+        if (content.length < PRECOMPRESS_MIN_BYTES) continue
+
+        const brotli = zlib.brotliCompressSync(content, {
+          params: {
+            [zlib.constants.BROTLI_PARAM_QUALITY]: zlib.constants.BROTLI_MAX_QUALITY,
+            [zlib.constants.BROTLI_PARAM_SIZE_HINT]: content.length,
+          },
+        })
+        const gzip = zlib.gzipSync(content, { level: zlib.constants.Z_BEST_COMPRESSION })
+        // 圧縮しても小さくならないファイルは元のファイルのみ配信する
+        if (brotli.length < content.length) fs.writeFileSync(`${filePath}.br`, brotli)
+        if (gzip.length < content.length) fs.writeFileSync(`${filePath}.gz`, gzip)
+      }
+    },
+  }
+}
 
 // https://vite.dev/config/
 export default defineConfig(({ mode }) => {
   const env = loadEnv(mode, process.cwd(), '')
 
   return {
-    plugins: [react(), tailwindcss()],
+    plugins: [react(), tailwindcss(), precompress()],
     optimizeDeps: {
       exclude: ['react-diff-viewer-continued'],
       include: ['classnames'],